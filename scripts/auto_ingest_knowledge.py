@@ -3,9 +3,9 @@ Automated Knowledge Base Ingestion Script
 Ingests all curated sources into the PCA Agent knowledge base
 """
 
+import argparse
 import os
 import sys
-import time
 import json
 import logging
 from datetime import datetime
@@ -14,6 +14,7 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.knowledge.async_ingestion import AsyncIngestionPipeline
 from src.knowledge.knowledge_ingestion import KnowledgeIngestion
 from src.knowledge.vector_store import VectorStoreBuilder
 
@@ -411,73 +412,26 @@ if PENDING_FILE.exists():
 ALL_SOURCES = SOURCES + PRIORITY_2_SOURCES + pending_sources
 
 
-def ingest_source(knowledge_engine, source_info, index, total):
-    """Ingest a single source with error handling"""
-    url = source_info["url"]
-    category = source_info["category"]
-    description = source_info["description"]
-    priority = source_info["priority"]
-    
-    logger.info(f"\n{'='*80}")
-    logger.info(f"[{index}/{total}] Ingesting: {description}")
-    logger.info(f"URL: {url}")
-    logger.info(f"Category: {category} | Priority: {priority}")
-    logger.info(f"{'='*80}")
-    
-    try:
-        result = knowledge_engine.ingest_from_url(url)
-        
-        if result['success']:
-            quality_score = result.get('quality_score', 0)
-            chunk_count = result.get('chunk_count', 0)
-            
-            logger.info("SUCCESS")
-            logger.info(f"   Quality Score: {quality_score}/100")
-            logger.info(f"   Chunks: {chunk_count}")
-            logger.info(f"   Title: {result.get('title', 'N/A')}")
-            
-            # Log warnings if any
-            validation = result.get('validation', {})
-            warnings = validation.get('warnings', [])
-            if warnings:
-                logger.warning(f"   Warnings: {len(warnings)}")
-                for warning in warnings:
-                    logger.warning(f"      - {warning}")
-            
-            result['category'] = category
-            result['priority'] = priority
-            result['description'] = description
-
-            return {
-                'status': 'success',
-                'url': url,
-                'category': category,
-                'quality_score': quality_score,
-                'chunk_count': chunk_count
-            }
-        else:
-            error = result.get('error', 'Unknown error')
-            logger.error(f"FAILED: {error}")
-            
-            return {
-                'status': 'failed',
-                'url': url,
-                'category': category,
-                'error': error
-            }
-            
-    except Exception as e:
-        logger.error(f"EXCEPTION: {str(e)}")
-        return {
-            'status': 'exception',
-            'url': url,
-            'category': category,
-            'error': str(e)
-        }
+def merge_knowledge_base(path, documents):
+    """Replace saved documents by URL with the newly ingested ones."""
+    saved = []
+    if path.exists():
+        try:
+            saved = json.loads(path.read_text(encoding='utf-8'))
+        except json.JSONDecodeError:
+            logger.error(f"Could not read {path}; rewriting it")
+    updated = {doc.get('url') for doc in documents}
+    return [doc for doc in saved if doc.get('url') not in updated] + documents
 
 
 def main():
     """Main ingestion function"""
+    parser = argparse.ArgumentParser(description="Ingest curated knowledge sources")
+    parser.add_argument('--concurrency', type=int, default=16, help="Sources processed at once")
+    parser.add_argument('--per-host', type=int, default=2, help="Concurrent requests per host")
+    parser.add_argument('--no-vector-store', action='store_true', help="Only fetch and chunk")
+    args = parser.parse_args()
+
     logger.info("="*80)
     logger.info("AUTOMATED KNOWLEDGE BASE INGESTION")
     logger.info("="*80)
@@ -492,43 +446,37 @@ def main():
         chunk_overlap=200,
         min_content_length=100
     )
+    builder = None if args.no_vector_store else VectorStoreBuilder()
+    pipeline = AsyncIngestionPipeline(
+        knowledge_engine,
+        builder,
+        max_concurrency=args.concurrency,
+        per_host_concurrency=args.per_host,
+    )
     logger.info("✅ Engine initialized")
     
-    # Track results
-    results = {
-        'success': [],
-        'failed': [],
-        'exception': []
-    }
-    
-    start_time = time.time()
-    
-    # Ingest each source
-    for index, source_info in enumerate(ALL_SOURCES, 1):
-        result = ingest_source(knowledge_engine, source_info, index, len(ALL_SOURCES))
+    # Fetch, chunk and index concurrently; unchanged sources are skipped
+    report = pipeline.run_sync(ALL_SOURCES)
+    results = {'ingested': [], 'unchanged': [], 'failed': []}
+    for result in report['results']:
         results[result['status']].append(result)
-        
-        # Small delay to avoid rate limiting
-        time.sleep(2)
-    
-    end_time = time.time()
-    duration = end_time - start_time
     
     # Print summary
     logger.info("\n" + "="*80)
     logger.info("INGESTION COMPLETE!")
     logger.info("="*80)
     logger.info(f"End Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info(f"Duration: {duration/60:.2f} minutes ({duration:.0f} seconds)")
+    logger.info(f"Duration: {report['duration_s']/60:.2f} minutes ({report['duration_s']:.0f} seconds)")
     logger.info(f"\nResults:")
-    logger.info(f"  Successful: {len(results['success'])}")
+    logger.info(f"  Ingested: {len(results['ingested'])}")
+    logger.info(f"  Unchanged: {len(results['unchanged'])}")
     logger.info(f"  Failed: {len(results['failed'])}")
-    logger.info(f"  Exceptions: {len(results['exception'])}")
-    logger.info(f"  📊 Success Rate: {len(results['success'])/len(ALL_SOURCES)*100:.1f}%")
+    logger.info(f"  Chunks: {report['chunks']}")
+    logger.info(f"  Stage time (ms): {report['stages_ms']}")
     
     # Quality statistics
-    if results['success']:
-        quality_scores = [r['quality_score'] for r in results['success']]
+    quality_scores = [r['quality_score'] for r in results['ingested'] if r.get('quality_score') is not None]
+    if quality_scores:
         avg_quality = sum(quality_scores) / len(quality_scores)
         logger.info(f"\nQuality Statistics:")
         logger.info(f"  Average Quality Score: {avg_quality:.1f}/100")
@@ -544,44 +492,24 @@ def main():
             logger.warning(f"  - {result['url']}")
             logger.warning(f"    Error: {result['error']}")
     
-    # Exception sources
-    if results['exception']:
-        logger.error(f"\nException Sources ({len(results['exception'])}):")
-        for result in results['exception']:
-            logger.error(f"  - {result['url']}")
-            logger.error(f"    Error: {result['error']}")
-    
     logger.info("\n" + "="*80)
     logger.info("Knowledge base ingestion complete!")
     logger.info("Check 'knowledge_ingestion.log' for detailed logs")
     logger.info("="*80)
-    
-    # Save knowledge base status
-    summary = knowledge_engine.get_knowledge_summary()
-    if summary:
-        logger.info("\nKnowledge Base Summary:")
-        for key, value in summary.items():
-            logger.info(f"  {key}: {value}")
 
-    # Persist knowledge base and rebuild vector store
+    # Persist the knowledge base (the vector store was updated by the pipeline)
     try:
         data_dir = Path('data')
         data_dir.mkdir(exist_ok=True)
         knowledge_path = data_dir / 'knowledge_base.json'
+        knowledge_base = merge_knowledge_base(knowledge_path, knowledge_engine.knowledge_base)
         knowledge_path.write_text(
-            json.dumps(knowledge_engine.knowledge_base, ensure_ascii=False, indent=2),
+            json.dumps(knowledge_base, ensure_ascii=False, indent=2),
             encoding='utf-8'
         )
-        logger.info(f"Knowledge base saved to {knowledge_path}")
-
-        if knowledge_engine.knowledge_base:
-            logger.info("Building vector store (FAISS)...")
-            VectorStoreBuilder().build_from_documents(knowledge_engine.knowledge_base)
-            logger.info("Vector store built successfully")
-        else:
-            logger.warning("No knowledge documents available to build vector store")
+        logger.info(f"Knowledge base saved to {knowledge_path} ({len(knowledge_base)} documents)")
     except Exception as exc:
-        logger.error(f"Failed to persist knowledge base or build vector store: {exc}")
+        logger.error(f"Failed to persist knowledge base: {exc}")
 
 
 if __name__ == "__main__":
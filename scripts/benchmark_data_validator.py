@@ -0,0 +1,195 @@
+"""
+Compare the vectorized DataValidator normalizers with the former row-wise ones.
+
+Loads the generated platform datasets (data/*_dataset.csv) as raw text, the
+way an upload arrives, renders spend and rate columns as "$1,234.56" and
+"12.5%", tiles the rows up to --rows and times each normalizer on both
+implementations. Parity is the share of values both implementations agree on.
+
+Usage:
+    python scripts/benchmark_data_validator.py                # 1M rows
+    python scripts/benchmark_data_validator.py --rows 200000
+"""
+import argparse
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.data_validator import DataValidator
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+# -- row-wise reference implementations (previous DataValidator code) ----------
+
+def rowwise_numeric(series: pd.Series) -> pd.Series:
+    def clean_numeric(val):
+        if pd.isna(val):
+            return np.nan
+        if isinstance(val, (int, float)):
+            return float(val)
+        val_str = str(val).strip().replace(',', '').replace(' ', '')
+        is_negative = val_str.startswith('-') or val_str.startswith('(')
+        val_str = val_str.replace('-', '').replace('(', '').replace(')', '')
+        try:
+            result = float(val_str)
+            return -result if is_negative else result
+        except ValueError:
+            return np.nan
+    return series.apply(clean_numeric)
+
+
+def rowwise_currency(series: pd.Series) -> pd.Series:
+    def clean_currency(val):
+        if pd.isna(val):
+            return np.nan
+        if isinstance(val, (int, float)):
+            return float(val)
+        val_str = str(val).strip()
+        val_str = re.sub(r'[\$£€¥₹]', '', val_str)
+        val_str = re.sub(r'USD|EUR|GBP|INR|JPY', '', val_str, flags=re.IGNORECASE)
+        val_str = val_str.replace(',', '').replace(' ', '')
+        is_negative = '(' in val_str or val_str.startswith('-')
+        val_str = val_str.replace('(', '').replace(')', '').replace('-', '')
+        try:
+            result = float(val_str)
+            return -result if is_negative else result
+        except ValueError:
+            return np.nan
+    return series.apply(clean_currency)
+
+
+def rowwise_percentage(series: pd.Series) -> pd.Series:
+    def clean_percentage(val):
+        if pd.isna(val):
+            return np.nan
+        if isinstance(val, (int, float)):
+            return float(val) if 0 <= val <= 1 else float(val) / 100
+        val_str = str(val).strip().replace('%', '').replace(' ', '')
+        try:
+            result = float(val_str)
+            return result / 100 if result > 1 else result
+        except ValueError:
+            return np.nan
+    return series.apply(clean_percentage)
+
+
+def rowwise_boolean(series: pd.Series) -> pd.Series:
+    true_vals = {'true', 'yes', '1', 't', 'y', 'on', 'enabled', 'active'}
+    false_vals = {'false', 'no', '0', 'f', 'n', 'off', 'disabled', 'inactive'}
+
+    def clean_boolean(val):
+        if pd.isna(val):
+            return np.nan
+        val_str = str(val).strip().lower()
+        if val_str in true_vals:
+            return True
+        if val_str in false_vals:
+            return False
+        return np.nan
+    return series.apply(clean_boolean)
+
+
+def rowwise_dates(series: pd.Series) -> pd.Series:
+    def parse_flexible(val):
+        if pd.isna(val):
+            return pd.NaT
+        val_str = str(val).strip()
+        for fmt in DataValidator.DATE_FORMATS:
+            try:
+                return datetime.strptime(val_str, fmt)
+            except ValueError:
+                continue
+        try:
+            return pd.to_datetime(val_str, dayfirst=True)
+        except (ValueError, TypeError):
+            return pd.NaT
+    return pd.to_datetime(series.apply(parse_flexible))
+
+
+# -- workload -----------------------------------------------------------------
+
+def _first(df: pd.DataFrame, *names: str) -> pd.Series:
+    """First of ``names`` present; the platform exports name their columns differently."""
+    return df[next(name for name in names if name in df.columns)]
+
+
+def load_uploads(rows: int) -> pd.DataFrame:
+    """Generated datasets stacked as text columns, tiled to ``rows``."""
+    frames = []
+    for path in sorted(DATA_DIR.glob("*_dataset.csv")):
+        df = pd.read_csv(path, dtype=str)
+        frames.append(pd.DataFrame({
+            "date": df["Date"],
+            "clicks": _first(df, "Clicks", "Swipes"),
+            "spend": _first(df, "Spend", "Cost", "Media_Cost", "Media_Cost_Adv_Currency"),
+            "ctr": _first(df, "CTR", "Swipe_Up_Rate"),
+        }))
+    if not frames:
+        raise FileNotFoundError(f"No *_dataset.csv files in {DATA_DIR}")
+
+    base = pd.concat(frames, ignore_index=True)
+    base = base.iloc[np.resize(np.arange(len(base)), rows)].reset_index(drop=True)
+
+    spend = pd.to_numeric(base["spend"])
+    base["spend"] = spend.map("${:,.2f}".format)
+    base["ctr"] = base["ctr"] + "%"
+    # Thousands separators, and the date column mixes ISO and day-first text
+    base["clicks"] = pd.to_numeric(base["clicks"]).map("{:,}".format)
+    dayfirst = np.arange(rows) % 3 == 0
+    base.loc[dayfirst, "date"] = pd.to_datetime(base.loc[dayfirst, "date"]).dt.strftime("%d/%m/%Y")
+    base["active"] = np.where(np.arange(rows) % 2 == 0, "Yes", "no")
+    return base
+
+
+def parity(left: pd.Series, right: pd.Series) -> float:
+    same = (left == right) | (left.isna() & right.isna())
+    if left.dtype.kind == "f" and right.dtype.kind == "f":
+        same |= np.isclose(left, right, equal_nan=True)
+    return float(same.mean())
+
+
+def timed(func, series):
+    start = time.perf_counter()
+    result = func(series)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = load_uploads(args.rows)
+    validator = DataValidator()
+    cases = [
+        ("numeric", "clicks", rowwise_numeric, validator._normalize_numeric),
+        ("currency", "spend", rowwise_currency, validator._normalize_currency),
+        ("percentage", "ctr", rowwise_percentage, validator._normalize_percentage),
+        ("boolean", "active", rowwise_boolean, validator._normalize_boolean),
+        ("dates", "date", rowwise_dates, validator._normalize_dates),
+    ]
+
+    logger.remove()  # normalizers log every call
+    print(f"{len(df):,} rows")
+    print(f"{'normalizer':<11} {'row-wise s':>11} {'vector s':>9} {'rows/s':>13} {'speedup':>8} {'parity':>7}")
+    for name, column, rowwise, vectorized in cases:
+        expected, rowwise_s = timed(rowwise, df[column])
+        actual, vector_s = timed(lambda s: vectorized(s, column), df[column])
+        print(
+            f"{name:<11} {rowwise_s:>11.3f} {vector_s:>9.3f} {len(df) / vector_s:>13,.0f} "
+            f"{rowwise_s / vector_s:>7.1f}x {parity(expected, actual):>7.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare FAISS index types for the knowledge vector store.
+
+Builds flat, HNSW and IVF-PQ indexes over the vectors of the current store
+(or a synthetic clustered corpus) and reports build time, query latency
+(p50/p95) and recall@k against exact search.
+
+Usage:
+    python scripts/benchmark_vector_index.py                 # current store
+    python scripts/benchmark_vector_index.py --synthetic 50000 --dim 384
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+from loguru import logger
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.knowledge.faiss_index import INDEX_TYPES, benchmark_index_types, read_index
+from src.knowledge.vector_store import VectorStoreConfig
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int = 64, seed: int = 7) -> np.ndarray:
+    """Clustered unit vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    vectors = centers[rng.integers(0, clusters, n)] + 0.3 * rng.standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def store_vectors(config: VectorStoreConfig) -> np.ndarray:
+    """Vectors of the persisted index (approximate for IVF-PQ)."""
+    index = read_index(config.index_path, mmap=False)
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=0, help="Benchmark N synthetic vectors instead of the store")
+    parser.add_argument("--dim", type=int, default=1536, help="Dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_corpus(args.synthetic, args.dim)
+    else:
+        config = VectorStoreConfig()
+        if not config.index_path.exists():
+            logger.error(f"No vector index at {config.index_path}; build it or pass --synthetic N")
+            sys.exit(1)
+        vectors = store_vectors(config)
+
+    # Held-out queries: perturbed corpus vectors, never exact duplicates
+    rng = np.random.default_rng(11)
+    queries = vectors[rng.choice(len(vectors), args.queries)] + 0.05 * rng.standard_normal(
+        (args.queries, vectors.shape[1])
+    ).astype("float32")
+    faiss.normalize_L2(queries)
+
+    logger.info(f"Benchmarking {len(vectors)} vectors (dim {vectors.shape[1]}), {args.queries} queries, k={args.k}")
+    print(f"{'index':<8} {'build s':>9} {'p50 ms':>9} {'p95 ms':>9} {'recall':>8}")
+    for row in benchmark_index_types(vectors, queries, k=args.k, index_types=args.types):
+        print(
+            f"{row['index_type']:<8} {row['build_s']:>9.3f} {row['p50_ms']:>9.3f} "
+            f"{row['p95_ms']:>9.3f} {row['recall']:>8.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Compact the partitioned campaign Parquet dataset.
+
+Appends write one small part file per touched partition; run this
+periodically (e.g. nightly) to merge them into a single file per
+month/platform partition. A legacy single-file data/campaigns.parquet is
+imported into an empty dataset first (the API also does this on startup).
+
+Usage:
+    python scripts/compact_campaigns.py
+"""
+import sys
+from pathlib import Path
+from loguru import logger
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.duckdb_manager import get_duckdb_manager
+
+
+def main():
+    db = get_duckdb_manager()
+    if not db.has_data() and not db.legacy_parquet.exists():
+        logger.info("No campaign data to compact")
+        return
+
+    stats = db.compact()
+    logger.info(
+        f"✅ Compaction complete: {stats['files_before']} -> {stats['files_after']} files "
+        f"({stats['partitions_compacted']} partitions merged)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Convert legacy JSONL audit logs into the partitioned Parquet audit store.
+
+Reads every ``audit_*.jsonl`` file in the audit directory, writes its events
+into the daily partitions and moves the file to ``archive/jsonl``. Safe to
+re-run: a file interrupted half-way is rewritten, not duplicated.
+
+Usage:
+    python scripts/migrate_audit_logs.py
+    python scripts/migrate_audit_logs.py --audit-dir ./data/enterprise/audit --keep-jsonl
+"""
+import argparse
+import sys
+from pathlib import Path
+from loguru import logger
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.enterprise.audit import AuditLogger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audit-dir", default="./data/enterprise/audit")
+    parser.add_argument("--keep-jsonl", action="store_true", help="Leave the JSONL files in place (a later run converts them again)")
+    args = parser.parse_args()
+
+    audit = AuditLogger(audit_dir=args.audit_dir, flush_interval=0)
+    stats = audit.migrate_jsonl(archive=not args.keep_jsonl)
+    compacted = audit.compact()
+    logger.info(
+        f"✅ Migrated {stats['events']} events from {stats['files']} files "
+        f"({stats['skipped_lines']} malformed lines skipped); "
+        f"{compacted['files_after']} partition files after compaction"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Import legacy JSONL query logs and user analytics files into the event store.
+
+Reads every ``queries_*.jsonl`` file in the query log directory and every
+``session_*.json`` / ``actions_*.jsonl`` file in the user analytics directory,
+appends their records to the ``query_log``, ``user_session`` and
+``user_action`` streams and moves each file to ``archive/`` next to it. Safe
+to re-run: records already in the store are skipped, not duplicated.
+
+Usage:
+    python scripts/migrate_event_logs.py
+    python scripts/migrate_event_logs.py --query-log-dir ./logs/queries --analytics-dir ./data/user_analytics --keep-files
+"""
+import argparse
+import sys
+from pathlib import Path
+from loguru import logger
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analytics.user_behavior import LEGACY_STORAGE_PATH, UserBehaviorAnalytics
+from src.database.event_store import get_event_store
+from src.query_engine.structured_query_logger import LEGACY_LOG_DIR, StructuredQueryLogger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--query-log-dir", default=str(LEGACY_LOG_DIR))
+    parser.add_argument("--analytics-dir", default=LEGACY_STORAGE_PATH)
+    parser.add_argument("--keep-files", action="store_true", help="Leave the files in place (a later run skips what is already imported)")
+    args = parser.parse_args()
+
+    store = get_event_store()
+    importers = {
+        "query logs": StructuredQueryLogger(event_store=store, legacy_dir=args.query_log_dir),
+        "user analytics": UserBehaviorAnalytics(event_store=store, legacy_dir=args.analytics_dir),
+    }
+
+    for name, importer in importers.items():
+        stats = importer.migrate_jsonl(archive=not args.keep_files)
+        logger.info(
+            f"✅ Imported {stats['events']} {name} events from {stats['files']} files "
+            f"({stats['skipped_lines']} malformed lines skipped)"
+        )
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -299,18 +299,24 @@ class PacingReportAgent:
             DataFrame with campaign data
         """
         db = get_duckdb_manager()
-        
-        # Build filters dict for DuckDBManager
-        db_filters = filters.copy() if filters else {}
-        
-        # Add date filters if provided
-        if start_date:
-            db_filters['start_date'] = start_date
-        if end_date:
-            db_filters['end_date'] = end_date
-        
-        # Fetch data using DuckDBManager's get_campaigns method
-        df = db.get_campaigns(filters=db_filters, limit=1000000)
+        schema = db.get_schema()
+        
+        # Map canonical filter keys (platform, channel, ...) to physical columns
+        # using the dataset's schema registry
+        db_filters = {}
+        for key, value in (filters or {}).items():
+            column = schema.resolve(key) if schema else None
+            db_filters[column or key] = value
+        
+        # Fetch data using DuckDBManager's get_campaigns method; the date range
+        # applies to the registry's date column
+        df = db.get_campaigns(
+            filters=db_filters,
+            limit=1000000,
+            date_column=schema.date_column if schema else None,
+            start_date=start_date,
+            end_date=end_date
+        )
         
         if df.empty:
             logger.warning("No campaign data found for specified criteria")
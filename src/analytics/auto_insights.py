@@ -267,7 +267,8 @@ class MediaAnalyticsExpert:
     
     def analyze_all(self, df: pd.DataFrame, 
                     progress_callback: Optional[callable] = None,
-                    use_parallel: bool = True) -> Dict[str, Any]:
+                    use_parallel: bool = True,
+                    column_types: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Run complete automated analysis on campaign data with parallel processing.
         
@@ -275,6 +276,8 @@ class MediaAnalyticsExpert:
             df: DataFrame with campaign data
             progress_callback: Optional callback for progress updates
             use_parallel: Whether to use parallel processing (default True)
+            column_types: Column profiles already computed for ``df`` (see
+                data_normalizer.get_column_types), handed to the data processor
             
         Returns:
             Dictionary with all insights and recommendations
@@ -287,7 +290,7 @@ class MediaAnalyticsExpert:
         
         # Stage 1: Data Validation & Processing
         streamer.update('validation', 'started', 'Validating and processing data...')
-        df = self.processor.load_data(df, auto_detect=True)
+        df = self.processor.load_data(df, auto_detect=True, column_types=column_types)
         data_summary = self.processor.get_data_summary()
         overall_kpis = self.processor.calculate_overall_kpis()
         streamer.update('validation', 'completed', 
@@ -2429,7 +2432,7 @@ Platform Performance (Multi-KPI View):
                 
                 config = VectorStoreConfig()
                 
-                if config.index_path.exists() and config.metadata_path.exists():
+                if config.index_path.exists() and config.metadata_exists():
                     # Initialize retrievers from existing vector store
                     vector_retriever = VectorRetriever(config=config)
                     hybrid_retriever = HybridRetriever(
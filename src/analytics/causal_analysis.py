@@ -38,6 +38,14 @@ from scipy import stats
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LinearRegression
 
+from src.analytics.shapley import (
+    DEFAULT_PERMUTATIONS,
+    EXACT_MAX_PLAYERS,
+    factor_value_function,
+    group_value_function,
+    shapley_values,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -67,6 +75,83 @@ class ComponentContribution:
         return f"{self.component}: {sign}${self.absolute_change:.2f} ({self.percentage_contribution:.1f}%)"
 
 
+@dataclass(frozen=True)
+class KPIFactor:
+    """One factor of a multiplicative KPI identity (ratio of summed columns)."""
+    component: str
+    numerator: str
+    denominator: Optional[str]
+    exponent: int
+    display_scale: float  # e.g. 100 to report rates as percentages
+    actionability: str
+
+
+# Metrics as (numerator, denominator, scale) over summed columns, as computed by
+# CausalAnalysisEngine._calculate_metric; a None denominator is a plain sum
+METRIC_RATIOS: Dict[str, Tuple[str, Optional[str], float]] = {
+    'ROAS': ('Revenue', 'Spend', 1.0),
+    'CPA': ('Spend', 'Conversions', 1.0),
+    'CTR': ('Clicks', 'Impressions', 100.0),
+    'CVR': ('Conversions', 'Clicks', 100.0),
+    'CPC': ('Spend', 'Clicks', 1.0),
+    'CPM': ('Spend', 'Impressions', 1000.0),
+    'Revenue': ('Revenue', None, 1.0),
+    'Spend': ('Spend', None, 1.0),
+}
+
+# Metric = constant x product(factor ** exponent), the identities the Shapley
+# decomposition splits (e.g. ROAS = CTR x CVR x AOV / CPM, impressions cancel)
+FACTOR_IDENTITIES: Dict[str, Tuple[float, List[KPIFactor]]] = {
+    'ROAS': (1.0, [
+        KPIFactor("Click-Through Rate (CTR)", 'Clicks', 'Impressions', 1, 100.0, "medium"),
+        KPIFactor("Conversion Rate (CVR)", 'Conversions', 'Clicks', 1, 100.0, "high"),
+        KPIFactor("Average Order Value (AOV)", 'Revenue', 'Conversions', 1, 1.0, "medium"),
+        KPIFactor("Cost Per Mille (CPM)", 'Spend', 'Impressions', -1, 1000.0, "high"),
+    ]),
+    'CPA': (1.0, [
+        KPIFactor("Cost Per Mille (CPM)", 'Spend', 'Impressions', 1, 1000.0, "high"),
+        KPIFactor("Click-Through Rate (CTR)", 'Clicks', 'Impressions', -1, 100.0, "medium"),
+        KPIFactor("Conversion Rate (CVR)", 'Conversions', 'Clicks', -1, 100.0, "high"),
+    ]),
+    'CTR': (100.0, [
+        KPIFactor("Click Volume", 'Clicks', None, 1, 1.0, "medium"),
+        KPIFactor("Impression Volume", 'Impressions', None, -1, 1.0, "low"),
+    ]),
+    'CVR': (100.0, [
+        KPIFactor("Conversion Volume", 'Conversions', None, 1, 1.0, "high"),
+        KPIFactor("Click Volume", 'Clicks', None, -1, 1.0, "medium"),
+    ]),
+    'CPC': (1.0, [
+        KPIFactor("Spend Change", 'Spend', None, 1, 1.0, "high"),
+        KPIFactor("Click Volume", 'Clicks', None, -1, 1.0, "medium"),
+    ]),
+    'CPM': (1000.0, [
+        KPIFactor("Spend Change", 'Spend', None, 1, 1.0, "high"),
+        KPIFactor("Impression Volume", 'Impressions', None, -1, 1.0, "low"),
+    ]),
+    'Revenue': (1.0, [
+        KPIFactor("Conversion Volume", 'Conversions', None, 1, 1.0, "high"),
+        KPIFactor("Average Order Value", 'Revenue', 'Conversions', 1, 1.0, "medium"),
+    ]),
+}
+
+# Metrics where a decrease is an improvement
+LOWER_IS_BETTER = {'CPA', 'CPC', 'CPM'}
+
+# Denominator marker for metrics that are a column mean (sum / non-null count)
+_COUNT = '__count__'
+
+
+def _ratio_metric(totals: np.ndarray, scale: float, has_denominator: bool) -> np.ndarray:
+    """Metric from (m x 2) [numerator, denominator] totals, 0 where the denominator is not positive."""
+    numerator = totals[:, 0]
+    if not has_denominator:
+        return scale * numerator
+    denominator = totals[:, 1]
+    positive = denominator > 0
+    return np.where(positive, scale * numerator / np.where(positive, denominator, 1.0), 0.0)
+
+
 @dataclass
 class CausalAnalysisResult:
     """Complete causal analysis result."""
@@ -110,9 +195,16 @@ class CausalAnalysisEngine:
     3. ML-based causal impact
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        shapley_max_exact: int = EXACT_MAX_PLAYERS,
+        shapley_permutations: int = DEFAULT_PERMUTATIONS
+    ):
         self.scaler = StandardScaler()
         self.decomposition_cache = {}
+        # Shapley values are exact up to this many players, sampled beyond
+        self.shapley_max_exact = shapley_max_exact
+        self.shapley_permutations = shapley_permutations
         
     def analyze(
         self,
@@ -846,10 +938,72 @@ class CausalAnalysisEngine:
         """
         Shapley value-based decomposition (cooperative game theory).
         Fairly distributes the total change among components.
+        
+        The metric is written as a product of KPI factors (FACTOR_IDENTITIES)
+        and evaluated for every subset of factors at their after values, so
+        contributions add up exactly to the change of the metric computed
+        from period totals. Metrics without an identity, or periods where a
+        factor is zero, use the formula-based decomposition.
         """
-        # This is a simplified version - full Shapley requires all subset combinations
-        # For now, fall back to standard decomposition
-        return self._decompose_metric(before_df, after_df, metric, DecompositionMethod.HYBRID)
+        identity = FACTOR_IDENTITIES.get(metric)
+        if identity is None:
+            return self._decompose_metric(before_df, after_df, metric, DecompositionMethod.HYBRID)
+        
+        constant, factors = identity
+        columns = sorted({c for f in factors for c in (f.numerator, f.denominator) if c})
+        before = self._factor_values(factors, self._column_totals(before_df, columns))
+        after = self._factor_values(factors, self._column_totals(after_df, columns))
+        
+        if not (np.all(before > 0) and np.all(after > 0)):
+            logger.debug(f"Shapley identity for {metric} undefined (zero factor), using formula decomposition")
+            return self._decompose_metric(before_df, after_df, metric, DecompositionMethod.HYBRID)
+        
+        exponents = np.array([f.exponent for f in factors], dtype=float)
+        value_fn = factor_value_function(
+            before, after, lambda values: constant * np.prod(values ** exponents, axis=1)
+        )
+        phi = shapley_values(value_fn, len(factors), self.shapley_max_exact, self.shapley_permutations)
+        
+        lower_is_better = metric in LOWER_IS_BETTER
+        contributions = []
+        for factor, before_val, after_val, value in zip(factors, before, after, phi):
+            improves = value < 0 if lower_is_better else value > 0
+            contributions.append(ComponentContribution(
+                component=factor.component,
+                absolute_change=float(value),
+                percentage_contribution=0,
+                before_value=float(before_val * factor.display_scale),
+                after_value=float(after_val * factor.display_scale),
+                delta=float((after_val - before_val) * factor.display_scale),
+                delta_pct=float((after_val - before_val) / before_val * 100),
+                impact_direction="neutral" if value == 0 else "positive" if improves else "negative",
+                actionability=factor.actionability
+            ))
+        
+        total_abs = sum(abs(c.absolute_change) for c in contributions)
+        if total_abs > 0:
+            for c in contributions:
+                c.percentage_contribution = (abs(c.absolute_change) / total_abs) * 100
+        
+        return contributions
+    
+    @staticmethod
+    def _column_totals(df: pd.DataFrame, columns: List[str]) -> Dict[str, float]:
+        """Sums of ``columns`` (0 for missing ones)."""
+        return {col: float(df[col].sum()) if col in df.columns else 0.0 for col in columns}
+    
+    @staticmethod
+    def _factor_values(factors: List[KPIFactor], totals: Dict[str, float]) -> np.ndarray:
+        """Raw factor values (NaN where a denominator is zero)."""
+        values = []
+        for factor in factors:
+            numerator = totals[factor.numerator]
+            if factor.denominator is None:
+                values.append(numerator)
+            else:
+                denominator = totals[factor.denominator]
+                values.append(numerator / denominator if denominator else np.nan)
+        return np.array(values, dtype=float)
     
     def _calculate_channel_attribution(
         self,
@@ -858,26 +1012,7 @@ class CausalAnalysisEngine:
         metric: str
     ) -> Dict[str, float]:
         """Calculate channel-level attribution to metric change."""
-        
-        attribution = {}
-        
-        if 'Channel' not in before_df.columns or 'Channel' not in after_df.columns:
-            return attribution
-        
-        channels = set(before_df['Channel'].unique()) | set(after_df['Channel'].unique())
-        
-        for channel in channels:
-            before_val = self._calculate_metric(
-                before_df[before_df['Channel'] == channel], metric
-            )
-            after_val = self._calculate_metric(
-                after_df[after_df['Channel'] == channel], metric
-            )
-            
-            contribution = after_val - before_val
-            attribution[channel] = contribution
-        
-        return attribution
+        return self._calculate_group_attribution(before_df, after_df, metric, 'Channel')
     
     def _calculate_platform_attribution(
         self,
@@ -886,27 +1021,73 @@ class CausalAnalysisEngine:
         metric: str
     ) -> Dict[str, float]:
         """Calculate platform-level attribution to metric change."""
+        return self._calculate_group_attribution(before_df, after_df, metric, 'Platform')
+    
+    def _calculate_group_attribution(
+        self,
+        before_df: pd.DataFrame,
+        after_df: pd.DataFrame,
+        metric: str,
+        column: str
+    ) -> Dict[str, float]:
+        """
+        Shapley attribution of the metric change to the groups of ``column``.
         
+        Each period is aggregated in one groupby; a group's attribution is its
+        Shapley value when groups switch from their before to their after
+        totals, so attributions add up to the overall change of the metric
+        (mix shifts between groups included).
+        """
         attribution = {}
         
-        if 'Platform' not in before_df.columns or 'Platform' not in after_df.columns:
+        if column not in before_df.columns or column not in after_df.columns:
             return attribution
         
-        platforms = set(before_df['Platform'].unique()) | set(after_df['Platform'].unique())
+        ratio = self._metric_ratio(before_df, metric)
+        before = self._group_totals(before_df, column, ratio)
+        after = self._group_totals(after_df, column, ratio)
+        groups = before.index.union(after.index)
         
-        for platform in platforms:
-            before_val = self._calculate_metric(
-                before_df[before_df['Platform'] == platform], metric
-            )
-            after_val = self._calculate_metric(
-                after_df[after_df['Platform'] == platform], metric
-            )
-            
-            contribution = after_val - before_val
-            attribution[platform] = contribution
+        if ratio is None:
+            return {group: 0.0 for group in groups}
+        
+        _, denominator, scale = ratio
+        value_fn = group_value_function(
+            before.reindex(groups, fill_value=0).to_numpy(dtype=float),
+            after.reindex(groups, fill_value=0).to_numpy(dtype=float),
+            lambda totals: _ratio_metric(totals, scale, denominator is not None)
+        )
+        phi = shapley_values(value_fn, len(groups), self.shapley_max_exact, self.shapley_permutations)
+        
+        for group, value in zip(groups, phi):
+            attribution[group] = float(value)
         
         return attribution
     
+    @staticmethod
+    def _metric_ratio(df: pd.DataFrame, metric: str) -> Optional[Tuple[str, Optional[str], float]]:
+        """(numerator, denominator, scale) of ``metric``, a column mean if the data has it."""
+        if metric in df.columns:
+            return (metric, _COUNT, 1.0)
+        return METRIC_RATIOS.get(metric)
+    
+    @staticmethod
+    def _group_totals(
+        df: pd.DataFrame,
+        column: str,
+        ratio: Optional[Tuple[str, Optional[str], float]]
+    ) -> pd.DataFrame:
+        """Per-group [numerator, denominator] sums in a single groupby."""
+        numerator, denominator, _ = ratio or (None, None, 1.0)
+        
+        def values(name: Optional[str]) -> Any:
+            if name == _COUNT:
+                return df[numerator].notna().astype(float)
+            return df[name] if name in df.columns else 0.0
+        
+        parts = pd.DataFrame({'numerator': values(numerator), 'denominator': values(denominator)}, index=df.index)
+        return parts.groupby(df[column], sort=False).sum()
+    
     def _ml_causal_impact(
         self,
         df: pd.DataFrame,
@@ -1,16 +1,30 @@
 """
 User Behavior Analytics
 Track and analyze user interactions, sessions, and patterns
+
+Actions and ended sessions are appended to the shared event store
+(``src.database.event_store``, streams ``user_action`` and ``user_session``).
+Per-user and per-feature statistics come from its daily key rollups; funnels,
+cohorts and journeys are single DuckDB queries over the raw events.
+Session and action files written by earlier versions are imported with
+``migrate_jsonl()`` (``scripts/migrate_event_logs.py``).
 """
 
+import json
+import shutil
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
-import json
 from pathlib import Path
-from collections import defaultdict
 from loguru import logger
 
+from src.database.event_store import DIMENSION_KEY, DIMENSION_USER, EventStore, get_event_store
+
+# Session and action files of earlier versions
+LEGACY_STORAGE_PATH = "./data/user_analytics"
+LEGACY_SESSION_PATTERN = "session_*.json"
+LEGACY_ACTION_PATTERN = "actions_*.jsonl"
+
 @dataclass
 class UserSession:
     """User session data."""
@@ -39,15 +53,49 @@ class UserAction:
 class UserBehaviorAnalytics:
     """Track and analyze user behavior."""
     
-    def __init__(self, storage_path: str = "./data/user_analytics"):
-        """Initialize user behavior analytics."""
-        self.storage_path = Path(storage_path)
-        self.storage_path.mkdir(parents=True, exist_ok=True)
+    ACTION_STREAM = "user_action"
+    SESSION_STREAM = "user_session"
+    
+    COHORT_FORMATS = {
+        "day": "%Y-%m-%d",
+        "week": "%Y-W%W",
+        "month": "%Y-%m"
+    }
+    
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        event_store: Optional[EventStore] = None,
+        legacy_dir: Optional[str] = None
+    ):
+        """
+        Initialize user behavior analytics.
+        
+        Args:
+            storage_path: Directory for a private event store
+                (default: the shared event store)
+            event_store: Event store to use (overrides ``storage_path``)
+            legacy_dir: Directory of session/action files from earlier versions
+                (default: ``storage_path`` or ``./data/user_analytics``)
+        """
+        self.storage_path = Path(storage_path) if storage_path else None
+        if event_store is None and self.storage_path is not None:
+            self.storage_path.mkdir(parents=True, exist_ok=True)
+            event_store = get_event_store(str(self.storage_path / "events.duckdb"))
+        self.event_store = event_store or get_event_store()
+        self.legacy_dir = Path(legacy_dir or self.storage_path or LEGACY_STORAGE_PATH)
         
         # In-memory caches
         self.active_sessions: Dict[str, UserSession] = {}
         self.user_actions: List[UserAction] = []
         
+        legacy_files = self._legacy_files()
+        if legacy_files:
+            logger.warning(
+                f"{len(legacy_files)} legacy session/action file(s) in {self.legacy_dir} are not queried; "
+                f"run scripts/migrate_event_logs.py to import them"
+            )
+        
         logger.info("✅ User Behavior Analytics initialized")
     
     def start_session(
@@ -151,10 +199,10 @@ class UserBehaviorAnalytics:
     
     def get_user_stats(self, user_id: str) -> Dict[str, Any]:
         """Get statistics for a user."""
-        # Load user sessions
-        sessions = self._load_user_sessions(user_id)
+        sessions = self.event_store.key_counts(self.SESSION_STREAM, DIMENSION_USER, name=user_id)
+        total_sessions = int(sessions["events"].sum())
         
-        if not sessions:
+        if not total_sessions:
             return {
                 "user_id": user_id,
                 "total_sessions": 0,
@@ -163,23 +211,17 @@ class UserBehaviorAnalytics:
                 "most_used_features": []
             }
         
-        # Calculate stats
-        total_sessions = len(sessions)
-        total_duration = sum(s.duration_seconds for s in sessions)
-        avg_duration = total_duration / total_sessions if total_sessions > 0 else 0
+        # Session durations are the event values
+        avg_duration = float(sessions["value_sum"].sum()) / total_sessions
         
         # Count actions by type
-        action_counts = defaultdict(int)
-        for session in sessions:
-            for action in session.actions:
-                action_counts[action["action_type"]] += 1
-        
-        # Most used features
-        most_used = sorted(
-            action_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
+        actions = self.event_store.key_counts(
+            self.ACTION_STREAM, DIMENSION_USER, name=user_id, by_status=True
+        )
+        action_counts = {row.status: int(row.events) for row in actions.itertuples()}
+        
+        # Most used features (key_counts is ordered by count)
+        most_used = list(action_counts.items())[:5]
         
         return {
             "user_id": user_id,
@@ -190,7 +232,7 @@ class UserBehaviorAnalytics:
                 {"feature": feature, "count": count}
                 for feature, count in most_used
             ],
-            "action_breakdown": dict(action_counts)
+            "action_breakdown": action_counts
         }
     
     def get_feature_usage(
@@ -198,29 +240,30 @@ class UserBehaviorAnalytics:
         from_date: Optional[datetime] = None,
         to_date: Optional[datetime] = None
     ) -> Dict[str, int]:
-        """Get feature usage statistics."""
+        """Get feature usage statistics (whole days from ``from_date`` to ``to_date``)."""
         if from_date is None:
             from_date = datetime.utcnow() - timedelta(days=30)
         if to_date is None:
             to_date = datetime.utcnow()
         
-        # Load actions in date range
-        actions = self._load_actions_in_range(from_date, to_date)
-        
         # Count by resource
-        usage = defaultdict(int)
-        for action in actions:
-            usage[action.resource] += 1
-        
-        return dict(sorted(usage.items(), key=lambda x: x[1], reverse=True))
+        usage = self.event_store.key_counts(
+            self.ACTION_STREAM, DIMENSION_KEY,
+            start_day=from_date.date(),
+            end_day=to_date.date() + timedelta(days=1)
+        )
+        return {row.name: int(row.events) for row in usage.itertuples()}
     
     def get_user_journey(self, session_id: str) -> List[Dict[str, Any]]:
-        """Get user journey for a session."""
-        session = self._load_session(session_id)
+        """Get user journey for an ended session."""
+        sessions = self.event_store.events(self.SESSION_STREAM, session_id=session_id, limit=1)
         
-        if not session:
+        if not sessions:
             return []
         
+        start_time = datetime.fromisoformat(sessions[0]["start_time"])
+        actions = self.event_store.events(self.ACTION_STREAM, start=start_time, session_id=session_id)
+        
         return [
             {
                 "timestamp": action["timestamp"],
@@ -228,28 +271,47 @@ class UserBehaviorAnalytics:
                 "resource": action["resource"],
                 "details": action.get("details", {})
             }
-            for action in session.actions
+            for action in actions
         ]
     
     def get_conversion_funnel(
         self,
         funnel_steps: List[str]
     ) -> Dict[str, Any]:
-        """Analyze conversion funnel."""
-        # Load recent sessions
-        sessions = self._load_recent_sessions(days=30)
-        
-        funnel_data = {step: 0 for step in funnel_steps}
-        total_users = len(set(s.user_id for s in sessions))
-        
-        for session in sessions:
-            actions = [a["resource"] for a in session.actions]
-            
-            for i, step in enumerate(funnel_steps):
-                if step in actions:
-                    funnel_data[step] += 1
-                else:
-                    break  # User dropped off
+        """
+        Analyze conversion funnel.
+        
+        Counts sessions of the last 30 days that reached each step, a step
+        counting only when every earlier step was also visited.
+        """
+        cutoff = datetime.utcnow() - timedelta(days=30)
+        
+        # Per session: visited each step? Then sessions that reached steps 0..i
+        step_flags = ", ".join(f"bool_or(a.key = ?) AS s{i}" for i in range(len(funnel_steps)))
+        reached = ", ".join(
+            f"count(*) FILTER (WHERE {' AND '.join(f's{j}' for j in range(i + 1))})"
+            for i in range(len(funnel_steps))
+        )
+        sql = f"""
+            WITH sessions AS (
+                SELECT session_id, user_id, ts FROM events WHERE stream = ? AND ts >= ?
+            ),
+            steps AS (
+                SELECT s.session_id {', ' + step_flags if funnel_steps else ''}
+                FROM sessions s
+                LEFT JOIN events a
+                  ON a.stream = ? AND a.session_id = s.session_id AND a.ts >= s.ts
+                GROUP BY s.session_id
+            )
+            SELECT (SELECT count(DISTINCT user_id) FROM sessions) AS total_users,
+                   count(*) AS sessions {', ' + reached if funnel_steps else ''}
+            FROM steps
+        """
+        params = [self.SESSION_STREAM, cutoff, *funnel_steps, self.ACTION_STREAM]
+        row = self.event_store.query(sql, params).iloc[0].tolist()
+        
+        total_users = int(row[0] or 0)
+        funnel_data = {step: int(count or 0) for step, count in zip(funnel_steps, row[2:])}
         
         # Calculate conversion rates
         funnel_with_rates = []
@@ -278,25 +340,28 @@ class UserBehaviorAnalytics:
         cohort_by: str = "week"  # day, week, month
     ) -> Dict[str, Any]:
         """Perform cohort analysis."""
-        sessions = self._load_recent_sessions(days=90)
-        
-        # Group users by cohort
-        cohorts = defaultdict(set)
-        
-        for session in sessions:
-            cohort_key = self._get_cohort_key(session.start_time, cohort_by)
-            cohorts[cohort_key].add(session.user_id)
+        cutoff = datetime.utcnow() - timedelta(days=90)
+        
+        # Group users by cohort of their session start
+        cohorts = self.event_store.query(
+            """
+            SELECT strftime(ts, ?) AS cohort, list(DISTINCT user_id) AS users
+            FROM events WHERE stream = ? AND ts >= ?
+            GROUP BY cohort ORDER BY cohort
+            """,
+            [self.COHORT_FORMATS.get(cohort_by, self.COHORT_FORMATS["day"]), self.SESSION_STREAM, cutoff]
+        )
         
         # Calculate retention
         cohort_data = []
         
-        for cohort_key in sorted(cohorts.keys()):
-            cohort_users = cohorts[cohort_key]
+        for row in cohorts.itertuples():
+            cohort_users = set(row.users)
             
             cohort_data.append({
-                "cohort": cohort_key,
+                "cohort": row.cohort,
                 "size": len(cohort_users),
-                "retention": self._calculate_retention(cohort_users, cohort_key)
+                "retention": self._calculate_retention(cohort_users, row.cohort)
             })
         
         return {
@@ -306,13 +371,7 @@ class UserBehaviorAnalytics:
     
     def _get_cohort_key(self, date: datetime, cohort_by: str) -> str:
         """Get cohort key for a date."""
-        if cohort_by == "day":
-            return date.strftime("%Y-%m-%d")
-        elif cohort_by == "week":
-            return date.strftime("%Y-W%W")
-        elif cohort_by == "month":
-            return date.strftime("%Y-%m")
-        return date.strftime("%Y-%m-%d")
+        return date.strftime(self.COHORT_FORMATS.get(cohort_by, self.COHORT_FORMATS["day"]))
     
     def _calculate_retention(
         self,
@@ -325,79 +384,93 @@ class UserBehaviorAnalytics:
         return [100.0, 80.0, 60.0, 40.0]  # Placeholder
     
     def _save_session(self, session: UserSession):
-        """Save session to disk."""
-        file_path = self.storage_path / f"session_{session.session_id}.json"
-        with open(file_path, 'w') as f:
-            json.dump(asdict(session), f, default=str)
+        """Append the ended session to the event store (its actions are stored as action events)."""
+        self.event_store.append(self.SESSION_STREAM, **self._session_event(asdict(session)))
     
     def _save_action(self, action: UserAction):
-        """Save action to disk."""
-        date_str = action.timestamp.strftime("%Y-%m-%d")
-        file_path = self.storage_path / f"actions_{date_str}.jsonl"
-        
-        with open(file_path, 'a') as f:
-            f.write(json.dumps(asdict(action), default=str) + "\n")
+        """Append the action to the event store."""
+        self.event_store.append(self.ACTION_STREAM, **self._action_event(asdict(action)))
     
-    def _load_session(self, session_id: str) -> Optional[UserSession]:
-        """Load session from disk."""
-        file_path = self.storage_path / f"session_{session_id}.json"
-        
-        if not file_path.exists():
-            return None
-        
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-            return UserSession(**data)
+    @staticmethod
+    def _as_datetime(value: Any) -> datetime:
+        return value if isinstance(value, datetime) else datetime.fromisoformat(value)
     
-    def _load_user_sessions(self, user_id: str) -> List[UserSession]:
-        """Load all sessions for a user."""
-        sessions = []
-        
-        for file_path in self.storage_path.glob("session_*.json"):
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                if data["user_id"] == user_id:
-                    sessions.append(UserSession(**data))
-        
-        return sessions
+    def _session_event(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Event store fields of a session record (without its actions)."""
+        record = {k: v for k, v in record.items() if k != "actions"}
+        return {
+            "timestamp": self._as_datetime(record["start_time"]),
+            "event_id": record["session_id"],
+            "user_id": record["user_id"],
+            "session_id": record["session_id"],
+            "status": record.get("device"),
+            "key": record.get("browser"),
+            "value": float(record.get("duration_seconds") or 0),
+            "amount": float(record.get("page_views") or 0),
+            "payload": record
+        }
     
-    def _load_recent_sessions(self, days: int = 30) -> List[UserSession]:
-        """Load recent sessions."""
-        cutoff = datetime.utcnow() - timedelta(days=days)
-        sessions = []
-        
-        for file_path in self.storage_path.glob("session_*.json"):
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                start_time = datetime.fromisoformat(data["start_time"])
-                
-                if start_time >= cutoff:
-                    sessions.append(UserSession(**data))
-        
-        return sessions
+    def _action_event(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Event store fields of an action record."""
+        return {
+            "timestamp": self._as_datetime(record["timestamp"]),
+            "event_id": record["action_id"],
+            "user_id": record["user_id"],
+            "session_id": record.get("session_id"),
+            "status": record["action_type"],
+            "key": record["resource"],
+            "payload": record
+        }
     
-    def _load_actions_in_range(
-        self,
-        from_date: datetime,
-        to_date: datetime
-    ) -> List[UserAction]:
-        """Load actions in date range."""
-        actions = []
-        current_date = from_date
-        
-        while current_date <= to_date:
-            date_str = current_date.strftime("%Y-%m-%d")
-            file_path = self.storage_path / f"actions_{date_str}.jsonl"
+    def _legacy_files(self) -> List[Path]:
+        return sorted(self.legacy_dir.glob(LEGACY_SESSION_PATTERN)) + sorted(self.legacy_dir.glob(LEGACY_ACTION_PATTERN))
+    
+    def migrate_jsonl(self, archive: bool = True) -> Dict[str, int]:
+        """
+        Import legacy ``session_*.json`` and ``actions_*.jsonl`` files into the event store.
+        
+        Sessions and actions already in the store are skipped, so re-running
+        after an interruption does not duplicate them. The action list kept in
+        a session file is not imported again: every action was also written
+        to the daily action file.
+        
+        Args:
+            archive: Move imported files to ``archive/`` (else keep them)
+            
+        Returns:
+            Stats with files and events imported and lines skipped
+        """
+        stats = {"files": 0, "events": 0, "skipped_lines": 0}
+        archive_dir = self.legacy_dir / "archive"
+        
+        for legacy_file in self._legacy_files():
+            if legacy_file.suffix == ".json":
+                stream, lines = self.SESSION_STREAM, [legacy_file.read_text()]
+                to_event = self._session_event
+            else:
+                stream, lines = self.ACTION_STREAM, legacy_file.read_text().splitlines()
+                to_event = self._action_event
+            
+            events = []
+            for line_number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    events.append(to_event(json.loads(line)))
+                except (ValueError, KeyError, TypeError) as e:
+                    stats["skipped_lines"] += 1
+                    logger.warning(f"Skipping {legacy_file.name}:{line_number}: {e}")
             
-            if file_path.exists():
-                with open(file_path, 'r') as f:
-                    for line in f:
-                        data = json.loads(line)
-                        actions.append(UserAction(**data))
+            added = self.event_store.import_events(stream, events)
+            if archive:
+                archive_dir.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(legacy_file), str(archive_dir / legacy_file.name))
             
-            current_date += timedelta(days=1)
+            stats["files"] += 1
+            stats["events"] += added
+            logger.info(f"Imported {added} {stream} events from {legacy_file.name}")
         
-        return actions
+        return stats
 
 
 # Global instance
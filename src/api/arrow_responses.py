@@ -0,0 +1,109 @@
+"""
+Arrow-native response helpers.
+
+Endpoints that return large tabular payloads fetch DuckDB results as Arrow
+tables and serialize them here, skipping the pandas -> ``to_dict`` ->
+numpy-type conversion walk. Three formats are supported:
+
+- ``json``: list of row objects (the default, same shape as before)
+- ``columnar``: ``{column: [values...]}``, smaller and faster to build
+- ``arrow``: Arrow IPC stream (``application/vnd.apache.arrow.stream``)
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+RESPONSE_FORMATS = ('json', 'columnar', 'arrow')
+
+
+def validate_format(format: str) -> str:
+    """Normalize a ``format`` query parameter, rejecting unknown formats with 400."""
+    normalized = (format or 'json').lower()
+    if normalized not in RESPONSE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format '{format}'. Allowed: {', '.join(RESPONSE_FORMATS)}"
+        )
+    return normalized
+
+
+def json_safe(table: pa.Table) -> pa.Table:
+    """
+    Make a table JSON-serializable column by column:
+    decimals (e.g. DuckDB HUGEINT sums) become floats, NaN/inf floats become null
+    and temporal columns become strings.
+    """
+    columns = []
+    for column in table.columns:
+        if pa.types.is_decimal(column.type):
+            column = pc.cast(column, pa.float64())
+        if pa.types.is_floating(column.type):
+            column = pc.if_else(pc.is_finite(column), column, pa.scalar(None, column.type))
+        elif pa.types.is_temporal(column.type):
+            column = pc.cast(column, pa.string())
+        columns.append(column)
+    return pa.table(columns, names=table.column_names)
+
+
+def table_to_records(table: pa.Table) -> List[Dict[str, Any]]:
+    """Rows as plain Python dicts (no numpy scalars)."""
+    return json_safe(table).to_pylist()
+
+
+def table_to_columns(table: pa.Table) -> Dict[str, List[Any]]:
+    """Columns as plain Python lists."""
+    return json_safe(table).to_pydict()
+
+
+def table_to_ipc(table: pa.Table) -> bytes:
+    """Serialize a table as an Arrow IPC stream."""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse for payloads already made of plain Python values.
+    Returned directly, it skips FastAPI's ``jsonable_encoder`` walk.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(content, separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+
+class ArrowResponse(Response):
+    """Arrow IPC stream response."""
+    media_type = ARROW_STREAM_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, pa.Table):
+            return table_to_ipc(content)
+        return super().render(content)
+
+
+def table_response(
+    table: pa.Table,
+    format: str = 'json',
+    envelope: Optional[Callable[[Any], Dict[str, Any]]] = None
+) -> Response:
+    """
+    Serialize an Arrow table in the requested format.
+
+    Args:
+        table: Result table
+        format: One of RESPONSE_FORMATS
+        envelope: Wraps the JSON payload (rows or columns) into the response body,
+            e.g. ``lambda data: {"data": data}``; not applied to Arrow IPC
+    """
+    if format == 'arrow':
+        return ArrowResponse(table)
+    data = table_to_columns(table) if format == 'columnar' else table_to_records(table)
+    return FastJSONResponse(envelope(data) if envelope else data)
@@ -230,6 +230,14 @@ async def startup_event():
         logger.warning("⚠️ WARNING: Using default JWT secret key!")
         logger.warning("⚠️ Change JWT_SECRET_KEY in .env for production")
     
+    # Load an NL-to-SQL session for the current dataset so the first chat question skips setup
+    try:
+        from src.api.v1.campaigns import query_sessions
+        from src.database.duckdb_manager import get_duckdb_manager
+        query_sessions.warm(get_duckdb_manager())
+    except Exception as e:
+        logger.warning(f"NL-to-SQL session warm-up skipped: {e}")
+    
     logger.info("API ready at http://localhost:8000")
     logger.info("Docs available at http://localhost:8000/api/docs")
 
@@ -239,6 +247,8 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("PCA Agent API v3.0 - Shutting down")
+    from src.api.v1.campaigns import query_sessions
+    query_sessions.clear()
 
 
 if __name__ == "__main__":
@@ -358,6 +358,7 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("PCA Agent API v3.0 - Shutting down")
+    audit_logger.close()
 
 
 if __name__ == "__main__":
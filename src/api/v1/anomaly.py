@@ -24,7 +24,7 @@ logger = logging.getLogger(__name__)
 # Import your existing modules
 from src.database.connection import get_db_manager
 from src.api.middleware.auth import get_current_user
-from src.database.duckdb_manager import get_duckdb_manager, CAMPAIGNS_PARQUET
+from src.database.duckdb_manager import get_duckdb_manager
 
 router = APIRouter(prefix="/anomaly-detective", tags=["anomaly-detective"])
 
@@ -353,7 +353,6 @@ async def get_anomalies(
             return []
 
         # Query for metrics over time
-        conn = duckdb_mgr.get_connection()
         cutoff_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
         
         query = f"""  # nosec B608
@@ -363,14 +362,14 @@ async def get_anomalies(
                 SUM(COALESCE("Clicks", 0)) / NULLIF(SUM(COALESCE("Impressions", 0)), 0) * 100 as avg_ctr,
                 SUM(COALESCE("Conversions", 0)) / NULLIF(SUM(COALESCE("Clicks", 0)), 0) * 100 as conversion_rate,
                 SUM(COALESCE("Spend_USD", 0)) / NULLIF(SUM(COALESCE("Conversions", 0)), 0) as avg_cpa
-            FROM '{CAMPAIGNS_PARQUET}'
+            FROM {duckdb_mgr.get_parquet_source()}
             WHERE "Date" >= '{cutoff_date}'
             GROUP BY "Date"
             ORDER BY date ASC
         """
         
-        result_df = conn.execute(query).df()
-        conn.close()
+        with duckdb_mgr.connection() as conn:
+            result_df = conn.execute(query).df()
         
         # Convert to list of tuples for compatibility
         rows = result_df.itertuples(index=False, name=None)
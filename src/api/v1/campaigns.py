@@ -3,7 +3,7 @@ Campaign endpoints (v1) with database persistence and report regeneration.
 """
 
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request, status, Query
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import date
 from dateutil.relativedelta import relativedelta
 import uuid
@@ -14,52 +14,43 @@ from loguru import logger
 
 from ..middleware.auth import get_current_user
 from ..middleware.rate_limit import limiter, get_user_rate_limit
+from ..arrow_responses import (
+    ArrowResponse,
+    FastJSONResponse,
+    table_response,
+    table_to_columns,
+    table_to_records,
+    validate_format,
+)
 
 from src.agents.enhanced_reasoning_agent import EnhancedReasoningAgent
 from src.analytics.auto_insights import MediaAnalyticsExpert
-from src.database.duckdb_manager import get_duckdb_manager, CAMPAIGNS_PARQUET
+from src.database.duckdb_manager import get_duckdb_manager
+from src.database.schema_registry import (
+    COLUMN_ALIASES,
+    DatasetSchema,
+    resolve_column,
+    resolve_metric_columns,
+)
 from src.query_engine.nl_to_sql import NaturalLanguageQueryEngine
+from src.query_engine.session_pool import NLQuerySessionPool
 from .models import ChatRequest, GlobalAnalysisRequest, KPIComparisonRequest
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import os
 import time
 
 
 
-query_engine = NaturalLanguageQueryEngine(api_key=os.getenv("OPENAI_API_KEY", "dummy"))
+# Warm NL-to-SQL engines for /chat, reloaded only when the dataset version changes
+query_sessions = NLQuerySessionPool()
 
 router = APIRouter(prefix="/campaigns", tags=["campaigns"])
 
-# ============================================================================
-# ROBUST COLUMN MAPPING - Central registry of all column name variations
-# ============================================================================
-METRIC_COLUMN_ALIASES = {
-    'spend': ['Spend', 'Total Spent', 'Total_Spent', 'spend', 'Cost', 'cost', 'Media Cost', 'media_cost', 'Ad Spend', 'ad_spend', 'Amount Spent', 'investment', 'Investment'],
-    'impressions': ['Impressions', 'Impr', 'impressions', 'impr', 'Impression', 'impression', 'views', 'Views'],
-    'clicks': ['Clicks', 'clicks', 'Click', 'click', 'link_clicks', 'Link Clicks'],
-    'conversions': ['Conversions', 'Site Visit', 'conversions', 'Conversion', 'conversion', 'conv', 'Conv', 'purchases', 'Purchases', 'leads', 'Leads', 'site_visit'],
-    'date': ['Date', 'date', 'Week', 'week', 'Month', 'month', 'Day', 'day', 'Period', 'period', 'Time', 'time', 'report_date'],
-    'reach': ['Reach', 'reach', 'Unique Reach', 'unique_reach', 'Reach_2024', 'Reach_2025', 'unique_users'],
-    'platform': ['Platform', 'platform', 'Network', 'network', 'Ad Network', 'ad_network', 'Publisher', 'publisher', 'Source', 'source', 'account'],
-    'channel': ['Channel', 'channel', 'Medium', 'medium', 'Marketing Channel', 'Traffic Source', 'traffic_source'],
-    'device': ['Device_Type', 'Device Type', 'device_type', 'Device', 'device'],
-    'region': ['Geographic_Region', 'geographic_region', 'Region', 'region', 'State', 'state', 'Location', 'location', 'Geo', 'geo', 'DMA', 'dma', 'Country', 'country'],
-    'campaign': ['Campaign', 'campaign', 'Campaign Name', 'campaign_name', 'Campaign_Name'],
-    'funnel': ['Funnel', 'funnel', 'Funnel_Stage', 'Funnel Stage', 'Stage', 'stage', 'funnel_stage'],
-    'placement': ['Placement', 'placement', 'Position', 'position', 'Ad Placement', 'ad_placement'],
-    'ad_type': ['Ad Type', 'ad_type', 'Ad_Type', 'AdType', 'creative_type', 'Creative Type'],
-    'ctr': ['CTR', 'ctr', 'Click Through Rate', 'click_through_rate'],
-    'cpc': ['CPC', 'cpc', 'Cost Per Click', 'cost_per_click'],
-    'cpm': ['CPM', 'cpm', 'Cost Per Mille', 'cost_per_mille'],
-    'cpa': ['CPA', 'cpa', 'Cost Per Acquisition', 'cost_per_acquisition', 'Cost Per Conversion'],
-    'roas': ['ROAS', 'roas', 'Return On Ad Spend', 'return_on_ad_spend'],
-    'revenue': ['Revenue', 'revenue', 'Sales', 'Sales Value', 'sales_value', 'Conversion Value', 'conversion_value', 'Total Revenue', 'total_revenue', 'Income', 'income', 'Revenue_2024', 'Revenue_2025'],
-    'audience': ['Audience', 'audience', 'Audience Segment', 'Segment', 'segment', 'Audience Name'],
-    'age': ['Age', 'age', 'Age Group', 'age_group', 'Demographic', 'demographic'],
-    'objective': ['Objective', 'objective', 'Campaign Objective', 'campaign_objective', 'Goal', 'goal'],
-    'targeting': ['Targeting', 'targeting', 'Targeting Type', 'targeting_type', 'Target Type'],
-    'revenue': ['Revenue', 'revenue', 'Total Revenue', 'total_revenue', 'Sales', 'sales', 'Purchase Value', 'purchase_value', 'Value', 'value', 'Revenue_2024', 'Revenue_2025']
-}
+# Column alias registry lives with the dataset schema registry so agents and the
+# NL-to-SQL engine resolve columns exactly like the endpoints do.
+METRIC_COLUMN_ALIASES = COLUMN_ALIASES
 
 
 def find_column(df, metric_key: str):
@@ -74,28 +65,16 @@ def find_column(df, metric_key: str):
     Returns:
         Actual column name in df or None if not found
     """
-    aliases = METRIC_COLUMN_ALIASES.get(metric_key, [])
-    cols_lower = {c.lower(): c for c in df.columns}
-    for alias in aliases:
-        if alias.lower() in cols_lower:
-            return cols_lower[alias.lower()]
-    return None
+    return resolve_column(df.columns, metric_key)
+
 
 def consolidate_metric_column(df, metric_key):
     """
     Finds all columns matching aliases for a metric and consolidates them.
     Priority is given to the first matching alias, filling NaNs with subsequent matches.
     """
-    aliases = METRIC_COLUMN_ALIASES.get(metric_key, [])
-    cols_lower = {c.lower(): c for c in df.columns}
-    
-    found_cols = []
     # Identify all columns that match any alias
-    for alias in aliases:
-        if alias.lower() in cols_lower:
-            actual_col = cols_lower[alias.lower()]
-            if actual_col not in found_cols:
-                found_cols.append(actual_col)
+    found_cols = resolve_metric_columns(df.columns, metric_key)
     
     if not found_cols:
         return None
@@ -111,7 +90,152 @@ def consolidate_metric_column(df, metric_key):
     return series
 
 
+# ============================================================================
+# SQL AGGREGATION HELPERS - resolve aliases once, aggregate inside DuckDB
+# ============================================================================
+SUMMABLE_METRICS = ['spend', 'impressions', 'clicks', 'conversions', 'reach', 'revenue']
+
+# Fallback physical names for filter keys whose aliases are not present in the data
+FILTER_FALLBACK_COLUMNS = {
+    'platform': 'Platform',
+    'funnel': 'Funnel',
+    'channel': 'Channel',
+    'device': 'Device_Type',
+    'placement': 'Placement',
+    'region': 'Geographic_Region',
+    'ad_type': 'Ad Type'
+}
+
+
+def resolve_metric_sources(schema: DatasetSchema) -> Dict[str, List[str]]:
+    """Map each summable metric to the physical columns consolidated into it."""
+    return {metric: schema.sources(metric) for metric in SUMMABLE_METRICS}
+
+
+def build_dimension_filters(schema: DatasetSchema, mapping: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate frontend filter keys (platform, channel, ...) into physical-column filters."""
+    filter_params = {}
+    for key, val in mapping.items():
+        if val:
+            actual_col = schema.resolve(key)
+            filter_params[actual_col or FILTER_FALLBACK_COLUMNS.get(key, key)] = val
+    return filter_params
+
+
+def parse_date_param(value: Optional[str], name: str) -> Optional[date]:
+    """Parse a date query parameter, ignoring (and logging) unparseable values."""
+    if not value:
+        return None
+    try:
+        return pd.to_datetime(value).date()
+    except Exception as e:
+        logger.warning(f"Could not parse {name} {value}: {e}")
+        return None
+
+
+def summarize_metrics(row) -> Dict[str, Any]:
+    """Build base + derived metrics from one aggregated row (spend, ctr, cpc, cpa, cpm, roas...)."""
+    spend = float(row.get('spend', 0) or 0)
+    impressions = int(row.get('impressions', 0) or 0)
+    clicks = int(row.get('clicks', 0) or 0)
+    conversions = int(row.get('conversions', 0) or 0)
+    revenue = float(row.get('revenue', 0) or 0)
+    reach = int(row.get('reach', 0) or 0)
+    return {
+        "spend": round(spend, 2),
+        "impressions": impressions,
+        "reach": reach,
+        "clicks": clicks,
+        "conversions": conversions,
+        "revenue": round(revenue, 2),
+        "ctr": round((clicks / impressions * 100) if impressions > 0 else 0, 2),
+        "cpc": round((spend / clicks) if clicks > 0 else 0, 2),
+        "cpm": round((spend / impressions * 1000) if impressions > 0 else 0, 2),
+        "cpa": round((spend / conversions) if conversions > 0 else 0, 2),
+        "roas": round((revenue / spend) if spend > 0 else 0, 2)
+    }
+
+
+# Metrics returned per row by the /visualizations charts
+TREND_CHART_METRICS = ['spend', 'impressions', 'clicks', 'conversions', 'revenue', 'reach', 'ctr', 'cpc', 'cpa']
+DIMENSION_CHART_METRICS = TREND_CHART_METRICS + ['cpm', 'roas']
+
+
+def summarize_metrics_table(
+    table: pa.Table,
+    keys: Dict[str, str],
+    metric_keys: List[str]
+) -> pa.Table:
+    """
+    Vectorized summarize_metrics() over an aggregated Arrow table.
+    
+    Args:
+        table: aggregate(..., as_arrow=True) result
+        keys: Output key name -> table column, rendered as strings
+        metric_keys: Metrics to output, in order (any of summarize_metrics()' keys)
+    """
+    def base(name, integer):
+        if name not in table.column_names:
+            values = pa.array([0.0] * table.num_rows, pa.float64())
+        else:
+            values = pc.fill_null(pc.cast(table[name], pa.float64()), 0.0)
+        return pc.cast(pc.trunc(values), pa.int64()) if integer else values
+    
+    def ratio(numerator, denominator, scale=1):
+        denominator = pc.cast(denominator, pa.float64())
+        value = pc.multiply(pc.divide(pc.cast(numerator, pa.float64()), denominator), scale)
+        return pc.round(pc.if_else(pc.greater(denominator, 0), value, 0.0), 2)
+    
+    spend, revenue = base('spend', False), base('revenue', False)
+    impressions, clicks = base('impressions', True), base('clicks', True)
+    conversions, reach = base('conversions', True), base('reach', True)
+    columns = {
+        "spend": pc.round(spend, 2),
+        "impressions": impressions,
+        "reach": reach,
+        "clicks": clicks,
+        "conversions": conversions,
+        "revenue": pc.round(revenue, 2),
+        "ctr": ratio(clicks, impressions, 100),
+        "cpc": ratio(spend, clicks),
+        "cpm": ratio(spend, impressions, 1000),
+        "cpa": ratio(spend, conversions),
+        "roas": ratio(revenue, spend),
+    }
+    output = {key: pc.cast(table[column], pa.string()) for key, column in keys.items()}
+    output.update({key: columns[key] for key in metric_keys})
+    return pa.table(output)
+
+
+def stack_chart_tables(charts: Dict[str, pa.Table]) -> pa.Table:
+    """
+    Stack per-chart tables into one long table for Arrow IPC responses:
+    a ``chart`` column, the chart's dimension value as ``key``, then the metrics
+    (null where a chart does not have a metric).
+    """
+    metric_names = []
+    for table in charts.values():
+        metric_names += [c for c in table.column_names[1:] if c not in metric_names]
+    
+    parts = []
+    for chart, table in charts.items():
+        columns = {
+            'chart': pa.array([chart] * table.num_rows, pa.string()),
+            'key': table.column(0) if table.num_columns else pa.array([], pa.string()),
+        }
+        for name in metric_names:
+            if name in table.column_names:
+                columns[name] = table[name]
+            else:
+                metric_type = next(t[name].type for t in charts.values() if name in t.column_names)
+                columns[name] = pa.nulls(table.num_rows, metric_type)
+        parts.append(pa.table(columns))
+    return pa.concat_tables(parts) if parts else pa.table({'chart': pa.array([], pa.string())})
+
+
 from fastapi import UploadFile, File, Form
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 
 
@@ -165,120 +289,98 @@ async def preview_excel_sheets(
         logger.error(f"Failed to preview Excel sheets: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to preview sheets: {str(e)}")
 
+UPLOAD_MAX_BYTES = 100 * 1024 * 1024
+UPLOAD_SPOOL_CHUNK = 1024 * 1024
+
+
+def _clear_workflow_cache():
+    """Clear agent workflow cache to ensure fresh analysis on new data."""
+    try:
+        from src.agents.agent_chain import clear_workflow_state
+        clear_workflow_state()
+        logger.info("Cleared agent workflow cache after new file upload")
+    except Exception as e:
+        logger.warning(f"Failed to clear workflow cache: {e}")
+
+
+def _on_dataset_updated():
+    """Reset per-dataset state after an upload and warm a chat session for the new version."""
+    _clear_workflow_cache()
+    query_sessions.warm(get_duckdb_manager())
+
+
 @router.post("/upload", status_code=status.HTTP_201_CREATED)
 async def upload_campaign_data(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     sheet_name: Optional[str] = Form(None),
+    append: bool = Form(False),
+    background: bool = Form(False),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Upload campaign data from CSV/Excel.
     Uses DuckDB + Parquet for fast analytics.
+    Set ``append`` to add rows to the existing dataset instead of replacing it.
+    
+    The upload is spooled to disk and ingested in chunks off the event loop.
+    Set ``background`` to return immediately (202) with a ``job_id``; poll
+    ``/campaigns/upload/jobs/{job_id}`` for progress and the result.
     
     **File Constraints:**
     - Max size: 100MB
     - Allowed formats: CSV, XLSX, XLS
     """
+    from src.services.campaign_upload import get_upload_ingestor
+    
+    # Validate file extension
+    file_ext = file.filename.split('.')[-1].lower() if file.filename else ''
+    if file_ext not in ['csv', 'xlsx', 'xls']:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file format '{file_ext}'. Allowed: csv, xlsx, xls"
+        )
+    
+    ingestor = get_upload_ingestor()
+    spool_path = ingestor.spool_path(file.filename)
+    handed_off = False
     try:
-        from src.database.duckdb_manager import get_duckdb_manager
-        
-        # Validate file extension
-        file_ext = file.filename.split('.')[-1].lower() if file.filename else ''
-        if file_ext not in ['csv', 'xlsx', 'xls']:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file format '{file_ext}'. Allowed: csv, xlsx, xls"
-            )
-        
+        # Spool to disk in chunks, enforcing the size limit as bytes arrive
         t_start = time.time()
-        contents = await file.read()
-        
-        # Validate file size (100MB limit)
-        file_size_mb = len(contents) / (1024 * 1024)
-        if file_size_mb > 100:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File too large: {file_size_mb:.1f}MB. Maximum allowed: 100MB"
+        size = 0
+        with open(spool_path, 'wb') as spool:
+            while chunk := await file.read(UPLOAD_SPOOL_CHUNK):
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large: more than {UPLOAD_MAX_BYTES // (1024 * 1024)}MB. Maximum allowed: 100MB"
+                    )
+                spool.write(chunk)
+        
+        if size == 0:
+            raise HTTPException(status_code=400, detail="The uploaded file is empty")
+        
+        logger.info(f"File spooled in {time.time() - t_start:.2f}s (Size: {size / (1024 * 1024):.1f}MB)")
+        
+        job_id = ingestor.create_job(file.filename, size)
+        options = {'sheet_name': sheet_name, 'append': append, 'on_complete': _on_dataset_updated}
+        handed_off = True
+        
+        if background:
+            background_tasks.add_task(ingestor.ingest_in_background, job_id, spool_path, **options)
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={
+                    'success': True,
+                    'job_id': job_id,
+                    'status': 'pending',
+                    'status_url': f"/api/v1/campaigns/upload/jobs/{job_id}",
+                    'message': 'Upload accepted for background ingestion'
+                }
             )
         
-        logger.info(f"File read took {time.time() - t_start:.2f}s (Size: {file_size_mb:.1f}MB)")
-        
-        import io
-        t_parse = time.time()
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-        elif file.filename.endswith(('.xls', '.xlsx')):
-            if sheet_name:
-                logger.info(f"Reading Excel file with sheet: {sheet_name}")
-                df = pd.read_excel(io.BytesIO(contents), sheet_name=sheet_name)
-            else:
-                logger.info("Reading Excel file with default (first) sheet")
-                df = pd.read_excel(io.BytesIO(contents))
-        else:
-            raise HTTPException(status_code=400, detail="Invalid file format. Please upload CSV or Excel.")
-        
-        logger.info(f"Dataframe parsing took {time.time() - t_parse:.2f}s (Shape: {df.shape})")
-        
-        # Save to Parquet using DuckDB manager
-        duckdb_mgr = get_duckdb_manager()
-        row_count = duckdb_mgr.save_campaigns(df)
-        
-        # Generate summary stats using central alias mapping
-        summary = {'total_spend': 0, 'total_clicks': 0, 'total_impressions': 0, 'total_conversions': 0, 'avg_ctr': 0}
-        
-        # Use find_column() for consistent column mapping across all endpoints
-        spend_col = find_column(df, 'spend')
-        if spend_col:
-            summary['total_spend'] = float(df[spend_col].sum())
-        
-        clicks_col = find_column(df, 'clicks')
-        if clicks_col:
-            summary['total_clicks'] = int(df[clicks_col].sum())
-        
-        impressions_col = find_column(df, 'impressions')
-        if impressions_col:
-            summary['total_impressions'] = int(df[impressions_col].sum())
-        
-        conversions_col = find_column(df, 'conversions')
-        if conversions_col:
-            summary['total_conversions'] = int(df[conversions_col].sum())
-        
-        # Calculate avg_ctr
-        if summary['total_impressions'] > 0:
-            summary['avg_ctr'] = (summary['total_clicks'] / summary['total_impressions']) * 100
-        
-        logger.info(f"Successfully imported {row_count} rows to Parquet in {time.time() - t_start:.2f}s")
-
-        # Clear agent workflow cache to ensure fresh analysis on new data
-        try:
-            from src.agents.agent_chain import clear_workflow_state
-            clear_workflow_state()
-            logger.info("Cleared agent workflow cache after new file upload")
-        except Exception as e:
-            logger.warning(f"Failed to clear workflow cache: {e}")
-        
-        # Clean preview data - replace NaN with None for JSON serialization
-        preview_df = df.head(5).fillna('')
-        preview = preview_df.to_dict(orient='records')
-        
-        # Generate schema info
-        schema = []
-        for col in df.columns:
-            schema.append({
-                'column': col,
-                'dtype': str(df[col].dtype),
-                'null_count': int(df[col].isnull().sum())
-            })
-        
-        return {
-            'success': True,
-            'imported_count': row_count,
-            'message': f'Successfully imported {row_count} campaigns',
-            'summary': summary,
-            'schema': schema,
-            'columns': list(df.columns),
-            'preview': preview
-        }
+        return await run_in_threadpool(ingestor.ingest, job_id, spool_path, **options)
         
     except HTTPException:
         raise
@@ -287,6 +389,26 @@ async def upload_campaign_data(
     except Exception as e:
         logger.error(f"Upload failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if not handed_off:
+            spool_path.unlink(missing_ok=True)
+
+
+@router.get("/upload/jobs/{job_id}")
+async def get_upload_job_status(
+    job_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Get status and progress of an upload ingestion job.
+    The upload result is included once the job has completed.
+    """
+    from src.services.campaign_upload import get_upload_ingestor
+    
+    job = get_upload_ingestor().get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Upload job {job_id} not found")
+    return job
 
 @router.get("/metrics")
 async def get_global_metrics(
@@ -301,9 +423,10 @@ async def get_global_metrics(
         from src.database.duckdb_manager import get_duckdb_manager
         duckdb_mgr = get_duckdb_manager()
         
-        df = duckdb_mgr.get_campaigns()
+        schema = duckdb_mgr.get_schema()
+        totals = duckdb_mgr.aggregate(resolve_metric_sources(schema)) if schema else pd.DataFrame()
         
-        if df.empty:
+        if totals.empty or int(totals.iloc[0]['row_count']) == 0:
             return {
                 "total_spend": 0,
                 "total_impressions": 0,
@@ -314,16 +437,12 @@ async def get_global_metrics(
                 "avg_cpa": 0,
                 "conversion_rate": 0
             }
-            
-        spend_col = find_column(df, 'spend')
-        impr_col = find_column(df, 'impressions')
-        clicks_col = find_column(df, 'clicks')
-        conv_col = find_column(df, 'conversions')
         
-        total_spend = float(df[spend_col].sum()) if spend_col else 0
-        total_impr = int(df[impr_col].sum()) if impr_col else 0
-        total_clicks = int(df[clicks_col].sum()) if clicks_col else 0
-        total_conv = int(df[conv_col].sum()) if conv_col else 0
+        row = totals.iloc[0]
+        total_spend = float(row['spend'])
+        total_impr = int(row['impressions'])
+        total_clicks = int(row['clicks'])
+        total_conv = int(row['conversions'])
         
         avg_ctr = (total_clicks / total_impr * 100) if total_impr > 0 else 0
         avg_cpc = (total_spend / total_clicks) if total_clicks > 0 else 0
@@ -363,255 +482,90 @@ async def get_global_visualizations(
     ages: Optional[str] = None,
     objectives: Optional[str] = None,
     targetings: Optional[str] = None,
+    format: str = Query('json', description="Response format: json (rows per chart), columnar (column arrays per chart) or arrow (one Arrow IPC table with a 'chart' column)"),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Get global visualizations data using DuckDB + Parquet.
     Supports filtering by any column from uploaded CSV.
+    Aggregates are fetched as Arrow and derived metrics computed column-wise.
     """
     logger.info(f"📊 /visualizations endpoint called - platforms={platforms}, dates={start_date} to {end_date}")
+    response_format = validate_format(format)
     try:
         from src.database.duckdb_manager import get_duckdb_manager
         
         duckdb_mgr = get_duckdb_manager()
         
-        if not duckdb_mgr.has_data():
+        # Aliases are resolved once per dataset version by the schema registry
+        schema = duckdb_mgr.get_schema()
+        if schema is None:
             return {"trend": [], "device": [], "platform": [], "channel": []}
         
-        # Build filter parameters - map to actual column names in CSV using aliases
-        filter_params = {}
-        
-        # Get sample data to find actual columns
-        sample_df = duckdb_mgr.get_campaigns(limit=1)
-        
-        if not sample_df.empty:
-            # Map standard frontend keys to actual columns
-            mapping = {
-                'platform': platforms,
-                'funnel': funnel_stages,
-                'channel': channels,
-                'device': devices,
-                'placement': placements,
-                'region': regions,
-                'ad_type': adTypes,
-                'audience': audiences,
-                'age': ages,
-                'objective': objectives,
-                'targeting': targetings
-            }
-            
-            for key, val in mapping.items():
-                if val:
-                    actual_col = find_column(sample_df, key)
-                    if actual_col:
-                        filter_params[actual_col] = val
-                    else:
-                        # Fallback for old hardcoded keys if alias not found
-                        fallback_map = {
-                            'platform': 'Platform',
-                            'funnel': 'Funnel',
-                            'channel': 'Channel',
-                            'device': 'Device_Type',
-                            'placement': 'Placement',
-                            'region': 'Geographic_Region',
-                            'ad_type': 'Ad Type'
-                        }
-                        filter_params[fallback_map.get(key, key)] = val
+        filter_params = build_dimension_filters(schema, {
+            'platform': platforms,
+            'funnel': funnel_stages,
+            'channel': channels,
+            'device': devices,
+            'placement': placements,
+            'region': regions,
+            'ad_type': adTypes,
+            'audience': audiences,
+            'age': ages,
+            'objective': objectives,
+            'targeting': targetings
+        })
         
         logger.info(f"DuckDB visualization filters (mapped): {filter_params}")
         
-        logger.info(f"DuckDB visualization filters: {filter_params}")
+        metric_sources = resolve_metric_sources(schema)
+        date_col = schema.date_column
+        
+        # NO automatic date filtering - show ALL data by default
+        # User can manually filter via date picker if needed
+        start_dt = parse_date_param(start_date, 'start_date')
+        end_dt = parse_date_param(end_date, 'end_date')
+        date_filtered = date_col is not None and (start_dt is not None or end_dt is not None)
+        
+        def aggregate(group_by=None, date_grain=None):
+            return duckdb_mgr.aggregate(
+                metric_sources,
+                group_by=group_by,
+                filters=filter_params or None,
+                date_column=date_col if (date_filtered or date_grain) else None,
+                start_date=start_dt,
+                end_date=end_dt,
+                date_grain=date_grain,
+                as_arrow=True
+            )
         
-        # Get data from DuckDB
-        df = duckdb_mgr.get_campaigns(filters=filter_params if filter_params else None)
+        # Each chart is a single GROUP BY query; only aggregated rows are transferred
+        def calc_metrics(dimension_key, key_name):
+            col = schema.resolve(dimension_key)
+            if not col:
+                return pa.table({key_name: pa.array([], pa.string())})
+            return summarize_metrics_table(
+                aggregate(group_by={key_name: col}), {key_name: key_name}, DIMENSION_CHART_METRICS
+            )
         
-        if df.empty:
+        totals = aggregate()
+        if totals.num_rows == 0 or totals['row_count'][0].as_py() == 0:
             return {"trend": [], "device": [], "platform": [], "channel": []}
         
-        # Apply date filtering if provided
-        date_col = None
-        for col in ['Date', 'date', 'Week', 'Month']:
-            if col in df.columns:
-                date_col = col
-                break
-        
-        if date_col:
-            df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-            
-            # NO automatic date filtering - show ALL data by default
-            # User can manually filter via date picker if needed
-
-            if start_date:
-                try:
-                    start_dt = pd.to_datetime(start_date)
-                    df = df[df[date_col] >= start_dt]
-                    logger.info(f"Filtered by start_date {start_date}: {len(df)} rows remaining")
-                except Exception as e:
-                    logger.warning(f"Could not parse start_date {start_date}: {e}")
-            if end_date:
-                try:
-                    end_dt = pd.to_datetime(end_date)
-                    df = df[df[date_col] <= end_dt]
-                    logger.info(f"Filtered by end_date {end_date}: {len(df)} rows remaining")
-                except Exception as e:
-                    logger.warning(f"Could not parse end_date {end_date}: {e}")
-            
-            if df.empty:
-                return {"trend": [], "device": [], "platform": [], "channel": []}
-        
-        # Use global find_column with METRIC_COLUMN_ALIASES
-        spend_col = find_column(df, 'spend')
-        impr_col = find_column(df, 'impressions')
-        clicks_col = find_column(df, 'clicks')
-        conv_col = find_column(df, 'conversions')
-        date_col = find_column(df, 'date')
-        platform_col = find_column(df, 'platform')
-        channel_col = find_column(df, 'channel')
-        device_col = find_column(df, 'device')
-        region_col = find_column(df, 'region')
-        audience_col = find_column(df, 'audience')
-        age_col = find_column(df, 'age')
-        ad_type_col = find_column(df, 'ad_type')
-        objective_col = find_column(df, 'objective')
-        targeting_col = find_column(df, 'targeting')
-        
-        # DEBUG: Log total spend to trace data flow issue
-        if spend_col:
-            total_spend_raw = df[spend_col].sum()
-            logger.info(f"===== VISUALIZATION DEBUG =====")
-            logger.info(f"Total rows in df: {len(df)}")
-            logger.info(f"Spend column: {spend_col}")
-            logger.info(f"TOTAL SPEND (raw): ${total_spend_raw:,.2f}")
-            logger.info(f"================================")
-        
-        # Helper to calculate metrics
-        def calc_metrics(grp_df, key_name='name'):
-            result = []
-            for name, group in grp_df:
-                spend = float(group[spend_col].sum()) if spend_col else 0
-                impressions = int(group[impr_col].sum()) if impr_col else 0
-                clicks = int(group[clicks_col].sum()) if clicks_col else 0
-                conversions = int(group[conv_col].sum()) if conv_col else 0
-                
-                ctr = (clicks / impressions * 100) if impressions > 0 else 0
-                cpc = (spend / clicks) if clicks > 0 else 0
-                cpa = (spend / conversions) if conversions > 0 else 0
-                cpm = (spend / impressions * 1000) if impressions > 0 else 0
-                
-                # Dynamic ROAS calculation based on revenue column
-                revenue_col = find_column(group, 'revenue')
-                revenue = float(group[revenue_col].sum()) if revenue_col else 0
-                roas = (revenue / spend) if spend > 0 and revenue_col else 0
-                
-                # Dynamic reach calculation
-                reach_col = find_column(group, 'reach')
-                reach = int(group[reach_col].sum()) if reach_col else 0
-                
-                result.append({
-                    key_name: str(name) if not isinstance(name, str) else name,
-                    "spend": round(spend, 2),
-                    "impressions": impressions,
-                    "clicks": clicks,
-                    "conversions": conversions,
-                    "revenue": round(revenue, 2),
-                    "reach": reach,
-                    "ctr": round(ctr, 2),
-                    "cpc": round(cpc, 2),
-                    "cpa": round(cpa, 2),
-                    "cpm": round(cpm, 2),
-                    "roas": round(roas, 2)
-                })
-            return result
-        
         # 1. Trend data (by date)
-        trend_data = []
         if date_col:
-            df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-            for date, group in df.groupby(date_col):
-                if pd.isna(date):
-                    continue
-                spend = float(group[spend_col].sum()) if spend_col else 0
-                impressions = int(group[impr_col].sum()) if impr_col else 0
-                clicks = int(group[clicks_col].sum()) if clicks_col else 0
-                conversions = int(group[conv_col].sum()) if conv_col else 0
-                
-                # Add revenue and reach
-                revenue_col = find_column(group, 'revenue')
-                revenue = float(group[revenue_col].sum()) if revenue_col else 0
-                reach_col = find_column(group, 'reach')
-                reach = int(group[reach_col].sum()) if reach_col else 0
-                
-                trend_data.append({
-                    "date": date.strftime("%Y-%m-%d") if hasattr(date, 'strftime') else str(date),
-                    "spend": round(spend, 2),
-                    "impressions": impressions,
-                    "clicks": clicks,
-                    "conversions": conversions,
-                    "revenue": round(revenue, 2),
-                    "reach": reach,
-                    "ctr": round((clicks / impressions * 100) if impressions > 0 else 0, 2),
-                    "cpc": round((spend / clicks) if clicks > 0 else 0, 2),
-                    "cpa": round((spend / conversions) if conversions > 0 else 0, 2)
-                })
-            trend_data.sort(key=lambda x: x['date'])
-        
-        # 2. Platform data
-        platform_data = []
-        if platform_col:
-            platform_data = calc_metrics(df.groupby(platform_col), 'platform')
-        
-        # 3. Channel data
-        channel_data = []
-        if channel_col:
-            channel_data = calc_metrics(df.groupby(channel_col), 'channel')
-        
-        # 4. Device data
-        device_data = []
-        if device_col:
-            device_data = calc_metrics(df.groupby(device_col), 'device')
+            trend = summarize_metrics_table(aggregate(date_grain='day'), {'date': 'date'}, TREND_CHART_METRICS)
+        else:
+            trend = pa.table({'date': pa.array([], pa.string())})
         
-        # 5. Region data
-        region_data = []
-        if region_col:
-            region_data = calc_metrics(df.groupby(region_col), 'region')
-            
-        # 6. Audience data
-        audience_data = []
-        if audience_col:
-            audience_data = calc_metrics(df.groupby(audience_col), 'audience')
-            
-        # 7. Age data
-        age_data = []
-        if age_col:
-            age_data = calc_metrics(df.groupby(age_col), 'age')
-
-        # 8. Ad Type data
-        ad_type_data = []
-        if ad_type_col:
-            ad_type_data = calc_metrics(df.groupby(ad_type_col), 'ad_type')
-            
-        # 9. Campaign Objective data
-        objective_data = []
-        if objective_col:
-            objective_data = calc_metrics(df.groupby(objective_col), 'objective')
-            
-        # 10. Targeting Type data
-        targeting_data = []
-        if targeting_col:
-            targeting_data = calc_metrics(df.groupby(targeting_col), 'targeting')
+        charts = {"trend": trend}
+        for key in ['device', 'platform', 'channel', 'region', 'audience', 'age', 'ad_type', 'objective', 'targeting']:
+            charts[key] = calc_metrics(key, key)
         
-        return {
-            "trend": trend_data,
-            "device": device_data,
-            "platform": platform_data,
-            "channel": channel_data,
-            "region": region_data,
-            "audience": audience_data,
-            "age": age_data,
-            "ad_type": ad_type_data,
-            "objective": objective_data,
-            "targeting": targeting_data
-        }
+        if response_format == 'arrow':
+            return ArrowResponse(stack_chart_tables(charts))
+        convert = table_to_columns if response_format == 'columnar' else table_to_records
+        return FastJSONResponse({name: convert(table) for name, table in charts.items()})
         
     except Exception as e:
         logger.error(f"Failed to get global visualizations: {e}")
@@ -659,98 +613,56 @@ async def get_dashboard_stats(
 
         
         # 2. Build Filters - map to actual column names in CSV using aliases
-        filter_params = {}
-        
-        # Get sample data to find actual columns
-        sample_df = duckdb_mgr.get_campaigns(limit=1)
-        
-        if not sample_df.empty:
-            # Map standard frontend keys to actual columns
-            mapping = {
-                'platform': platforms,
-                'funnel': funnelStages,
-                'channel': channels,
-                'device': devices,
-                'placement': placements,
-                'placement': placements,
-                'region': regions,
-                'ad_type': adTypes,
-                'audience': audiences,
-                'age': ages,
-                'objective': objectives,
-                'targeting': targetings
-            }
-            
-            for key, val in mapping.items():
-                if val:
-                    actual_col = find_column(sample_df, key)
-                    if actual_col:
-                        filter_params[actual_col] = val
-                    else:
-                        # Fallback for old hardcoded keys if alias not found
-                        fallback_map = {
-                            'platform': 'Platform',
-                            'funnel': 'Funnel',
-                            'channel': 'Channel',
-                            'device': 'Device_Type',
-                            'placement': 'Placement',
-                            'region': 'Geographic_Region',
-                            'ad_type': 'Ad Type'
-                        }
-                        filter_params[fallback_map.get(key, key)] = val
+        schema = duckdb_mgr.get_schema()
+        filter_params = build_dimension_filters(schema, {
+            'platform': platforms,
+            'funnel': funnelStages,
+            'channel': channels,
+            'device': devices,
+            'placement': placements,
+            'region': regions,
+            'ad_type': adTypes,
+            'audience': audiences,
+            'age': ages,
+            'objective': objectives,
+            'targeting': targetings
+        })
         
         logger.info(f"DuckDB dashboard-stats filters: {filter_params}")
         
-        # Fetch data for current and previous period
-        # 1. First, fetch all data with filters applied, ignoring dates for now
-        total_df = duckdb_mgr.get_campaigns(filters=filter_params if filter_params else None)
-        if total_df.empty:
-            return {"summary_groups": {}, "monthly_performance": [], "platform_performance": []}
-            
-        # Use global find_column with METRIC_COLUMN_ALIASES
         # ROBUST FIX for mixed schemas (e.g. 'spend' vs 'Total Spent'):
-        # Consolidate main metric columns into normalized versions
-        norm_cols = {}
-        for metric in ['spend', 'impressions', 'clicks', 'conversions', 'reach', 'revenue']:
-            series = consolidate_metric_column(total_df, metric)
-            if series is not None:
-                # Assign to a new normalized column
-                norm_col_name = f"_norm_{metric}"
-                total_df[norm_col_name] = series
-                norm_cols[metric] = norm_col_name
-            else:
-                norm_cols[metric] = None
-        
-        # Use normalized columns for metrics
-        spend_col = norm_cols['spend']
-        impr_col = norm_cols['impressions']
-        clicks_col = norm_cols['clicks']
-        conv_col = norm_cols['conversions']
-        reach_col = norm_cols['reach']
-        revenue_col = norm_cols['revenue']
+        # each metric coalesces all of its alias columns inside the SQL aggregate
+        metric_sources = resolve_metric_sources(schema)
         
-        # Dimensions still use find_column
-        date_col = find_column(total_df, 'date')
-        platform_col = find_column(total_df, 'platform')
+        # Dimensions use the registry's alias resolution
+        date_col = schema.date_column
+        platform_col = schema.resolve('platform')
+        channel_col = schema.resolve('channel')
+        funnel_col = schema.resolve('funnel')
         
         if not date_col:
             return {"summary_groups": {}, "monthly_performance": [], "platform_performance": []}
-            
-        # Parse dates without dayfirst - data uses YYYY-MM-DD format
-        total_df[date_col] = pd.to_datetime(total_df[date_col], errors='coerce')
-        total_df = total_df.dropna(subset=[date_col])
+        
+        filters = filter_params or None
+        
+        def aggregate(**kwargs):
+            # Rows without a parseable date are always excluded (date_column is set)
+            return duckdb_mgr.aggregate(metric_sources, filters=filters, date_column=date_col, **kwargs)
+        
+        min_date, max_date = duckdb_mgr.get_date_bounds(date_col, filters=filters)
+        if min_date is None:
+            return {"summary_groups": {}, "monthly_performance": [], "platform_performance": []}
 
         # 2. Determine Date Range for Current Period
         if not start_date and not end_date:
             # If no dates provided, use full history as "current"
-            d1 = total_df[date_col].min()
-            d2 = total_df[date_col].max()
+            d1 = pd.Timestamp(min_date)
+            d2 = pd.Timestamp(max_date)
             logger.info(f"Using full date range: {d1} to {d2}")
         else:
             if not end_date:
                 # Use MAX DATE from data instead of NOW() if data is historical
-                max_data_date = total_df[date_col].max()
-                end_date = max_data_date.strftime("%Y-%m-%d")
+                end_date = pd.Timestamp(max_date).strftime("%Y-%m-%d")
             if not start_date:
                 # Default to last 30 days relative to end_date
                 start_date = (datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=30)).strftime("%Y-%m-%d")
@@ -761,134 +673,95 @@ async def get_dashboard_stats(
 
         delta = d2 - d1
         
-        curr_df = total_df[(total_df[date_col] >= d1) & (total_df[date_col] <= d2)]
+        curr_df = aggregate(start_date=d1.date(), end_date=d2.date())
         
         # 3. Handle Previous Period (Default to YoY if simple comparison)
         from dateutil.relativedelta import relativedelta
         yoy_d1 = d1 - relativedelta(years=1)
         yoy_d2 = d2 - relativedelta(years=1)
-        prev_df = total_df[(total_df[date_col] >= yoy_d1) & (total_df[date_col] <= yoy_d2)]
+        prev_df = aggregate(start_date=yoy_d1.date(), end_date=yoy_d2.date())
         
         # Fallback if YoY is empty: try sequential previous period
-        if prev_df.empty:
+        if prev_df.empty or int(prev_df.iloc[0]['row_count']) == 0:
             prev_d1 = d1 - delta
             prev_d2 = d1 - timedelta(days=1)
-            prev_df = total_df[(total_df[date_col] >= prev_d1) & (total_df[date_col] <= prev_d2)]
+            prev_df = aggregate(start_date=prev_d1.date(), end_date=prev_d2.date())
             logger.info("YoY empty, fell back to sequential period")
         
-        def get_summary(df):
-            if df.empty:
+        def get_summary(row):
+            if row is None or int(row.get('row_count', 0) or 0) == 0:
                 return {"spend": 0, "impressions": 0, "reach": 0, "clicks": 0, "conversions": 0, "ctr": 0, "cpc": 0, "cpm": 0, "cpa": 0, "roas": 0}
-            s = float(df[spend_col].sum()) if spend_col else 0
-            i = int(df[impr_col].sum()) if impr_col else 0
-            # Use reach_col from outer scope (normalized)
-            r = int(df[reach_col].sum()) if reach_col else 0
-            c = int(df[clicks_col].sum()) if clicks_col else 0
-            cv = int(df[conv_col].sum()) if conv_col else 0
-            
-            # Use revenue_col from outer scope (normalized)
-            revenue_sum = float(df[revenue_col].sum()) if revenue_col else 0
-            logger.debug(f"Revenue sum: ${revenue_sum:,.2f}")
-            
-            return {
-                "spend": round(s, 2),
-                "impressions": i,
-                "reach": r,
-                "clicks": c,
-                "conversions": cv,
-                "ctr": round((c / i * 100) if i > 0 else 0, 2),
-                "cpc": round((s / c) if c > 0 else 0, 2),
-                "cpm": round((s / i * 1000) if i > 0 else 0, 2),
-                "cpa": round((s / cv) if cv > 0 else 0, 2),
-                "roas": round((revenue_sum / s) if s > 0 else 0, 2),
-                "revenue": round(revenue_sum, 2)
-            }
+            return summarize_metrics(row)
+        
+        def first_row(df):
+            return df.iloc[0].to_dict() if not df.empty else None
             
-        curr_summary = get_summary(curr_df)
-        prev_summary = get_summary(prev_df)
+        curr_summary = get_summary(first_row(curr_df))
+        prev_summary = get_summary(first_row(prev_df))
         
         # 3. Sparkline Data (Current Period)
         sparkline_data = []
-        for date, group in curr_df.groupby(date_col):
+        for row in aggregate(start_date=d1.date(), end_date=d2.date(), date_grain='day').to_dict('records'):
             sparkline_data.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "spend": float(group[spend_col].sum()) if spend_col else 0,
-                "impressions": int(group[impr_col].sum()) if impr_col else 0,
-                "clicks": int(group[clicks_col].sum()) if clicks_col else 0,
-                "conversions": int(group[conv_col].sum()) if conv_col else 0
+                "date": row['date'],
+                "spend": float(row['spend']),
+                "impressions": int(row['impressions']),
+                "clicks": int(row['clicks']),
+                "conversions": int(row['conversions'])
             })
-        sparkline_data.sort(key=lambda x: x['date'])
         
         # 4. Monthly Performance (granular by channel if available)
         monthly_perf = []
-        total_df['Month'] = total_df[date_col].dt.strftime('%Y-%m')
-        channel_col = find_column(total_df, 'channel')
-        
         if channel_col:
             # Group by Month and Channel
-            for (month, channel), group in total_df.groupby(['Month', channel_col]):
+            for row in aggregate(date_grain='month', group_by={'channel': channel_col}).to_dict('records'):
                 monthly_perf.append({
-                    "month": month,
-                    "channel": channel,
-                    **get_summary(group)
+                    "month": row['month'],
+                    "channel": row['channel'],
+                    **get_summary(row)
                 })
         else:
-            for month, group in total_df.groupby('Month'):
+            for row in aggregate(date_grain='month').to_dict('records'):
                 monthly_perf.append({
-                    "month": month,
-                    **get_summary(group)
+                    "month": row['month'],
+                    **get_summary(row)
                 })
         monthly_perf.sort(key=lambda x: x['month'], reverse=True)
         
         # 5. Platform Performance (granular by month, platform, and channel for linking)
         platform_perf = []
         if platform_col:
-            # Ensure Month column exists
-            if 'Month' not in total_df.columns:
-                total_df['Month'] = total_df[date_col].dt.strftime('%Y-%m')
-            
             # Group by month, platform, AND channel for maximum linking flexibility
+            group_by = {'platform': platform_col}
             if channel_col:
-                for (month, platform, channel), group in total_df.groupby(['Month', platform_col, channel_col]):
-                    platform_perf.append({
-                        "month": month,
-                        "platform": platform,
-                        "channel": channel,
-                        **get_summary(group)
-                    })
-            else:
-                for (month, platform), group in total_df.groupby(['Month', platform_col]):
-                    platform_perf.append({
-                        "month": month,
-                        "platform": platform,
-                        **get_summary(group)
-                    })
+                group_by['channel'] = channel_col
+            for row in aggregate(date_grain='month', group_by=group_by).to_dict('records'):
+                platform_perf.append({
+                    "month": row['month'],
+                    **{key: row[key] for key in group_by},
+                    **get_summary(row)
+                })
         platform_perf.sort(key=lambda x: (x.get('month', ''), -x['spend']), reverse=True)
         
         # 4. Funnel stage aggregation
         funnel_perf = []
-        funnel_col = find_column(total_df, 'funnel')
-        if funnel_col and funnel_col in total_df.columns:
-            for funnel_stage, group in total_df.groupby(funnel_col):
-                if pd.isna(funnel_stage) or funnel_stage == 'Unknown':
-                    continue
+        if funnel_col:
+            for row in aggregate(group_by={'funnel': funnel_col}, exclude_values=['Unknown']).to_dict('records'):
                 funnel_perf.append({
-                    "funnel": str(funnel_stage),
-                    **get_summary(group)
+                    "funnel": str(row['funnel']),
+                    **get_summary(row)
                 })
         funnel_perf.sort(key=lambda x: -x['spend'])
         
         # 5. Channel by Funnel aggregation
         channel_by_funnel = []
-        channel_col = find_column(total_df, 'channel')
-        if channel_col and funnel_col and channel_col in total_df.columns and funnel_col in total_df.columns:
-            for (channel, funnel_stage), group in total_df.groupby([channel_col, funnel_col]):
-                if pd.isna(channel) or pd.isna(funnel_stage) or channel == 'Unknown' or funnel_stage == 'Unknown':
-                    continue
+        if channel_col and funnel_col:
+            for row in aggregate(group_by={'channel': channel_col, 'funnel': funnel_col},
+                                 exclude_values=['Unknown']).to_dict('records'):
                 channel_by_funnel.append({
-                    "channel": str(channel),
-                    "funnel": str(funnel_stage),
-                    **get_summary(group)
+                    "channel": str(row['channel']),
+                    "funnel": str(row['funnel']),
+                    **get_summary(row)
                 })
         channel_by_funnel.sort(key=lambda x: -x['spend'])
         
@@ -920,7 +793,6 @@ async def get_data_schema(
     """
     try:
         from src.database.duckdb_manager import get_duckdb_manager
-        import pandas as pd
         
         duckdb_mgr = get_duckdb_manager()
         
@@ -934,35 +806,28 @@ async def get_data_schema(
                 "all_columns": []
             }
         
-        # Get sample data to check columns
-        df = duckdb_mgr.get_campaigns(limit=1)
-        all_columns = list(df.columns)
+        # Column resolution comes from the schema registry (no sample query)
+        schema = duckdb_mgr.get_schema()
+        all_columns = schema.columns
         
         # Check which standard metrics are available
         metrics = {
-            "spend": find_column(df, 'spend') is not None,
-            "impressions": find_column(df, 'impressions') is not None,
-            "clicks": find_column(df, 'clicks') is not None,
-            "conversions": find_column(df, 'conversions') is not None,
-            "reach": find_column(df, 'reach') is not None,
-            "ctr": find_column(df, 'clicks') is not None and find_column(df, 'impressions') is not None,
-            "cpc": find_column(df, 'spend') is not None and find_column(df, 'clicks') is not None,
-            "cpa": find_column(df, 'spend') is not None and find_column(df, 'conversions') is not None,
-            "cpm": find_column(df, 'spend') is not None and find_column(df, 'impressions') is not None,
-            "roas": find_column(df, 'spend') is not None and find_column(df, 'revenue') is not None,
+            "spend": schema.has('spend'),
+            "impressions": schema.has('impressions'),
+            "clicks": schema.has('clicks'),
+            "conversions": schema.has('conversions'),
+            "reach": schema.has('reach'),
+            "ctr": schema.has('clicks') and schema.has('impressions'),
+            "cpc": schema.has('spend') and schema.has('clicks'),
+            "cpa": schema.has('spend') and schema.has('conversions'),
+            "cpm": schema.has('spend') and schema.has('impressions'),
+            "roas": schema.has('spend') and schema.has('revenue'),
         }
         
         # Check which standard dimensions are available
         dimensions = {
-            "date": find_column(df, 'date') is not None,
-            "platform": find_column(df, 'platform') is not None,
-            "channel": find_column(df, 'channel') is not None,
-            "funnel": find_column(df, 'funnel') is not None,
-            "device": find_column(df, 'device') is not None,
-            "region": find_column(df, 'region') is not None,
-            "placement": find_column(df, 'placement') is not None,
-            "campaign": find_column(df, 'campaign') is not None,
-            "ad_type": find_column(df, 'ad_type') is not None,
+            key: schema.has(key)
+            for key in ['date', 'platform', 'channel', 'funnel', 'device', 'region', 'placement', 'campaign', 'ad_type']
         }
         
         # Find extra columns not in standard lists
@@ -982,15 +847,10 @@ async def get_data_schema(
             is_standard = any(kw in col_lower for kw in standard_metric_keywords + standard_dim_keywords)
             
             if not is_standard:
-                # Check if numeric (likely a metric) or categorical (likely a dimension)
-                try:
-                    sample = df[col].dropna().head(10)
-                    if len(sample) > 0:
-                        if pd.api.types.is_numeric_dtype(sample):
-                            extra_metrics.append(col)
-                        else:
-                            extra_dimensions.append(col)
-                except:
+                # Numeric columns are likely metrics, everything else a dimension
+                if schema.is_numeric(col):
+                    extra_metrics.append(col)
+                else:
                     extra_dimensions.append(col)
         
         return {
@@ -1009,12 +869,23 @@ async def get_data_schema(
 @router.get("/filters")
 async def get_filter_options(
     request: Request,
+    platforms: Optional[str] = None,
+    channels: Optional[str] = None,
+    funnel_stages: Optional[str] = None,
+    devices: Optional[str] = None,
+    placements: Optional[str] = None,
+    regions: Optional[str] = None,
+    ad_types: Optional[str] = None,
+    include_counts: bool = False,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Get all unique filter option values for dropdowns.
-    Uses DuckDB to dynamically detect all filterable columns.
     Any column from uploaded CSV becomes a filter automatically!
+    
+    Served from the dimension dictionary precomputed at upload. When selections
+    are passed (comma-separated), every other filter only offers values that
+    co-occur with them. include_counts adds "counts": {column_key: {value: rows}}.
     """
     try:
         from src.database.duckdb_manager import get_duckdb_manager
@@ -1032,8 +903,25 @@ async def get_filter_options(
                 "ad_types": []
             }
         
-        # Get all filter options dynamically from columns
-        all_filters = duckdb_mgr.get_filter_options()
+        # Cross-filter selections are mapped to physical columns by the schema registry
+        schema = duckdb_mgr.get_schema()
+        selection = build_dimension_filters(schema, {
+            'platform': platforms,
+            'channel': channels,
+            'funnel': funnel_stages,
+            'device': devices,
+            'placement': placements,
+            'region': regions,
+            'ad_type': ad_types
+        })
+        
+        # Get all filter options from the dimension dictionary (no table scans)
+        filter_counts = duckdb_mgr.get_filter_counts(selection or None)
+        all_filters = {
+            duckdb_mgr.filter_key(col): counts['value'].tolist()
+            for col, counts in filter_counts.items()
+            if not counts.empty
+        }
         
         logger.info(f"DuckDB filter options keys: {list(all_filters.keys())}")
         logger.info(f"geographic_region values: {all_filters.get('geographic_region', [])}")
@@ -1042,10 +930,8 @@ async def get_filter_options(
         # Map common column variations to standard filter names expected by frontend
         result = {}
         
-        # Get sample data to find actual columns
-        sample_df = duckdb_mgr.get_campaigns(limit=1)
-        
-        if not sample_df.empty:
+        # Actual columns come from the schema registry
+        if schema is not None:
             standard_mappings = {
                 "platforms": "platform",
                 "channels": "channel",
@@ -1057,7 +943,7 @@ async def get_filter_options(
             }
             
             for frontend_key, standard_key in standard_mappings.items():
-                actual_col = find_column(sample_df, standard_key)
+                actual_col = schema.resolve(standard_key)
                 if actual_col:
                     # DuckDBManager normalized keys to lower_underscore
                     api_key = actual_col.lower().replace(' ', '_')
@@ -1092,6 +978,13 @@ async def get_filter_options(
         # Remove empty arrays - only return filters that have values
         result = {k: v for k, v in result.items() if v}
         
+        if include_counts:
+            result["counts"] = {
+                duckdb_mgr.filter_key(col): {str(v): int(n) for v, n in zip(counts['value'], counts['rows'])}
+                for col, counts in filter_counts.items()
+                if not counts.empty
+            }
+        
         logger.info(f"Returning {len(result)} filters with values: {list(result.keys())}")
         return result
         
@@ -1177,8 +1070,13 @@ async def get_funnel_stats(
         if not duckdb_mgr.has_data():
             return {"data": [], "count": 0}
         
-        # Get aggregated data by Funnel
-        df = duckdb_mgr.get_aggregated_data(group_by="Funnel")
+        # Get aggregated data by the funnel column (alias-resolved)
+        schema = duckdb_mgr.get_schema()
+        funnel_col = schema.resolve('funnel') if schema else None
+        if not funnel_col:
+            return {"data": [], "count": 0}
+        
+        df = duckdb_mgr.aggregate(resolve_metric_sources(schema), group_by={'name': funnel_col})
         
         if df.empty:
             return {"data": [], "count": 0}
@@ -1187,17 +1085,11 @@ async def get_funnel_stats(
         stage_order = {'Upper': 1, 'Middle': 2, 'Lower': 3, 'TOFU': 1, 'MOFU': 2, 'BOFU': 3}
         result = []
         
-        for _, row in df.iterrows():
-            stage = str(row['name'])
+        for row in df.to_dict('records'):
+            metrics = summarize_metrics(row)
             result.append({
-                'stage': stage,
-                'spend': float(row['spend']),
-                'impressions': int(row['impressions']),
-                'clicks': int(row['clicks']),
-                'conversions': int(row['conversions']),
-                'ctr': float(row['ctr']),
-                'cpc': float(row['cpc']),
-                'cpa': float(row['cpa'])
+                'stage': str(row['name']),
+                **{k: metrics[k] for k in ['spend', 'impressions', 'clicks', 'conversions', 'ctr', 'cpc', 'cpa']}
             })
         
         # Sort by funnel order
@@ -1225,24 +1117,32 @@ async def get_audience_stats(
         if not duckdb_mgr.has_data():
             return {"data": [], "count": 0}
         
-        # Get aggregated data by Audience_Segment
-        df = duckdb_mgr.get_aggregated_data(group_by="Audience_Segment")
+        # Get aggregated data by Audience_Segment (or any audience alias)
+        schema = duckdb_mgr.get_schema()
+        if schema is None:
+            return {"data": [], "count": 0}
+        audience_col = 'Audience_Segment' if 'Audience_Segment' in schema.dtypes else schema.resolve('audience')
+        if not audience_col:
+            return {"data": [], "count": 0}
+        
+        df = duckdb_mgr.aggregate(resolve_metric_sources(schema), group_by={'name': audience_col})
         
         if df.empty:
             return {"data": [], "count": 0}
         
         # Convert to expected format
         result = []
-        for _, row in df.iterrows():
+        for row in df.to_dict('records'):
+            metrics = summarize_metrics(row)
             result.append({
                 'name': str(row['name']),
-                'spend': float(row['spend']),
-                'impressions': int(row['impressions']),
-                'clicks': int(row['clicks']),
-                'conversions': int(row['conversions']),
-                'ctr': float(row['ctr']),
-                'cvr': round((row['conversions'] / row['clicks'] * 100) if row['clicks'] > 0 else 0, 2),
-                'cpa': float(row['cpa'])
+                'spend': metrics['spend'],
+                'impressions': metrics['impressions'],
+                'clicks': metrics['clicks'],
+                'conversions': metrics['conversions'],
+                'ctr': metrics['ctr'],
+                'cvr': round((metrics['conversions'] / metrics['clicks'] * 100) if metrics['clicks'] > 0 else 0, 2),
+                'cpa': metrics['cpa']
             })
         
         # Sort by spend descending
@@ -1271,6 +1171,12 @@ async def get_suggested_questions(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _ask_in_session(duckdb_mgr, question: str) -> Dict[str, Any]:
+    """Answer a question with a pooled NL-to-SQL engine (runs in a worker thread)."""
+    with query_sessions.session(duckdb_mgr) as engine:
+        return engine.ask(question)
+
+
 @router.post("/chat")
 async def chat_global(
     request: Request,
@@ -1301,21 +1207,15 @@ async def chat_global(
             return await _handle_knowledge_mode_query(question)
         
         # 2. DATA MODE
-        if not CAMPAIGNS_PARQUET.exists():
+        duckdb_mgr = get_duckdb_manager()
+        if not duckdb_mgr.has_data():
             return {"success": True, "answer": "No campaign data found. Please upload a dynamic data file first.", "sql": ""}
             
         logger.info(f"Chat processing question: {question}")
         
-        # Load and verify data
+        # A. Try NL-to-SQL on a warm session of the current dataset version
         try:
-            query_engine.load_parquet_data(str(CAMPAIGNS_PARQUET), table_name="all_campaigns")
-        except Exception as load_err:
-            logger.error(f"Failed to load data for chat: {load_err}")
-            return {"success": False, "error": f"Failed to load data: {str(load_err)}"}
-        
-        # A. Try NL-to-SQL
-        try:
-            result = query_engine.ask(question)
+            result = await run_in_threadpool(_ask_in_session, duckdb_mgr, question)
         except Exception as ask_err:
             logger.error(f"NL-to-SQL crashed: {ask_err}")
             result = {"success": False, "error": str(ask_err)}
@@ -1324,8 +1224,8 @@ async def chat_global(
         if not result.get('success'):
             logger.info("Attempting local template fallback...")
             try:
-                from src.query_engine.template_generator import load_schema_from_parquet, generate_templates_for_schema
-                schema_columns = load_schema_from_parquet(str(CAMPAIGNS_PARQUET))
+                from src.query_engine.template_generator import generate_templates_for_schema
+                schema_columns = duckdb_mgr.get_columns()
                 if schema_columns:
                     dynamic_templates = generate_templates_for_schema(schema_columns)
                     template = next((t for t in dynamic_templates.values() if t.matches(question)), None)
@@ -1334,7 +1234,7 @@ async def chat_global(
                         logger.info(f"Using template fallback: {template.name}")
                         import duckdb
                         conn = duckdb.connect(':memory:')
-                        conn.execute("CREATE VIEW all_campaigns AS SELECT * FROM read_parquet(?)", [str(CAMPAIGNS_PARQUET)])
+                        conn.execute(f"CREATE VIEW all_campaigns AS SELECT * FROM {duckdb_mgr.get_parquet_source()}")  # nosec B608
                         df = conn.execute(template.sql).fetchdf()
                         
                         result = {
@@ -1671,66 +1571,50 @@ async def get_chart_data(
     year: Optional[int] = Query(None, description="Filter by year"),
     start_date: Optional[str] = Query(None, description="Start date YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="End date YYYY-MM-DD"),
+    format: str = Query('json', description="Response format: json (rows), columnar (column arrays) or arrow (Arrow IPC stream)"),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     Get aggregated data for charts with dynamic schema handling.
     Automatically detects column names and date types.
+    Results are fetched as Arrow and serialized without a pandas round-trip.
     """
+    response_format = validate_format(format)
     try:
         duckdb_mgr = get_duckdb_manager()
         if not duckdb_mgr.has_data():
             return {"data": []}
             
+        # 1. Column names and date type come from the schema registry
+        schema = duckdb_mgr.get_schema()
+        
+        def resolve(key):
+            """Quoted physical column for a canonical key or raw column name."""
+            return f'"{schema.resolve(key) or key}"'
+        
+        def metric_sql(key):
+            """Per-row value of a metric, consolidating all of its alias columns."""
+            sources = schema.sources(key)
+            if not sources:
+                return resolve(key)
+            casts = ", ".join(f'TRY_CAST("{c}" AS DOUBLE)' for c in sources)
+            return f"COALESCE({casts})" if len(sources) > 1 else f'"{sources[0]}"'
+        
+        # Resolve columns
+        db_x = resolve(x_axis)
+        db_group = resolve(group_by) if group_by else None
+        col_spend = metric_sql('spend')
+        col_impressions = metric_sql('impressions')
+        col_clicks = metric_sql('clicks')
+        col_conversions = metric_sql('conversions')
+        col_date = resolve('date')
+        
+        # String dates are parsed in SQL, native DATE/TIMESTAMP columns used as-is
+        date_expr = col_date
+        if schema.date_is_string:
+            date_expr = duckdb_mgr.date_expression(schema.date_column)
+        
         with duckdb_mgr.connection() as conn:
-            # 1. INTROSPECTION: Get actual column names from Parquet
-            schema_df = conn.execute(f"DESCRIBE SELECT * FROM {duckdb_mgr.get_optimized_table()}").fetchdf()
-            cols = {row['column_name'].lower(): row['column_name'] for _, row in schema_df.iterrows()}
-            
-            # Helper to resolve actual DB column name
-            def resolve(key):
-                aliases = {
-                    'spend': ['total spent', 'spend', 'cost'],
-                    'impressions': ['impressions'],
-                    'clicks': ['clicks'],
-                    'conversions': ['site visit', 'conversions', 'leads'],
-                    'date': ['date', 'day'],
-                    'platform': ['platform', 'source', 'account'],
-                    'channel': ['channel', 'medium'],
-                    'region': ['geographic_region', 'region', 'country'],
-                    'device': ['device_type', 'device'],
-                    'funnel': ['funnel', 'funnel_stage'],
-                    'campaign': ['campaign', 'campaign_name']
-                }
-                for alias in aliases.get(key.lower(), []):
-                    if alias.lower() in cols:
-                        return f'"{cols[alias.lower()]}"'
-                if key.lower() in cols:
-                    return f'"{cols[key.lower()]}"'
-                return f'"{key}"'
-            
-            # Resolve columns
-            db_x = resolve(x_axis)
-            db_group = resolve(group_by) if group_by else None
-            col_spend = resolve('spend')
-            col_impressions = resolve('impressions')
-            col_clicks = resolve('clicks')
-            col_conversions = resolve('conversions')
-            col_date = resolve('date')
-            
-            # Check Date Type for proper filtering
-            date_col_name = col_date.strip('"').lower()
-            date_type_row = schema_df[schema_df['column_name'].str.lower() == date_col_name]
-            is_date_string = False
-            if not date_type_row.empty:
-                dtype = str(date_type_row.iloc[0]['column_type'])
-                if 'VARCHAR' in dtype or 'STRING' in dtype:
-                    is_date_string = True
-            
-            date_expr = col_date
-            if is_date_string:
-                date_expr = f"CAST({col_date} AS DATE)"
-            
             # 2. Build WHERE clause
             where_clauses = ["1=1"]
             params = []
@@ -1821,27 +1705,21 @@ async def get_chart_data(
                 group_cols.append(db_group)
             group_sql = ", ".join(group_cols)
             
+            # x is rendered as text (dates as YYYY-MM-DD) but ordered by its native value
             query = f"""
                 SELECT 
-                    {db_x} as x,
+                    CAST({db_x} AS VARCHAR) as x,
                     {f"{db_group} as group_col," if db_group else ""}
-                    {select_y} as y
+                    COALESCE({select_y}, 0) as y
                 FROM {duckdb_mgr.get_optimized_table()}
                 WHERE {where_sql}
                 GROUP BY {group_sql}
-                ORDER BY x ASC
+                ORDER BY {db_x} ASC
             """
             
-            df = conn.execute(query, params).fetchdf()
-            
-            if df.empty:
-                return {"data": []}
-            
-            # Convert date column to string for JSON
-            if 'x' in df.columns:
-                df['x'] = df['x'].astype(str)
+            table = duckdb_mgr.fetch_arrow(conn.execute(query, params))
             
-            return {"data": df.fillna(0).to_dict(orient="records")}
+            return table_response(table, response_format, envelope=lambda data: {"data": data})
             
     except Exception as e:
         logger.error(f"Chart data error: {e}")
@@ -1897,8 +1775,7 @@ async def get_regression_analysis(
         # Build filters for DuckDB
         filter_params = {}
         if platforms:
-            sample_df = duckdb_mgr.get_campaigns(limit=1)
-            platform_col = find_column(sample_df, 'platform')
+            platform_col = duckdb_mgr.get_schema().resolve('platform')
             if platform_col:
                 filter_params[platform_col] = platforms
 
@@ -2352,7 +2229,7 @@ async def chat_with_campaign(
     try:
         query = chat_req.message
         engine = NaturalLanguageQueryEngine()
-        engine.load_parquet_data(CAMPAIGNS_PARQUET)
+        engine.load_parquet_data(str(get_duckdb_manager().dataset_dir))
         
         # Filter context
         context_query = f"Regarding campaign '{campaign_id}': {query}"
@@ -2743,7 +2620,7 @@ async def get_campaign(
     try:
         duckdb_mgr = get_duckdb_manager()
         with duckdb_mgr.connection() as conn:
-            query = f"SELECT * FROM '{CAMPAIGNS_PARQUET}' WHERE \"Creative_ID\" = ? OR \"Campaign_Name_Full\" = ? LIMIT 1"  # nosec B608
+            query = f"SELECT * FROM {duckdb_mgr.get_parquet_source()} WHERE \"Creative_ID\" = ? OR \"Campaign_Name_Full\" = ? LIMIT 1"  # nosec B608
             try:
                 df = conn.execute(query, [campaign_id, campaign_id]).df()
             except Exception as e:
@@ -2770,7 +2647,7 @@ async def get_campaign_insights(request: Request, campaign_id: str, current_user
     try:
         duckdb_mgr = get_duckdb_manager()
         with duckdb_mgr.connection() as conn:
-            df = conn.execute(f"SELECT * FROM \"{CAMPAIGNS_PARQUET}\" WHERE \"Creative_ID\" = ? OR \"Campaign_Name_Full\" = ?", [campaign_id, campaign_id]).df()
+            df = conn.execute(f"SELECT * FROM {duckdb_mgr.get_parquet_source()} WHERE \"Creative_ID\" = ? OR \"Campaign_Name_Full\" = ?", [campaign_id, campaign_id]).df()
         if df.empty: raise HTTPException(status_code=404, detail="Campaign not found")
         from src.analytics.auto_insights import MediaAnalyticsExpert
         analyst = MediaAnalyticsExpert()
@@ -2786,7 +2663,7 @@ async def get_campaign_visualizations_single(request: Request, campaign_id: str,
     try:
         duckdb_mgr = get_duckdb_manager()
         with duckdb_mgr.connection() as conn:
-            df = conn.execute(f"SELECT * FROM \"{CAMPAIGNS_PARQUET}\" WHERE \"Creative_ID\" = ? OR \"Campaign_Name_Full\" = ? LIMIT 1", [campaign_id, campaign_id]).df()  # nosec B608
+            df = conn.execute(f"SELECT * FROM {duckdb_mgr.get_parquet_source()} WHERE \"Creative_ID\" = ? OR \"Campaign_Name_Full\" = ? LIMIT 1", [campaign_id, campaign_id]).df()  # nosec B608
         if df.empty: raise HTTPException(status_code=404, detail="Campaign not found")
         return {"trend": [], "device": [], "platform": []}
     except HTTPException: raise
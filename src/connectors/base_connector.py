@@ -14,6 +14,8 @@ import os
 
 from loguru import logger
 
+from src.connectors.mock_responses import simulate_latency
+
 
 class ConnectorStatus(str, Enum):
     """Connection status states."""
@@ -242,6 +244,7 @@ class BaseAdConnector(ABC):
         """
         if self.use_mock:
             logger.info(f"Testing {self.PLATFORM_NAME} connection (MOCK MODE)")
+            simulate_latency(self.PLATFORM_NAME)
             self._connected = True
             return ConnectionResult(
                 success=True,
@@ -295,6 +298,7 @@ class BaseAdConnector(ABC):
         """
         if self.use_mock:
             logger.info(f"Fetching campaigns from {self.PLATFORM_NAME} (MOCK MODE)")
+            simulate_latency(self.PLATFORM_NAME)
             return self._get_mock_campaigns()
         
         if not self.is_connected:
@@ -327,6 +331,7 @@ class BaseAdConnector(ABC):
         
         if self.use_mock:
             logger.info(f"Fetching performance from {self.PLATFORM_NAME} (MOCK MODE)")
+            simulate_latency(self.PLATFORM_NAME)
             return self._get_mock_performance(start_date, end_date)
         
         if not self.is_connected:
@@ -3,11 +3,21 @@ Unified Ad Connector Manager.
 
 Provides a single interface to manage all ad platform connectors,
 test connections, and retrieve aggregated data.
+
+Calls that span several platforms run concurrently on a bounded thread pool,
+so their latency is that of the slowest platform rather than the sum of all
+of them. Every platform call has its own timeout; platforms that fail or
+time out are reported per platform while the others still return (partial
+results), and each call's latency is recorded in the metrics collector.
 """
 
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 import os
+import threading
+import time
 
 from loguru import logger
 
@@ -30,6 +40,54 @@ from src.connectors.tradedesk_connector import TradeDeskConnector
 from src.connectors.amazon_dsp_connector import AmazonDSPConnector
 from src.connectors.pinterest_ads_connector import PinterestAdsConnector
 from src.connectors.apple_search_ads_connector import AppleSearchAdsConnector
+from src.utils.observability import metrics
+
+
+class CallStatus:
+    """Outcome of one platform call in a fan-out."""
+    OK = "ok"
+    ERROR = "error"
+    TIMEOUT = "timeout"
+
+
+@dataclass
+class PlatformCallResult:
+    """Result, error or timeout of one platform call."""
+    platform: str
+    status: str
+    value: Any = None
+    error: Optional[str] = None
+    latency_ms: float = 0.0
+    
+    @property
+    def ok(self) -> bool:
+        return self.status == CallStatus.OK
+
+
+@dataclass
+class FanOutResult:
+    """Per-platform results of a call made on several platforms concurrently."""
+    operation: str
+    results: Dict[str, PlatformCallResult] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+    
+    @property
+    def values(self) -> Dict[str, Any]:
+        """Return values of the platforms that succeeded."""
+        return {p: r.value for p, r in self.results.items() if r.ok}
+    
+    @property
+    def failures(self) -> Dict[str, PlatformCallResult]:
+        """Platforms that raised or timed out."""
+        return {p: r for p, r in self.results.items() if not r.ok}
+    
+    @property
+    def partial(self) -> bool:
+        return bool(self.failures)
+    
+    @property
+    def latency_ms(self) -> Dict[str, float]:
+        return {p: round(r.latency_ms, 1) for p, r in self.results.items()}
 
 
 class AdConnectorManager:
@@ -41,8 +99,15 @@ class AdConnectorManager:
     - Aggregated campaign data across platforms
     - Unified performance metrics
     - Mock mode support for all connectors
+    - Concurrent multi-platform calls with per-platform timeouts
     """
     
+    # Platform calls running at once (per manager)
+    DEFAULT_MAX_WORKERS = 8
+    
+    # Seconds a platform call may run (and, separately, wait for a worker)
+    DEFAULT_TIMEOUT = 30.0
+    
     SUPPORTED_PLATFORMS = {
         # Phase 1: Core Platforms
         "google_ads": GoogleAdsConnector,
@@ -60,19 +125,34 @@ class AdConnectorManager:
         "apple_search_ads": AppleSearchAdsConnector,
     }
     
-    def __init__(self, use_mock: bool = None, platforms: Optional[List[str]] = None):
+    def __init__(
+        self,
+        use_mock: bool = None,
+        platforms: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        platform_timeouts: Optional[Dict[str, float]] = None,
+    ):
         """
         Initialize the connector manager.
         
         Args:
             use_mock: If True, all connectors use mock mode.
             platforms: List of platforms to initialize. If None, initializes all.
+            max_workers: Concurrent platform calls (default AD_CONNECTORS_MAX_WORKERS or 8).
+            timeout: Seconds per platform call (default AD_CONNECTORS_TIMEOUT_SECONDS or 30).
+            platform_timeouts: Per-platform overrides of ``timeout``.
         """
         if use_mock is None:
             use_mock = os.getenv("AD_CONNECTORS_MOCK_MODE", "true").lower() == "true"
         
         self.use_mock = use_mock
+        self.max_workers = max_workers or int(os.getenv("AD_CONNECTORS_MAX_WORKERS", self.DEFAULT_MAX_WORKERS))
+        self.timeout = timeout or float(os.getenv("AD_CONNECTORS_TIMEOUT_SECONDS", self.DEFAULT_TIMEOUT))
+        self.platform_timeouts = dict(platform_timeouts or {})
         self._connectors: Dict[str, BaseAdConnector] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         
         # Initialize requested platforms
         platforms = platforms or list(self.SUPPORTED_PLATFORMS.keys())
@@ -92,6 +172,113 @@ class AdConnectorManager:
         """Get a specific connector by platform name."""
         return self._connectors.get(platform)
     
+    def _pool(self) -> ThreadPoolExecutor:
+        """Shared worker pool, created on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="ad-connector"
+                )
+            return self._executor
+    
+    def fan_out(
+        self,
+        operation: str,
+        call: Callable[[BaseAdConnector], Any],
+        platforms: Optional[List[str]] = None,
+    ) -> FanOutResult:
+        """
+        Run ``call(connector)`` for each platform concurrently.
+        
+        Each call may run for its platform's timeout once a worker picks it
+        up, and may wait as long again for a worker. A call that times out is
+        reported as such and left to finish in the background (connector
+        calls can't be interrupted); one that hasn't started is cancelled.
+        
+        Args:
+            operation: Name used in logs and metrics (e.g. "get_campaigns").
+            call: Function receiving the platform's connector.
+            platforms: Platforms to call. If None, all configured platforms.
+            
+        Returns:
+            FanOutResult with one PlatformCallResult per known platform.
+        """
+        platforms = [p for p in (platforms or list(self._connectors)) if p in self._connectors]
+        outcome = FanOutResult(operation=operation)
+        begin = time.perf_counter()
+        started: Dict[str, float] = {}
+        finished: Dict[str, float] = {}
+        
+        def run(platform: str) -> Any:
+            started[platform] = time.perf_counter()
+            try:
+                return call(self._connectors[platform])
+            finally:
+                finished[platform] = time.perf_counter()
+        
+        pool = self._pool()
+        futures: Dict[Future, str] = {pool.submit(run, p): p for p in platforms}
+        pending = set(futures)
+        
+        while pending:
+            now = time.perf_counter()
+            deadlines = {
+                f: started.get(futures[f], begin) + self.platform_timeouts.get(futures[f], self.timeout)
+                for f in pending
+            }
+            for future in [f for f in pending if deadlines[f] <= now and not f.done()]:
+                platform = futures[future]
+                pending.discard(future)
+                future.cancel()
+                was_started = platform in started
+                self._record(outcome, PlatformCallResult(
+                    platform=platform,
+                    status=CallStatus.TIMEOUT,
+                    error=(
+                        f"Timed out after {self.platform_timeouts.get(platform, self.timeout)}s"
+                        if was_started else "Timed out waiting for a worker"
+                    ),
+                    latency_ms=(now - started[platform]) * 1000 if was_started else 0.0,
+                ))
+            if not pending:
+                break
+            
+            done, pending = wait(
+                pending,
+                timeout=max(0.0, min(deadlines[f] for f in pending) - now),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                platform = futures[future]
+                latency_ms = (finished.get(platform, time.perf_counter()) - started.get(platform, begin)) * 1000
+                error = future.exception()
+                if error is None:
+                    result = PlatformCallResult(platform, CallStatus.OK, future.result(), latency_ms=latency_ms)
+                else:
+                    result = PlatformCallResult(platform, CallStatus.ERROR, error=str(error), latency_ms=latency_ms)
+                self._record(outcome, result)
+        
+        outcome.elapsed_ms = (time.perf_counter() - begin) * 1000
+        # Report in the order the platforms were requested
+        outcome.results = {p: outcome.results[p] for p in platforms}
+        if outcome.partial:
+            logger.warning(
+                f"{operation}: {len(outcome.failures)} of {len(platforms)} platforms failed",
+                failures={p: r.error for p, r in outcome.failures.items()},
+            )
+        return outcome
+    
+    def _record(self, outcome: FanOutResult, result: PlatformCallResult):
+        """Add a platform result to ``outcome`` and to the connector metrics."""
+        outcome.results[result.platform] = result
+        labels = {"platform": result.platform, "operation": outcome.operation}
+        metrics.increment("ad_connector_calls_total", labels={**labels, "status": result.status})
+        if result.status != CallStatus.TIMEOUT:
+            # Timed-out calls only have a lower bound; they are counted by status
+            metrics.observe("ad_connector_latency_ms", result.latency_ms, labels=labels)
+        if result.status == CallStatus.ERROR:
+            logger.error(f"{outcome.operation} failed for {result.platform}: {result.error}")
+    
     def test_connection(self, platform: str) -> ConnectionResult:
         """Test connection for a specific platform."""
         connector = self._connectors.get(platform)
@@ -107,18 +294,29 @@ class AdConnectorManager:
         return connector.test_connection()
     
     def test_all_connections(self) -> Dict[str, ConnectionResult]:
-        """Test connections for all configured platforms."""
+        """Test connections for all configured platforms (concurrently)."""
+        logger.info(f"Testing connections for {len(self._connectors)} platforms...")
+        outcome = self.fan_out("test_connection", lambda connector: connector.test_connection())
+        
         results = {}
-        for platform, connector in self._connectors.items():
-            logger.info(f"Testing connection for {platform}...")
-            results[platform] = connector.test_connection()
+        for platform, call in outcome.results.items():
+            if call.ok:
+                results[platform] = call.value
+            else:
+                results[platform] = ConnectionResult(
+                    success=False,
+                    status=ConnectorStatus.ERROR,
+                    message=f"Connection test for {platform} {'timed out' if call.status == CallStatus.TIMEOUT else 'failed'}",
+                    platform=platform,
+                    is_mock=self.use_mock,
+                    error_details=call.error,
+                )
         return results
     
     def get_connection_status(self) -> Dict[str, Dict[str, Any]]:
         """Get status summary for all connectors."""
         status = {}
-        for platform, connector in self._connectors.items():
-            result = connector.test_connection()
+        for platform, result in self.test_all_connections().items():
             status[platform] = {
                 "connected": result.success,
                 "status": result.status.value,
@@ -144,21 +342,15 @@ class AdConnectorManager:
             end_date: Optional end date filter.
             
         Returns:
-            Dictionary mapping platform name to list of campaigns.
+            Dictionary mapping platform name to list of campaigns (empty for
+            platforms that failed or timed out).
         """
-        platforms = platforms or list(self._connectors.keys())
-        campaigns = {}
-        
-        for platform in platforms:
-            connector = self._connectors.get(platform)
-            if connector:
-                try:
-                    campaigns[platform] = connector.get_campaigns(start_date, end_date)
-                except Exception as e:
-                    logger.error(f"Failed to get campaigns from {platform}: {e}")
-                    campaigns[platform] = []
-        
-        return campaigns
+        outcome = self.fan_out(
+            "get_campaigns",
+            lambda connector: connector.get_campaigns(start_date, end_date),
+            platforms,
+        )
+        return {platform: call.value if call.ok else [] for platform, call in outcome.results.items()}
     
     def get_all_campaigns(
         self,
@@ -198,20 +390,22 @@ class AdConnectorManager:
             end_date: End date for metrics.
             
         Returns:
-            Dictionary mapping platform name to performance metrics.
+            Dictionary mapping platform name to performance metrics (platforms
+            that failed or timed out are left out).
         """
-        platforms = platforms or list(self._connectors.keys())
-        performance = {}
-        
-        for platform in platforms:
-            connector = self._connectors.get(platform)
-            if connector:
-                try:
-                    performance[platform] = connector.get_performance(start_date, end_date)
-                except Exception as e:
-                    logger.error(f"Failed to get performance from {platform}: {e}")
-        
-        return performance
+        return self._fetch_performance(platforms, start_date, end_date).values
+    
+    def _fetch_performance(
+        self,
+        platforms: Optional[List[str]],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+    ) -> FanOutResult:
+        return self.fan_out(
+            "get_performance",
+            lambda connector: connector.get_performance(start_date, end_date),
+            platforms,
+        )
     
     def get_aggregated_performance(
         self,
@@ -222,9 +416,12 @@ class AdConnectorManager:
         Get aggregated performance metrics across all platforms.
         
         Returns:
-            Dictionary with totals and per-platform breakdown.
+            Dictionary with totals and per-platform breakdown. Totals cover
+            the platforms that responded; ``partial`` and ``failed_platforms``
+            report the ones that didn't, and ``latency_ms`` each call's time.
         """
-        performance = self.get_performance(None, start_date, end_date)
+        outcome = self._fetch_performance(None, start_date, end_date)
+        performance = outcome.values
         
         # Calculate totals
         total_spend = 0.0
@@ -235,14 +432,14 @@ class AdConnectorManager:
         
         platform_breakdown = {}
         
-        for platform, metrics in performance.items():
-            total_spend += metrics.spend
-            total_impressions += metrics.impressions
-            total_clicks += metrics.clicks
-            total_conversions += metrics.conversions
-            total_revenue += metrics.revenue
+        for platform, perf in performance.items():
+            total_spend += perf.spend
+            total_impressions += perf.impressions
+            total_clicks += perf.clicks
+            total_conversions += perf.conversions
+            total_revenue += perf.revenue
             
-            platform_breakdown[platform] = metrics.to_dict()
+            platform_breakdown[platform] = perf.to_dict()
         
         return {
             "totals": {
@@ -261,12 +458,19 @@ class AdConnectorManager:
                 "end": end_date.isoformat() if end_date else None,
             },
             "is_mock": self.use_mock,
+            "partial": outcome.partial,
+            "failed_platforms": {p: r.error for p, r in outcome.failures.items()},
+            "latency_ms": outcome.latency_ms,
         }
     
     def disconnect_all(self):
         """Disconnect from all platforms."""
         for platform, connector in self._connectors.items():
             connector.disconnect()
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
         logger.info("Disconnected from all platforms")
 
 
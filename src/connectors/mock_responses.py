@@ -7,7 +7,9 @@ for testing without real advertising accounts.
 
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
+import os
 import random
+import time
 
 
 def _random_date_range(days_back: int = 90) -> tuple:
@@ -429,3 +431,31 @@ def get_mock_account(platform: str) -> Dict[str, Any]:
         "dv360": DV360_ACCOUNT,
     }
     return accounts.get(platform, {})
+
+
+# =============================================================================
+# Simulated API Latency
+# =============================================================================
+
+# Seconds each mock API call sleeps, per platform ("*" applies to every
+# platform); AD_CONNECTORS_MOCK_LATENCY_MS is the default when unset
+MOCK_LATENCY_SECONDS: Dict[str, float] = {}
+
+
+def set_mock_latency(seconds: float, platform: str = "*"):
+    """Make mock calls for ``platform`` (or all platforms) take ``seconds``."""
+    MOCK_LATENCY_SECONDS[platform] = seconds
+
+
+def clear_mock_latency():
+    """Remove all latency set with ``set_mock_latency``."""
+    MOCK_LATENCY_SECONDS.clear()
+
+
+def simulate_latency(platform: str):
+    """Sleep for the mock latency configured for ``platform``."""
+    seconds = MOCK_LATENCY_SECONDS.get(platform, MOCK_LATENCY_SECONDS.get("*"))
+    if seconds is None:
+        seconds = float(os.getenv("AD_CONNECTORS_MOCK_LATENCY_MS", "0")) / 1000
+    if seconds > 0:
+        time.sleep(seconds)
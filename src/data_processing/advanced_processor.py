@@ -7,9 +7,12 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from loguru import logger
+
 import warnings
 warnings.filterwarnings('ignore')
 
+from ..utils.data_normalizer import ColumnProfile, get_column_types
+
 
 class MediaDataProcessor:
     """Advanced processor for media campaign data with multi-granularity support."""
@@ -64,13 +67,19 @@ class MediaDataProcessor:
         self.time_granularity = None
         logger.info("Initialized MediaDataProcessor")
     
-    def load_data(self, df: pd.DataFrame, auto_detect: bool = True) -> pd.DataFrame:
+    def load_data(
+        self,
+        df: pd.DataFrame,
+        auto_detect: bool = True,
+        column_types: Optional[Dict[Any, ColumnProfile]] = None
+    ) -> pd.DataFrame:
         """
         Load and prepare data with automatic type detection.
         
         Args:
             df: Input DataFrame
             auto_detect: Automatically detect and fix data types
+            column_types: Profiles already computed for ``df`` (see get_column_types)
             
         Returns:
             Processed DataFrame
@@ -81,7 +90,7 @@ class MediaDataProcessor:
         self.df = df.copy()
         
         if auto_detect:
-            self.df = self._auto_detect_types(self.df)
+            self.df = self._auto_detect_types(self.df, column_types)
             self.df = self._detect_date_column(self.df)
             self.df = self._standardize_column_names(self.df)
             self.df = self._calculate_missing_metrics(self.df)
@@ -89,26 +98,33 @@ class MediaDataProcessor:
         logger.info(f"Data loaded successfully with {len(self.df.columns)} columns")
         return self.df
     
-    def _auto_detect_types(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Automatically detect and convert data types."""
+    def _auto_detect_types(
+        self,
+        df: pd.DataFrame,
+        column_types: Optional[Dict[Any, ColumnProfile]] = None
+    ) -> pd.DataFrame:
+        """Automatically detect and convert data types, reusing precomputed profiles."""
         logger.info("Auto-detecting data types...")
         
+        # Shared, sample-based detection; only columns without a matching profile are profiled
+        column_types = get_column_types(df, column_types)
+        
         for col in df.columns:
             # Skip if already datetime
             if pd.api.types.is_datetime64_any_dtype(df[col]):
                 continue
             
-            # Try to convert to numeric
+            # Convert to numeric when most rows hold numbers once formatting is removed
             if df[col].dtype == 'object':
-                # Remove common formatting
+                profile = column_types[col]
+                if profile.cleaned_numeric_ratio * (1 - profile.null_ratio) <= 0.8:  # 80% threshold
+                    continue
+                
                 cleaned = df[col].astype(str).str.replace(',', '').str.replace('$', '').str.replace('%', '')
                 
                 try:
-                    # Try integer first
-                    numeric_values = pd.to_numeric(cleaned, errors='coerce')
-                    if numeric_values.notna().sum() > len(df) * 0.8:  # 80% threshold
-                        df[col] = numeric_values
-                        logger.debug(f"Converted {col} to numeric")
+                    df[col] = pd.to_numeric(cleaned, errors='coerce')
+                    logger.debug(f"Converted {col} to numeric")
                 except Exception as e:
                     logger.debug(f"Type detection failed for {col}: {e}")
         
@@ -0,0 +1,253 @@
+"""
+Precomputed dimension dictionaries for filter options.
+
+Built once per dataset write with a single ``GROUPING SETS`` scan that yields:
+
+* the *cube*: row counts for every combination of dimension values, used for
+  cross-filter counts ("channels available for the selected platforms"), and
+* per-dimension dictionaries: distinct values with row counts.
+
+Both are additive, so an append merges the dictionary of the new files into
+the existing one instead of rescanning the dataset. The result is stored next
+to the Parquet files (Arrow IPC) and served from memory. Datasets whose cube
+is too large to keep fall back to a single ``cross_filter_query()`` scan.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Cross-filter cube is dropped (per-dimension dictionaries kept) above this many combinations
+MAX_CUBE_ROWS = 200_000
+
+# Values never offered as filter options
+EXCLUDED_VALUES = {'Unknown', ''}
+
+ROWS_COLUMN = '__rows'
+SET_COLUMN = '__set'
+CUBE_SET = 0  # GROUPING() bitmask of the all-dimensions grouping set
+
+
+class DimensionDictionary:
+    """Distinct values and row counts for the filterable columns of a dataset."""
+
+    def __init__(
+        self,
+        columns: List[str],
+        values: Dict[str, pd.DataFrame],
+        cube: Optional[pd.DataFrame] = None
+    ):
+        """
+        Args:
+            columns: Filterable physical columns
+            values: Column -> DataFrame(value, rows) of distinct non-null values
+            cube: Row counts per value combination (columns + ``__rows``), if small enough
+        """
+        self.columns = columns
+        self.values = values
+        self.cube = cube
+
+    @property
+    def supports_cross_filter(self) -> bool:
+        return self.cube is not None
+
+    @staticmethod
+    def build_query(columns: List[str], source: str) -> str:
+        """
+        Single-scan query producing the cube and the per-column dictionaries.
+        Values are cast to VARCHAR; ``__set`` is the GROUPING() bitmask of each row.
+        """
+        quoted = [f'"{c}"' for c in columns]
+        selects = ", ".join(f'CAST({q} AS VARCHAR) AS {q}' for q in quoted)
+        sets = [f"({', '.join(quoted)})"]
+        if len(columns) > 1:
+            sets += [f"({q})" for q in quoted]
+        return (
+            f"SELECT {selects}, COUNT(*) AS {ROWS_COLUMN}, GROUPING({', '.join(quoted)}) AS {SET_COLUMN} "
+            f"FROM {source} GROUP BY GROUPING SETS ({', '.join(sets)})"  # nosec B608
+        )
+
+    @staticmethod
+    def _single_set(columns: List[str], index: int) -> int:
+        """GROUPING() bitmask of the set grouping only columns[index] (bits are set for ungrouped columns)."""
+        all_bits = (1 << len(columns)) - 1
+        return all_bits ^ (1 << (len(columns) - 1 - index))
+
+    @staticmethod
+    def cross_filter_query(
+        columns: List[str],
+        selected: Dict[str, List[str]],
+        source: str
+    ) -> Tuple[str, List[Any]]:
+        """
+        Single-scan fallback for cross-filter counts when no cube is kept.
+        Per-column grouping sets; ``__rows_<i>`` counts rows matching every selection
+        except the one on column i, ``__rows`` rows matching all selections.
+        """
+        quoted = [f'"{c}"' for c in columns]
+        params: List[Any] = []
+
+        def predicate(exclude: Optional[str]) -> str:
+            clauses = []
+            for col, vals in selected.items():
+                if col != exclude:
+                    clauses.append(f'CAST("{col}" AS VARCHAR) IN ({", ".join("?" for _ in vals)})')
+                    params.extend(vals)
+            return " AND ".join(clauses) or "TRUE"
+
+        counts = [
+            f"COUNT(*) FILTER (WHERE {predicate(col)}) AS {ROWS_COLUMN}_{i}"
+            for i, col in enumerate(columns) if col in selected
+        ]
+        counts.append(f"COUNT(*) FILTER (WHERE {predicate(None)}) AS {ROWS_COLUMN}")
+        selects = ", ".join(f'CAST({q} AS VARCHAR) AS {q}' for q in quoted)
+        sets = ", ".join(f"({q})" for q in quoted)
+        query = (
+            f"SELECT {selects}, {', '.join(counts)}, GROUPING({', '.join(quoted)}) AS {SET_COLUMN} "
+            f"FROM {source} GROUP BY GROUPING SETS ({sets})"  # nosec B608
+        )
+        return query, params
+
+    @classmethod
+    def from_cross_filter_result(
+        cls,
+        columns: List[str],
+        selected: Dict[str, List[str]],
+        result: pd.DataFrame,
+        limit: int = 100
+    ) -> Dict[str, pd.DataFrame]:
+        """Same output as options(), from the result of cross_filter_query()."""
+        options = {}
+        for i, col in enumerate(columns):
+            count_col = f"{ROWS_COLUMN}_{i}" if col in selected else ROWS_COLUMN
+            rows = result[(result[SET_COLUMN] == cls._single_set(columns, i)) & (result[count_col] > 0)]
+            counts = cls._value_counts(rows[[col, count_col]].rename(columns={col: 'value', count_col: ROWS_COLUMN}))
+            counts = counts[~counts['value'].isin(EXCLUDED_VALUES)]
+            options[col] = counts.head(limit).reset_index(drop=True)
+        return options
+
+    @classmethod
+    def from_grouping_sets(cls, columns: List[str], result: pd.DataFrame) -> 'DimensionDictionary':
+        """Build from the output of build_query()."""
+        if not columns:
+            return cls([], {})
+
+        cube = result[result[SET_COLUMN] == CUBE_SET][columns + [ROWS_COLUMN]].reset_index(drop=True)
+        values = {}
+        for i, col in enumerate(columns):
+            # With one column the cube is also that column's own grouping set
+            rows = cube if len(columns) == 1 else result[result[SET_COLUMN] == cls._single_set(columns, i)]
+            values[col] = cls._value_counts(rows[[col, ROWS_COLUMN]].rename(columns={col: 'value'}))
+
+        return cls(columns, values, cube if len(cube) <= MAX_CUBE_ROWS else None)
+
+    @staticmethod
+    def _value_counts(frame: pd.DataFrame) -> pd.DataFrame:
+        """Collapse (value, rows) pairs into sorted distinct non-null values with summed counts."""
+        frame = frame[frame['value'].notna()]
+        return (
+            frame.groupby('value', sort=True)[ROWS_COLUMN].sum()
+            .rename('rows').reset_index()
+        )
+
+    def merge(self, other: 'DimensionDictionary') -> 'DimensionDictionary':
+        """Combine with the dictionary of appended data (columns must match)."""
+        if self.columns != other.columns:
+            raise ValueError("Cannot merge dimension dictionaries with different columns")
+
+        values = {
+            col: self._value_counts(pd.concat([
+                self.values[col].rename(columns={'rows': ROWS_COLUMN}),
+                other.values[col].rename(columns={'rows': ROWS_COLUMN})
+            ]))
+            for col in self.columns
+        }
+        cube = None
+        if self.cube is not None and other.cube is not None and self.columns:
+            cube = (
+                pd.concat([self.cube, other.cube])
+                .groupby(self.columns, dropna=False, sort=False)[ROWS_COLUMN].sum()
+                .reset_index()
+            )
+            if len(cube) > MAX_CUBE_ROWS:
+                cube = None
+        return DimensionDictionary(self.columns, values, cube)
+
+    def options(
+        self,
+        selected: Optional[Dict[str, List[Any]]] = None,
+        limit: int = 100
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Get filter options with row counts.
+
+        Each column's counts honour the selections on the *other* columns, so a
+        column's own selection never hides its alternatives.
+
+        Args:
+            selected: Physical column -> selected values
+            limit: Maximum values per column (sorted by value)
+
+        Returns:
+            Column -> DataFrame(value, rows), excluding empty/'Unknown' values
+        """
+        selected = {
+            col: [str(v) for v in vals]
+            for col, vals in (selected or {}).items()
+            if col in self.columns and vals
+        }
+        if selected and self.cube is None:
+            raise ValueError("Cross-filter counts are not available for this dataset")
+
+        result = {}
+        for col in self.columns:
+            others = {c: v for c, v in selected.items() if c != col}
+            if others:
+                mask = pd.Series(True, index=self.cube.index)
+                for other_col, vals in others.items():
+                    mask &= self.cube[other_col].isin(vals)
+                counts = self._value_counts(
+                    self.cube.loc[mask, [col, ROWS_COLUMN]].rename(columns={col: 'value'})
+                )
+            else:
+                counts = self.values[col]
+            counts = counts[~counts['value'].isin(EXCLUDED_VALUES)]
+            result[col] = counts.head(limit).reset_index(drop=True)
+        return result
+
+    def save(self, path: Path) -> None:
+        """Store as one Arrow IPC table (cube rows have ``__set`` 0, value rows the column index + 1)."""
+        frames = []
+        if self.cube is not None:
+            frames.append(self.cube.assign(**{SET_COLUMN: CUBE_SET}))
+        for i, col in enumerate(self.columns):
+            frames.append(
+                self.values[col].rename(columns={'value': col, 'rows': ROWS_COLUMN})
+                .assign(**{SET_COLUMN: i + 1})
+            )
+        schema = pa.schema(
+            [pa.field(c, pa.string()) for c in self.columns]
+            + [pa.field(ROWS_COLUMN, pa.int64()), pa.field(SET_COLUMN, pa.int64())]
+        )
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=schema.names)
+        frame = frame.reindex(columns=schema.names)
+
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        feather.write_feather(pa.Table.from_pandas(frame, schema=schema, preserve_index=False), tmp_path)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'DimensionDictionary':
+        frame = feather.read_feather(path)
+        columns = [c for c in frame.columns if c not in (ROWS_COLUMN, SET_COLUMN)]
+        cube_rows = frame[frame[SET_COLUMN] == CUBE_SET]
+        cube = cube_rows[columns + [ROWS_COLUMN]].reset_index(drop=True) if len(cube_rows) else None
+        values = {
+            col: frame.loc[frame[SET_COLUMN] == i + 1, [col, ROWS_COLUMN]]
+            .rename(columns={col: 'value', ROWS_COLUMN: 'rows'}).reset_index(drop=True)
+            for i, col in enumerate(columns)
+        }
+        return cls(columns, values, cube)
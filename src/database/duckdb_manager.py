@@ -2,22 +2,78 @@
 DuckDB + Parquet database layer.
 Replaces SQLite/SQLAlchemy for fast analytics.
 Now with persistent indexes for 10-100x performance improvement.
+
+Campaign data is stored as a hive-style partitioned Parquet dataset
+(``data/campaigns/month=YYYY-MM/platform=<name>/part-*.parquet``) so that
+appends only write new partition files and the persistent ``campaigns``
+table is updated with an ``INSERT`` instead of being rebuilt.
+
+The resolved dataset schema (see ``schema_registry``) and the filter
+dimension dictionary (see ``dimension_dictionary``) are written next to the
+Parquet files whenever the dataset changes and served from memory by
+``get_schema()`` / ``get_filter_counts()``. Pre-aggregated rollups (see
+``rollups``) are maintained in the DuckDB file at the same time;
+``aggregate()`` answers from them when they cover the query.
 """
 
+import json
 import os
+import re
+import shutil
+import threading
+import uuid
 import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Tuple, Union
 from loguru import logger
 from contextlib import contextmanager
 import time
 
+from src.utils.observability import metrics
+from src.database.schema_registry import DatasetSchema, build_schema
+from src.database.dimension_dictionary import DimensionDictionary
+from src.database.rollups import ROLLUP_CATALOG_TABLE, ROLLUP_TABLE, RollupCatalog, RollupPlan
+
 # Data directory for parquet files
 DATA_DIR = Path("data")
-CAMPAIGNS_PARQUET = DATA_DIR / "campaigns.parquet"
+CAMPAIGNS_PARQUET = DATA_DIR / "campaigns.parquet"  # Legacy single-file layout (imported on first start)
+LEGACY_MIGRATION_BATCH_ROWS = 100_000
+COMPACTING_SUFFIX = ".compacting"  # Compaction inputs hidden from readers until the merge is published
+CAMPAIGNS_DATASET = DATA_DIR / "campaigns"  # Hive-partitioned Parquet dataset
 DUCKDB_FILE = DATA_DIR / "analytics.duckdb"  # Persistent DuckDB database
 
+# Partition keys: month of the date column x platform
+PARTITION_DATE_COLUMNS = ['Date', 'Day', 'Report_Date']
+PARTITION_PLATFORM_COLUMNS = ['Platform', 'Ad_Network', 'Network']
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Resolved schema and filter dimension dictionary of the current dataset version,
+# stored inside the dataset dir (not *.parquet, so dataset globs skip them)
+SCHEMA_FILE = "_schema.json"
+DIMENSIONS_FILE = "_dimensions.feather"
+
+# Column-name keywords of numeric and date columns, which are not offered as filters
+FILTER_EXCLUDE_KEYWORDS = ['spend', 'impressions', 'clicks', 'conversions',
+                           'ctr', 'cpc', 'cpa', 'roas', 'cpm', 'id', 'count', 'total',
+                           'date', 'time', 'created', 'updated']
+
+# Physical columns summed for each core metric (first non-null column wins per row)
+DEFAULT_METRIC_COLUMNS = {
+    'spend': ['Spend', 'Total Spent'],
+    'impressions': ['Impressions', 'Impr'],
+    'clicks': ['Clicks'],
+    'conversions': ['Conversions', 'Site Visit'],
+}
+
+# Request parameters that are never column filters
+NON_FILTER_KEYS = {'primary_metric', 'secondary_metric', 'start_date', 'end_date'}
+
+# Non-ISO date formats accepted when casting a date column
+DATE_FORMATS = ['%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%Y']
+
 
 class DuckDBManager:
     """Manages DuckDB connections and campaign data with performance indexes."""
@@ -25,30 +81,132 @@ class DuckDBManager:
     # Enable performance optimizations
     ENABLE_PARALLEL = True
     ENABLE_INDEXES = True
+    ENABLE_ROLLUPS = True
     
-    def __init__(self):
-        self.data_dir = DATA_DIR
-        self.data_dir.mkdir(exist_ok=True)
-        self._conn = None
+    def __init__(self, data_dir: Optional[str] = None):
+        self.data_dir = Path(data_dir) if data_dir else DATA_DIR
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.dataset_dir = self.data_dir / CAMPAIGNS_DATASET.name
+        self.legacy_parquet = self.data_dir / CAMPAIGNS_PARQUET.name
+        self.db_file = self.data_dir / DUCKDB_FILE.name
+        
+        # Shared connection settings
+        self.threads = int(os.getenv('DUCKDB_THREADS', '4'))
+        self.memory_limit = os.getenv('DUCKDB_MEMORY_LIMIT', '2GB')
+        self.max_cursors = int(os.getenv('DUCKDB_MAX_CURSORS', '8'))
+        self.pool_timeout = float(os.getenv('DUCKDB_POOL_TIMEOUT', '30'))
+        
+        self._conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._conn_lock = threading.Lock()
+        self._cursor_slots = threading.BoundedSemaphore(self.max_cursors)
+        self._active_cursors = 0
         self._indexed = False
+        
+        # Schema registry cache (reloaded when the schema file changes)
+        self._schema: Optional[DatasetSchema] = None
+        self._schema_mtime: Optional[int] = None
+        self._schema_lock = threading.RLock()
+        self._dimensions: Optional[DimensionDictionary] = None
+        self._dimensions_mtime: Optional[int] = None
+        self._rollups: Optional[RollupCatalog] = None
+        self._rollups_failed_version: Optional[str] = None
         self._init_persistent_db()
     
     def _init_persistent_db(self):
         """Initialize persistent DuckDB database with indexes."""
         try:
             with self.connection() as conn:
-                # Configure for performance
-                conn.execute("SET threads TO 4")
-                conn.execute("SET memory_limit = '2GB'")
-                conn.execute("SET enable_progress_bar = false")
+                # Reuse the persisted campaigns table across restarts when it
+                # still matches the Parquet dataset (avoids a full rebuild).
+                if self.has_data():
+                    tables = conn.execute(
+                        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'campaigns'"
+                    ).fetchone()[0]
+                    if tables:
+                        table_rows = conn.execute("SELECT COUNT(*) FROM campaigns").fetchone()[0]
+                        parquet_rows = conn.execute(
+                            f"SELECT COUNT(*) FROM {self.get_parquet_source()}"  # nosec B608
+                        ).fetchone()[0]
+                        self._indexed = table_rows == parquet_rows
+                    self._rollups = self._load_rollups(conn)
                 
-                logger.info("DuckDB initialized with performance settings")
+                logger.info(
+                    f"DuckDB initialized with performance settings "
+                    f"(threads={self.threads}, memory_limit={self.memory_limit}, max_cursors={self.max_cursors})"
+                )
         except Exception as e:
             logger.warning(f"Error initializing DuckDB: {e}")
     
+    def migrate_legacy_file(self) -> bool:
+        """Import a legacy single-file campaigns.parquet into the partitioned dataset.
+        
+        Only runs while the dataset is empty, so a dataset that was saved or
+        uploaded since is never mixed with the old file. The file is streamed
+        through ``save_campaign_batches()`` (atomic, publishes the schema,
+        table and rollups) and left in place; it is ignored from then on.
+        
+        Returns:
+            True if the legacy file was imported
+        """
+        if not self.legacy_parquet.exists() or self.has_data():
+            return False
+        try:
+            legacy = pq.ParquetFile(self.legacy_parquet)
+            batches = (
+                batch.to_pandas()
+                for batch in legacy.iter_batches(batch_size=LEGACY_MIGRATION_BATCH_ROWS)
+            )
+            rows = self.save_campaign_batches(batches, legacy.schema_arrow)
+            logger.warning(
+                f"Imported {rows} rows from legacy {self.legacy_parquet} into {self.dataset_dir}; "
+                f"the legacy file is no longer read and can be removed"
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Legacy Parquet migration failed, {self.legacy_parquet} is not being served: {e}")
+            return False
+    
+    def _get_shared_connection(self) -> duckdb.DuckDBPyConnection:
+        """Get the long-lived, warmed database connection (opened once per manager)."""
+        if self._conn is None:
+            with self._conn_lock:
+                if self._conn is None:
+                    conn = duckdb.connect(str(self.db_file), config={
+                        'threads': self.threads,
+                        'memory_limit': self.memory_limit,
+                    })
+                    conn.execute("SET enable_progress_bar = false")
+                    self._conn = conn
+        return self._conn
+    
     def get_connection(self) -> duckdb.DuckDBPyConnection:
-        """Get a DuckDB connection (persistent for performance)."""
-        return duckdb.connect(str(DUCKDB_FILE))
+        """
+        Get a cursor on the shared DuckDB connection.
+        The caller owns the cursor and must close it; prefer ``connection()``,
+        which also applies the cursor limit.
+        """
+        return self._get_shared_connection().cursor()
+    
+    def close(self):
+        """Close the shared connection (reopened lazily on next use)."""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def get_parquet_source(self, files: Optional[List[Path]] = None) -> str:
+        """
+        Get a DuckDB table expression reading the partitioned Parquet dataset.
+        
+        Args:
+            files: Optional explicit list of files (defaults to the whole dataset)
+        """
+        if files is not None:
+            target = "[" + ", ".join(f"'{f}'" for f in files) + "]"
+        else:
+            target = f"'{self.dataset_dir}/**/*.parquet'"
+        # Partition directories only duplicate real columns, so don't expose them
+        return f"read_parquet({target}, hive_partitioning = false, union_by_name = true)"
     
     def ensure_indexes(self):
         """Create indexes on the campaigns table for fast queries."""
@@ -61,7 +219,7 @@ class DuckDBManager:
                 # Create or replace campaigns table from Parquet
                 conn.execute(f"""
                     CREATE OR REPLACE TABLE campaigns AS 
-                    SELECT * FROM '{CAMPAIGNS_PARQUET}'
+                    SELECT * FROM {self.get_parquet_source()}
                 """)
                 
                 # Get column names for index creation
@@ -137,101 +295,452 @@ class DuckDBManager:
         if self._indexed:
             return "campaigns"
         else:
-            return f"'{CAMPAIGNS_PARQUET}'"
+            return self.get_parquet_source()
     
     @contextmanager
     def connection(self):
-        """Context manager for DuckDB connections."""
-        conn = self.get_connection()
+        """
+        Context manager yielding a per-request cursor on the shared connection.
+        At most ``max_cursors`` cursors are open at once; time spent waiting
+        for a slot is recorded as ``duckdb_pool_wait_ms``.
+        """
+        wait_start = time.perf_counter()
+        if not self._cursor_slots.acquire(timeout=self.pool_timeout):
+            metrics.increment('duckdb_pool_timeouts')
+            raise TimeoutError(f"Timed out after {self.pool_timeout}s waiting for a DuckDB cursor")
+        metrics.observe('duckdb_pool_wait_ms', (time.perf_counter() - wait_start) * 1000)
+        
+        try:
+            conn = self.get_connection()
+        except Exception:
+            self._cursor_slots.release()
+            raise
+        
+        with self._conn_lock:
+            self._active_cursors += 1
+            metrics.set_gauge('duckdb_cursors_active', self._active_cursors)
         try:
             yield conn
         finally:
             conn.close()
+            with self._conn_lock:
+                self._active_cursors -= 1
+                metrics.set_gauge('duckdb_cursors_active', self._active_cursors)
+            self._cursor_slots.release()
+    
+    @staticmethod
+    def fetch_arrow(result) -> pa.Table:
+        """Fetch a query result as an Arrow table (no pandas conversion)."""
+        # to_arrow_table() replaces fetch_arrow_table() in newer DuckDB releases
+        if hasattr(result, 'to_arrow_table'):
+            return result.to_arrow_table()
+        return result.fetch_arrow_table()
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get cursor pool usage and wait-time statistics."""
+        return {
+            'max_cursors': self.max_cursors,
+            'active_cursors': self._active_cursors,
+            'timeouts': metrics.get_counter('duckdb_pool_timeouts'),
+            'wait_ms': metrics.get_histogram_stats('duckdb_pool_wait_ms'),
+        }
     
     def has_data(self) -> bool:
         """Check if campaign data exists."""
-        return CAMPAIGNS_PARQUET.exists()
+        if not self.dataset_dir.exists():
+            return False
+        return next(self.dataset_dir.rglob("*.parquet"), None) is not None
+    
+    def _publish_schema(self, target_dir: Optional[Path] = None) -> DatasetSchema:
+        """
+        Resolve the schema of the Parquet files under target_dir and store it as a new version.
+        Called whenever the dataset is written, so readers never re-discover columns.
+        """
+        target_dir = target_dir or self.dataset_dir
+        files = sorted(target_dir.rglob("*.parquet"))
+        with self._schema_lock:
+            described = []
+            if files:
+                with self.connection() as conn:
+                    described = conn.execute(
+                        f"DESCRIBE SELECT * FROM {self.get_parquet_source(files)}"  # nosec B608
+                    ).fetchall()
+            schema = build_schema({row[0]: row[1] for row in described})
+            
+            target_dir.mkdir(parents=True, exist_ok=True)
+            
+            path = target_dir / SCHEMA_FILE
+            tmp_path = path.with_suffix('.json.tmp')
+            tmp_path.write_text(json.dumps(schema.to_dict()))
+            tmp_path.replace(path)
+            
+            self._schema = schema
+            self._schema_mtime = None  # re-stat on next get_schema() (path may move on swap)
+            metrics.increment('schema_registry_builds')
+            logger.info(f"Published dataset schema version {schema.version} ({len(schema.columns)} columns)")
+            return schema
+    
+    def get_schema(self) -> Optional[DatasetSchema]:
+        """
+        Get the resolved schema of the current dataset version.
+        Served from memory; reloaded only when another writer published a new version.
+        Returns None when there is no data.
+        """
+        path = self.dataset_dir / SCHEMA_FILE
+        with self._schema_lock:
+            try:
+                mtime = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                if not self.has_data():
+                    self._schema = None
+                    return None
+                # Dataset written before the registry existed (or by an older version)
+                self._publish_schema()
+                mtime = path.stat().st_mtime_ns
+            
+            if self._schema is not None and self._schema_mtime in (None, mtime):
+                self._schema_mtime = mtime
+                return self._schema
+            
+            try:
+                self._schema = DatasetSchema.from_dict(json.loads(path.read_text()))
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Invalid schema file {path}, rebuilding: {e}")
+                self._publish_schema()
+            self._schema_mtime = mtime
+            return self._schema
+    
+    @property
+    def dataset_version(self) -> Optional[str]:
+        """Version of the current dataset (changes on every save/append)."""
+        schema = self.get_schema()
+        return schema.version if schema else None
+    
+    @staticmethod
+    def _match_column(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
+        """Find the first candidate column in df (case-insensitive)."""
+        cols_lower = {c.lower(): c for c in df.columns}
+        for col in candidates:
+            if col.lower() in cols_lower:
+                return cols_lower[col.lower()]
+        return None
+    
+    @staticmethod
+    def _partition_value(value: Any) -> str:
+        """Make a value safe for use in a hive partition directory name."""
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return HIVE_DEFAULT_PARTITION
+        slug = re.sub(r'[^0-9A-Za-z_.-]+', '_', str(value)).strip('_.')
+        return slug or HIVE_DEFAULT_PARTITION
+    
+    def _partition_frame(self, df: pd.DataFrame) -> List[Tuple[str, pd.DataFrame]]:
+        """Split a DataFrame into (relative partition dir, rows) pairs."""
+        date_col = self._match_column(df, PARTITION_DATE_COLUMNS)
+        platform_col = self._match_column(df, PARTITION_PLATFORM_COLUMNS)
+        
+        if date_col:
+            months = pd.to_datetime(df[date_col], errors='coerce').dt.strftime('%Y-%m')
+        else:
+            months = pd.Series(None, index=df.index, dtype=object)
+        platforms = df[platform_col] if platform_col else pd.Series(None, index=df.index, dtype=object)
+        
+        keys = pd.DataFrame({
+            'month': months.map(self._partition_value),
+            'platform': platforms.map(self._partition_value),
+        }, index=df.index)
+        
+        return [
+            (f"month={month}/platform={platform}", df.iloc[positions])
+            for (month, platform), positions in keys.groupby(['month', 'platform'], sort=False).indices.items()
+        ]
+    
+    def _write_partitions(
+        self,
+        df: pd.DataFrame,
+        target_dir: Path,
+        schema: Optional[pa.Schema] = None
+    ) -> List[Path]:
+        """
+        Write df as new part files under target_dir. Returns written files.
+        Pass schema when writing a dataset in several chunks so every file gets the same types.
+        """
+        # One schema for all partitions so column types don't drift between files
+        schema = schema or pa.Schema.from_pandas(df, preserve_index=False)
+        written = []
+        for rel_dir, part in self._partition_frame(df):
+            part_dir = target_dir / rel_dir
+            part_dir.mkdir(parents=True, exist_ok=True)
+            path = part_dir / f"part-{uuid.uuid4().hex}.parquet"
+            table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+            pq.write_table(table, path, compression='snappy')
+            written.append(path)
+        return written
     
     def save_campaigns(self, df: pd.DataFrame) -> int:
         """
-        Save campaigns DataFrame to Parquet.
+        Save campaigns DataFrame to Parquet, replacing existing data.
         Returns number of rows saved.
         Automatically rebuilds performance indexes.
         """
+        return self.save_campaign_batches([df])
+    
+    def save_campaign_batches(
+        self,
+        batches: Iterable[pd.DataFrame],
+        schema: Optional[pa.Schema] = None
+    ) -> int:
+        """
+        Save campaigns from DataFrame chunks, replacing existing data.
+        Each chunk is partitioned and written as it arrives, so the whole
+        dataset never has to be held in memory.
+        
+        Args:
+            batches: DataFrame chunks (consumed once)
+            schema: Arrow schema shared by all chunks (defaults to the first chunk's)
+            
+        Returns:
+            Number of rows saved
+        """
         try:
             # Ensure data directory exists
-            self.data_dir.mkdir(exist_ok=True)
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            
+            # Write the new dataset next to the old one, then swap directories
+            staging_dir = self.data_dir / f"{self.dataset_dir.name}.staging"
+            old_dir = self.data_dir / f"{self.dataset_dir.name}.old"
+            for stale in (staging_dir, old_dir):
+                if stale.exists():
+                    shutil.rmtree(stale)
+            
+            files, rows = self._write_batches(batches, staging_dir, schema)
+            dataset_schema = self._publish_schema(staging_dir)
+            self._publish_dimensions(dataset_schema, staging_dir)
             
-            # Save as Parquet (columnar, compressed)
-            df.to_parquet(CAMPAIGNS_PARQUET, index=False, compression='snappy')
+            if self.dataset_dir.exists():
+                self.dataset_dir.rename(old_dir)
+            staging_dir.rename(self.dataset_dir)
+            if old_dir.exists():
+                shutil.rmtree(old_dir)
             
             # Invalidate and rebuild indexes
             self._indexed = False
             self.ensure_indexes()
+            self._publish_rollups(dataset_schema)
             
-            logger.info(f"Saved {len(df)} campaigns to {CAMPAIGNS_PARQUET} (indexes rebuilt)")
-            return len(df)
+            logger.info(f"Saved {rows} campaigns to {self.dataset_dir} ({len(files)} partitions, indexes rebuilt)")
+            return rows
             
         except Exception as e:
             logger.error(f"Failed to save campaigns: {e}")
             raise
     
+    def _write_batches(
+        self,
+        batches: Iterable[pd.DataFrame],
+        target_dir: Path,
+        schema: Optional[pa.Schema] = None
+    ) -> Tuple[List[Path], int]:
+        """Partition and write each chunk under target_dir. Returns (files, rows)."""
+        target_dir.mkdir(parents=True, exist_ok=True)
+        files, rows = [], 0
+        for batch in batches:
+            if schema is None:
+                schema = pa.Schema.from_pandas(batch, preserve_index=False)
+            files.extend(self._write_partitions(batch, target_dir, schema))
+            rows += len(batch)
+        return files, rows
+    
     def append_campaigns(self, df: pd.DataFrame) -> int:
         """
-        Append campaigns to existing Parquet file.
+        Append campaigns as new partition files.
+        Only the new rows are written and inserted into the persistent table.
+        Returns total number of rows.
+        """
+        return self.append_campaign_batches([df])
+    
+    def append_campaign_batches(
+        self,
+        batches: Iterable[pd.DataFrame],
+        schema: Optional[pa.Schema] = None
+    ) -> int:
+        """
+        Append campaigns from DataFrame chunks (see save_campaign_batches()).
+        New files are written to a staging directory and moved into the dataset
+        only once every chunk was written, so a failed upload appends nothing.
         Returns total number of rows.
         """
         try:
-            if self.has_data():
-                existing_df = pd.read_parquet(CAMPAIGNS_PARQUET)
-                df = pd.concat([existing_df, df], ignore_index=True)
+            if not self.has_data():
+                return self.save_campaign_batches(batches, schema)
             
-            return self.save_campaigns(df)
+            staging_dir = self.data_dir / f"{self.dataset_dir.name}.append-{uuid.uuid4().hex[:8]}"
+            try:
+                staged, rows = self._write_batches(batches, staging_dir, schema)
+                files = []
+                for path in staged:
+                    target = self.dataset_dir / path.relative_to(staging_dir)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    path.rename(target)
+                    files.append(target)
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            
+            dataset_schema = self._publish_schema()
+            self._publish_dimensions(dataset_schema, new_files=files)
+            
+            if self._indexed and files:
+                try:
+                    with self.connection() as conn:
+                        conn.execute(
+                            f"INSERT INTO campaigns BY NAME SELECT * FROM {self.get_parquet_source(files)}"  # nosec B608
+                        )
+                except Exception as ie:
+                    # Schema drift (new/retyped columns) - fall back to a rebuild
+                    logger.warning(f"Incremental insert failed, rebuilding campaigns table: {ie}")
+                    self._indexed = False
+            
+            self.ensure_indexes()
+            self._publish_rollups(dataset_schema, new_files=files)
+            
+            total = self.get_total_count()
+            logger.info(f"Appended {rows} campaigns in {len(files)} partition files (total {total})")
+            return total
             
         except Exception as e:
             logger.error(f"Failed to append campaigns: {e}")
             raise
     
+    def compact(self) -> Dict[str, int]:
+        """
+        Merge small part files so each partition holds a single file.
+        A legacy campaigns.parquet is imported first when the dataset is empty,
+        and unpartitioned files at the dataset root are split into partitions.
+        Otherwise row contents are unchanged, so the persistent table is left as-is.
+        
+        Merged inputs are renamed out of the dataset before the merged file is
+        moved in, so an interrupted run never serves rows twice; the next run
+        finishes it (see ``_recover_compaction()``).
+        """
+        stats = {'files_before': 0, 'files_after': 0, 'partitions_compacted': 0}
+        self.migrate_legacy_file()
+        self._recover_compaction()
+        if not self.has_data():
+            return stats
+        
+        stats['files_before'] = sum(1 for _ in self.dataset_dir.rglob("*.parquet"))
+        
+        with self.connection() as conn:
+            # 1. Re-partition loose files at the dataset root
+            for loose in sorted(self.dataset_dir.glob("*.parquet")):
+                df = conn.execute(f"SELECT * FROM {self.get_parquet_source([loose])}").df()  # nosec B608
+                staging_dir = self.data_dir / f"{self.dataset_dir.name}.compact-{uuid.uuid4().hex[:8]}"
+                try:
+                    staged = self._write_partitions(df, staging_dir)
+                    # Hide the input before publishing its partitions (recovered if interrupted)
+                    loose.rename(loose.with_name(loose.name + COMPACTING_SUFFIX))
+                    for path in staged:
+                        # Named after their source so recovery can find them
+                        target = self.dataset_dir / path.relative_to(staging_dir)
+                        target = target.with_name(f"part-from-{loose.stem}-{target.name[len('part-'):]}")
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        path.rename(target)
+                    loose.with_name(loose.name + COMPACTING_SUFFIX).unlink()
+                finally:
+                    shutil.rmtree(staging_dir, ignore_errors=True)
+            
+            # 2. Merge multi-file partitions into one file each
+            partition_dirs = {p.parent for p in self.dataset_dir.rglob("*.parquet")}
+            for part_dir in sorted(partition_dirs):
+                files = sorted(part_dir.glob("*.parquet"))
+                if len(files) < 2:
+                    continue
+                df = conn.execute(f"SELECT * FROM {self.get_parquet_source(files)}").df()  # nosec B608
+                tmp_path = part_dir / f"part-{uuid.uuid4().hex}.parquet.tmp"
+                df.to_parquet(tmp_path, index=False, compression='snappy')
+                # Hide the inputs, then publish the merged file (recovered if interrupted)
+                for f in files:
+                    f.rename(f.with_name(f.name + COMPACTING_SUFFIX))
+                tmp_path.rename(tmp_path.with_suffix(''))
+                for f in files:
+                    f.with_name(f.name + COMPACTING_SUFFIX).unlink()
+                stats['partitions_compacted'] += 1
+        
+        stats['files_after'] = sum(1 for _ in self.dataset_dir.rglob("*.parquet"))
+        logger.info(
+            f"Compacted {stats['partitions_compacted']} partitions: "
+            f"{stats['files_before']} -> {stats['files_after']} files"
+        )
+        return stats
+    
+    def _recover_compaction(self):
+        """
+        Roll an interrupted compaction forward or back.
+        
+        In a partition, hidden ``*.parquet.compacting`` inputs next to their
+        unpublished ``*.parquet.tmp`` merge are restored (the merge is dropped);
+        without the merge it was already published, so the inputs are dropped.
+        A hidden loose file at the dataset root is restored after removing the
+        partition files already published from it.
+        """
+        if not self.dataset_dir.exists():
+            return
+        for part_dir in sorted({p.parent for p in self.dataset_dir.rglob(f"*.parquet{COMPACTING_SUFFIX}")}):
+            if part_dir == self.dataset_dir:
+                continue
+            merged = list(part_dir.glob("*.parquet.tmp"))
+            for hidden in part_dir.glob(f"*.parquet{COMPACTING_SUFFIX}"):
+                if merged:
+                    hidden.rename(hidden.with_name(hidden.name[:-len(COMPACTING_SUFFIX)]))
+                else:
+                    hidden.unlink()
+            logger.warning(f"Recovered interrupted compaction of {part_dir}")
+        for stale_tmp in self.dataset_dir.rglob("*.parquet.tmp"):
+            stale_tmp.unlink()
+        for hidden in sorted(self.dataset_dir.glob(f"*.parquet{COMPACTING_SUFFIX}")):
+            original = hidden.with_name(hidden.name[:-len(COMPACTING_SUFFIX)])
+            for published in self.dataset_dir.rglob(f"part-from-{original.stem}-*.parquet"):
+                published.unlink()
+            hidden.rename(original)
+            logger.warning(f"Restored {original.name} after an interrupted compaction")
+        for staging_dir in self.data_dir.glob(f"{self.dataset_dir.name}.compact-*"):
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    
     def get_campaigns(
         self,
         filters: Optional[Dict[str, Any]] = None,
-        limit: int = 100000
+        limit: int = 100000,
+        date_column: Optional[str] = None,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None
     ) -> pd.DataFrame:
         """
         Get campaigns with optional filters.
         Uses DuckDB to query Parquet directly.
+        
+        Args:
+            filters: {column: value} equality/IN filters
+            limit: Maximum rows returned
+            date_column: Date column that start_date/end_date (inclusive) apply to
         """
         if not self.has_data():
             return pd.DataFrame()
         
         try:
             with self.connection() as conn:
-                # Build WHERE clause from filters
-                where_clauses = []
-                params = []
-                
-                if filters:
-                    for key, value in filters.items():
-                        if value and key not in ['primary_metric', 'secondary_metric']:
-                            if isinstance(value, str) and ',' in value:
-                                # Multiple values - use IN clause
-                                values = [v.strip() for v in value.split(',')]
-                                placeholders = ', '.join(['?' for _ in values])
-                                where_clauses.append(f'"{key}" IN ({placeholders})')
-                                params.extend(values)
-                            elif isinstance(value, list):
-                                placeholders = ', '.join(['?' for _ in value])
-                                where_clauses.append(f'"{key}" IN ({placeholders})')
-                                params.extend(value)
-                            else:
-                                where_clauses.append(f'"{key}" = ?')
-                                params.append(value)
-                
+                where_clauses, params = self._build_filter_clauses(filters)
+                if date_column:
+                    date_sql = self.date_expression(date_column)
+                    if start_date is not None:
+                        where_clauses.append(f"{date_sql} >= CAST(? AS DATE)")
+                        params.append(str(start_date))
+                    if end_date is not None:
+                        where_clauses.append(f"{date_sql} <= CAST(? AS DATE)")
+                        params.append(str(end_date))
                 where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
                 
                 query = f"""
                     SELECT * 
-                    FROM '{CAMPAIGNS_PARQUET}'
+                    FROM {self.get_parquet_source()}
                     WHERE {where_sql}
                     LIMIT {limit}
                 """
@@ -243,62 +752,530 @@ class DuckDBManager:
             logger.error(f"Failed to get campaigns: {e}")
             return pd.DataFrame()
     
-    def get_filter_options(self) -> Dict[str, List[str]]:
+    @staticmethod
+    def _filter_columns(columns: List[str]) -> List[str]:
+        """Columns offered as filters (categorical; numeric and date columns excluded by name)."""
+        return [
+            col for col in columns
+            if not any(kw in col.lower() for kw in FILTER_EXCLUDE_KEYWORDS)
+        ]
+    
+    def _publish_dimensions(
+        self,
+        schema: DatasetSchema,
+        target_dir: Optional[Path] = None,
+        new_files: Optional[List[Path]] = None
+    ) -> Optional[DimensionDictionary]:
+        """
+        Build the dimension dictionary in a single scan and store it next to the Parquet files.
+        
+        Args:
+            schema: Schema of the dataset being published
+            target_dir: Dataset directory (defaults to the live dataset)
+            new_files: Appended files; their dictionary is merged into the existing one
+                when the filter columns are unchanged
+        """
+        target_dir = target_dir or self.dataset_dir
+        columns = self._filter_columns(schema.columns)
+        
+        with self._schema_lock:
+            base = self._read_dimensions() if new_files else None
+            if base is not None and base.columns != columns:
+                base = None
+            files = new_files if base is not None else sorted(target_dir.rglob("*.parquet"))
+            
+            try:
+                if columns and files:
+                    start = time.perf_counter()
+                    with self.connection() as conn:
+                        result = conn.execute(
+                            DimensionDictionary.build_query(columns, self.get_parquet_source(files))
+                        ).df()
+                    dims = DimensionDictionary.from_grouping_sets(columns, result)
+                    metrics.observe('dimension_dictionary_build_ms', (time.perf_counter() - start) * 1000)
+                else:
+                    dims = DimensionDictionary.from_grouping_sets([], pd.DataFrame())
+                if base is not None:
+                    dims = base.merge(dims)
+                
+                target_dir.mkdir(parents=True, exist_ok=True)
+                dims.save(target_dir / DIMENSIONS_FILE)
+            except Exception as e:
+                # Filter options then fall back to scanning; never fail the write for this
+                logger.warning(f"Failed to build dimension dictionary: {e}")
+                (target_dir / DIMENSIONS_FILE).unlink(missing_ok=True)
+                dims = None
+            
+            self._dimensions = dims
+            self._dimensions_mtime = None
+            return dims
+    
+    def _read_dimensions(self) -> Optional[DimensionDictionary]:
+        """Load the stored dimension dictionary (cached until the file changes), without building it."""
+        path = self.dataset_dir / DIMENSIONS_FILE
+        with self._schema_lock:
+            try:
+                mtime = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                return None
+            if self._dimensions is None or self._dimensions_mtime not in (None, mtime):
+                self._dimensions = DimensionDictionary.load(path)
+            self._dimensions_mtime = mtime
+            return self._dimensions
+    
+    def get_dimension_dictionary(self) -> Optional[DimensionDictionary]:
+        """Get the dimension dictionary of the current dataset, building it for older datasets."""
+        with self._schema_lock:
+            dims = self._read_dimensions()
+            if dims is None:
+                schema = self.get_schema()
+                if schema is not None:
+                    dims = self._publish_dimensions(schema)
+            return dims
+    
+    @staticmethod
+    def filter_key(column: str) -> str:
+        """API key of a filter column (lower_underscore)."""
+        return column.lower().replace(' ', '_')
+    
+    @staticmethod
+    def _normalize_selection(selected: Optional[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """Turn {column: 'a,b' | [..] | value} selections into {column: [str, ...]}."""
+        normalized = {}
+        for col, value in (selected or {}).items():
+            if not value:
+                continue
+            if isinstance(value, str):
+                value = [v.strip() for v in value.split(',') if v.strip()]
+            elif not isinstance(value, (list, tuple, set)):
+                value = [value]
+            normalized[col] = [str(v) for v in value]
+        return normalized
+    
+    def get_filter_counts(
+        self,
+        selected: Optional[Dict[str, Any]] = None,
+        limit: int = 100
+    ) -> Dict[str, pd.DataFrame]:
         """
-        Get unique values for all filterable columns.
-        Dynamically detects columns from the data.
+        Get filter values with row counts per filterable column.
+        
+        Served from the precomputed dimension dictionary. With selections, each
+        column's counts are restricted by the selections on the other columns.
+        
+        Args:
+            selected: Physical column -> selected value(s)
+            limit: Maximum values per column
+            
+        Returns:
+            Physical column -> DataFrame(value, rows), sorted by value
         """
         if not self.has_data():
             return {}
         
+        dims = self.get_dimension_dictionary()
+        if dims is None:
+            return {}
+        
+        selection = {c: v for c, v in self._normalize_selection(selected).items() if c in dims.columns}
+        if not selection or dims.supports_cross_filter:
+            metrics.increment('filter_options_from_dictionary')
+            return dims.options(selection, limit)
+        
+        # Cube too large to keep in memory - one grouped scan instead
+        metrics.increment('filter_options_scans')
+        query, params = DimensionDictionary.cross_filter_query(
+            dims.columns, selection, self.get_optimized_table()
+        )
         try:
             with self.connection() as conn:
-                # Get column names
-                columns_query = f"DESCRIBE SELECT * FROM '{CAMPAIGNS_PARQUET}'"
-                columns_df = conn.execute(columns_query).df()
-                all_columns = columns_df['column_name'].tolist()
-                
-                # Define which columns should be filters (categorical/string columns)
-                # Exclude numeric and date columns
-                numeric_keywords = ['spend', 'impressions', 'clicks', 'conversions', 
-                                   'ctr', 'cpc', 'cpa', 'roas', 'cpm', 'id', 'count', 'total']
-                date_keywords = ['date', 'time', 'created', 'updated']
-                
-                filter_columns = []
-                for col in all_columns:
-                    col_lower = col.lower()
-                    if not any(kw in col_lower for kw in numeric_keywords + date_keywords):
-                        filter_columns.append(col)
-                
-                # Get unique values for each filter column
-                result = {}
-                for col in filter_columns:
-                    try:
-                        query = f"""
-                            SELECT DISTINCT CAST("{col}" AS VARCHAR) as val
-                            FROM '{CAMPAIGNS_PARQUET}'
-                            WHERE "{col}" IS NOT NULL 
-                            AND CAST("{col}" AS VARCHAR) != 'Unknown'
-                            AND CAST("{col}" AS VARCHAR) != ''
-                            ORDER BY val
-                            LIMIT 100
-                        """
-                        values_df = conn.execute(query).df()
-                        values = values_df['val'].dropna().astype(str).tolist()
-                        
-                        if values:
-                            # Normalize column name for API
-                            api_key = col.lower().replace(' ', '_')
-                            result[api_key] = values
-                    except Exception as e:
-                        logger.warning(f"Could not get filter values for {col}: {e}")
-                
-                return result
-                
+                result = conn.execute(query, params).df()
+            return DimensionDictionary.from_cross_filter_result(dims.columns, selection, result, limit)
+        except Exception as e:
+            logger.error(f"Failed to get cross-filter counts: {e}")
+            return {}
+    
+    def get_filter_options(self, selected: Optional[Dict[str, Any]] = None) -> Dict[str, List[str]]:
+        """
+        Get unique values for all filterable columns.
+        Keys are column names normalized to lower_underscore; see get_filter_counts().
+        """
+        try:
+            return {
+                self.filter_key(col): counts['value'].tolist()
+                for col, counts in self.get_filter_counts(selected).items()
+                if not counts.empty
+            }
         except Exception as e:
             logger.error(f"Failed to get filter options: {e}")
             return {}
     
+    @staticmethod
+    def _filter_keys(filters: Optional[Dict[str, Any]]) -> List[str]:
+        """Columns actually filtered on by _build_filter_clauses()."""
+        return [key for key, value in (filters or {}).items() if value and key not in NON_FILTER_KEYS]
+    
+    @staticmethod
+    def _build_filter_clauses(filters: Optional[Dict[str, Any]]) -> Tuple[List[str], List[Any]]:
+        """
+        Build parameterized WHERE clauses from a {column: value} filter dict.
+        Comma-separated strings and lists become IN clauses.
+        """
+        where_clauses = []
+        params = []
+        
+        for key, value in (filters or {}).items():
+            if not value or key in NON_FILTER_KEYS:
+                continue
+            if isinstance(value, str) and ',' in value:
+                value = [v.strip() for v in value.split(',')]
+            if isinstance(value, list):
+                placeholders = ', '.join(['?' for _ in value])
+                where_clauses.append(f'"{key}" IN ({placeholders})')
+                params.extend(value)
+            else:
+                where_clauses.append(f'"{key}" = ?')
+                params.append(value)
+        
+        return where_clauses, params
+    
+    @staticmethod
+    def date_expression(column: str) -> str:
+        """SQL expression casting a (possibly string) date column to DATE; NULL if unparseable."""
+        formats = ", ".join(f"'{fmt}'" for fmt in DATE_FORMATS)
+        return (
+            f'COALESCE(TRY_CAST("{column}" AS DATE), '
+            f'CAST(TRY_STRPTIME(CAST("{column}" AS VARCHAR), [{formats}]) AS DATE))'
+        )
+    
+    def get_columns(self) -> List[str]:
+        """Get the column names of the campaign data (from the schema registry)."""
+        try:
+            schema = self.get_schema()
+            return schema.columns if schema else []
+        except Exception as e:
+            logger.error(f"Failed to get columns: {e}")
+            return []
+    
+    def _load_rollups(self, conn) -> Optional[RollupCatalog]:
+        """Read the rollup catalog stored in the database (None if there are no rollups)."""
+        try:
+            row = conn.execute(f"SELECT spec FROM {ROLLUP_CATALOG_TABLE}").fetchone()  # nosec B608
+            return RollupCatalog.from_json(row[0]) if row else None
+        except duckdb.Error:
+            return None
+    
+    def _publish_rollups(
+        self,
+        schema: DatasetSchema,
+        new_files: Optional[List[Path]] = None
+    ) -> Optional[RollupCatalog]:
+        """
+        Build the rollup table for a new dataset version.
+        
+        Args:
+            schema: Schema of the dataset version being published
+            new_files: Appended files; their rollups are merged into the existing
+                table when the layout (dimensions, metrics, date column) is unchanged
+        """
+        if not self.ENABLE_ROLLUPS:
+            return None
+        
+        with self._schema_lock:
+            catalog = RollupCatalog.from_schema(schema, self._default_metric_columns().values())
+            base = self._rollups if new_files else None
+            incremental = (
+                base is not None
+                and (base.dimensions, base.metric_sources, base.date_column)
+                == (catalog.dimensions, catalog.metric_sources, catalog.date_column)
+            )
+            if incremental:
+                # Keep the previous set selection so merged rows line up
+                catalog.sets = base.sets
+            
+            date_sql = self.date_expression(catalog.date_column) if catalog.date_column else None
+            try:
+                start = time.perf_counter()
+                with self.connection() as conn:
+                    if incremental:
+                        new_rows = catalog.build_query(self.get_parquet_source(new_files), date_sql)
+                        query = catalog.merge_query(new_rows)
+                    else:
+                        query = catalog.build_query(self.get_optimized_table(), date_sql)
+                    conn.execute(f"CREATE OR REPLACE TABLE {ROLLUP_TABLE} AS {query}")
+                    
+                    counts = conn.execute(
+                        f"SELECT __grain, __set, COUNT(*) AS rows FROM {ROLLUP_TABLE} GROUP BY ALL"  # nosec B608
+                    ).df()
+                    base_rows = conn.execute(
+                        f"SELECT COALESCE(SUM(row_count), 0) FROM {ROLLUP_TABLE} "
+                        f"WHERE __grain = 'day' AND __set = ?",  # nosec B608
+                        [catalog.set_mask(())]
+                    ).fetchone()[0]
+                    for spec in catalog.update_row_counts(counts, int(base_rows)):
+                        conn.execute(
+                            f"DELETE FROM {ROLLUP_TABLE} WHERE __grain = ? AND __set = ?",  # nosec B608
+                            [spec['grain'], spec['mask']]
+                        )
+                    
+                    conn.execute(f"CREATE OR REPLACE TABLE {ROLLUP_CATALOG_TABLE} (spec VARCHAR)")
+                    conn.execute(f"INSERT INTO {ROLLUP_CATALOG_TABLE} VALUES (?)", [catalog.to_json()])  # nosec B608
+                
+                metrics.observe('rollup_build_ms', (time.perf_counter() - start) * 1000)
+                logger.info(
+                    f"{'Merged' if incremental else 'Built'} rollups for dataset version {catalog.version} "
+                    f"({len(catalog.sets)} grain/dimension sets, {sum(spec['rows'] for spec in catalog.sets)} rows)"
+                )
+            except Exception as e:
+                # Queries then fall back to the base table; never fail the write for this
+                logger.warning(f"Failed to build rollups: {e}")
+                catalog = None
+            
+            self._rollups = catalog
+            return catalog
+    
+    def get_rollups(self) -> Optional[RollupCatalog]:
+        """
+        Get the rollup catalog of the current dataset version.
+        Rollups of older datasets are (re)built on first use.
+        """
+        if not self.ENABLE_ROLLUPS:
+            return None
+        schema = self.get_schema()
+        if schema is None:
+            return None
+        with self._schema_lock:
+            if self._rollups is None or self._rollups.version != schema.version:
+                if self._rollups_failed_version == schema.version:
+                    return None
+                self.ensure_indexes()
+                if self._publish_rollups(schema) is None:
+                    self._rollups_failed_version = schema.version
+            return self._rollups
+    
+    def _rollup_query(
+        self,
+        plan: RollupPlan,
+        group_by: Dict[str, str],
+        filters: Optional[Dict[str, Any]],
+        date_column: Optional[str],
+        start_date: Optional[Any],
+        end_date: Optional[Any],
+        date_grain: Optional[str],
+        exclude_values: Optional[List[str]]
+    ) -> Tuple[str, List[Any]]:
+        """SQL answering an aggregate() call from the rollup table (same output as the base query)."""
+        where_clauses = ["__grain = ?", "__set = ?"]
+        params: List[Any] = [plan.grain, plan.set_mask]
+        filter_clauses, filter_params = self._build_filter_clauses(filters)
+        where_clauses += filter_clauses
+        params += filter_params
+        keys = []
+        
+        if date_column:
+            where_clauses.append("__period IS NOT NULL")
+            if start_date is not None:
+                where_clauses.append("__period >= CAST(? AS DATE)")
+                params.append(str(start_date))
+            if end_date is not None:
+                where_clauses.append("__period <= CAST(? AS DATE)")
+                params.append(str(end_date))
+            if date_grain:
+                keys.append(self._date_grain_key('__period', date_grain))
+        
+        for alias, column in group_by.items():
+            keys.append(f'"{column}" AS "{alias}"')
+            where_clauses.append(f'"{column}" IS NOT NULL')
+            if exclude_values:
+                placeholders = ', '.join(['?' for _ in exclude_values])
+                where_clauses.append(f'CAST("{column}" AS VARCHAR) NOT IN ({placeholders})')
+                params.extend(exclude_values)
+        
+        metric_exprs = [
+            f'COALESCE(SUM({column}), 0) AS "{name}"' if column else f'CAST(0 AS DOUBLE) AS "{name}"'
+            for name, column in plan.metric_columns.items()
+        ]
+        metric_exprs.append("CAST(COALESCE(SUM(row_count), 0) AS BIGINT) AS row_count")
+        
+        select_sql = ", ".join(keys + metric_exprs)
+        where_sql = " AND ".join(where_clauses)
+        group_sql = f"GROUP BY ALL ORDER BY {', '.join(str(i + 1) for i in range(len(keys)))}" if keys else ""
+        query = f"SELECT {select_sql} FROM {ROLLUP_TABLE} WHERE {where_sql} {group_sql}"  # nosec B608
+        return query, params
+    
+    @classmethod
+    def _fetch(cls, result, as_arrow: bool) -> Union[pd.DataFrame, pa.Table]:
+        return cls.fetch_arrow(result) if as_arrow else result.df()
+    
+    @staticmethod
+    def _record_rollup_use(plan: Optional[RollupPlan]) -> None:
+        """Count aggregate() calls answered from rollups vs the base table."""
+        if plan is not None:
+            metrics.increment('rollup_hits', labels={'grain': plan.grain})
+        else:
+            metrics.increment('rollup_misses')
+    
+    @staticmethod
+    def _date_grain_key(date_sql: str, date_grain: str) -> str:
+        """Select expression of the date key added by aggregate(date_grain=...)."""
+        if date_grain == 'week':
+            return f"strftime(date_trunc('week', {date_sql}), '%Y-%m-%d') AS week"
+        if date_grain == 'month':
+            return f"strftime({date_sql}, '%Y-%m') AS month"
+        return f"strftime({date_sql}, '%Y-%m-%d') AS date"
+    
+    def aggregate(
+        self,
+        metrics: Dict[str, List[str]],
+        group_by: Optional[Dict[str, str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        date_column: Optional[str] = None,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None,
+        date_grain: Optional[str] = None,
+        exclude_values: Optional[List[str]] = None,
+        as_arrow: bool = False
+    ) -> Union[pd.DataFrame, pa.Table]:
+        """
+        Aggregate metrics in a single GROUP BY query so only grouped rows leave DuckDB.
+        
+        Args:
+            metrics: Output metric name -> physical columns, coalesced per row then summed
+            group_by: Output key name -> physical dimension column
+            filters: {column: value} equality/IN filters
+            date_column: Date column for range filtering and date grouping.
+                Rows whose date cannot be parsed are excluded when it is given.
+            start_date: Inclusive lower bound on date_column
+            end_date: Inclusive upper bound on date_column
+            date_grain: 'day' adds a ``date`` key (YYYY-MM-DD), 'week' a ``week`` key
+                (ISO week start, YYYY-MM-DD), 'month' a ``month`` key (YYYY-MM)
+            exclude_values: Dimension values to drop from group_by keys (e.g. 'Unknown')
+            as_arrow: Return an Arrow table instead of a DataFrame
+            
+        Returns:
+            DataFrame (or Arrow table) with one row per group: group keys, metric sums and ``row_count``
+        """
+        if not self.has_data():
+            return pa.table({}) if as_arrow else pd.DataFrame()
+        
+        group_by = dict(group_by or {})
+        
+        # Answer from the smallest covering rollup when there is one
+        rollups = self.get_rollups()
+        plan = rollups.plan(
+            metrics,
+            group_by.values(),
+            self._filter_keys(filters),
+            date_column=date_column,
+            start_date=start_date,
+            end_date=end_date,
+            date_grain=date_grain
+        ) if rollups else None
+        if plan is not None:
+            query, params = self._rollup_query(
+                plan, group_by, filters, date_column, start_date, end_date, date_grain, exclude_values
+            )
+            try:
+                with self.connection() as conn:
+                    result = self._fetch(conn.execute(query, params), as_arrow)
+                self._record_rollup_use(plan)
+                return result
+            except Exception as e:
+                logger.warning(f"Rollup query failed, using base table: {e}")
+        self._record_rollup_use(None)
+        
+        where_clauses, params = self._build_filter_clauses(filters)
+        keys = []
+        
+        if date_column:
+            date_sql = self.date_expression(date_column)
+            where_clauses.append(f"{date_sql} IS NOT NULL")
+            if start_date is not None:
+                where_clauses.append(f"{date_sql} >= CAST(? AS DATE)")
+                params.append(str(start_date))
+            if end_date is not None:
+                where_clauses.append(f"{date_sql} <= CAST(? AS DATE)")
+                params.append(str(end_date))
+            if date_grain:
+                keys.append(self._date_grain_key(date_sql, date_grain))
+        
+        for alias, column in group_by.items():
+            keys.append(f'"{column}" AS "{alias}"')
+            where_clauses.append(f'"{column}" IS NOT NULL')
+            if exclude_values:
+                placeholders = ', '.join(['?' for _ in exclude_values])
+                where_clauses.append(f'CAST("{column}" AS VARCHAR) NOT IN ({placeholders})')
+                params.extend(exclude_values)
+        
+        metric_exprs = []
+        for name, columns in metrics.items():
+            if columns:
+                casts = ", ".join(f'TRY_CAST("{c}" AS DOUBLE)' for c in columns)
+                metric_exprs.append(f'COALESCE(SUM(COALESCE({casts})), 0) AS "{name}"')
+            else:
+                metric_exprs.append(f'CAST(0 AS DOUBLE) AS "{name}"')
+        metric_exprs.append("COUNT(*) AS row_count")
+        
+        select_sql = ",\n                        ".join(keys + metric_exprs)
+        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+        group_sql = f"GROUP BY ALL ORDER BY {', '.join(str(i + 1) for i in range(len(keys)))}" if keys else ""
+        
+        query = f"""
+                    SELECT 
+                        {select_sql}
+                    FROM {self.get_optimized_table()}
+                    WHERE {where_sql}
+                    {group_sql}
+                """  # nosec B608
+        
+        try:
+            with self.connection() as conn:
+                return self._fetch(conn.execute(query, params), as_arrow)
+        except Exception as e:
+            logger.error(f"Failed to aggregate campaigns: {e}")
+            return pa.table({}) if as_arrow else pd.DataFrame()
+    
+    def get_date_bounds(
+        self,
+        date_column: str,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Any], Optional[Any]]:
+        """Get (min, max) parsed dates of date_column for the filtered rows."""
+        if not self.has_data():
+            return None, None
+        
+        where_clauses, params = self._build_filter_clauses(filters)
+        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+        date_sql = self.date_expression(date_column)
+        
+        try:
+            with self.connection() as conn:
+                row = conn.execute(
+                    f"SELECT MIN({date_sql}), MAX({date_sql}) FROM {self.get_optimized_table()} WHERE {where_sql}",  # nosec B608
+                    params
+                ).fetchone()
+                return (row[0], row[1]) if row else (None, None)
+        except Exception as e:
+            logger.error(f"Failed to get date bounds: {e}")
+            return None, None
+    
+    def _default_metric_columns(self) -> Dict[str, List[str]]:
+        """Resolve DEFAULT_METRIC_COLUMNS against the columns actually present."""
+        present = set(self.get_columns())
+        return {
+            metric: [c for c in candidates if c in present]
+            for metric, candidates in DEFAULT_METRIC_COLUMNS.items()
+        }
+    
+    @staticmethod
+    def _add_derived_metrics(result: pd.DataFrame) -> pd.DataFrame:
+        """Add ctr/cpc/cpa/cpm computed from summed base metrics."""
+        result['ctr'] = (result['clicks'] / result['impressions'] * 100).replace([float('inf')], 0).fillna(0).round(2)
+        result['cpc'] = (result['spend'] / result['clicks']).replace([float('inf')], 0).fillna(0).round(2)
+        result['cpa'] = (result['spend'] / result['conversions']).replace([float('inf')], 0).fillna(0).round(2)
+        result['cpm'] = (result['spend'] / result['impressions'] * 1000).replace([float('inf')], 0).fillna(0).round(2)
+        return result
+    
     def get_aggregated_data(
         self,
         group_by: str,
@@ -307,56 +1284,16 @@ class DuckDBManager:
         """
         Get aggregated metrics grouped by a column.
         """
-        if not self.has_data():
-            return pd.DataFrame()
+        result = self.aggregate(
+            self._default_metric_columns(),
+            group_by={'name': group_by},
+            filters=filters
+        )
+        if result.empty:
+            return result
         
-        try:
-            with self.connection() as conn:
-                # Build WHERE clause
-                where_clauses = []
-                params = []
-                
-                if filters:
-                    for key, value in filters.items():
-                        if value and key not in ['primary_metric', 'secondary_metric']:
-                            if isinstance(value, str) and ',' in value:
-                                values = [v.strip() for v in value.split(',')]
-                                placeholders = ', '.join(['?' for _ in values])
-                                where_clauses.append(f'"{key}" IN ({placeholders})')
-                                params.extend(values)
-                            else:
-                                where_clauses.append(f'"{key}" = ?')
-                                params.append(value)
-                
-                where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-                
-                query = f"""
-                    SELECT 
-                        "{group_by}" as name,
-                        SUM(COALESCE("Spend", "Total Spent", 0)) as spend,
-                        SUM(COALESCE("Impressions", "Impr", 0)) as impressions,
-                        SUM(COALESCE("Clicks", 0)) as clicks,
-                        SUM(COALESCE("Conversions", "Site Visit", 0)) as conversions
-                    FROM '{CAMPAIGNS_PARQUET}'
-                    WHERE {where_sql}
-                    AND "{group_by}" IS NOT NULL
-                    GROUP BY "{group_by}"
-                    ORDER BY spend DESC
-                """
-                
-                result = conn.execute(query, params).df()
-                
-                # Calculate derived metrics
-                if not result.empty:
-                    result['ctr'] = (result['clicks'] / result['impressions'] * 100).fillna(0).round(2)
-                    result['cpc'] = (result['spend'] / result['clicks']).fillna(0).round(2)
-                    result['cpa'] = (result['spend'] / result['conversions']).fillna(0).round(2)
-                
-                return result
-                
-        except Exception as e:
-            logger.error(f"Failed to get aggregated data: {e}")
-            return pd.DataFrame()
+        result = self._add_derived_metrics(result.drop(columns=['row_count']))
+        return result.sort_values('spend', ascending=False).reset_index(drop=True)
     
     def get_trend_data(
         self,
@@ -366,57 +1303,19 @@ class DuckDBManager:
         """
         Get time-series trend data.
         """
-        if not self.has_data():
-            return pd.DataFrame()
+        filters = filters or {}
+        result = self.aggregate(
+            self._default_metric_columns(),
+            filters=filters,
+            date_column=date_column,
+            start_date=filters.get('start_date'),
+            end_date=filters.get('end_date'),
+            date_grain='day'
+        )
+        if result.empty:
+            return result
         
-        try:
-            with self.connection() as conn:
-                # Build WHERE clause
-                where_clauses = []
-                params = []
-                
-                if filters:
-                    for key, value in filters.items():
-                        if value and key not in ['primary_metric', 'secondary_metric', 'start_date', 'end_date']:
-                            if isinstance(value, str) and ',' in value:
-                                values = [v.strip() for v in value.split(',')]
-                                placeholders = ', '.join(['?' for _ in values])
-                                where_clauses.append(f'"{key}" IN ({placeholders})')
-                                params.extend(values)
-                            else:
-                                where_clauses.append(f'"{key}" = ?')
-                                params.append(value)
-                
-                where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-                
-                query = f"""
-                    SELECT 
-                        "{date_column}" as date,
-                        SUM(COALESCE("Spend", "Total Spent", 0)) as spend,
-                        SUM(COALESCE("Impressions", "Impr", 0)) as impressions,
-                        SUM(COALESCE("Clicks", 0)) as clicks,
-                        SUM(COALESCE("Conversions", "Site Visit", 0)) as conversions
-                    FROM '{CAMPAIGNS_PARQUET}'
-                    WHERE {where_sql}
-                    AND "{date_column}" IS NOT NULL
-                    GROUP BY "{date_column}"
-                    ORDER BY "{date_column}"
-                """
-                
-                result = conn.execute(query, params).df()
-                
-                # Calculate derived metrics
-                if not result.empty:
-                    result['ctr'] = (result['clicks'] / result['impressions'] * 100).fillna(0).round(2)
-                    result['cpc'] = (result['spend'] / result['clicks']).fillna(0).round(2)
-                    result['cpa'] = (result['spend'] / result['conversions']).fillna(0).round(2)
-                    result['cpm'] = (result['spend'] / result['impressions'] * 1000).fillna(0).round(2)
-                
-                return result
-                
-        except Exception as e:
-            logger.error(f"Failed to get trend data: {e}")
-            return pd.DataFrame()
+        return self._add_derived_metrics(result.drop(columns=['row_count']))
     
     def get_total_metrics(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Get aggregated metrics across ALL campaigns."""
@@ -432,55 +1331,26 @@ class DuckDBManager:
                 'campaign_count': 0
             }
         
-        try:
-            with self.connection() as conn:
-                # Build WHERE clause
-                where_clauses = []
-                params = []
-                
-                if filters:
-                    for key, value in filters.items():
-                        if value and key not in ['primary_metric', 'secondary_metric', 'start_date', 'end_date']:
-                            where_clauses.append(f'"{key}" = ?')
-                            params.append(value)
-                
-                where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-                
-                query = f"""
-                    SELECT 
-                        SUM(COALESCE("Spend", "Total Spent", 0)) as total_spend,
-                        SUM(COALESCE("Impressions", "Impr", 0)) as total_impressions,
-                        SUM(COALESCE("Clicks", 0)) as total_clicks,
-                        SUM(COALESCE("Conversions", "Site Visit", 0)) as total_conversions,
-                        COUNT(*) as campaign_count
-                    FROM '{CAMPAIGNS_PARQUET}'
-                    WHERE {where_sql}
-                """
-                
-                result_df = conn.execute(query, params).df()
-                
-                if result_df.empty:
-                    return {}
-                
-                row = result_df.iloc[0]
-                total_spend = float(row['total_spend'] or 0)
-                total_impressions = int(row['total_impressions'] or 0)
-                total_clicks = int(row['total_clicks'] or 0)
-                total_conversions = int(row['total_conversions'] or 0)
-                
-                return {
-                    'total_spend': total_spend,
-                    'total_impressions': total_impressions,
-                    'total_clicks': total_clicks,
-                    'total_conversions': total_conversions,
-                    'avg_ctr': (total_clicks / total_impressions * 100) if total_impressions > 0 else 0,
-                    'avg_cpc': (total_spend / total_clicks) if total_clicks > 0 else 0,
-                    'avg_cpa': (total_spend / total_conversions) if total_conversions > 0 else 0,
-                    'campaign_count': int(row['campaign_count'] or 0)
-                }
-        except Exception as e:
-            logger.error(f"Failed to get total metrics: {e}")
+        result_df = self.aggregate(self._default_metric_columns(), filters=filters)
+        if result_df.empty:
             return {}
+        
+        row = result_df.iloc[0]
+        total_spend = float(row['spend'] or 0)
+        total_impressions = int(row['impressions'] or 0)
+        total_clicks = int(row['clicks'] or 0)
+        total_conversions = int(row['conversions'] or 0)
+        
+        return {
+            'total_spend': total_spend,
+            'total_impressions': total_impressions,
+            'total_clicks': total_clicks,
+            'total_conversions': total_conversions,
+            'avg_ctr': (total_clicks / total_impressions * 100) if total_impressions > 0 else 0,
+            'avg_cpc': (total_spend / total_clicks) if total_clicks > 0 else 0,
+            'avg_cpa': (total_spend / total_conversions) if total_conversions > 0 else 0,
+            'campaign_count': int(row['row_count'] or 0)
+        }
 
     def get_total_count(self) -> int:
         """Get total number of campaign records."""
@@ -489,7 +1359,7 @@ class DuckDBManager:
         
         try:
             with self.connection() as conn:
-                result = conn.execute(f"SELECT COUNT(*) FROM '{CAMPAIGNS_PARQUET}'").fetchone()  # nosec B608
+                result = conn.execute(f"SELECT COUNT(*) FROM {self.get_parquet_source()}").fetchone()  # nosec B608
                 return result[0] if result else 0
         except Exception as e:
             logger.error(f"Failed to get count: {e}")
@@ -497,8 +1367,20 @@ class DuckDBManager:
     
     def clear_data(self):
         """Delete all campaign data."""
-        if CAMPAIGNS_PARQUET.exists():
-            CAMPAIGNS_PARQUET.unlink()
+        if self.dataset_dir.exists():
+            shutil.rmtree(self.dataset_dir)
+            self._indexed = False
+            with self._schema_lock:
+                self._schema = None
+                self._dimensions = None
+                self._rollups = None
+            try:
+                with self.connection() as conn:
+                    conn.execute("DROP TABLE IF EXISTS campaigns")
+                    conn.execute(f"DROP TABLE IF EXISTS {ROLLUP_TABLE}")
+                    conn.execute(f"DROP TABLE IF EXISTS {ROLLUP_CATALOG_TABLE}")
+            except Exception as e:
+                logger.warning(f"Failed to drop campaigns table: {e}")
             logger.info("Cleared campaign data")
 
 
@@ -511,4 +1393,6 @@ def get_duckdb_manager() -> DuckDBManager:
     global _duckdb_manager
     if _duckdb_manager is None:
         _duckdb_manager = DuckDBManager()
+        # Serve a pre-partitioning data/campaigns.parquet instead of an empty dataset
+        _duckdb_manager.migrate_legacy_file()
     return _duckdb_manager
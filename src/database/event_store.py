@@ -0,0 +1,517 @@
+"""
+Shared append-only event store with DuckDB rollups.
+
+Operational events (NL query logs, query tracker lifecycle, user actions and
+sessions) are appended into one DuckDB table, tagged by ``stream``. Appends
+are buffered and written in batches; every batch also updates three rollup
+tables in the same transaction:
+
+* ``rollup_minute``: events, value count/sum/max and amount sum per stream,
+  minute and status,
+* ``rollup_latency``: a log-bucketed latency sketch per stream and minute
+  (bucket ``i`` holds values in ``(gamma^(i-1), gamma^i]``, so quantiles read
+  from it are within ``LATENCY_ACCURACY`` relative error),
+* ``rollup_keys``: events and value sum per stream, day, dimension
+  (``user`` or ``key``), name and status.
+
+Rollups are additive, so dashboard reads over months aggregate a few rows per
+minute or day instead of rescanning raw events. Raw events stay queryable for
+drill-downs (``events()``, ``query()``).
+
+Stores are opened per database file and shared within the process through
+``get_event_store()``; like ``analytics.duckdb``, a store file has a single
+writer process.
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from loguru import logger
+
+from src.utils.quantile_sketch import DDSketch
+
+DEFAULT_STORE_PATH = Path(os.getenv("EVENT_STORE_PATH", "data/events.duckdb"))
+
+# Events kept in memory while the store cannot be written; the oldest are
+# dropped beyond this
+MAX_BUFFERED_EVENTS = int(os.getenv("EVENT_STORE_MAX_BUFFER", "100000"))
+
+# Relative accuracy of latency quantiles read from the sketch; buckets use the
+# DDSketch key mapping so they load straight into one
+LATENCY_ACCURACY = 0.01
+LATENCY_GAMMA = (1 + LATENCY_ACCURACY) / (1 - LATENCY_ACCURACY)
+
+# Rollup key dimensions
+DIMENSION_USER = "user"
+DIMENSION_KEY = "key"
+
+TIMESERIES_INTERVALS = ("minute", "hour", "day", "week", "month")
+
+EVENT_SCHEMA = pa.schema([
+    ("stream", pa.string()),
+    ("ts", pa.timestamp("us")),
+    ("event_id", pa.string()),
+    ("user_id", pa.string()),
+    ("session_id", pa.string()),
+    ("status", pa.string()),
+    ("key", pa.string()),
+    ("label", pa.string()),
+    ("value", pa.float64()),
+    ("amount", pa.float64()),
+    ("payload", pa.string()),  # JSON-encoded
+])
+
+_SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        stream VARCHAR, ts TIMESTAMP, event_id VARCHAR, user_id VARCHAR, session_id VARCHAR,
+        status VARCHAR, key VARCHAR, label VARCHAR, value DOUBLE, amount DOUBLE, payload VARCHAR
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_minute (
+        stream VARCHAR, minute TIMESTAMP, status VARCHAR,
+        events BIGINT, value_events BIGINT, value_sum DOUBLE, value_max DOUBLE, amount_sum DOUBLE,
+        PRIMARY KEY (stream, minute, status)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_latency (
+        stream VARCHAR, minute TIMESTAMP, bucket INTEGER, events BIGINT,
+        PRIMARY KEY (stream, minute, bucket)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_keys (
+        stream VARCHAR, day DATE, dimension VARCHAR, name VARCHAR, status VARCHAR,
+        events BIGINT, value_sum DOUBLE, label VARCHAR,
+        PRIMARY KEY (stream, day, dimension, name, status)
+    )
+    """,
+]
+
+# Rollups of the staged batch (registered as _batch), merged into the totals
+_ROLLUP_SQL = [
+    """
+    INSERT INTO rollup_minute
+    SELECT stream, date_trunc('minute', ts), coalesce(status, ''),
+           count(*), count(*) FILTER (WHERE value > 0),
+           coalesce(sum(value) FILTER (WHERE value > 0), 0), coalesce(max(value), 0),
+           coalesce(sum(amount), 0)
+    FROM _batch GROUP BY ALL
+    ON CONFLICT (stream, minute, status) DO UPDATE SET
+        events = events + EXCLUDED.events,
+        value_events = value_events + EXCLUDED.value_events,
+        value_sum = value_sum + EXCLUDED.value_sum,
+        value_max = greatest(value_max, EXCLUDED.value_max),
+        amount_sum = amount_sum + EXCLUDED.amount_sum
+    """,
+    f"""
+    INSERT INTO rollup_latency
+    SELECT stream, date_trunc('minute', ts), CAST(ceil(ln(value) / {math.log(LATENCY_GAMMA)!r}) AS INTEGER), count(*)
+    FROM _batch WHERE value > 0 GROUP BY ALL
+    ON CONFLICT (stream, minute, bucket) DO UPDATE SET events = events + EXCLUDED.events
+    """,
+    f"""
+    INSERT INTO rollup_keys
+    SELECT stream, CAST(ts AS DATE), '{DIMENSION_USER}', user_id, coalesce(status, ''),
+           count(*), coalesce(sum(value), 0), NULL
+    FROM _batch WHERE user_id IS NOT NULL GROUP BY ALL
+    UNION ALL
+    SELECT stream, CAST(ts AS DATE), '{DIMENSION_KEY}', key, coalesce(status, ''),
+           count(*), coalesce(sum(value), 0), any_value(label)
+    FROM _batch WHERE key IS NOT NULL GROUP BY stream, CAST(ts AS DATE), key, coalesce(status, '')
+    ON CONFLICT (stream, day, dimension, name, status) DO UPDATE SET
+        events = events + EXCLUDED.events,
+        value_sum = value_sum + EXCLUDED.value_sum,
+        label = coalesce(label, EXCLUDED.label)
+    """,
+]
+
+
+def _time_filter(column: str, start: Optional[Any], end: Optional[Any], params: List[Any]) -> str:
+    """``AND`` clauses bounding ``column`` to [start, end)."""
+    clauses = ""
+    if start is not None:
+        clauses += f" AND {column} >= ?"
+        params.append(start)
+    if end is not None:
+        clauses += f" AND {column} < ?"
+        params.append(end)
+    return clauses
+
+
+class EventStore:
+    """Buffered append-only event log with minute/day rollups in DuckDB."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        flush_size: int = 500,
+        flush_interval: float = 2.0,
+    ):
+        """
+        Args:
+            db_path: DuckDB file (default ``EVENT_STORE_PATH`` or data/events.duckdb)
+            flush_size: Buffered events that trigger a flush
+            flush_interval: Seconds between background flushes (0 disables)
+        """
+        self.db_path = Path(db_path) if db_path else DEFAULT_STORE_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+
+        self._conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._conn_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffer_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="event-store-flusher", daemon=True)
+            self._flusher.start()
+        atexit.register(self.close)
+
+    def _connection(self) -> duckdb.DuckDBPyConnection:
+        """Shared connection, opened (and the schema created) on first use."""
+        if self._conn is None:
+            with self._conn_lock:
+                if self._conn is None:
+                    conn = duckdb.connect(str(self.db_path))
+                    for statement in _SCHEMA_SQL:
+                        conn.execute(statement)
+                    self._conn = conn
+        return self._conn
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(
+        self,
+        stream: str,
+        timestamp: Optional[datetime] = None,
+        event_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        status: Optional[str] = None,
+        key: Optional[str] = None,
+        label: Optional[str] = None,
+        value: Optional[float] = None,
+        amount: Optional[float] = None,
+        payload: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Buffer one event.
+
+        Args:
+            stream: Event stream (e.g. ``query_log``, ``user_action``)
+            timestamp: Event time (default now, UTC)
+            event_id: Identifier of the event or the entity it belongs to
+            user_id: User, rolled up under the ``user`` dimension
+            session_id: Session the event belongs to
+            status: Category rolled up per minute (status, action type...)
+            key: Grouping key rolled up under the ``key`` dimension
+            label: Human-readable text kept with the ``key`` rollup
+            value: Measured value (latency, duration), sketched when > 0
+            amount: Secondary additive quantity (tokens, rows)
+            payload: Full record, returned by ``events()``
+        """
+        try:
+            event = {
+                "stream": stream,
+                "ts": timestamp or datetime.utcnow(),
+                "event_id": event_id,
+                "user_id": None if user_id is None else str(user_id),
+                "session_id": None if session_id is None else str(session_id),
+                "status": status,
+                "key": key,
+                "label": label,
+                "value": None if value is None else float(value),
+                "amount": None if amount is None else float(amount),
+                "payload": json.dumps(payload, default=str) if payload is not None else None,
+            }
+        except (TypeError, ValueError) as e:
+            # Recording an event must never fail the caller's request
+            logger.warning(f"Dropped malformed {stream} event: {e}")
+            return
+        with self._buffer_lock:
+            self._buffer.append(event)
+            buffer_full = len(self._buffer) >= self.flush_size
+        if buffer_full:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write buffered events and merge them into the rollups; returns the count.
+
+        Never raises: on failure the events go back to the front of the buffer
+        (capped at ``MAX_BUFFERED_EVENTS``) for the next flush.
+        """
+        with self._buffer_lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return 0
+
+        with self._write_lock:
+            began = registered = False
+            conn = None
+            try:
+                batch = self._to_table(events)
+                conn = self._connection()
+                conn.register("_batch", batch)
+                registered = True
+                conn.execute("BEGIN TRANSACTION")
+                began = True
+                conn.execute("INSERT INTO events SELECT * FROM _batch")
+                for statement in _ROLLUP_SQL:
+                    conn.execute(statement)
+                conn.execute("COMMIT")
+                return batch.num_rows
+            except Exception as e:
+                if began:
+                    try:
+                        conn.execute("ROLLBACK")
+                    except Exception as rollback_error:
+                        logger.warning(f"Event store rollback failed: {rollback_error}")
+                logger.error(f"Event store flush failed, {len(events)} events kept in buffer: {e}")
+                self._requeue(events)
+                return 0
+            finally:
+                if registered:
+                    conn.unregister("_batch")
+
+    @staticmethod
+    def _to_table(events: List[Dict[str, Any]]) -> pa.Table:
+        """Convert buffered events to Arrow, dropping any that do not fit the schema."""
+        try:
+            return pa.Table.from_pylist(events, schema=EVENT_SCHEMA)
+        except (pa.ArrowException, TypeError, ValueError):
+            valid = []
+            for event in events:
+                try:
+                    pa.Table.from_pylist([event], schema=EVENT_SCHEMA)
+                    valid.append(event)
+                except (pa.ArrowException, TypeError, ValueError) as e:
+                    logger.warning(f"Dropped {event.get('stream')} event that does not match the schema: {e}")
+            return pa.Table.from_pylist(valid, schema=EVENT_SCHEMA)
+
+    def _requeue(self, events: List[Dict[str, Any]]):
+        """Put unwritten events back in front of newer ones, keeping at most MAX_BUFFERED_EVENTS."""
+        with self._buffer_lock:
+            self._buffer[:0] = events
+            overflow = len(self._buffer) - MAX_BUFFERED_EVENTS
+            if overflow > 0:
+                del self._buffer[:overflow]
+        if overflow > 0:
+            logger.warning(f"Event store buffer full, dropped {overflow} oldest events")
+
+    def close(self):
+        """Stop the background flusher, write buffered events and close the connection."""
+        self._closed.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=self.flush_interval + 1)
+        self.flush()
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Background event flush failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def query(self, sql: str, params: Optional[Sequence[Any]] = None) -> pd.DataFrame:
+        """Run SQL against the store (``events`` and ``rollup_*`` tables) after a flush."""
+        self.flush()
+        cursor = self._connection().cursor()
+        try:
+            return cursor.execute(sql, list(params or [])).df()
+        finally:
+            cursor.close()
+
+    def events(
+        self,
+        stream: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        status: Optional[str] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        min_value: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Payloads of raw events in [start, end), oldest first."""
+        params: List[Any] = [stream]
+        sql = "SELECT payload FROM events WHERE stream = ?" + _time_filter("ts", start, end, params)
+        for column, wanted in (("status", status), ("user_id", user_id), ("session_id", session_id)):
+            if wanted is not None:
+                sql += f" AND {column} = ?"
+                params.append(wanted)
+        if min_value is not None:
+            sql += " AND value > ?"
+            params.append(min_value)
+        sql += " ORDER BY ts"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        return [json.loads(p) for p in self.query(sql, params)["payload"] if p is not None]
+
+    def event_ids(self, stream: str, event_ids: Sequence[str]) -> set:
+        """Those of ``event_ids`` already stored in ``stream``."""
+        if not event_ids:
+            return set()
+        found = self.query(
+            "SELECT DISTINCT event_id FROM events WHERE stream = ? AND list_contains(?, event_id)",
+            [stream, list(event_ids)],
+        )
+        return set(found["event_id"])
+
+    def import_events(self, stream: str, events: List[Dict[str, Any]]) -> int:
+        """
+        Append a one-off import (``append()`` keyword arguments, each with an
+        ``event_id``), skipping ids the stream already holds, and flush.
+
+        Re-running an interrupted import therefore adds only what is missing.
+
+        Returns:
+            Number of events added
+
+        Raises:
+            RuntimeError: Some events could not be written (keep the source)
+        """
+        ids = [event["event_id"] for event in events]
+        stored = self.event_ids(stream, ids)
+        added = [event for event in events if event["event_id"] not in stored]
+        for event in added:
+            self.append(stream, **event)
+        self.flush()
+
+        missing = set(ids) - self.event_ids(stream, ids)
+        if missing:
+            raise RuntimeError(f"{len(missing)} imported {stream} events were not written")
+        return len(added)
+
+    def counts(
+        self,
+        stream: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """Per-status totals in [start, end) from the minute rollup."""
+        params: List[Any] = [stream]
+        return self.query(
+            """
+            SELECT status, sum(events) AS events, sum(value_events) AS value_events,
+                   sum(value_sum) AS value_sum, max(value_max) AS value_max, sum(amount_sum) AS amount_sum
+            FROM rollup_minute WHERE stream = ?
+            """ + _time_filter("minute", start, end, params) + " GROUP BY status ORDER BY status",
+            params,
+        )
+
+    def timeseries(
+        self,
+        stream: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        interval: str = "hour",
+    ) -> pd.DataFrame:
+        """Per-period, per-status totals in [start, end) from the minute rollup."""
+        if interval not in TIMESERIES_INTERVALS:
+            raise ValueError(f"interval must be one of {TIMESERIES_INTERVALS}, got {interval!r}")
+        params: List[Any] = [stream]
+        return self.query(
+            f"""
+            SELECT date_trunc('{interval}', minute) AS period, status, sum(events) AS events,
+                   sum(value_events) AS value_events, sum(value_sum) AS value_sum,
+                   max(value_max) AS value_max, sum(amount_sum) AS amount_sum
+            FROM rollup_minute WHERE stream = ?
+            """ + _time_filter("minute", start, end, params) + " GROUP BY ALL ORDER BY period, status",
+            params,
+        )
+
+    def quantiles(
+        self,
+        stream: str,
+        quantiles: Sequence[float],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[float, float]:
+        """
+        Quantiles of positive event values in [start, end) from the latency sketch.
+
+        The summed bucket counts are loaded into a ``DDSketch``, so quantile
+        ``q`` of ``n`` values is the value at 0-based rank ``int(q * n)``.
+        Returns 0 for every quantile when there are no values.
+        """
+        params: List[Any] = [stream]
+        buckets = self.query(
+            "SELECT bucket, sum(events) AS events FROM rollup_latency WHERE stream = ?"
+            + _time_filter("minute", start, end, params) + " GROUP BY bucket ORDER BY bucket",
+            params,
+        )
+        if buckets.empty:
+            return {q: 0.0 for q in quantiles}
+
+        sketch = DDSketch(LATENCY_ACCURACY)
+        sketch.add_bins(dict(zip(buckets["bucket"], buckets["events"])))
+        return {q: sketch.quantile(q) for q in quantiles}
+
+    def key_counts(
+        self,
+        stream: str,
+        dimension: str,
+        start_day: Optional[date] = None,
+        end_day: Optional[date] = None,
+        name: Optional[str] = None,
+        by_status: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Per-name totals (``events``, ``value_sum``, ``label``) for days in [start_day, end_day).
+
+        Args:
+            dimension: ``DIMENSION_USER`` or ``DIMENSION_KEY``
+            name: Restrict to one user / key
+            by_status: Also split by status
+        """
+        params: List[Any] = [stream, dimension]
+        sql = "FROM rollup_keys WHERE stream = ? AND dimension = ?" + _time_filter("day", start_day, end_day, params)
+        if name is not None:
+            sql += " AND name = ?"
+            params.append(name)
+        group = "name, status" if by_status else "name"
+        return self.query(
+            f"SELECT {group}, sum(events) AS events, sum(value_sum) AS value_sum, any_value(label) AS label "
+            f"{sql} GROUP BY {group} ORDER BY events DESC, name",
+            params,
+        )
+
+
+_stores: Dict[Path, EventStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_event_store(db_path: Optional[str] = None) -> EventStore:
+    """Process-wide store for ``db_path`` (default: the shared ``EVENT_STORE_PATH``)."""
+    path = (Path(db_path) if db_path else DEFAULT_STORE_PATH).resolve()
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = EventStore(str(path))
+        return _stores[path]
@@ -0,0 +1,244 @@
+"""
+Pre-aggregated rollups of the campaign dataset.
+
+Dashboard, pacing and insight queries mostly ask for summed metrics by a date
+grain and one or two core dimensions. Rollups precompute those sums at ingest
+time in one ``GROUPING SETS`` scan:
+
+* grains: day, ISO week (Monday start) and month of the dataset date column,
+* dimension sets: none, each core dimension, each pair and all of them,
+* metrics: the coalesced source columns of each summable metric, plus
+  ``row_count``.
+
+All rows live in one DuckDB table keyed by ``__grain``, ``__period`` and
+``__set`` (the GROUPING() bitmask of the dimensions). Sums and counts are
+additive, so appends merge the rollup of the new files into it. ``plan()``
+picks the smallest rollup that covers a query's metrics, group-bys, filters
+and date range; anything it cannot answer exactly goes to the base table.
+"""
+
+import json
+from dataclasses import dataclass, field, asdict
+from datetime import date
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+ROLLUP_TABLE = "campaign_rollups"
+ROLLUP_CATALOG_TABLE = "campaign_rollup_catalog"
+
+# Canonical dimensions crossed with each grain
+ROLLUP_DIMENSIONS = ['platform', 'channel', 'funnel', 'device', 'region']
+
+# Canonical metrics pre-summed (each over all of its alias columns)
+ROLLUP_METRICS = ['spend', 'impressions', 'clicks', 'conversions', 'reach', 'revenue']
+
+# Finest to coarsest; a grain can be answered from itself or any finer grain that nests in it
+ROLLUP_GRAINS = ['day', 'week', 'month']
+GRAIN_SOURCES = {
+    'day': ['day'],
+    'week': ['week', 'day'],
+    'month': ['month', 'day'],
+}
+
+# Dimension sets larger than this fraction of the base table are dropped (no speedup)
+MAX_ROW_RATIO = 0.5
+
+
+@dataclass
+class RollupPlan:
+    """How to answer one aggregate() call from the rollup table."""
+    grain: str
+    set_mask: int
+    metric_columns: Dict[str, Optional[str]]  # output metric -> rollup sum column (None = constant 0)
+
+
+@dataclass
+class RollupCatalog:
+    """Layout of the rollup table for one dataset version."""
+    version: str
+    date_column: Optional[str]
+    dimensions: List[str]  # physical dimension columns, in GROUPING() order
+    metric_sources: List[List[str]]  # sum column i (``__sum_i``) coalesces these physical columns
+    sets: List[Dict[str, Any]] = field(default_factory=list)  # grain, mask, dims, rows
+
+    @classmethod
+    def from_schema(cls, schema, extra_metric_sources: Sequence[List[str]] = ()) -> 'RollupCatalog':
+        """
+        Lay out rollups for a dataset schema.
+
+        Args:
+            schema: DatasetSchema of the dataset
+            extra_metric_sources: Additional source-column lists to pre-sum
+                (e.g. the manager's default metric columns)
+        """
+        dimensions = []
+        for key in ROLLUP_DIMENSIONS:
+            column = schema.resolve(key)
+            if column and column not in dimensions:
+                dimensions.append(column)
+
+        metric_sources = []
+        for sources in [schema.sources(key) for key in ROLLUP_METRICS] + list(extra_metric_sources):
+            if sources and list(sources) not in metric_sources:
+                metric_sources.append(list(sources))
+
+        catalog = cls(schema.version, schema.date_column, dimensions, metric_sources)
+        catalog.sets = [
+            {'grain': grain, 'mask': catalog.set_mask(dims), 'dims': list(dims), 'rows': None}
+            for grain in ROLLUP_GRAINS
+            for dims in catalog.dimension_sets()
+        ]
+        return catalog
+
+    def dimension_sets(self) -> List[Tuple[str, ...]]:
+        """Dimension combinations rolled up: none, singles, pairs and all."""
+        sets = [()]
+        for size in (1, 2):
+            sets += list(combinations(self.dimensions, size))
+        if len(self.dimensions) > 2:
+            sets.append(tuple(self.dimensions))
+        return sets
+
+    def set_mask(self, dims: Sequence[str]) -> int:
+        """GROUPING() bitmask of a dimension set (bits are set for ungrouped dimensions)."""
+        n = len(self.dimensions)
+        return sum(1 << (n - 1 - i) for i, col in enumerate(self.dimensions) if col not in dims)
+
+    @staticmethod
+    def sum_column(index: int) -> str:
+        return f"__sum_{index}"
+
+    def build_query(self, source: str, date_sql: Optional[str]) -> str:
+        """
+        Single-scan query producing every rollup row of the catalog's sets.
+
+        Args:
+            source: Table expression of the rows to roll up
+            date_sql: SQL expression parsing the date column to DATE (None without a date column)
+        """
+        day = date_sql or "CAST(NULL AS DATE)"
+        dims = [f'"{c}"' for c in self.dimensions]
+        inner = [
+            f"{day} AS __day",
+            f"CAST(date_trunc('week', {day}) AS DATE) AS __week",
+            f"CAST(date_trunc('month', {day}) AS DATE) AS __month",
+        ] + dims
+        for i, sources in enumerate(self.metric_sources):
+            casts = ", ".join(f'TRY_CAST("{c}" AS DOUBLE)' for c in sources)
+            inner.append(f"COALESCE({casts}) AS {self.sum_column(i)}")
+
+        sets = []
+        for spec in self.sets:
+            keys = [f"__{spec['grain']}"] + [f'"{c}"' for c in spec['dims']]
+            sets.append(f"({', '.join(keys)})")
+
+        selects = [
+            "CASE WHEN GROUPING(__day) = 0 THEN 'day' WHEN GROUPING(__week) = 0 THEN 'week' "
+            "ELSE 'month' END AS __grain",
+            "COALESCE(__day, __week, __month) AS __period",
+        ] + dims
+        selects.append(f"GROUPING({', '.join(dims)}) AS __set" if dims else "0 AS __set")
+        selects += [f"SUM({self.sum_column(i)}) AS {self.sum_column(i)}" for i in range(len(self.metric_sources))]
+        selects.append("COUNT(*) AS row_count")
+
+        return (
+            f"SELECT {', '.join(selects)} "
+            f"FROM (SELECT {', '.join(inner)} FROM {source}) "
+            f"GROUP BY GROUPING SETS ({', '.join(sets)})"  # nosec B608
+        )
+
+    def merge_query(self, new_rows: str) -> str:
+        """Query summing the existing rollup table with new rollup rows (same layout)."""
+        keys = ["__grain", "__period"] + [f'"{c}"' for c in self.dimensions] + ["__set"]
+        sums = [f"SUM({self.sum_column(i)}) AS {self.sum_column(i)}" for i in range(len(self.metric_sources))]
+        sums.append("CAST(SUM(row_count) AS BIGINT) AS row_count")
+        return (
+            f"SELECT {', '.join(keys + sums)} FROM ("
+            f"SELECT * FROM {ROLLUP_TABLE} UNION ALL BY NAME {new_rows}"
+            f") GROUP BY {', '.join(keys)}"  # nosec B608
+        )
+
+    def update_row_counts(self, counts: pd.DataFrame, base_rows: int) -> List[Dict[str, Any]]:
+        """
+        Record rows per set from a (__grain, __set, rows) frame and drop sets too
+        large to be worth reading. Returns the dropped sets.
+        """
+        lookup = {(r['__grain'], int(r['__set'])): int(r['rows']) for r in counts.to_dict('records')}
+        kept, dropped = [], []
+        for spec in self.sets:
+            spec['rows'] = lookup.get((spec['grain'], spec['mask']), 0)
+            if spec['dims'] and spec['rows'] > base_rows * MAX_ROW_RATIO:
+                dropped.append(spec)
+            else:
+                kept.append(spec)
+        self.sets = kept
+        return dropped
+
+    def plan(
+        self,
+        metrics: Dict[str, List[str]],
+        group_by: Sequence[str],
+        filter_columns: Sequence[str],
+        date_column: Optional[str] = None,
+        start_date: Optional[Any] = None,
+        end_date: Optional[Any] = None,
+        date_grain: Optional[str] = None
+    ) -> Optional[RollupPlan]:
+        """
+        Pick the smallest rollup answering an aggregate() call exactly.
+
+        Returns None when no rollup covers the metrics, dimensions, date grain
+        or date range (ranges must start and end on period boundaries).
+        """
+        metric_columns = {}
+        for name, sources in metrics.items():
+            if not sources:
+                metric_columns[name] = None
+            elif list(sources) in self.metric_sources:
+                metric_columns[name] = self.sum_column(self.metric_sources.index(list(sources)))
+            else:
+                return None
+
+        if date_column is not None and date_column != self.date_column:
+            return None
+        if date_column is None and (start_date is not None or end_date is not None or date_grain):
+            return None
+
+        grains = GRAIN_SOURCES.get(date_grain) if date_grain else ROLLUP_GRAINS
+        if grains is None:
+            return None
+        try:
+            start = pd.Timestamp(str(start_date)).date() if start_date is not None else None
+            end = pd.Timestamp(str(end_date)).date() if end_date is not None else None
+        except (ValueError, TypeError):
+            return None
+        grains = [g for g in grains if self._aligned(g, start, end)]
+
+        needed = set(group_by) | set(filter_columns)
+        candidates = [
+            spec for spec in self.sets
+            if spec['grain'] in grains and needed <= set(spec['dims'])
+        ]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda spec: (spec['rows'] or 0, len(spec['dims'])))
+        return RollupPlan(best['grain'], best['mask'], metric_columns)
+
+    @staticmethod
+    def _aligned(grain: str, start: Optional[date], end: Optional[date]) -> bool:
+        """True when [start, end] consists of whole periods of grain."""
+        if grain == 'day':
+            return True
+        next_day = (pd.Timestamp(end) + pd.Timedelta(days=1)).date() if end else None
+        if grain == 'week':
+            return (start is None or start.weekday() == 0) and (next_day is None or next_day.weekday() == 0)
+        return (start is None or start.day == 1) and (next_day is None or next_day.day == 1)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str) -> 'RollupCatalog':
+        return cls(**json.loads(data))
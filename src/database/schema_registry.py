@@ -0,0 +1,144 @@
+"""
+Dataset schema registry.
+
+Resolves canonical metric/dimension keys (spend, platform, date, ...) to the
+physical columns of the uploaded campaign dataset. The resolution is computed
+once when the dataset is written and persisted next to the Parquet files, so
+API endpoints and agents read it instead of re-running DESCRIBE / sample
+queries on every request.
+
+Each write of the dataset produces a new schema ``version``; consumers can use
+it to invalidate anything they derived from the previous data.
+"""
+
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# ============================================================================
+# ROBUST COLUMN MAPPING - Central registry of all column name variations
+# ============================================================================
+COLUMN_ALIASES: Dict[str, List[str]] = {
+    'spend': ['Spend', 'Total Spent', 'Total_Spent', 'spend', 'Cost', 'cost', 'Media Cost', 'media_cost', 'Ad Spend', 'ad_spend', 'Amount Spent', 'investment', 'Investment'],
+    'impressions': ['Impressions', 'Impr', 'impressions', 'impr', 'Impression', 'impression', 'views', 'Views'],
+    'clicks': ['Clicks', 'clicks', 'Click', 'click', 'link_clicks', 'Link Clicks'],
+    'conversions': ['Conversions', 'Site Visit', 'conversions', 'Conversion', 'conversion', 'conv', 'Conv', 'purchases', 'Purchases', 'leads', 'Leads', 'site_visit'],
+    'date': ['Date', 'date', 'Week', 'week', 'Month', 'month', 'Day', 'day', 'Period', 'period', 'Time', 'time', 'report_date'],
+    'reach': ['Reach', 'reach', 'Unique Reach', 'unique_reach', 'Reach_2024', 'Reach_2025', 'unique_users'],
+    'platform': ['Platform', 'platform', 'Network', 'network', 'Ad Network', 'ad_network', 'Publisher', 'publisher', 'Source', 'source', 'account'],
+    'channel': ['Channel', 'channel', 'Medium', 'medium', 'Marketing Channel', 'Traffic Source', 'traffic_source'],
+    'device': ['Device_Type', 'Device Type', 'device_type', 'Device', 'device'],
+    'region': ['Geographic_Region', 'geographic_region', 'Region', 'region', 'State', 'state', 'Location', 'location', 'Geo', 'geo', 'DMA', 'dma', 'Country', 'country'],
+    'campaign': ['Campaign', 'campaign', 'Campaign Name', 'campaign_name', 'Campaign_Name'],
+    'funnel': ['Funnel', 'funnel', 'Funnel_Stage', 'Funnel Stage', 'Stage', 'stage', 'funnel_stage'],
+    'placement': ['Placement', 'placement', 'Position', 'position', 'Ad Placement', 'ad_placement'],
+    'ad_type': ['Ad Type', 'ad_type', 'Ad_Type', 'AdType', 'creative_type', 'Creative Type'],
+    'ctr': ['CTR', 'ctr', 'Click Through Rate', 'click_through_rate'],
+    'cpc': ['CPC', 'cpc', 'Cost Per Click', 'cost_per_click'],
+    'cpm': ['CPM', 'cpm', 'Cost Per Mille', 'cost_per_mille'],
+    'cpa': ['CPA', 'cpa', 'Cost Per Acquisition', 'cost_per_acquisition', 'Cost Per Conversion'],
+    'roas': ['ROAS', 'roas', 'Return On Ad Spend', 'return_on_ad_spend'],
+    'audience': ['Audience', 'audience', 'Audience Segment', 'Segment', 'segment', 'Audience Name'],
+    'age': ['Age', 'age', 'Age Group', 'age_group', 'Demographic', 'demographic'],
+    'objective': ['Objective', 'objective', 'Campaign Objective', 'campaign_objective', 'Goal', 'goal'],
+    'targeting': ['Targeting', 'targeting', 'Targeting Type', 'targeting_type', 'Target Type'],
+    'revenue': ['Revenue', 'revenue', 'Total Revenue', 'total_revenue', 'Sales', 'sales', 'Purchase Value', 'purchase_value', 'Value', 'value', 'Revenue_2024', 'Revenue_2025']
+}
+
+# DuckDB type prefixes treated as numeric / temporal
+NUMERIC_TYPE_PREFIXES = ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'UTINYINT', 'USMALLINT',
+                         'UINTEGER', 'UBIGINT', 'FLOAT', 'DOUBLE', 'DECIMAL', 'REAL')
+TEMPORAL_TYPE_PREFIXES = ('DATE', 'TIMESTAMP')
+
+
+def resolve_metric_columns(columns, metric_key: str) -> List[str]:
+    """Return every physical column matching the aliases of metric_key, in alias priority order."""
+    aliases = COLUMN_ALIASES.get(metric_key, [])
+    cols_lower = {c.lower(): c for c in columns}
+
+    found_cols = []
+    for alias in aliases:
+        actual_col = cols_lower.get(alias.lower())
+        if actual_col and actual_col not in found_cols:
+            found_cols.append(actual_col)
+    return found_cols
+
+
+def resolve_column(columns, metric_key: str) -> Optional[str]:
+    """Resolve a metric/dimension key to the first matching physical column name (case-insensitive)."""
+    matches = resolve_metric_columns(columns, metric_key)
+    return matches[0] if matches else None
+
+
+@dataclass
+class DatasetSchema:
+    """Resolved schema of one version of the campaign dataset."""
+    version: str
+    dtypes: Dict[str, str]  # physical column -> DuckDB type, in dataset column order
+    column_map: Dict[str, List[str]]  # canonical key -> matching physical columns, priority order
+    date_column: Optional[str] = None
+    date_type: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.dtypes.keys())
+
+    @property
+    def date_is_string(self) -> bool:
+        """True when the date column is stored as text and must be parsed in SQL."""
+        return bool(self.date_type) and not self.date_type.upper().startswith(TEMPORAL_TYPE_PREFIXES)
+
+    def sources(self, key: str) -> List[str]:
+        """All physical columns for a canonical key (consolidated per row by aggregations)."""
+        return list(self.column_map.get(key, []))
+
+    def resolve(self, key: str) -> Optional[str]:
+        """
+        Resolve a canonical key to its physical column.
+        Keys that are not canonical are matched against the physical columns case-insensitively.
+        """
+        if not key:
+            return None
+        sources = self.column_map.get(key.lower())
+        if sources:
+            return sources[0]
+        lower = key.lower()
+        for col in self.dtypes:
+            if col.lower() == lower:
+                return col
+        return None
+
+    def has(self, key: str) -> bool:
+        return bool(self.column_map.get(key))
+
+    def is_numeric(self, column: str) -> bool:
+        return self.dtypes.get(column, '').upper().startswith(NUMERIC_TYPE_PREFIXES)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DatasetSchema':
+        return cls(**data)
+
+
+def build_schema(dtypes: Dict[str, str], version: Optional[str] = None) -> DatasetSchema:
+    """
+    Resolve every canonical key against a dataset's columns.
+
+    Args:
+        dtypes: Physical column name -> DuckDB type (e.g. from DESCRIBE)
+        version: Schema version; a new one is generated when omitted
+    """
+    columns = list(dtypes.keys())
+    column_map = {key: resolve_metric_columns(columns, key) for key in COLUMN_ALIASES}
+    date_column = column_map['date'][0] if column_map['date'] else None
+    return DatasetSchema(
+        version=version or uuid.uuid4().hex,
+        dtypes=dict(dtypes),
+        column_map=column_map,
+        date_column=date_column,
+        date_type=dtypes.get(date_column) if date_column else None
+    )
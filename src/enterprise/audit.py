@@ -1,15 +1,54 @@
 """
 Enterprise Audit Logging System
 Tracks all user actions for compliance and security
+
+Events are buffered in memory and flushed as Parquet files into daily
+partitions (``events/date=YYYY-MM-DD/part-*.parquet``). Every file is sorted
+by user, event type and timestamp, so the Parquet row-group statistics act
+as indexes on those columns: queries only open the partitions of their date
+range and DuckDB pushes the remaining predicates down into the scan.
+Legacy ``audit_*.jsonl`` files are converted once with ``migrate_jsonl()``
+(see ``scripts/migrate_audit_logs.py``).
 """
+import atexit
 import json
-from datetime import datetime
+import shutil
+import threading
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Tuple
 from enum import Enum
 from loguru import logger
+import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Hive-style daily partitions under <audit_dir>/events
+EVENTS_DIR = "events"
+PARTITION_PREFIX = "date="
+LEGACY_PATTERN = "audit_*.jsonl"
+
+AUDIT_SCHEMA = pa.schema([
+    ("event_id", pa.string()),
+    ("timestamp", pa.timestamp("us")),
+    ("event_type", pa.string()),
+    ("severity", pa.string()),
+    ("user", pa.string()),
+    ("organization", pa.string()),
+    ("action", pa.string()),
+    ("resource", pa.string()),
+    ("details", pa.string()),  # JSON-encoded
+    ("ip_address", pa.string()),
+    ("user_agent", pa.string()),
+    ("version", pa.string()),
+])
 
+# Sort order inside each file; keeps row-group min/max tight for these filters
+SORT_KEYS = [("user", "ascending"), ("event_type", "ascending"), ("timestamp", "ascending")]
+ROW_GROUP_SIZE = 64 * 1024
 
 class AuditEventType(Enum):
     """Types of audit events."""
@@ -41,11 +80,43 @@ class AuditSeverity(Enum):
 class AuditLogger:
     """Enterprise-grade audit logging system."""
     
-    def __init__(self, audit_dir: str = "./data/enterprise/audit"):
-        """Initialize audit logger."""
+    def __init__(
+        self,
+        audit_dir: str = "./data/enterprise/audit",
+        buffer_size: int = 100,
+        flush_interval: float = 5.0
+    ):
+        """
+        Initialize audit logger.
+        
+        Args:
+            audit_dir: Directory holding the partitioned audit events
+            buffer_size: Buffered events that trigger a flush
+            flush_interval: Seconds between background flushes (0 disables)
+        """
         self.audit_dir = Path(audit_dir)
         self.audit_dir.mkdir(parents=True, exist_ok=True)
-        self.current_log_file = self.audit_dir / f"audit_{datetime.now().strftime('%Y%m')}.jsonl"
+        self.events_dir = self.audit_dir / EVENTS_DIR
+        self.events_dir.mkdir(exist_ok=True)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="audit-flusher", daemon=True)
+            self._flusher.start()
+        atexit.register(self.close)
+        
+        legacy_files = list(self.audit_dir.glob(LEGACY_PATTERN))
+        if legacy_files:
+            logger.warning(
+                f"{len(legacy_files)} legacy JSONL audit file(s) in {self.audit_dir} are not queried; "
+                f"run scripts/migrate_audit_logs.py to convert them"
+            )
     
     def log_event(
         self,
@@ -62,6 +133,9 @@ class AuditLogger:
         """
         Log an audit event.
         
+        The event is buffered and written with the next flush (buffer full,
+        ``flush_interval`` elapsed, a query, or ``close()``).
+        
         Args:
             event_type: Type of event
             user: Username
@@ -75,22 +149,24 @@ class AuditLogger:
         """
         event = {
             "event_id": self._generate_event_id(),
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "event_type": event_type.value,
             "severity": severity.value,
             "user": user,
             "organization": organization,
             "action": action,
             "resource": resource,
-            "details": details or {},
+            "details": json.dumps(details or {}, default=str),
             "ip_address": ip_address,
             "user_agent": user_agent,
             "version": "1.0"
         }
         
-        # Write to log file
-        with open(self.current_log_file, 'a') as f:
-            f.write(json.dumps(event) + '\n')
+        with self._buffer_lock:
+            self._buffer.append(event)
+            buffer_full = len(self._buffer) >= self.buffer_size
+        if buffer_full:
+            self.flush()
         
         # Also log to standard logger
         log_message = f"[AUDIT] {user} - {action}"
@@ -105,9 +181,155 @@ class AuditLogger:
     
     def _generate_event_id(self) -> str:
         """Generate unique event ID."""
-        import uuid
         return str(uuid.uuid4())
     
+    # ------------------------------------------------------------------
+    # Buffered writer
+    # ------------------------------------------------------------------
+    
+    def flush(self) -> int:
+        """
+        Write buffered events to their daily partitions.
+        
+        Returns:
+            Number of events written
+        """
+        with self._buffer_lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return 0
+        
+        try:
+            self._write_events(events)
+        except Exception as e:
+            # Keep the events for the next attempt rather than dropping audit records
+            logger.error(f"Audit flush failed, {len(events)} events kept in buffer: {e}")
+            with self._buffer_lock:
+                self._buffer[:0] = events
+            return 0
+        return len(events)
+    
+    def close(self):
+        """Stop the background flusher and write any buffered events."""
+        self._closed.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=self.flush_interval + 1)
+        self.flush()
+    
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+    
+    def _partition_dir(self, day: date) -> Path:
+        return self.events_dir / f"{PARTITION_PREFIX}{day.isoformat()}"
+    
+    def _write_events(self, events: List[Dict[str, Any]], name: Optional[str] = None):
+        """
+        Write events as one sorted Parquet file per day.
+        
+        Args:
+            events: Event records (``timestamp`` as datetime, ``details`` as JSON)
+            name: Fixed file name per partition; rewriting the same name
+                replaces the file (used to make migrations repeatable)
+        """
+        by_day: Dict[date, List[Dict[str, Any]]] = defaultdict(list)
+        for event in events:
+            by_day[event["timestamp"].date()].append(event)
+        
+        with self._write_lock:
+            for day, rows in by_day.items():
+                partition = self._partition_dir(day)
+                partition.mkdir(parents=True, exist_ok=True)
+                table = pa.Table.from_pylist(rows, schema=AUDIT_SCHEMA).sort_by(SORT_KEYS)
+                self._write_file(table, partition / f"part-{name or uuid.uuid4().hex}.parquet")
+    
+    @staticmethod
+    def _write_file(table: pa.Table, path: Path):
+        # Write next to the target and rename, so readers never see a partial file
+        tmp_path = path.with_suffix(".tmp")
+        pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+        tmp_path.replace(path)
+    
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    
+    def _partitions(self) -> Iterable[Tuple[date, Path]]:
+        for partition in self.events_dir.glob(f"{PARTITION_PREFIX}*"):
+            try:
+                yield date.fromisoformat(partition.name[len(PARTITION_PREFIX):]), partition
+            except ValueError:
+                continue
+    
+    def _partition_files(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> List[Path]:
+        """Parquet files of the daily partitions overlapping the date range."""
+        files = []
+        for day, partition in sorted(self._partitions()):
+            if start_date and day < start_date.date():
+                continue
+            if end_date and day > end_date.date():
+                continue
+            files.extend(sorted(partition.glob("*.parquet")))
+        return files
+    
+    def _query(
+        self,
+        select: str,
+        conditions: List[str],
+        params: List[Any],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        suffix: str = ""
+    ) -> Optional[pa.Table]:
+        """
+        Run ``SELECT <select> FROM <events> WHERE <conditions> <suffix>``.
+        
+        Buffered events are flushed first. Only the partitions overlapping
+        ``start_date``/``end_date`` are scanned; the date bounds are also
+        added as predicates. Returns None when no partition is in range.
+        """
+        self.flush()
+        files = self._partition_files(start_date, end_date)
+        if not files:
+            return None
+        
+        conditions = list(conditions)
+        params = list(params)
+        if start_date:
+            conditions.append("timestamp >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("timestamp <= ?")
+            params.append(end_date)
+        
+        file_list = ", ".join("'" + str(f).replace("'", "''") + "'" for f in files)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {select} FROM read_parquet([{file_list}], union_by_name = true) {where} {suffix}"  # nosec B608
+        with duckdb.connect() as conn:
+            return conn.execute(sql, params).fetch_arrow_table()
+    
+    @staticmethod
+    def _naive(value: Optional[datetime]) -> Optional[datetime]:
+        """Event timestamps are naive local time; align aware bounds with them."""
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+    
+    @staticmethod
+    def _to_records(table: Optional[pa.Table]) -> List[Dict]:
+        """Query rows as event dicts in the original JSON shape."""
+        if table is None:
+            return []
+        records = table.to_pylist()
+        for record in records:
+            record["timestamp"] = record["timestamp"].isoformat()
+            record["details"] = json.loads(record["details"]) if record["details"] else {}
+        return records
+    
     def get_user_activity(
         self,
         user: str,
@@ -127,23 +349,17 @@ class AuditLogger:
         Returns:
             List of audit events
         """
-        events = self._load_events()
-        
-        # Filter by user
-        user_events = [e for e in events if e['user'] == user]
-        
-        # Filter by date range
-        if start_date:
-            user_events = [e for e in user_events if datetime.fromisoformat(e['timestamp']) >= start_date]
-        if end_date:
-            user_events = [e for e in user_events if datetime.fromisoformat(e['timestamp']) <= end_date]
-        
-        # Filter by event types
+        conditions = ['"user" = ?']
+        params: List[Any] = [user]
         if event_types:
-            event_type_values = [et.value for et in event_types]
-            user_events = [e for e in user_events if e['event_type'] in event_type_values]
+            conditions.append(f"event_type IN ({', '.join('?' for _ in event_types)})")
+            params.extend(et.value for et in event_types)
         
-        return user_events
+        return self._to_records(self._query(
+            "*", conditions, params,
+            self._naive(start_date), self._naive(end_date),
+            suffix="ORDER BY timestamp"
+        ))
     
     def get_security_alerts(
         self,
@@ -151,25 +367,19 @@ class AuditLogger:
         severity: Optional[AuditSeverity] = None
     ) -> List[Dict]:
         """Get security-related alerts."""
-        events = self._load_events()
-        
-        # Filter security events
-        security_events = [
-            e for e in events
-            if e['event_type'] == AuditEventType.SECURITY_ALERT.value
-            or e['severity'] in [AuditSeverity.ERROR.value, AuditSeverity.CRITICAL.value]
+        conditions = ["(event_type = ? OR severity IN (?, ?))"]
+        params: List[Any] = [
+            AuditEventType.SECURITY_ALERT.value,
+            AuditSeverity.ERROR.value,
+            AuditSeverity.CRITICAL.value
         ]
-        
-        if start_date:
-            security_events = [
-                e for e in security_events
-                if datetime.fromisoformat(e['timestamp']) >= start_date
-            ]
-        
         if severity:
-            security_events = [e for e in security_events if e['severity'] == severity.value]
+            conditions.append("severity = ?")
+            params.append(severity.value)
         
-        return security_events
+        return self._to_records(self._query(
+            "*", conditions, params, self._naive(start_date), suffix="ORDER BY timestamp"
+        ))
     
     def generate_compliance_report(
         self,
@@ -180,6 +390,9 @@ class AuditLogger:
         """
         Generate compliance report.
         
+        The period is aggregated in one scan to counts per user, event type,
+        severity, hour and login outcome; the report is built from those.
+        
         Args:
             start_date: Report start date
             end_date: Report end date
@@ -188,19 +401,38 @@ class AuditLogger:
         Returns:
             Compliance report data
         """
-        events = self._load_events()
+        conditions, params = [], []
+        if organization:
+            conditions.append("organization = ?")
+            params.append(organization)
         
-        # Filter by date range
-        period_events = [
-            e for e in events
-            if start_date <= datetime.fromisoformat(e['timestamp']) <= end_date
-        ]
+        table = self._query(
+            """
+            "user", event_type, severity, hour(timestamp) AS hour,
+            coalesce(json_extract_string(details, '$.success') = 'false', false) AS failed,
+            COUNT(*) AS events
+            """,
+            conditions, params,
+            self._naive(start_date), self._naive(end_date),
+            suffix="GROUP BY ALL"
+        )
+        if table is not None:
+            counts = table.to_pandas()
+        else:
+            counts = pd.DataFrame({
+                "user": pd.Series(dtype=object), "event_type": pd.Series(dtype=object),
+                "severity": pd.Series(dtype=object), "hour": pd.Series(dtype="int64"),
+                "failed": pd.Series(dtype=bool), "events": pd.Series(dtype="int64")
+            })
         
-        # Filter by organization
-        if organization:
-            period_events = [e for e in period_events if e.get('organization') == organization]
+        def total(mask) -> int:
+            return int(counts.loc[mask, 'events'].sum())
         
-        df = pd.DataFrame(period_events)
+        def by(column: str) -> Dict:
+            return counts.groupby(column)['events'].sum().sort_values(ascending=False, kind='stable').to_dict()
+        
+        def of_type(event_type: AuditEventType) -> pd.Series:
+            return counts['event_type'] == event_type.value
         
         report = {
             "period": {
@@ -209,24 +441,24 @@ class AuditLogger:
             },
             "organization": organization or "all",
             "summary": {
-                "total_events": len(period_events),
-                "unique_users": df['user'].nunique() if len(df) > 0 else 0,
-                "events_by_type": df['event_type'].value_counts().to_dict() if len(df) > 0 else {},
-                "events_by_severity": df['severity'].value_counts().to_dict() if len(df) > 0 else {}
+                "total_events": int(counts['events'].sum()),
+                "unique_users": int(counts['user'].nunique()),
+                "events_by_type": by('event_type'),
+                "events_by_severity": by('severity')
             },
             "security": {
-                "security_alerts": len([e for e in period_events if e['event_type'] == AuditEventType.SECURITY_ALERT.value]),
-                "failed_logins": len([e for e in period_events if e['event_type'] == AuditEventType.USER_LOGIN.value and e.get('details', {}).get('success') == False]),
-                "critical_events": len([e for e in period_events if e['severity'] == AuditSeverity.CRITICAL.value])
+                "security_alerts": total(of_type(AuditEventType.SECURITY_ALERT)),
+                "failed_logins": total(of_type(AuditEventType.USER_LOGIN) & counts['failed']),
+                "critical_events": total(counts['severity'] == AuditSeverity.CRITICAL.value)
             },
             "data_access": {
-                "analyses_created": len([e for e in period_events if e['event_type'] == AuditEventType.ANALYSIS_CREATED.value]),
-                "data_uploaded": len([e for e in period_events if e['event_type'] == AuditEventType.DATA_UPLOADED.value]),
-                "data_exported": len([e for e in period_events if e['event_type'] == AuditEventType.DATA_EXPORTED.value])
+                "analyses_created": total(of_type(AuditEventType.ANALYSIS_CREATED)),
+                "data_uploaded": total(of_type(AuditEventType.DATA_UPLOADED)),
+                "data_exported": total(of_type(AuditEventType.DATA_EXPORTED))
             },
             "user_activity": {
-                "most_active_users": df['user'].value_counts().head(10).to_dict() if len(df) > 0 else {},
-                "activity_by_hour": df.groupby(pd.to_datetime(df['timestamp']).dt.hour).size().to_dict() if len(df) > 0 else {}
+                "most_active_users": dict(list(by('user').items())[:10]),
+                "activity_by_hour": counts.groupby('hour')['events'].sum().to_dict()
             }
         }
         
@@ -249,15 +481,12 @@ class AuditLogger:
         Returns:
             Path to exported file
         """
-        events = self._load_events()
-        
-        # Filter by date range
-        period_events = [
-            e for e in events
-            if start_date <= datetime.fromisoformat(e['timestamp']) <= end_date
-        ]
-        
-        df = pd.DataFrame(period_events)
+        table = self._query(
+            "* REPLACE (strftime(timestamp, '%Y-%m-%dT%H:%M:%S.%f') AS timestamp)", [], [],
+            self._naive(start_date), self._naive(end_date),
+            suffix="ORDER BY timestamp"
+        )
+        df = table.to_pandas() if table is not None else pd.DataFrame(columns=AUDIT_SCHEMA.names)
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
@@ -274,35 +503,114 @@ class AuditLogger:
         logger.info(f"Exported audit log to {export_path}")
         return str(export_path)
     
-    def _load_events(self) -> List[Dict]:
-        """Load all audit events."""
-        events = []
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    
+    def compact(self) -> Dict[str, int]:
+        """
+        Merge each day's part files into a single sorted file.
         
-        # Load all audit log files
-        for log_file in sorted(self.audit_dir.glob("audit_*.jsonl")):
+        Flushes write one small file per day touched; run this periodically
+        (e.g. nightly) so scans open few files with large row groups.
+        
+        Returns:
+            Stats with files before/after and partitions compacted
+        """
+        self.flush()
+        stats = {"files_before": 0, "files_after": 0, "partitions_compacted": 0}
+        
+        with self._write_lock:
+            for _, partition in sorted(self._partitions()):
+                files = sorted(partition.glob("*.parquet"))
+                stats["files_before"] += len(files)
+                if len(files) <= 1:
+                    stats["files_after"] += len(files)
+                    continue
+                
+                table = pa.concat_tables(
+                    pq.read_table(f).cast(AUDIT_SCHEMA) for f in files
+                ).sort_by(SORT_KEYS)
+                self._write_file(table, partition / f"part-{uuid.uuid4().hex}.parquet")
+                for f in files:
+                    f.unlink()
+                stats["files_after"] += 1
+                stats["partitions_compacted"] += 1
+        
+        return stats
+    
+    @staticmethod
+    def _from_legacy(record: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a JSONL audit record to the Parquet row layout."""
+        timestamp = datetime.fromisoformat(record["timestamp"])
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        
+        row = {name: record.get(name) for name in AUDIT_SCHEMA.names}
+        row["event_id"] = row["event_id"] or str(uuid.uuid4())
+        row["timestamp"] = timestamp
+        row["details"] = json.dumps(record.get("details") or {}, default=str)
+        for name in ("event_type", "severity", "user", "organization", "action",
+                     "resource", "ip_address", "user_agent", "version"):
+            if row[name] is not None:
+                row[name] = str(row[name])
+        return row
+    
+    def migrate_jsonl(self, archive: bool = True) -> Dict[str, int]:
+        """
+        Convert legacy ``audit_*.jsonl`` files into the partitioned store.
+        
+        Each file is written under a file name derived from its own name, so
+        re-running after an interruption replaces instead of duplicating.
+        
+        Args:
+            archive: Move converted files to ``archive/jsonl`` (else keep them)
+            
+        Returns:
+            Stats with files and events migrated and lines skipped
+        """
+        stats = {"files": 0, "events": 0, "skipped_lines": 0}
+        archive_dir = self.audit_dir / "archive" / "jsonl"
+        
+        for log_file in sorted(self.audit_dir.glob(LEGACY_PATTERN)):
+            events = []
             with open(log_file, 'r') as f:
-                for line in f:
-                    events.append(json.loads(line))
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        events.append(self._from_legacy(json.loads(line)))
+                    except (ValueError, KeyError, TypeError) as e:
+                        stats["skipped_lines"] += 1
+                        logger.warning(f"Skipping {log_file.name}:{line_number}: {e}")
+            
+            if events:
+                self._write_events(events, name=f"migrated-{log_file.stem}")
+            if archive:
+                archive_dir.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(log_file), str(archive_dir / log_file.name))
+            
+            stats["files"] += 1
+            stats["events"] += len(events)
+            logger.info(f"Migrated {len(events)} audit events from {log_file.name}")
         
-        return events
+        return stats
     
     def rotate_logs(self, keep_months: int = 12):
-        """Rotate old audit logs."""
+        """Archive daily partitions older than ``keep_months``."""
         current_date = datetime.now()
+        archive_dir = self.audit_dir / "archive" / EVENTS_DIR
         
-        for log_file in self.audit_dir.glob("audit_*.jsonl"):
-            # Extract date from filename
-            try:
-                file_date_str = log_file.stem.split('_')[1]
-                file_date = datetime.strptime(file_date_str, '%Y%m')
-                
-                age_months = (current_date.year - file_date.year) * 12 + (current_date.month - file_date.month)
-                
-                if age_months > keep_months:
-                    # Archive or delete old logs
-                    archive_dir = self.audit_dir / "archive"
-                    archive_dir.mkdir(exist_ok=True)
-                    log_file.rename(archive_dir / log_file.name)
-                    logger.info(f"Archived old audit log: {log_file.name}")
-            except (ValueError, IndexError):
-                continue
+        for day, partition in self._partitions():
+            age_months = (current_date.year - day.year) * 12 + (current_date.month - day.month)
+            if age_months > keep_months:
+                archive_dir.mkdir(parents=True, exist_ok=True)
+                target = archive_dir / partition.name
+                if target.exists():
+                    # Partition already archived once (late events); merge the new files
+                    for f in partition.glob("*.parquet"):
+                        shutil.move(str(f), str(target / f.name))
+                    shutil.rmtree(partition)
+                else:
+                    shutil.move(str(partition), str(target))
+                logger.info(f"Archived old audit partition: {partition.name}")
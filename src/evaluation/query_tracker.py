@@ -1,18 +1,25 @@
 """
 Query Tracker - Evaluation Metrics & Traceability
 Logs all queries, interpretations, and user feedback for analysis
+
+Per-query records stay in SQLite (they are updated as the query runs and
+gets feedback). Every lifecycle step is also appended to the shared event
+store (stream ``query_tracker``, metrics under ``query_metrics``) so activity
+over time is read from its rollups.
 """
 import os
 import json
 import uuid
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import pandas as pd
 import logging
 
+from src.database.event_store import EventStore, get_event_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,12 +55,16 @@ class QueryMetrics:
 class QueryTracker:
     """Tracks queries, interpretations, and user feedback for evaluation."""
     
-    def __init__(self, db_path: str = None):
+    STREAM = "query_tracker"
+    METRICS_STREAM = "query_metrics"
+    
+    def __init__(self, db_path: str = None, event_store: Optional[EventStore] = None):
         """
         Initialize the query tracker.
         
         Args:
             db_path: Path to SQLite database file (default: logs/query_tracker.db)
+            event_store: Event store for lifecycle events (default: shared store)
         """
         if db_path is None:
             logs_dir = Path("logs")
@@ -61,6 +72,7 @@ class QueryTracker:
             db_path = logs_dir / "query_tracker.db"
         
         self.db_path = str(db_path)
+        self.event_store = event_store or get_event_store()
         self._init_database()
         logger.info(f"QueryTracker initialized with database: {self.db_path}")
     
@@ -153,6 +165,16 @@ class QueryTracker:
         )
         
         self._insert_query_log(log_entry)
+        self.event_store.append(
+            self.STREAM,
+            timestamp=datetime.fromisoformat(timestamp),
+            event_id=query_id,
+            user_id=user_id,
+            session_id=session_id,
+            status="started",
+            label=original_query,
+            amount=len(interpretations)
+        )
         logger.info(f"Started tracking query: {query_id}")
         
         return query_id
@@ -205,6 +227,16 @@ class QueryTracker:
             conn.commit()
         
         conn.close()
+        
+        if execution_time_ms is not None or error_message is not None:
+            self.event_store.append(
+                self.STREAM,
+                timestamp=datetime.now(),
+                event_id=query_id,
+                status="failed" if error_message is not None else "executed",
+                value=execution_time_ms,
+                amount=result_count
+            )
         logger.info(f"Updated query: {query_id}")
     
     def add_feedback(
@@ -231,6 +263,13 @@ class QueryTracker:
         
         conn.commit()
         conn.close()
+        self.event_store.append(
+            self.STREAM,
+            timestamp=datetime.now(),
+            event_id=query_id,
+            status="feedback",
+            amount=feedback
+        )
         logger.info(f"Added feedback for query: {query_id} - {feedback}")
     
     def log_metric(
@@ -263,6 +302,13 @@ class QueryTracker:
         
         conn.commit()
         conn.close()
+        self.event_store.append(
+            self.METRICS_STREAM,
+            timestamp=datetime.fromisoformat(metric.timestamp),
+            event_id=query_id,
+            key=metric_name,
+            value=metric_value
+        )
     
     def _insert_query_log(self, log_entry: QueryLog):
         """Insert a query log entry into the database."""
@@ -321,33 +367,36 @@ class QueryTracker:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # Total queries
-        cursor.execute("SELECT COUNT(*) FROM query_logs")
-        total_queries = cursor.fetchone()[0]
-        
-        # Queries with feedback
-        cursor.execute("SELECT COUNT(*) FROM query_logs WHERE user_feedback IS NOT NULL")
-        queries_with_feedback = cursor.fetchone()[0]
+        # One pass over query_logs for every statistic
+        cursor.execute("""
+            SELECT
+                COUNT(*),
+                COUNT(user_feedback),
+                AVG(user_feedback),
+                AVG(execution_time_ms),
+                SUM(error_message IS NULL),
+                SUM(selected_interpretation_index = 0)
+            FROM query_logs
+        """)
+        (
+            total_queries,
+            queries_with_feedback,
+            avg_feedback,
+            avg_execution_time,
+            successful_queries,
+            first_interpretation_selected
+        ) = cursor.fetchone()
         
-        # Average feedback
-        cursor.execute("SELECT AVG(user_feedback) FROM query_logs WHERE user_feedback IS NOT NULL")
-        avg_feedback = cursor.fetchone()[0] or 0
+        conn.close()
         
-        # Average execution time
-        cursor.execute("SELECT AVG(execution_time_ms) FROM query_logs WHERE execution_time_ms IS NOT NULL")
-        avg_execution_time = cursor.fetchone()[0] or 0
+        avg_feedback = avg_feedback or 0
+        avg_execution_time = avg_execution_time or 0
         
         # Success rate (queries without errors)
-        cursor.execute("SELECT COUNT(*) FROM query_logs WHERE error_message IS NULL")
-        successful_queries = cursor.fetchone()[0]
-        success_rate = (successful_queries / total_queries * 100) if total_queries > 0 else 0
+        success_rate = ((successful_queries or 0) / total_queries * 100) if total_queries > 0 else 0
         
         # Interpretation accuracy (% of times first interpretation was selected)
-        cursor.execute("SELECT COUNT(*) FROM query_logs WHERE selected_interpretation_index = 0")
-        first_interpretation_selected = cursor.fetchone()[0]
-        interpretation_accuracy = (first_interpretation_selected / total_queries * 100) if total_queries > 0 else 0
-        
-        conn.close()
+        interpretation_accuracy = ((first_interpretation_selected or 0) / total_queries * 100) if total_queries > 0 else 0
         
         return {
             "total_queries": total_queries,
@@ -358,6 +407,42 @@ class QueryTracker:
             "interpretation_accuracy": round(interpretation_accuracy, 2)
         }
     
+    def get_activity(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        interval: str = "hour"
+    ) -> pd.DataFrame:
+        """
+        Query activity per period from the event store rollups.
+        
+        Args:
+            start: Period start (default: 7 days ago)
+            end: Period end, exclusive (default: now)
+            interval: minute, hour, day, week or month
+            
+        Returns:
+            DataFrame indexed by period with started/executed/failed/feedback
+            counts, average execution time and average feedback
+        """
+        end = end or datetime.now()
+        start = start or end - timedelta(days=7)
+        series = self.event_store.timeseries(self.STREAM, start, end, interval)
+        
+        columns = ["started", "executed", "failed", "feedback", "avg_execution_time_ms", "avg_feedback"]
+        if series.empty:
+            return pd.DataFrame(columns=columns)
+        
+        events = series.pivot_table(index="period", columns="status", values="events", aggfunc="sum", fill_value=0)
+        activity = events.reindex(columns=["started", "executed", "failed", "feedback"], fill_value=0)
+        
+        timed = series[series["status"].isin(["executed", "failed"])].groupby("period")[["value_events", "value_sum"]].sum()
+        activity["avg_execution_time_ms"] = (timed["value_sum"] / timed["value_events"].where(timed["value_events"] > 0)).reindex(activity.index)
+        
+        feedback = series[series["status"] == "feedback"].set_index("period")
+        activity["avg_feedback"] = (feedback["amount_sum"] / feedback["events"]).reindex(activity.index)
+        return activity[columns]
+    
     def export_to_csv(self, output_path: str = "query_logs_export.csv"):
         """Export all query logs to CSV."""
         df = self.get_all_queries(limit=999999)
@@ -0,0 +1,349 @@
+"""
+Asynchronous, concurrent knowledge ingestion pipeline.
+
+Sources (web pages, YouTube videos, PDFs) flow through three stages:
+
+- fetch: async HTTP with bounded concurrency overall and per host, and
+  conditional requests (ETag / Last-Modified, then a content hash) so
+  unchanged sources are skipped
+- parse: HTML/transcript/PDF extraction and chunking in worker threads,
+  streamed to the writer as soon as each document is chunked
+- embed: documents are written to the vector store in batches of chunks
+  (``VectorStoreBuilder.upsert_documents``); unchanged chunks of a
+  changed source keep their vectors
+
+A source's fetch validators are only recorded once its chunks were written,
+so an interrupted run re-fetches whatever was not indexed. Each stage's
+time is reported per source and recorded as a ``knowledge_ingest_stage_ms``
+metric.
+
+Example:
+    pipeline = AsyncIngestionPipeline(KnowledgeIngestion(), VectorStoreBuilder())
+    report = pipeline.run_sync(sources)
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+from loguru import logger
+
+from ..utils.observability import metrics
+from .knowledge_ingestion import PDF_AVAILABLE, YOUTUBE_AVAILABLE, KnowledgeIngestion
+
+if YOUTUBE_AVAILABLE:
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+FETCH_STATE_PATH = Path(os.getenv("KNOWLEDGE_FETCH_STATE", "data/knowledge_fetch_state.json"))
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Source metadata copied onto ingested documents
+SOURCE_FIELDS = ("category", "priority", "description")
+
+
+def source_kind(source: Dict[str, Any]) -> str:
+    """'youtube', 'pdf' or 'url' (an explicit ``type`` wins)."""
+    if source.get("type"):
+        return source["type"]
+    location = source.get("url") or source.get("path", "")
+    host = urlparse(location).netloc.lower()
+    if "youtube.com" in host or "youtu.be" in host:
+        return "youtube"
+    if urlparse(location).path.lower().endswith(".pdf"):
+        return "pdf"
+    return "url"
+
+
+class FetchStateStore:
+    """Per-source fetch validators (etag, last_modified, content_hash), kept as JSON."""
+
+    def __init__(self, path: Path = FETCH_STATE_PATH) -> None:
+        self.path = Path(path)
+        self.states: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                self.states = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as exc:
+                logger.warning(f"Could not read fetch state {self.path}, fetching all sources: {exc}")
+
+    def get(self, location: str) -> Dict[str, Any]:
+        return self.states.get(location, {})
+
+    def set(self, location: str, state: Dict[str, Any]) -> None:
+        self.states[location] = state
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.states, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class AsyncIngestionPipeline:
+    """Fetches, chunks and indexes knowledge sources concurrently."""
+
+    def __init__(
+        self,
+        ingestion: Optional[KnowledgeIngestion] = None,
+        builder: Optional[Any] = None,
+        max_concurrency: int = 16,
+        per_host_concurrency: int = 2,
+        timeout: float = 20.0,
+        embed_batch_chunks: int = 256,
+        state_path: Path = FETCH_STATE_PATH,
+        client_factory: Optional[Callable[[], httpx.AsyncClient]] = None,
+    ) -> None:
+        """
+        Args:
+            ingestion: Parser/chunker; ingested documents are appended to its knowledge base
+            builder: Vector store builder to write chunks to (None: only chunk)
+            max_concurrency: Sources processed at once
+            per_host_concurrency: Concurrent requests to one host
+            timeout: HTTP timeout in seconds
+            embed_batch_chunks: Chunks collected before a vector store write
+            state_path: JSON file of fetch validators
+            client_factory: Builds the HTTP client (tests inject transports)
+        """
+        self.ingestion = ingestion or KnowledgeIngestion()
+        self.builder = builder
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.timeout = timeout
+        self.embed_batch_chunks = embed_batch_chunks
+        self.state = FetchStateStore(state_path)
+        self.client_factory = client_factory or (
+            lambda: httpx.AsyncClient(headers=REQUEST_HEADERS, timeout=timeout, follow_redirects=True)
+        )
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._embed_ms = 0.0
+
+    def run_sync(self, sources: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run the pipeline from synchronous code."""
+        return asyncio.run(self.run(sources))
+
+    async def run(self, sources: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Ingest ``sources`` (dicts with url or path, optional type/category/priority/description).
+
+        Returns:
+            Report with per-status counts, total chunks, per-stage time and per-source results
+        """
+        start = time.perf_counter()
+        self._host_limits = {}
+        self._embed_ms = 0.0
+        limit = asyncio.Semaphore(self.max_concurrency)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrency * 2)
+        results: List[Dict[str, Any]] = []
+
+        async with self.client_factory() as client:
+            writer = asyncio.create_task(self._write(queue, results))
+
+            async def process(source: Dict[str, Any]) -> None:
+                async with limit:
+                    result, document, state = await self._process_source(client, source)
+                if document is None:
+                    results.append(result)
+                else:
+                    await queue.put((result, document, state))
+
+            try:
+                await asyncio.gather(*(process(source) for source in sources))
+            finally:
+                await queue.put(None)
+                await writer
+        self.state.save()
+
+        report = self._report(results, time.perf_counter() - start, self._embed_ms)
+        logger.info(
+            f"Ingested {report['ingested']} / unchanged {report['unchanged']} / failed {report['failed']} "
+            f"of {report['total']} sources ({report['chunks']} chunks) in {report['duration_s']}s"
+        )
+        return report
+
+    # -- stages ------------------------------------------------------------------
+
+    def _host_limit(self, location: str) -> asyncio.Semaphore:
+        host = urlparse(location).netloc.lower() or "local"
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_limits[host]
+
+    async def _process_source(self, client: httpx.AsyncClient, source: Dict[str, Any]):
+        """Fetch and chunk one source: (result, document or None, new fetch state)."""
+        location = source.get("url") or source.get("path", "")
+        kind = source_kind(source)
+        result: Dict[str, Any] = {"url": location, "type": kind, "timings_ms": {}}
+        try:
+            if kind == "youtube":
+                document, state = await self._fetch_youtube(location, result)
+            elif kind == "pdf" and not urlparse(location).scheme.startswith("http"):
+                document, state = await self._read_local_pdf(location, result)
+            else:
+                document, state = await self._fetch_http(client, location, kind, result)
+        except Exception as exc:
+            logger.error(f"Error ingesting {location}: {exc}")
+            return {**result, "status": "failed", "error": str(exc)}, None, None
+
+        if document is None:
+            return {**result, "status": "unchanged"}, None, None
+        if not document.get("success"):
+            return {**result, "status": "failed", "error": document.get("error")}, None, None
+
+        document["url"] = location
+        for field in SOURCE_FIELDS:
+            if field in source:
+                document[field] = source[field]
+        result.update(
+            status="ingested",
+            chunk_count=document.get("chunk_count", 0),
+            quality_score=document.get("quality_score"),
+        )
+        return result, document, state
+
+    async def _fetch_http(self, client: httpx.AsyncClient, url: str, kind: str, result: Dict[str, Any]):
+        previous = self.state.get(url)
+        headers = {}
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+        start = time.perf_counter()
+        async with self._host_limit(url):
+            response = await client.get(url, headers=headers)
+        self._timed(result, "fetch", start)
+        if response.status_code == 304:
+            return None, None
+        response.raise_for_status()
+
+        content = response.content
+        state = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_hash": hashlib.sha256(content).hexdigest(),
+        }
+        if state["content_hash"] == previous.get("content_hash"):
+            self.state.set(url, state)
+            return None, None
+
+        start = time.perf_counter()
+        if kind == "pdf":
+            if not PDF_AVAILABLE:
+                raise RuntimeError("PyPDF2 not installed")
+            document = await asyncio.to_thread(self.ingestion.parse_pdf, io.BytesIO(content), url)
+        else:
+            document = await asyncio.to_thread(self.ingestion.parse_html, url, content)
+        self._timed(result, "parse", start)
+        return document, state
+
+    async def _read_local_pdf(self, path: str, result: Dict[str, Any]):
+        if not PDF_AVAILABLE:
+            raise RuntimeError("PyPDF2 not installed")
+        start = time.perf_counter()
+        content = await asyncio.to_thread(Path(path).read_bytes)
+        self._timed(result, "fetch", start)
+        state = {"content_hash": hashlib.sha256(content).hexdigest()}
+        if state["content_hash"] == self.state.get(path).get("content_hash"):
+            return None, None
+
+        start = time.perf_counter()
+        document = await asyncio.to_thread(self.ingestion.parse_pdf, io.BytesIO(content), path)
+        self._timed(result, "parse", start)
+        return document, state
+
+    async def _fetch_youtube(self, video_url: str, result: Dict[str, Any]):
+        if not YOUTUBE_AVAILABLE:
+            raise RuntimeError("youtube-transcript-api not installed")
+        video_id = self.ingestion._extract_youtube_id(video_url)
+        if not video_id:
+            raise ValueError("Could not extract video ID from URL")
+
+        start = time.perf_counter()
+        async with self._host_limit(video_url):
+            transcript = await asyncio.to_thread(YouTubeTranscriptApi.get_transcript, video_id, languages=['en'])
+        self._timed(result, "fetch", start)
+        state = {"content_hash": hashlib.sha256(json.dumps(transcript).encode("utf-8")).hexdigest()}
+        if state["content_hash"] == self.state.get(video_url).get("content_hash"):
+            return None, None
+
+        start = time.perf_counter()
+        document = await asyncio.to_thread(self.ingestion.parse_transcript, video_url, video_id, transcript)
+        self._timed(result, "parse", start)
+        return document, state
+
+    async def _write(self, queue: asyncio.Queue, results: List[Dict[str, Any]]) -> None:
+        """Collect chunked documents and write them to the vector store in batches."""
+        batch: List[tuple] = []
+        batch_chunks = 0
+        while True:
+            item = await queue.get()
+            if item is not None:
+                batch.append(item)
+                batch_chunks += item[1].get("chunk_count", 0)
+            if batch and (item is None or batch_chunks >= self.embed_batch_chunks):
+                await self._flush(batch, results)
+                batch, batch_chunks = [], 0
+            if item is None:
+                return
+
+    async def _flush(self, batch: List[tuple], results: List[Dict[str, Any]]) -> None:
+        documents = [document for _, document, _ in batch]
+        error = None
+        if self.builder is not None:
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self.builder.upsert_documents, documents)
+            except Exception as exc:
+                logger.error(f"Vector store write failed for {len(documents)} documents: {exc}")
+                error = str(exc)
+            elapsed = (time.perf_counter() - start) * 1000
+            self._embed_ms += elapsed
+            metrics.record_time("knowledge_ingest_stage_ms", elapsed, labels={"stage": "embed"})
+
+        for result, document, state in batch:
+            if error is not None:
+                results.append({**result, "status": "failed", "error": error})
+                continue
+            self.ingestion.knowledge_base.append(document)
+            self.state.set(result["url"], state)
+            results.append(result)
+        self.state.save()
+
+    # -- reporting ---------------------------------------------------------------
+
+    @staticmethod
+    def _timed(result: Dict[str, Any], stage: str, start: float) -> None:
+        elapsed = (time.perf_counter() - start) * 1000
+        result["timings_ms"][stage] = round(elapsed, 2)
+        metrics.record_time("knowledge_ingest_stage_ms", elapsed, labels={"stage": stage})
+
+    @staticmethod
+    def _report(results: List[Dict[str, Any]], duration_s: float, embed_ms: float) -> Dict[str, Any]:
+        """Counts and stage totals (fetch/parse summed over sources, embed over batch writes)."""
+        stages_ms: Dict[str, float] = {"embed": round(embed_ms, 2)}
+        for result in results:
+            for stage, elapsed in result.get("timings_ms", {}).items():
+                stages_ms[stage] = round(stages_ms.get(stage, 0.0) + elapsed, 2)
+            metrics.increment("knowledge_ingest_sources", labels={"status": result["status"]})
+
+        statuses = [result["status"] for result in results]
+        return {
+            "total": len(results),
+            "ingested": statuses.count("ingested"),
+            "unchanged": statuses.count("unchanged"),
+            "failed": statuses.count("failed"),
+            "chunks": sum(result.get("chunk_count", 0) for result in results if result["status"] == "ingested"),
+            "duration_s": round(duration_s, 2),
+            "stages_ms": stages_ms,
+            "results": results,
+        }
@@ -0,0 +1,254 @@
+"""
+SQLite sidecar holding the chunk metadata of the FAISS vector store.
+
+Each chunk is a row addressed by a stable integer id, the same id its vector
+carries in the ID-mapped FAISS index, so chunks can be added and removed
+without renumbering the corpus. Ids are not reused: a deleted id stays a
+hole until ``clear()`` (a full rebuild) restarts the numbering. Metadata fields are real columns, so filters load only the column
+they need and results fetch only the rows they return; nothing is parsed up
+front when a retriever starts.
+
+The store also keeps a few ``store_info`` values: the index type and
+embedder the vectors were built with, and a revision token that changes on
+every write and fingerprints derived indexes such as the keyword index.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Chunk record fields, stored as columns (see VectorStoreBuilder)
+RECORD_FIELDS = ("source", "url", "title", "category", "priority", "description", "text")
+
+# Ids per SQLite IN (...) lookup
+_LOOKUP_CHUNK = 500
+
+
+def chunk_key(record: Dict[str, Any]) -> str:
+    """Identity of a chunk: hash of its text and metadata."""
+    canonical = json.dumps([record.get(field) for field in RECORD_FIELDS], default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ChunkStore:
+    """
+    Chunk metadata by id, backed by SQLite.
+
+    Readers see the ids that existed when the store was opened (or last
+    ``refresh``-ed); ``len()`` is the id bound so it can size position
+    bitmaps, and deleted ids read as ``None``.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+        self._columns: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._id_bound: Optional[int] = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            columns = ", ".join(RECORD_FIELDS)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                f"id INTEGER PRIMARY KEY AUTOINCREMENT, chunk_key TEXT NOT NULL, {columns})"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_key ON chunks (chunk_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_url ON chunks (url)")
+            conn.execute("CREATE TABLE IF NOT EXISTS store_info (key TEXT PRIMARY KEY, value TEXT)")
+            self._local.conn = conn
+        return conn
+
+    # -- reading -----------------------------------------------------------------
+
+    def __len__(self) -> int:
+        if self._id_bound is None:
+            self._id_bound = self._max_id() + 1
+        return self._id_bound
+
+    def _max_id(self) -> int:
+        if not self.exists():
+            return -1
+        row = self._conn().execute("SELECT MAX(id) FROM chunks").fetchone()
+        return -1 if row[0] is None else row[0]
+
+    def count(self) -> int:
+        """Number of live chunks."""
+        if not self.exists():
+            return 0
+        return self._conn().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def refresh(self) -> None:
+        """Pick up writes made since the store was opened."""
+        with self._lock:
+            self._id_bound = None
+            self._columns = {}
+
+    def __getitem__(self, chunk_id: int) -> Optional[Dict[str, Any]]:
+        return self.get_many([chunk_id]).get(int(chunk_id))
+
+    def records(self) -> List[Dict[str, Any]]:
+        """All live records in id order."""
+        return [record for _, record in self._scan(RECORD_FIELDS) if record is not None]
+
+    def get_many(self, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Records of the given ids that exist."""
+        ids = [int(i) for i in ids if 0 <= int(i) < len(self)]
+        records: Dict[int, Dict[str, Any]] = {}
+        if not ids:
+            return records
+        conn = self._conn()
+        select = ", ".join(RECORD_FIELDS)
+        for start in range(0, len(ids), _LOOKUP_CHUNK):
+            chunk = ids[start:start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT id, {select} FROM chunks WHERE id IN ({placeholders})", chunk):
+                records[row[0]] = dict(zip(RECORD_FIELDS, row[1:]))
+        return records
+
+    def _scan(self, fields: Sequence[str]) -> Iterable[Tuple[int, Optional[Dict[str, Any]]]]:
+        """(id, record) for every id below the bound, ``None`` for holes."""
+        bound = len(self)
+        expected = 0
+        if self.exists():
+            select = ", ".join(fields)
+            for row in self._conn().execute(
+                f"SELECT id, {select} FROM chunks WHERE id < ? ORDER BY id", (bound,)
+            ):
+                for hole in range(expected, row[0]):
+                    yield hole, None
+                yield row[0], dict(zip(fields, row[1:]))
+                expected = row[0] + 1
+        for hole in range(expected, bound):
+            yield hole, None
+
+    def column(self, field: str) -> List[Any]:
+        """Values of one field indexed by id (``None`` for holes and unknown fields)."""
+        with self._lock:
+            values = self._columns.get(field)
+            if values is None:
+                if field in RECORD_FIELDS:
+                    values = [record[field] if record else None for _, record in self._scan((field,))]
+                else:
+                    values = [None] * len(self)
+                self._columns[field] = values
+            return values
+
+    def live_mask(self) -> np.ndarray:
+        """Boolean mask of ids that hold a chunk."""
+        mask = np.zeros(len(self), dtype=bool)
+        if self.exists():
+            ids = [row[0] for row in self._conn().execute("SELECT id FROM chunks WHERE id < ?", (len(self),))]
+            mask[ids] = True
+        return mask
+
+    def texts(self) -> List[Optional[str]]:
+        """Chunk texts indexed by id (``None`` for holes)."""
+        live = self.live_mask()
+        return [(text or "") if live[i] else None for i, text in enumerate(self.column("text"))]
+
+    def keys(self, urls: Optional[Iterable[str]] = None) -> Dict[str, List[int]]:
+        """chunk_key -> ids holding a chunk with that identity (optionally only for ``urls``)."""
+        keys: Dict[str, List[int]] = {}
+        if not self.exists():
+            return keys
+        if urls is None:
+            rows = self._conn().execute("SELECT id, chunk_key FROM chunks ORDER BY id")
+        else:
+            urls = list(urls)
+            placeholders = ",".join("?" * len(urls))
+            rows = self._conn().execute(
+                f"SELECT id, chunk_key FROM chunks WHERE url IN ({placeholders}) ORDER BY id", urls
+            )
+        for chunk_id, key in rows:
+            keys.setdefault(key, []).append(chunk_id)
+        return keys
+
+    def ids_for_urls(self, urls: Iterable[str]) -> List[int]:
+        urls = list(urls)
+        if not urls or not self.exists():
+            return []
+        placeholders = ",".join("?" * len(urls))
+        return [row[0] for row in self._conn().execute(
+            f"SELECT id FROM chunks WHERE url IN ({placeholders})", urls
+        )]
+
+    def info(self, key: str) -> Optional[str]:
+        if not self.exists():
+            return None
+        row = self._conn().execute("SELECT value FROM store_info WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def revision(self) -> Optional[str]:
+        """Token that changes whenever the chunks change."""
+        return self.info("revision")
+
+    # -- writing -----------------------------------------------------------------
+
+    def transaction(self) -> "_Transaction":
+        """Write transaction; the revision is bumped on commit."""
+        return _Transaction(self)
+
+
+class _Transaction:
+    """Serialized write to a ChunkStore (``with store.transaction() as txn``)."""
+
+    def __init__(self, store: ChunkStore) -> None:
+        self.store = store
+        self.conn = store._conn()
+
+    def __enter__(self) -> "_Transaction":
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.conn.execute("ROLLBACK")
+            return
+        self.set_info("revision", uuid.uuid4().hex)
+        self.conn.execute("COMMIT")
+        self.store.refresh()
+
+    def clear(self) -> None:
+        """Drop all chunks and restart ids, so a rebuilt corpus is numbered densely."""
+        self.conn.execute("DELETE FROM chunks")
+        self.conn.execute("DELETE FROM sqlite_sequence WHERE name = 'chunks'")
+
+    def add(self, records: Sequence[Dict[str, Any]]) -> List[int]:
+        """Insert records, returning their new ids."""
+        columns = ", ".join(("chunk_key",) + RECORD_FIELDS)
+        placeholders = ",".join("?" * (len(RECORD_FIELDS) + 1))
+        ids = []
+        for record in records:
+            cursor = self.conn.execute(
+                f"INSERT INTO chunks ({columns}) VALUES ({placeholders})",
+                (chunk_key(record), *(record.get(field) for field in RECORD_FIELDS)),
+            )
+            ids.append(cursor.lastrowid)
+        return ids
+
+    def delete(self, ids: Sequence[int]) -> None:
+        ids = [int(i) for i in ids]
+        for start in range(0, len(ids), _LOOKUP_CHUNK):
+            chunk = ids[start:start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            self.conn.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", chunk)
+
+    def set_info(self, key: str, value: Any) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO store_info (key, value) VALUES (?, ?)", (key, str(value))
+        )
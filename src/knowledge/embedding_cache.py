@@ -0,0 +1,288 @@
+"""
+Embedding providers and a content-addressed on-disk embedding cache.
+
+Every text is keyed by the SHA-256 of its content, per embedding provider, so
+re-ingesting a source only embeds chunks whose text changed and repeated
+queries are answered without a network call. Vectors are appended to one raw
+float32 file per provider and read back through a memory map; a SQLite table
+maps content keys to rows. The cache is safe to share between threads and
+processes (writers are serialized by a SQLite write transaction).
+
+Backends:
+- ``openai`` (default): OpenAI embeddings API
+- ``local``: sentence-transformers model when installed, otherwise the
+  hash embedding (works fully offline)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+from openai import OpenAI
+
+from ..utils.observability import metrics
+from ..utils.performance import SentenceTransformerEmbedder, hash_embedding
+
+EMBEDDING_CACHE_DIR = Path(os.getenv("EMBEDDING_CACHE_DIR", "data/vector_store/embedding_cache"))
+EMBEDDING_BACKEND = os.getenv("KNOWLEDGE_EMBEDDING_BACKEND", "openai").lower()
+LOCAL_EMBEDDING_MODEL = os.getenv("KNOWLEDGE_LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# Keys per SQLite IN (...) lookup
+_LOOKUP_CHUNK = 500
+
+
+def content_key(text: str) -> bytes:
+    """Cache key of a text: SHA-256 of its UTF-8 content."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class OpenAIEmbeddingProvider:
+    """Embeddings from the OpenAI API, requested in batches."""
+
+    def __init__(
+        self,
+        client: Optional[OpenAI] = None,
+        model: str = "text-embedding-3-small",
+        batch_size: int = 64,
+    ) -> None:
+        self.client = client or OpenAI()
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"openai:{model}"
+
+    def embed(self, texts: Sequence[str], batch_size: Optional[int] = None) -> np.ndarray:
+        batch_size = batch_size or self.batch_size
+        vectors: List[np.ndarray] = []
+        for start in range(0, len(texts), batch_size):
+            response = self.client.embeddings.create(
+                model=self.model,
+                input=list(texts[start:start + batch_size]),
+            )
+            vectors.append(np.array([data.embedding for data in response.data], dtype="float32"))
+        return np.vstack(vectors)
+
+
+class LocalEmbeddingProvider:
+    """
+    Offline embeddings: a local sentence-transformers model when the package
+    is installed, otherwise the hash embedding used by the semantic cache.
+    """
+
+    def __init__(self, model_name: str = LOCAL_EMBEDDING_MODEL) -> None:
+        try:
+            import sentence_transformers  # noqa: F401
+            self._embed = SentenceTransformerEmbedder(model_name)
+            self.name = f"local:{model_name}"
+        except ImportError:
+            logger.warning("sentence-transformers not installed. Using hash embeddings for local embedding backend.")
+            self._embed = hash_embedding
+            self.name = "local:hash"
+
+    def embed(self, texts: Sequence[str], batch_size: Optional[int] = None) -> np.ndarray:
+        return np.asarray(self._embed(list(texts)), dtype="float32")
+
+
+class EmbeddingCache:
+    """
+    Content-hash keyed embedding store (memory-mapped float32 vectors).
+
+    Layout under ``cache_dir``:
+        embeddings.db       provider -> (dim, vector file); (provider, key) -> row
+        <provider>.f32      raw float32 rows, appended
+    """
+
+    def __init__(self, cache_dir: Path = EMBEDDING_CACHE_DIR) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.db_path = self.cache_dir / "embeddings.db"
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._maps: Dict[str, np.memmap] = {}
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread connection; the cache directory is created on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS providers ("
+                "provider TEXT PRIMARY KEY, dim INTEGER NOT NULL, file TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "provider TEXT NOT NULL, key BLOB NOT NULL, row INTEGER NOT NULL, "
+                "PRIMARY KEY (provider, key)) WITHOUT ROWID"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _provider_file(self, provider: str) -> Optional[tuple]:
+        row = self._conn().execute(
+            "SELECT dim, file FROM providers WHERE provider = ?", (provider,)
+        ).fetchone()
+        return (row[0], self.cache_dir / row[1]) if row else None
+
+    def _vectors(self, provider: str, dim: int, path: Path, max_row: int) -> np.memmap:
+        """Read-only map of the provider's vector file covering ``max_row``."""
+        with self._lock:
+            mapped = self._maps.get(provider)
+            if mapped is None or len(mapped) <= max_row:
+                rows = path.stat().st_size // (dim * 4)
+                mapped = np.memmap(path, dtype="<f4", mode="r", shape=(rows, dim))
+                self._maps[provider] = mapped
+            return mapped
+
+    def lookup(self, provider: str, keys: Iterable[bytes]) -> Dict[bytes, np.ndarray]:
+        """Cached vectors for the keys that are present."""
+        keys = list(keys)
+        if not keys or not self.db_path.exists():
+            return {}
+        info = self._provider_file(provider)
+        if info is None:
+            return {}
+        dim, path = info
+
+        rows: Dict[bytes, int] = {}
+        conn = self._conn()
+        for start in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[start:start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows.update(conn.execute(
+                f"SELECT key, row FROM embeddings WHERE provider = ? AND key IN ({placeholders})",
+                (provider, *chunk),
+            ).fetchall())
+        if not rows:
+            return {}
+
+        mapped = self._vectors(provider, dim, path, max(rows.values()))
+        found = np.array(mapped[list(rows.values())], dtype=np.float32)
+        return {bytes(key): found[i] for i, key in enumerate(rows)}
+
+    def store(self, provider: str, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        """Append vectors for new keys (keys already cached are skipped)."""
+        vectors = np.ascontiguousarray(vectors, dtype="<f4")
+        if not len(keys):
+            return
+        dim = vectors.shape[1]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            info = self._provider_file(provider)
+            if info is None:
+                filename = hashlib.sha256(provider.encode("utf-8")).hexdigest()[:16] + ".f32"
+                conn.execute(
+                    "INSERT INTO providers (provider, dim, file) VALUES (?, ?, ?)", (provider, dim, filename)
+                )
+                path = self.cache_dir / filename
+            elif info[0] != dim:
+                raise ValueError(f"Embedding dimension changed for {provider}: {info[0]} -> {dim}")
+            else:
+                path = info[1]
+
+            new = {}
+            for key, vector in zip(keys, vectors):
+                new.setdefault(key, vector)
+            candidates = list(new)
+            for start in range(0, len(candidates), _LOOKUP_CHUNK):
+                chunk = candidates[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for (key,) in conn.execute(
+                    f"SELECT key FROM embeddings WHERE provider = ? AND key IN ({placeholders})",
+                    (provider, *chunk),
+                ).fetchall():
+                    new.pop(bytes(key), None)
+            if not new:
+                conn.execute("COMMIT")
+                return
+
+            row_bytes = dim * 4
+            with open(path, "a+b") as f:
+                # Drop any partial row left by an interrupted (uncommitted) write
+                first_row = os.fstat(f.fileno()).st_size // row_bytes
+                f.truncate(first_row * row_bytes)
+                f.write(np.stack(list(new.values())).tobytes())
+            conn.executemany(
+                "INSERT INTO embeddings (provider, key, row) VALUES (?, ?, ?)",
+                [(provider, key, first_row + i) for i, key in enumerate(new)],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def count(self, provider: str) -> int:
+        if not self.db_path.exists():
+            return 0
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM embeddings WHERE provider = ?", (provider,)
+        ).fetchone()[0]
+
+
+class CachedEmbedder:
+    """Embeds texts through a provider, serving unchanged texts from the cache."""
+
+    def __init__(self, provider, cache: Optional[EmbeddingCache] = None) -> None:
+        self.provider = provider
+        self.cache = cache
+
+    def embed(self, texts: Sequence[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """float32 array of shape (len(texts), dim); only uncached texts reach the provider."""
+        keys = [content_key(text) for text in texts]
+        found: Dict[bytes, np.ndarray] = {}
+        if self.cache is not None:
+            try:
+                found = self.cache.lookup(self.provider.name, set(keys))
+            except (sqlite3.Error, OSError, ValueError) as exc:
+                logger.warning(f"Embedding cache lookup failed: {exc}")
+
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.provider.embed(list(missing.values()), batch_size=batch_size)
+            if len(vectors) != len(missing):
+                raise ValueError(f"Embedding provider returned {len(vectors)} vectors for {len(missing)} texts")
+            found.update(zip(missing, vectors))
+            if self.cache is not None:
+                try:
+                    self.cache.store(self.provider.name, list(missing), vectors)
+                except (sqlite3.Error, OSError, ValueError) as exc:
+                    logger.warning(f"Embedding cache write failed: {exc}")
+
+        metrics.increment("embedding_cache", len(texts) - len(missing), labels={"result": "hit"})
+        metrics.increment("embedding_cache", len(missing), labels={"result": "miss"})
+        return np.array([found[key] for key in keys], dtype=np.float32)
+
+
+def get_embedding_provider(
+    client: Optional[OpenAI] = None,
+    model: str = "text-embedding-3-small",
+    backend: Optional[str] = None,
+):
+    """Embedding provider for the configured backend (KNOWLEDGE_EMBEDDING_BACKEND)."""
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend == "local":
+        return LocalEmbeddingProvider()
+    if backend != "openai":
+        logger.warning(f"Unknown embedding backend '{backend}', using openai")
+    return OpenAIEmbeddingProvider(client=client, model=model)
+
+
+def default_embedder(
+    client: Optional[OpenAI] = None,
+    model: str = "text-embedding-3-small",
+    cache_dir: Optional[Path] = None,
+) -> CachedEmbedder:
+    """Cached embedder for the configured backend, stored under ``cache_dir``."""
+    return CachedEmbedder(
+        get_embedding_provider(client=client, model=model),
+        EmbeddingCache(cache_dir or EMBEDDING_CACHE_DIR),
+    )
@@ -0,0 +1,209 @@
+"""
+FAISS index construction, persistence and benchmarking for the vector store.
+
+Every index is ID-mapped (vectors carry the chunk ids of ``ChunkStore``), so
+chunks can be added and removed without rebuilding the corpus. Index types:
+
+- ``flat``: exact inner-product search (default)
+- ``hnsw``: HNSW graph; removal rebuilds the graph from the stored vectors
+  (no re-embedding), since HNSW cannot delete in place
+- ``ivfpq``: IVF with product quantization; needs enough vectors to train
+  (falls back to ``flat`` for small corpora)
+
+Indexes are written atomically and read back memory-mapped where FAISS
+supports it, so a retriever does not copy the index into RAM at startup and
+readers holding the old file keep a consistent view while it is replaced.
+"""
+
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import faiss  # type: ignore
+import numpy as np
+from loguru import logger
+
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+
+# Minimum vectors to train IVF-PQ (8-bit PQ codebooks need 256 points)
+MIN_IVFPQ_TRAINING = 256
+
+
+def _pq_subquantizers(dim: int, wanted: int) -> int:
+    """Largest divisor of ``dim`` not above ``wanted``."""
+    for m in range(min(wanted, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def create_index(
+    index_type: str,
+    vectors: np.ndarray,
+    hnsw_m: int = 32,
+    ivf_nlist: Optional[int] = None,
+    pq_m: int = 16,
+) -> Any:
+    """
+    Empty ID-mapped index of ``index_type`` for vectors like ``vectors``.
+
+    IVF-PQ is trained on ``vectors``; ``ivf_nlist`` defaults to about
+    4 * sqrt(n) lists, capped so each list gets enough training points.
+    """
+    dim = vectors.shape[1]
+    if index_type == "ivfpq":
+        if len(vectors) < MIN_IVFPQ_TRAINING:
+            logger.warning(
+                f"IVF-PQ needs at least {MIN_IVFPQ_TRAINING} vectors to train, got {len(vectors)}; using flat index"
+            )
+            index_type = "flat"
+        else:
+            nlist = ivf_nlist or max(1, min(int(4 * math.sqrt(len(vectors))), len(vectors) // 39))
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFPQ(
+                quantizer, dim, nlist, _pq_subquantizers(dim, pq_m), 8, faiss.METRIC_INNER_PRODUCT
+            )
+            index.train(vectors)
+            return index
+    if index_type == "hnsw":
+        return faiss.IndexIDMap2(faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT))
+    if index_type != "flat":
+        raise ValueError(f"Unknown index type '{index_type}'. Choose from {INDEX_TYPES}")
+    return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+
+def index_type_of(index: Any) -> str:
+    """Index type name of a (possibly ID-mapped) index."""
+    inner = _inner(index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivfpq"
+    return "flat"
+
+
+def is_id_mapped(index: Any) -> bool:
+    """Whether the index stores explicit ids (legacy stores use positions)."""
+    return isinstance(index, (faiss.IndexIDMap, faiss.IndexIVF))
+
+
+def _inner(index: Any) -> Any:
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def configure_search(index: Any, nprobe: int = 16, ef_search: int = 64) -> None:
+    """Apply query-time recall/latency knobs."""
+    inner = _inner(index)
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(nprobe, inner.nlist)
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = ef_search
+
+
+def search_parameters(index: Any, selector: Any) -> Any:
+    """Search parameters restricting ``index`` to ``selector``, typed for the index."""
+    inner = _inner(index)
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=inner.nprobe)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def remove_ids(index: Any, ids: Sequence[int]) -> Any:
+    """
+    Remove ids from the index, returning the index to keep using.
+
+    Indexes that cannot delete in place (HNSW) are rebuilt from their own
+    stored vectors.
+    """
+    if not len(ids):
+        return index
+    id_array = np.asarray(ids, dtype="int64")
+    try:
+        index.remove_ids(id_array)
+        return index
+    except RuntimeError:
+        pass
+
+    removed = set(id_array.tolist())
+    all_ids = faiss.vector_to_array(index.id_map)
+    keep = np.array([i for i in all_ids if i not in removed], dtype="int64")
+    inner = _inner(index)
+    # Layers above 0 hold M neighbours per node
+    hnsw_m = inner.hnsw.nb_neighbors(1)
+    rebuilt = faiss.IndexIDMap2(faiss.IndexHNSWFlat(index.d, hnsw_m, faiss.METRIC_INNER_PRODUCT))
+    configure_search(rebuilt, ef_search=inner.hnsw.efSearch)
+    if len(keep):
+        vectors = np.vstack([index.reconstruct(int(i)) for i in keep]).astype("float32")
+        rebuilt.add_with_ids(vectors, keep)
+    logger.info(f"Rebuilt HNSW graph without {len(removed)} removed vectors ({len(keep)} kept)")
+    return rebuilt
+
+
+def write_index(index: Any, path: Path) -> None:
+    """Write atomically: readers mapping the old file keep a consistent view."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    faiss.write_index(index, str(tmp_path))
+    os.replace(tmp_path, path)
+
+
+def read_index(path: Path, mmap: bool = True) -> Any:
+    """Read an index, memory-mapped when FAISS supports it for this index type."""
+    if mmap and hasattr(faiss, "IO_FLAG_MMAP"):
+        flags = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_READ_ONLY", 0)
+        try:
+            return faiss.read_index(str(path), flags)
+        except RuntimeError as exc:
+            logger.debug(f"Memory-mapped read of {path} unavailable, loading into memory: {exc}")
+    return faiss.read_index(str(path))
+
+
+def benchmark_index_types(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    index_types: Sequence[str] = INDEX_TYPES,
+    **index_options: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Build each index type over ``vectors`` and measure it with ``queries``.
+
+    Recall@k is measured against exact (flat) search. Vectors and queries
+    should already be L2-normalized.
+
+    Returns:
+        One dict per index type with build_s, p50_ms, p95_ms and recall
+    """
+    ids = np.arange(len(vectors), dtype="int64")
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    results = []
+    for index_type in index_types:
+        start = time.perf_counter()
+        index = create_index(index_type, vectors, **index_options)
+        index.add_with_ids(vectors, ids)
+        build_s = time.perf_counter() - start
+
+        latencies = []
+        hits = 0
+        for i in range(len(queries)):
+            start = time.perf_counter()
+            _, found = index.search(queries[i:i + 1], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(set(found[0].tolist()) & set(truth[i].tolist()))
+
+        results.append({
+            "index_type": index_type_of(index),
+            "build_s": round(build_s, 3),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "recall": round(hits / (len(queries) * k), 4),
+        })
+    return results
@@ -0,0 +1,290 @@
+"""
+Inverted keyword index with BM25 scoring.
+
+Postings (document ids and term frequencies) are stored as flat numpy arrays
+so a persisted index can be memory-mapped instead of re-tokenizing the corpus
+on every start. Queries use MaxScore pruning: terms are processed from the
+highest to the lowest score upper bound and, once no unseen document can
+reach the current top-k threshold, the remaining postings are only probed
+for documents that are still in contention.
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+INDEX_FORMAT_VERSION = 2
+
+STOP_WORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have how i if in into is it its
+me my no not of on or our so than that the their them then there these they this those to too us was we
+were what when where which while who why will with would you your
+""".split())
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# (suffix, replacement) tried in order; only the first match applies
+_PLURAL_RULES = (("sses", "ss"), ("ies", "y"), ("s", ""))
+_SUFFIX_RULES = (
+    ("ational", "ate"), ("ation", ""), ("ingly", ""), ("edly", ""),
+    ("ing", ""), ("ed", ""), ("ly", ""), ("er", ""),
+)
+_MIN_STEM = 3
+
+
+@lru_cache(maxsize=100_000)
+def stem(token: str) -> str:
+    """
+    Light suffix-stripping stemmer (plural, -ing/-ed/-ation/-er, trailing e).
+
+    It only needs to map inflections of a word to the same key, so
+    "optimize", "optimized", "optimizing" and "optimization" all become
+    "optimiz"; the stems are not meant to be readable words.
+    """
+    if len(token) <= _MIN_STEM or token.isdigit():
+        return token
+    for suffix, replacement in _PLURAL_RULES:
+        if token.endswith(suffix):
+            if suffix == "s" and token.endswith(("ss", "us", "is")):
+                break
+            if len(token) - len(suffix) + len(replacement) >= _MIN_STEM:
+                token = token[: len(token) - len(suffix)] + replacement
+            break
+    for suffix, replacement in _SUFFIX_RULES:
+        if token.endswith(suffix):
+            if len(token) - len(suffix) + len(replacement) >= _MIN_STEM:
+                token = token[: len(token) - len(suffix)] + replacement
+            break
+    if token.endswith("e") and len(token) > _MIN_STEM + 1:
+        token = token[:-1]
+    return token
+
+
+def analyze(text: str) -> List[str]:
+    """Lowercase, tokenize, drop stop words and stem."""
+    return [
+        stem(token)
+        for token in _TOKEN_PATTERN.findall((text or "").lower())
+        if token not in STOP_WORDS
+    ]
+
+
+class KeywordIndex:
+    """
+    BM25 inverted index over a list of texts (document id = list position).
+
+    A ``None`` text marks an unused id (e.g. a deleted chunk): it keeps its
+    position but is not counted in the corpus statistics (``num_docs``,
+    ``avgdl``) that BM25 scores depend on.
+
+    Build with ``KeywordIndex.build(texts)``, persist with ``save(path)`` and
+    reopen memory-mapped with ``KeywordIndex.load(path)``.
+    """
+
+    def __init__(
+        self,
+        terms: Dict[str, Tuple[int, int, float]],
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        doc_lengths: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+        fingerprint: Optional[str] = None,
+        num_docs: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            terms: term -> (offset, length, max_score) into the postings arrays
+            doc_ids: Concatenated postings, ascending document ids per term
+            tfs: Term frequency for each posting
+            doc_lengths: Analyzed token count per document
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+            fingerprint: Identifies the corpus the index was built from
+            num_docs: Documents actually present (default: every id)
+        """
+        self.terms = terms
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.fingerprint = fingerprint
+        self.num_docs = len(doc_lengths) if num_docs is None else num_docs
+        total_length = int(doc_lengths.sum())
+        self.avgdl = total_length / self.num_docs if self.num_docs and total_length else 1.0
+
+    def __len__(self) -> int:
+        """Id bound: documents plus unused ids."""
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(
+        cls,
+        texts: Iterable[Optional[str]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        fingerprint: Optional[str] = None,
+    ) -> "KeywordIndex":
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lengths: List[int] = []
+        num_docs = 0
+        for doc_id, text in enumerate(texts):
+            if text is None:
+                doc_lengths.append(0)
+                continue
+            num_docs += 1
+            tokens = analyze(text)
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        lengths = np.asarray(doc_lengths, dtype=np.int32)
+        total = sum(len(p) for p in postings.values())
+        doc_ids = np.empty(total, dtype=np.int32)
+        tfs = np.empty(total, dtype=np.int32)
+        index = cls({}, doc_ids, tfs, lengths, k1=k1, b=b, fingerprint=fingerprint, num_docs=num_docs)
+
+        offset = 0
+        for term in sorted(postings):
+            entries = postings[term]
+            end = offset + len(entries)
+            doc_ids[offset:end] = [doc_id for doc_id, _ in entries]
+            tfs[offset:end] = [tf for _, tf in entries]
+            max_score = float(index._term_scores(len(entries), doc_ids[offset:end], tfs[offset:end]).max())
+            index.terms[term] = (offset, len(entries), max_score)
+            offset = end
+        return index
+
+    def idf(self, df: int) -> float:
+        # Lucene-style BM25 idf: always positive, which keeps score upper bounds valid
+        return math.log(1.0 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+    def _term_scores(self, df: int, ids: np.ndarray, tfs: np.ndarray) -> np.ndarray:
+        tf = tfs.astype(np.float64)
+        norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[ids] / self.avgdl)
+        return self.idf(df) * tf * (self.k1 + 1.0) / (tf + norm)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        allowed: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k documents for a query as ``(doc_id, score)``, best first.
+
+        Only documents containing at least one query term are returned.
+
+        Args:
+            query: Free-text query (analyzed like the corpus)
+            top_k: Number of results
+            allowed: Optional boolean mask restricting the candidate documents
+        """
+        query_terms = Counter(term for term in analyze(query) if term in self.terms)
+        if not query_terms or top_k <= 0 or not self.num_docs:
+            return []
+
+        # Highest upper bound first; a repeated query term counts once per occurrence
+        plan = sorted(
+            ((self.terms[term], count) for term, count in query_terms.items()),
+            key=lambda item: item[0][2] * item[1],
+            reverse=True,
+        )
+        bounds = [entry[2] * count for entry, count in plan]
+        remaining = np.cumsum(bounds[::-1])[::-1].tolist() + [0.0]
+
+        scores = np.zeros(len(self), dtype=np.float64)
+        candidates: Optional[np.ndarray] = None  # set once unseen documents can no longer qualify
+        for i, ((offset, length, _), count) in enumerate(plan):
+            ids = np.asarray(self.doc_ids[offset:offset + length])
+            tfs = np.asarray(self.tfs[offset:offset + length])
+            keep = None
+            if allowed is not None:
+                keep = allowed[ids]
+            if candidates is not None:
+                keep = candidates[ids] if keep is None else keep & candidates[ids]
+            if keep is not None:
+                ids, tfs = ids[keep], tfs[keep]
+            if ids.size:
+                scores[ids] += count * self._term_scores(length, ids, tfs)
+
+            rest = remaining[i + 1]
+            if rest == 0.0:
+                break
+            seen = np.flatnonzero(scores) if candidates is None else np.flatnonzero(candidates)
+            if seen.size < top_k:
+                continue
+            pivot = seen.size - top_k
+            threshold = np.partition(scores[seen], pivot)[pivot]
+            if candidates is None and rest > threshold:
+                continue
+            # Unseen documents score at most `rest`, below the current k-th best
+            candidates = np.zeros(len(self), dtype=bool)
+            candidates[seen[scores[seen] + rest >= threshold]] = True
+
+        hits = np.flatnonzero(scores) if candidates is None else np.flatnonzero(candidates & (scores > 0))
+        if hits.size > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        order = np.lexsort((hits, -scores[hits]))
+        return [(int(hits[i]), float(scores[hits[i]])) for i in order]
+
+    def save(self, path: Path) -> None:
+        """Persist the index as a directory of ``.npy`` postings plus a JSON lexicon."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, array in (("doc_ids", self.doc_ids), ("tfs", self.tfs), ("doc_lengths", self.doc_lengths)):
+            tmp_path = path / f"{name}.tmp.npy"
+            np.save(tmp_path, np.ascontiguousarray(array))
+            os.replace(tmp_path, path / f"{name}.npy")
+        lexicon = {
+            "version": INDEX_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "k1": self.k1,
+            "b": self.b,
+            "num_docs": self.num_docs,
+            "num_postings": int(len(self.doc_ids)),
+            "terms": self.terms,
+        }
+        tmp_path = path / "lexicon.json.tmp"
+        tmp_path.write_text(json.dumps(lexicon), encoding="utf-8")
+        os.replace(tmp_path, path / "lexicon.json")
+        logger.info(f"Saved keyword index ({len(self.terms)} terms, {self.num_docs} docs) to {path}")
+
+    @classmethod
+    def load(cls, path: Path, fingerprint: Optional[str] = None) -> Optional["KeywordIndex"]:
+        """
+        Open a persisted index with memory-mapped postings.
+
+        Returns None when the index is missing, unreadable, of another format
+        version, or was built from a different corpus than ``fingerprint``.
+        """
+        path = Path(path)
+        try:
+            lexicon = json.loads((path / "lexicon.json").read_text(encoding="utf-8"))
+            if lexicon.get("version") != INDEX_FORMAT_VERSION:
+                return None
+            if fingerprint is not None and lexicon.get("fingerprint") != fingerprint:
+                return None
+            doc_ids = np.load(path / "doc_ids.npy", mmap_mode="r")
+            tfs = np.load(path / "tfs.npy", mmap_mode="r")
+            doc_lengths = np.load(path / "doc_lengths.npy")
+        except (OSError, ValueError) as exc:
+            logger.debug(f"Keyword index at {path} not loaded: {exc}")
+            return None
+        if len(doc_ids) != lexicon.get("num_postings") or len(tfs) != len(doc_ids):
+            return None
+        terms = {term: tuple(entry) for term, entry in lexicon["terms"].items()}
+        return cls(
+            terms, doc_ids, tfs, doc_lengths,
+            k1=lexicon["k1"], b=lexicon["b"], fingerprint=lexicon.get("fingerprint"),
+            num_docs=lexicon.get("num_docs"),
+        )
@@ -10,6 +10,8 @@ import requests
 from bs4 import BeautifulSoup
 import re
 
+from .keyword_index import KeywordIndex
+
 # Optional dependencies - will gracefully degrade if not available
 try:
     from youtube_transcript_api import YouTubeTranscriptApi
@@ -51,6 +53,9 @@ class KnowledgeIngestion:
         self.chunk_overlap = chunk_overlap
         self.min_content_length = min_content_length
         self.knowledge_base = []
+        self._keyword_index: Optional[KeywordIndex] = None
+        self._indexed_chunks: List[Dict[str, Any]] = []
+        self._index_signature: Optional[tuple] = None
         
         if LANGCHAIN_AVAILABLE:
             self.text_splitter = RecursiveCharacterTextSplitter(
@@ -83,60 +88,15 @@ class KnowledgeIngestion:
             response = requests.get(url, headers=headers, timeout=10)
             response.raise_for_status()
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            # Extract title
-            title = soup.title.string if soup.title else url
-            
-            # Extract main content
-            # Try to find main content area
-            main_content = soup.find('main') or soup.find('article') or soup.find('body')
-            
-            if main_content:
-                text = main_content.get_text(separator='\n', strip=True)
-            else:
-                text = soup.get_text(separator='\n', strip=True)
-            
-            # Clean up text
-            lines = [line.strip() for line in text.splitlines() if line.strip()]
-            text = '\n'.join(lines)
-            
-            # Validate content quality
-            validation = self._validate_content(text, source_type='url')
-            if not validation['is_valid']:
-                logger.warning(f"Content validation failed: {validation['reason']}")
-                return {
-                    'source': 'url',
-                    'url': url,
-                    'success': False,
-                    'error': f"Content validation failed: {validation['reason']}",
-                    'validation': validation
-                }
-            
-            # Split into chunks
-            chunks = self._split_text(text)
-            
-            result = {
-                'source': 'url',
-                'url': url,
-                'title': title,
-                'content': text,
-                'chunks': chunks,
-                'chunk_count': len(chunks),
-                'validation': validation,
-                'quality_score': validation.get('quality_score', 0),
-                'success': True
-            }
+            result = self.parse_html(url, response.content)
+            if not result['success']:
+                logger.warning(result['error'])
+                return result
             
             # Add to knowledge base
             self.knowledge_base.append(result)
             
-            logger.info(f"Successfully ingested {len(chunks)} chunks from URL")
+            logger.info(f"Successfully ingested {result['chunk_count']} chunks from URL")
             return result
             
         except Exception as e:
@@ -148,6 +108,69 @@ class KnowledgeIngestion:
                 'error': str(e)
             }
     
+    def parse_html(self, url: str, content: bytes) -> Dict[str, Any]:
+        """
+        Extract, validate and chunk the main text of a fetched web page.
+        
+        The document is not added to the knowledge base.
+        
+        Args:
+            url: URL the page was fetched from
+            content: Raw HTML
+            
+        Returns:
+            Dictionary with extracted content and metadata
+        """
+        # Parse HTML
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Remove script and style elements
+        for script in soup(["script", "style", "nav", "footer", "header"]):
+            script.decompose()
+        
+        # Extract title
+        title = soup.title.string if soup.title else url
+        
+        # Extract main content
+        # Try to find main content area
+        main_content = soup.find('main') or soup.find('article') or soup.find('body')
+        
+        if main_content:
+            text = main_content.get_text(separator='\n', strip=True)
+        else:
+            text = soup.get_text(separator='\n', strip=True)
+        
+        # Clean up text
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        text = '\n'.join(lines)
+        
+        # Validate content quality
+        validation = self._validate_content(text, source_type='url')
+        if not validation['is_valid']:
+            return {
+                'source': 'url',
+                'url': url,
+                'success': False,
+                'error': f"Content validation failed: {validation['reason']}",
+                'validation': validation
+            }
+        
+        # Split into chunks
+        chunks = self._split_text(text)
+        
+        result = {
+            'source': 'url',
+            'url': url,
+            'title': title,
+            'content': text,
+            'chunks': chunks,
+            'chunk_count': len(chunks),
+            'validation': validation,
+            'quality_score': validation.get('quality_score', 0),
+            'success': True
+        }
+        return result
+    
     def ingest_from_youtube(self, video_url: str, languages: List[str] = ['en']) -> Dict[str, Any]:
         """
         Extract transcript from YouTube video.
@@ -177,35 +200,12 @@ class KnowledgeIngestion:
             
             # Get transcript
             transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=languages)
-            
-            # Combine transcript entries
-            full_text = " ".join([entry['text'] for entry in transcript_list])
-            
-            # Also create timestamped version
-            timestamped_text = "\n".join([
-                f"[{self._format_timestamp(entry['start'])}] {entry['text']}"
-                for entry in transcript_list
-            ])
-            
-            # Split into chunks
-            chunks = self._split_text(full_text)
-            
-            result = {
-                'source': 'youtube',
-                'url': video_url,
-                'video_id': video_id,
-                'content': full_text,
-                'timestamped_content': timestamped_text,
-                'chunks': chunks,
-                'chunk_count': len(chunks),
-                'duration': transcript_list[-1]['start'] + transcript_list[-1]['duration'] if transcript_list else 0,
-                'success': True
-            }
+            result = self.parse_transcript(video_url, video_id, transcript_list)
             
             # Add to knowledge base
             self.knowledge_base.append(result)
             
-            logger.info(f"Successfully ingested {len(chunks)} chunks from YouTube video")
+            logger.info(f"Successfully ingested {result['chunk_count']} chunks from YouTube video")
             return result
             
         except Exception as e:
@@ -217,6 +217,44 @@ class KnowledgeIngestion:
                 'error': str(e)
             }
     
+    def parse_transcript(
+        self, video_url: str, video_id: str, transcript_list: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Chunk a YouTube transcript (not added to the knowledge base).
+        
+        Args:
+            video_url: YouTube video URL
+            video_id: YouTube video ID
+            transcript_list: Transcript entries with text, start and duration
+            
+        Returns:
+            Dictionary with transcript and metadata
+        """
+        # Combine transcript entries
+        full_text = " ".join([entry['text'] for entry in transcript_list])
+        
+        # Also create timestamped version
+        timestamped_text = "\n".join([
+            f"[{self._format_timestamp(entry['start'])}] {entry['text']}"
+            for entry in transcript_list
+        ])
+        
+        # Split into chunks
+        chunks = self._split_text(full_text)
+        
+        return {
+            'source': 'youtube',
+            'url': video_url,
+            'video_id': video_id,
+            'content': full_text,
+            'timestamped_content': timestamped_text,
+            'chunks': chunks,
+            'chunk_count': len(chunks),
+            'duration': transcript_list[-1]['start'] + transcript_list[-1]['duration'] if transcript_list else 0,
+            'success': True
+        }
+    
     def ingest_from_pdf(self, pdf_path: str) -> Dict[str, Any]:
         """
         Extract text from PDF file.
@@ -238,40 +276,12 @@ class KnowledgeIngestion:
         try:
             logger.info(f"Ingesting content from PDF: {pdf_path}")
             
-            # Read PDF
-            reader = PdfReader(pdf_path)
-            
-            # Extract text from all pages
-            pages_text = []
-            for i, page in enumerate(reader.pages):
-                text = page.extract_text()
-                pages_text.append({
-                    'page_number': i + 1,
-                    'text': text
-                })
-            
-            # Combine all text
-            full_text = "\n\n".join([p['text'] for p in pages_text])
-            
-            # Split into chunks
-            chunks = self._split_text(full_text)
-            
-            result = {
-                'source': 'pdf',
-                'path': pdf_path,
-                'filename': os.path.basename(pdf_path),
-                'content': full_text,
-                'pages': pages_text,
-                'page_count': len(reader.pages),
-                'chunks': chunks,
-                'chunk_count': len(chunks),
-                'success': True
-            }
+            result = self.parse_pdf(pdf_path, pdf_path)
             
             # Add to knowledge base
             self.knowledge_base.append(result)
             
-            logger.info(f"Successfully ingested {len(chunks)} chunks from PDF ({len(reader.pages)} pages)")
+            logger.info(f"Successfully ingested {result['chunk_count']} chunks from PDF ({result['page_count']} pages)")
             return result
             
         except Exception as e:
@@ -283,10 +293,72 @@ class KnowledgeIngestion:
                 'error': str(e)
             }
     
+    def parse_pdf(self, stream: Any, pdf_path: str) -> Dict[str, Any]:
+        """
+        Extract and chunk the text of a PDF (not added to the knowledge base).
+        
+        Args:
+            stream: File path or binary file object of the PDF
+            pdf_path: Path or URL recorded on the document
+            
+        Returns:
+            Dictionary with extracted text and metadata
+        """
+        # Read PDF
+        reader = PdfReader(stream)
+        
+        # Extract text from all pages
+        pages_text = []
+        for i, page in enumerate(reader.pages):
+            text = page.extract_text()
+            pages_text.append({
+                'page_number': i + 1,
+                'text': text
+            })
+        
+        # Combine all text
+        full_text = "\n\n".join([p['text'] for p in pages_text])
+        
+        # Split into chunks
+        chunks = self._split_text(full_text)
+        
+        return {
+            'source': 'pdf',
+            'path': pdf_path,
+            'filename': os.path.basename(pdf_path),
+            'content': full_text,
+            'pages': pages_text,
+            'page_count': len(reader.pages),
+            'chunks': chunks,
+            'chunk_count': len(chunks),
+            'success': True
+        }
+    
+    def _get_keyword_index(self) -> Optional[KeywordIndex]:
+        """Inverted index over all successful chunks, rebuilt when the knowledge base changes."""
+        signature = tuple(
+            (id(doc), len(doc.get('chunks') or []))
+            for doc in self.knowledge_base
+            if doc.get('success') and doc.get('chunks')
+        )
+        if signature != self._index_signature:
+            self._indexed_chunks = [
+                {'chunk': chunk, 'source': doc['source']}
+                for doc in self.knowledge_base
+                if doc.get('success') and doc.get('chunks')
+                for chunk in doc['chunks']
+            ]
+            self._keyword_index = (
+                KeywordIndex.build(item['chunk'] for item in self._indexed_chunks)
+                if self._indexed_chunks else None
+            )
+            self._index_signature = signature
+        return self._keyword_index
+    
     def get_context_for_query(self, query: str, max_chunks: int = 5) -> str:
         """
         Get relevant context from knowledge base for a query.
-        Simple keyword-based retrieval (can be enhanced with embeddings).
+        Keyword retrieval (BM25 over an inverted index of the ingested chunks).
         
         Args:
             query: User query
@@ -298,26 +370,10 @@ class KnowledgeIngestion:
         if not self.knowledge_base:
             return ""
         
-        # Simple keyword matching (can be enhanced with semantic search)
-        query_words = set(query.lower().split())
-        
-        scored_chunks = []
-        for doc in self.knowledge_base:
-            if doc.get('success') and doc.get('chunks'):
-                for chunk in doc['chunks']:
-                    chunk_words = set(chunk.lower().split())
-                    # Calculate overlap score
-                    score = len(query_words & chunk_words)
-                    if score > 0:
-                        scored_chunks.append({
-                            'chunk': chunk,
-                            'score': score,
-                            'source': doc['source']
-                        })
-        
-        # Sort by score and get top chunks
-        scored_chunks.sort(key=lambda x: x['score'], reverse=True)
-        top_chunks = scored_chunks[:max_chunks]
+        index = self._get_keyword_index()
+        if index is None:
+            return ""
+        top_chunks = [self._indexed_chunks[idx] for idx, _ in index.search(query, top_k=max_chunks)]
         
         if not top_chunks:
             return ""
@@ -354,6 +410,9 @@ class KnowledgeIngestion:
     def clear_knowledge_base(self):
         """Clear all ingested knowledge."""
         self.knowledge_base = []
+        self._keyword_index = None
+        self._indexed_chunks = []
+        self._index_signature = None
         logger.info("Knowledge base cleared")
     
     def _split_text(self, text: str) -> List[str]:
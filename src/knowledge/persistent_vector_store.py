@@ -19,6 +19,8 @@ except ImportError:
 
 from openai import OpenAI
 
+from .embedding_cache import EMBEDDING_BACKEND, CachedEmbedder, default_embedder
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,7 +41,8 @@ class PersistentVectorStore:
         collection_name: str = "pca_knowledge_base",
         persist_directory: str = "./data/chroma_db",
         embedding_model: str = "text-embedding-3-small",
-        openai_client: Optional[OpenAI] = None
+        openai_client: Optional[OpenAI] = None,
+        embedder: Optional[CachedEmbedder] = None
     ):
         """
         Initialize persistent vector store.
@@ -49,6 +52,8 @@ class PersistentVectorStore:
             persist_directory: Directory to persist data
             embedding_model: OpenAI embedding model
             openai_client: Optional OpenAI client
+            embedder: Optional cached embedder (default: configured backend
+                with the shared embedding cache)
         """
         if not CHROMADB_AVAILABLE:
             raise ImportError(
@@ -58,7 +63,10 @@ class PersistentVectorStore:
         self.collection_name = collection_name
         self.persist_directory = Path(persist_directory)
         self.embedding_model = embedding_model
-        self.client_openai = openai_client or OpenAI()
+        if openai_client is None and embedder is None and EMBEDDING_BACKEND == "openai":
+            openai_client = OpenAI()
+        self.client_openai = openai_client
+        self.embedder = embedder or default_embedder(openai_client, embedding_model)
         
         # Create persist directory
         self.persist_directory.mkdir(parents=True, exist_ok=True)
@@ -182,21 +190,8 @@ class PersistentVectorStore:
         texts: List[str],
         batch_size: int = 100
     ) -> List[List[float]]:
-        """Generate embeddings for texts."""
-        all_embeddings = []
-        
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
-            response = self.client_openai.embeddings.create(
-                model=self.embedding_model,
-                input=batch
-            )
-            
-            batch_embeddings = [data.embedding for data in response.data]
-            all_embeddings.extend(batch_embeddings)
-        
-        return all_embeddings
+        """Generate embeddings for texts (unchanged chunks come from the cache)."""
+        return self.embedder.embed(texts, batch_size=batch_size).tolist()
     
     def search(
         self,
@@ -217,11 +212,7 @@ class PersistentVectorStore:
         """
         try:
             # Generate query embedding
-            response = self.client_openai.embeddings.create(
-                model=self.embedding_model,
-                input=[query]
-            )
-            query_embedding = response.data[0].embedding
+            query_embedding = self.embedder.embed([query])[0].tolist()
             
             # Build where clause for metadata filtering
             where = None
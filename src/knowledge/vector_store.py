@@ -1,8 +1,13 @@
 """Vector store utilities for semantic retrieval."""
 from __future__ import annotations
 
+import hashlib
 import json
+import math
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -13,12 +18,19 @@ import numpy as np
 from loguru import logger
 from openai import OpenAI
 
-try:
-    from rank_bm25 import BM25Okapi  # type: ignore
-
-    BM25_AVAILABLE = True
-except ImportError:  # pragma: no cover - optional dependency
-    BM25_AVAILABLE = False
+from .chunk_store import ChunkStore, chunk_key
+from .embedding_cache import EMBEDDING_BACKEND, CachedEmbedder, default_embedder
+from .faiss_index import (
+    configure_search,
+    create_index,
+    index_type_of,
+    is_id_mapped,
+    read_index,
+    remove_ids,
+    search_parameters,
+    write_index,
+)
+from .keyword_index import KeywordIndex
 
 try:
     import cohere  # type: ignore
@@ -42,35 +54,269 @@ def _matches_filters(metadata: Dict[str, Any], filters: Optional[Dict[str, Any]]
     return True
 
 
+# Metadata fields whose bitmaps are built when the store is loaded (others on first use)
+FILTER_FIELDS = ("source", "category", "priority", "url", "title")
+
+# Extra headroom when over-fetching from an index that cannot filter natively
+OVERFETCH_FACTOR = 1.5
+
+
+class MetadataFilterIndex:
+    """
+    Per-field value -> boolean row bitmap over chunk metadata.
+
+    ``mask(filters)`` resolves metadata filters to the set of allowed chunk
+    positions without scanning records, so retrievers can restrict candidate
+    selection up front instead of filtering a top-k cut afterwards. Matching
+    follows ``_matches_filters``: a scalar filter requires equality, a
+    list/tuple/set filter membership.
+
+    ``metadata`` is a list of records or a ``ChunkStore``; for a store, only
+    the filtered columns are read and deleted ids never match.
+    """
+
+    def __init__(self, metadata: Any, fields: Tuple[str, ...] = FILTER_FIELDS) -> None:
+        self.metadata = metadata
+        self.size = len(metadata)
+        self._bitmaps: Dict[str, Optional[Dict[Any, np.ndarray]]] = {}
+        self._lock = threading.Lock()
+        self._live = metadata.live_mask() if isinstance(metadata, ChunkStore) else None
+        for field in fields:
+            self._field_bitmaps(field)
+
+    def _column(self, field: str) -> List[Any]:
+        if isinstance(self.metadata, ChunkStore):
+            return self.metadata.column(field)
+        return [record.get(field) for record in self.metadata]
+
+    def _field_bitmaps(self, field: str) -> Optional[Dict[Any, np.ndarray]]:
+        """Bitmaps of one field, or None when its values are not hashable."""
+        if field in self._bitmaps:
+            return self._bitmaps[field]
+        with self._lock:
+            if field not in self._bitmaps:
+                positions: Dict[Any, List[int]] = {}
+                try:
+                    for i, value in enumerate(self._column(field)):
+                        positions.setdefault(value, []).append(i)
+                    bitmaps: Optional[Dict[Any, np.ndarray]] = {}
+                    for value, rows in positions.items():
+                        bitmap = np.zeros(self.size, dtype=bool)
+                        bitmap[rows] = True
+                        bitmaps[value] = bitmap
+                except TypeError:
+                    bitmaps = None
+                self._bitmaps[field] = bitmaps
+        return self._bitmaps[field]
+
+    def mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Boolean mask of chunks matching all filters (None when there are no filters)."""
+        if not filters:
+            return None
+        result = np.ones(self.size, dtype=bool) if self._live is None else self._live.copy()
+        for field, value in filters.items():
+            bitmaps = self._field_bitmaps(field)
+            if bitmaps is None:
+                field_mask = np.fromiter(
+                    (_matches_filters({field: v}, {field: value}) for v in self._column(field)),
+                    dtype=bool, count=self.size
+                )
+            else:
+                values = value if isinstance(value, (list, tuple, set)) else [value]
+                field_mask = np.zeros(self.size, dtype=bool)
+                for v in values:
+                    try:
+                        bitmap = bitmaps.get(v)
+                    except TypeError:
+                        bitmap = None
+                    if bitmap is not None:
+                        field_mask |= bitmap
+            result &= field_mask
+            if not result.any():
+                break
+        return result
+
+
+def _fetch_records(metadata: Any, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Records by id from a ``ChunkStore`` (one query) or a list of records."""
+    if isinstance(metadata, ChunkStore):
+        return metadata.get_many(ids)
+    return {i: metadata[i] for i in ids if 0 <= i < len(metadata)}
+
+
+def _result(score: float, record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "score": float(score),
+        "text": record.get("text", ""),
+        "metadata": {k: v for k, v in record.items() if k != "text"},
+    }
+
+
+_search_executor: Optional[ThreadPoolExecutor] = None
+_search_executor_lock = threading.Lock()
+
+
+def _get_search_executor() -> ThreadPoolExecutor:
+    """Shared pool running retrieval legs concurrently."""
+    global _search_executor
+    with _search_executor_lock:
+        if _search_executor is None:
+            _search_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("RETRIEVAL_WORKERS", "8")),
+                thread_name_prefix="hybrid-search",
+            )
+        return _search_executor
+
+
 @dataclass
 class VectorStoreConfig:
-    """Configuration for building and querying the vector store."""
+    """
+    Configuration for building and querying the vector store.
+
+    ``index_type`` is one of ``faiss_index.INDEX_TYPES`` (flat, hnsw, ivfpq);
+    ``ivf_nprobe`` and ``hnsw_ef_search`` trade recall for query latency.
+    Chunk metadata lives in a SQLite sidecar next to ``metadata_path``;
+    a plain ``metadata.json`` is still read for stores built before it.
+    """
 
     index_path: Path = Path("data/vector_store/faiss.index")
     metadata_path: Path = Path("data/vector_store/metadata.json")
     embedding_model: str = "text-embedding-3-small"
     batch_size: int = 64
+    index_type: str = os.getenv("VECTOR_INDEX_TYPE", "flat")
+    hnsw_m: int = 32
+    hnsw_ef_search: int = 64
+    ivf_nlist: Optional[int] = None
+    ivf_nprobe: int = 16
+    pq_m: int = 16
+    mmap_index: bool = True
+
+    @property
+    def keyword_index_path(self) -> Path:
+        return self.metadata_path.with_name("keyword_index")
+
+    @property
+    def chunk_store_path(self) -> Path:
+        return self.metadata_path.with_name("chunks.db")
+
+    def metadata_exists(self) -> bool:
+        return self.chunk_store_path.exists() or self.metadata_path.exists()
+
+    @property
+    def embedding_cache_dir(self) -> Path:
+        return self.index_path.with_name("embedding_cache")
 
 
 class VectorStoreBuilder:
-    """Builds a FAISS index from ingested knowledge chunks."""
+    """
+    Builds and incrementally updates the FAISS index from ingested knowledge chunks.
+
+    Vectors are indexed under their ``ChunkStore`` id, so re-building from a
+    new document set only embeds and indexes the chunks that changed and
+    removes the ones that are gone; the index is only rebuilt from scratch
+    when it is missing or was built with another index type or embedder.
+    """
 
     def __init__(
         self,
         config: VectorStoreConfig = VectorStoreConfig(),
         client: Optional[OpenAI] = None,
+        embedder: Optional[CachedEmbedder] = None,
     ) -> None:
         self.config = config
-        self.client = client or OpenAI()
+        if client is None and embedder is None and EMBEDDING_BACKEND == "openai":
+            client = OpenAI()
+        self.client = client
+        self.embedder = embedder or default_embedder(
+            client, config.embedding_model, config.embedding_cache_dir
+        )
         self.config.index_path.parent.mkdir(parents=True, exist_ok=True)
         self.config.metadata_path.parent.mkdir(parents=True, exist_ok=True)
+        self.store = ChunkStore(config.chunk_store_path)
 
     def build_from_documents(self, documents: List[Dict[str, Any]]) -> None:
-        """Embed chunks and create FAISS index from ingested documents."""
+        """Make the store hold exactly the chunks of ``documents`` (unchanged chunks are kept)."""
+
+        records = self._document_records(documents)
+        if not records:
+            raise ValueError("No valid chunks found to build the vector store.")
+
+        index = self._load_index()
+        if index is None:
+            self._rebuild(records)
+            return
 
-        texts: List[str] = []
-        metadata_records: List[Dict[str, Any]] = []
+        self._apply(index, *self._diff(self.store.keys(), records))
+
+    def upsert_documents(self, documents: List[Dict[str, Any]]) -> List[int]:
+        """
+        Replace the chunks of ``documents`` (matched by URL), keeping unchanged ones.
+
+        Other documents are left untouched; returns the ids of added chunks.
+        """
+
+        records = self._document_records(documents)
+        if not records:
+            return []
+        urls = list({record["url"] for record in records})
+        index = self._load_index()
+        if index is None:
+            others = [record for record in self.store.records() if record["url"] not in urls]
+            return self._rebuild(others + records)[len(others):]
+        return self._apply(index, *self._diff(self.store.keys(urls), records))
+
+    def add_documents(self, documents: List[Dict[str, Any]]) -> List[int]:
+        """Add the chunks of ``documents`` next to the existing ones, returning their ids."""
+
+        records = self._document_records(documents)
+        if not records:
+            return []
+        index = self._load_index()
+        if index is None:
+            return self._rebuild(self.store.records() + records)[-len(records):]
+        return self._apply(index, records, [])
 
+    def delete_documents(self, urls: List[str]) -> int:
+        """Remove every chunk of the documents with these URLs, returning how many were removed."""
+
+        ids = self.store.ids_for_urls(urls)
+        self.delete_chunks(ids)
+        return len(ids)
+
+    def delete_chunks(self, ids: List[int]) -> None:
+        """Remove chunks by id from the index and the metadata store."""
+
+        if not ids:
+            return
+        index = self._load_index()
+        if index is None:
+            raise FileNotFoundError(
+                f"Vector index not found at {self.config.index_path}. Build the store first."
+            )
+        self._apply(index, [], ids)
+
+    @staticmethod
+    def _diff(
+        existing: Dict[str, List[int]], records: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """Records to add and ids to delete so ``existing`` (chunk_key -> ids) holds ``records``."""
+
+        existing = {key: list(ids) for key, ids in existing.items()}
+        to_add: List[Dict[str, Any]] = []
+        for record in records:
+            ids = existing.get(chunk_key(record))
+            if ids:
+                ids.pop(0)
+            else:
+                to_add.append(record)
+        to_delete = [chunk_id for ids in existing.values() for chunk_id in ids]
+        return to_add, to_delete
+
+    @staticmethod
+    def _document_records(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """One metadata record per chunk of the successfully ingested documents."""
+
+        records: List[Dict[str, Any]] = []
         for doc in documents:
             if not doc.get("success"):
                 continue
@@ -88,53 +334,91 @@ class VectorStoreBuilder:
             }
 
             for chunk in chunks:
-                texts.append(chunk)
-                metadata_records.append({**base_metadata, "text": chunk})
-
-        if not texts:
-            raise ValueError("No valid chunks found to build the vector store.")
-
-        embeddings = self._embed_texts(texts)
-        self._persist_index(embeddings)
-        self._persist_metadata(metadata_records)
+                records.append({**base_metadata, "text": chunk})
+        return records
+
+    def _load_index(self) -> Optional[Any]:
+        """The persisted index if it can be updated in place, else None."""
+
+        if not (self.config.index_path.exists() and self.store.exists()):
+            return None
+        if self.store.info("index_type") != self.config.index_type:
+            return None
+        if self.store.info("embedder") != self.embedder.provider.name:
+            return None
+        try:
+            index = read_index(self.config.index_path, mmap=False)
+        except RuntimeError as exc:
+            logger.warning(f"Could not read vector index, rebuilding: {exc}")
+            return None
+        if not is_id_mapped(index) or index.ntotal != self.store.count():
+            return None
+        return index
+
+    def _rebuild(self, records: List[Dict[str, Any]]) -> List[int]:
+        """Replace the index and metadata with ``records``."""
+
+        embeddings = self._embed_texts([record["text"] for record in records])
+        index = create_index(
+            self.config.index_type,
+            embeddings,
+            hnsw_m=self.config.hnsw_m,
+            ivf_nlist=self.config.ivf_nlist,
+            pq_m=self.config.pq_m,
+        )
+        configure_search(index, nprobe=self.config.ivf_nprobe, ef_search=self.config.hnsw_ef_search)
+        with self.store.transaction() as txn:
+            txn.clear()
+            ids = txn.add(records)
+            index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+            write_index(index, self.config.index_path)
+            txn.set_info("index_type", self.config.index_type)
+            txn.set_info("embedder", self.embedder.provider.name)
+        self._persist_keyword_index()
+        logger.info(f"Vector store built: {len(ids)} chunks ({index_type_of(index)} index)")
+        return ids
+
+    def _apply(self, index: Any, to_add: List[Dict[str, Any]], to_delete: List[int]) -> List[int]:
+        """Add and remove chunks in place, then persist the index and metadata together."""
+
+        if not to_add and not to_delete:
+            return []
+        # Embed outside the write transaction: it may wait on the network
+        embeddings = self._embed_texts([record["text"] for record in to_add]) if to_add else None
+        ids: List[int] = []
+        with self.store.transaction() as txn:
+            if to_delete:
+                txn.delete(to_delete)
+                index = remove_ids(index, to_delete)
+            if to_add:
+                ids = txn.add(to_add)
+                index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+            write_index(index, self.config.index_path)
+        self._persist_keyword_index()
+        logger.info(
+            f"Vector store updated: +{len(to_add)} / -{len(to_delete)} chunks ({self.store.count()} total)"
+        )
+        return ids
 
     def _embed_texts(self, texts: List[str]) -> np.ndarray:
-        """Create embeddings for the provided texts."""
-
-        vectors: List[np.ndarray] = []
-        for start in range(0, len(texts), self.config.batch_size):
-            batch = texts[start : start + self.config.batch_size]
-            response = self.client.embeddings.create(
-                model=self.config.embedding_model,
-                input=batch,
-            )
-            batch_vectors = np.array(
-                [data.embedding for data in response.data], dtype="float32"
-            )
-            vectors.append(batch_vectors)
+        """Create embeddings for the provided texts (unchanged chunks come from the cache)."""
 
-        embeddings = np.vstack(vectors)
+        embeddings = self.embedder.embed(texts, batch_size=self.config.batch_size)
         faiss.normalize_L2(embeddings)
         return embeddings
 
-    def _persist_index(self, embeddings: np.ndarray) -> None:
-        """Write FAISS index to disk."""
-
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatIP(dimension)
-        index.add(embeddings)
-        faiss.write_index(index, str(self.config.index_path))
-
-    def _persist_metadata(self, metadata: List[Dict[str, Any]]) -> None:
-        """Write chunk metadata for retrieval lookups."""
+    def _persist_keyword_index(self) -> None:
+        """Write the inverted keyword index for the current chunks (doc ids are chunk ids)."""
 
-        self.config.metadata_path.write_text(
-            json.dumps(metadata, indent=2), encoding="utf-8"
+        KeywordIndex.build(self.store.texts(), fingerprint=self.store.revision()).save(
+            self.config.keyword_index_path
         )
 
     def load_metadata(self) -> List[Dict[str, Any]]:
         """Load metadata if a downstream job needs to inspect it."""
 
+        if self.store.exists():
+            return self.store.records()
         if not self.config.metadata_path.exists():
             raise FileNotFoundError(
                 f"Metadata file not found at {self.config.metadata_path}. Build the store first."
@@ -150,9 +434,15 @@ class VectorRetriever:
         self,
         config: VectorStoreConfig = VectorStoreConfig(),
         client: Optional[OpenAI] = None,
+        embedder: Optional[CachedEmbedder] = None,
     ) -> None:
         self.config = config
-        self.client = client or OpenAI()
+        if client is None and embedder is None and EMBEDDING_BACKEND == "openai":
+            client = OpenAI()
+        self.client = client
+        self.embedder = embedder or default_embedder(
+            client, config.embedding_model, config.embedding_cache_dir
+        )
         self._load_index()
         self._load_metadata()
 
@@ -161,15 +451,62 @@ class VectorRetriever:
             raise FileNotFoundError(
                 f"Vector index not found at {self.config.index_path}. Build it first."
             )
-        self.index = faiss.read_index(str(self.config.index_path))
+        self.index = read_index(self.config.index_path, mmap=self.config.mmap_index)
+        configure_search(self.index, nprobe=self.config.ivf_nprobe, ef_search=self.config.hnsw_ef_search)
 
     def _load_metadata(self) -> None:
-        if not self.config.metadata_path.exists():
+        """Open the metadata sidecar (rows are read on demand) or a legacy metadata.json."""
+        store = ChunkStore(self.config.chunk_store_path)
+        if store.exists():
+            self.metadata: Any = store
+        elif self.config.metadata_path.exists():
+            metadata_text = self.config.metadata_path.read_text(encoding="utf-8")
+            self.metadata = json.loads(metadata_text)
+        else:
             raise FileNotFoundError(
-                f"Metadata file not found at {self.config.metadata_path}."
+                f"Metadata file not found at {self.config.chunk_store_path} or {self.config.metadata_path}."
             )
-        metadata_text = self.config.metadata_path.read_text(encoding="utf-8")
-        self.metadata = json.loads(metadata_text)
+        self._filter_index: Optional[MetadataFilterIndex] = None
+
+    @property
+    def filter_index(self) -> MetadataFilterIndex:
+        if self._filter_index is None or self._filter_index.metadata is not self.metadata:
+            self._filter_index = MetadataFilterIndex(self.metadata)
+        return self._filter_index
+
+    def _search_allowed(
+        self, query_vector: np.ndarray, k: int, allowed: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k search restricted to allowed positions.
+
+        Uses a FAISS ID selector when the index supports one; otherwise
+        over-fetches in proportion to filter selectivity and widens until k
+        allowed hits are found or the whole index was searched.
+        """
+        total = min(int(getattr(self.index, "ntotal", len(allowed)) or len(allowed)), len(allowed))
+        if hasattr(faiss, "IDSelectorBitmap") and hasattr(faiss, "SearchParameters"):
+            try:
+                bits = np.packbits(allowed, bitorder="little")
+                selector = faiss.IDSelectorBitmap(len(allowed), faiss.swig_ptr(bits))
+                scores, indices = self.index.search(
+                    query_vector, k, params=search_parameters(self.index, selector)
+                )
+                return scores[0], indices[0]
+            except Exception as exc:
+                logger.debug(f"FAISS selector search unavailable, over-fetching: {exc}")
+
+        selectivity = max(int(allowed.sum()), 1) / max(total, 1)
+        fetch = min(total, math.ceil(k / selectivity * OVERFETCH_FACTOR))
+        while True:
+            scores, indices = self.index.search(query_vector, fetch)
+            scores, indices = scores[0], indices[0]
+            valid = (indices >= 0) & (indices < len(allowed))
+            keep = valid.copy()
+            keep[valid] = allowed[indices[valid]]
+            if keep.sum() >= k or fetch >= total:
+                return scores[keep][:k], indices[keep][:k]
+            fetch = min(total, fetch * 2)
 
     def search(
         self,
@@ -177,60 +514,74 @@ class VectorRetriever:
         top_k: int = 5,
         metadata_filters: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
-        """Return top-k relevant chunks for the query."""
+        """Return top-k relevant chunks for the query (filters restrict candidates before the cut)."""
 
-        response = self.client.embeddings.create(
-            model=self.config.embedding_model,
-            input=[query],
-        )
-        query_vector = np.array([response.data[0].embedding], dtype="float32")
+        allowed = self.filter_index.mask(metadata_filters)
+        if allowed is not None and not allowed.any():
+            return []
+
+        query_vector = self.embedder.embed([query])
         faiss.normalize_L2(query_vector)
 
-        scores, indices = self.index.search(query_vector, top_k)
-        results: List[Dict[str, Any]] = []
+        if allowed is None:
+            scores, indices = self.index.search(query_vector, top_k)
+            scores, indices = scores[0], indices[0]
+        else:
+            scores, indices = self._search_allowed(query_vector, min(top_k, int(allowed.sum())), allowed)
 
-        for score, idx in zip(scores[0], indices[0]):
-            if idx == -1 or idx >= len(self.metadata):
-                continue
-            record = self.metadata[idx]
-            if not _matches_filters(record, metadata_filters):
+        records = _fetch_records(self.metadata, [int(idx) for idx in indices if idx != -1])
+        results: List[Dict[str, Any]] = []
+        for score, idx in zip(scores, indices):
+            record = records.get(int(idx))
+            if record is None or not _matches_filters(record, metadata_filters):
                 continue
-            results.append(
-                {
-                    "score": float(score),
-                    "text": record.get("text", ""),
-                    "metadata": {k: v for k, v in record.items() if k != "text"},
-                }
-            )
+            results.append(_result(score, record))
 
         return results
 
 
 class KeywordRetriever:
-    """Keyword-based retriever (BM25) over stored metadata chunks."""
+    """
+    Keyword-based retriever (BM25) over stored metadata chunks.
 
-    def __init__(self, config: VectorStoreConfig = VectorStoreConfig()) -> None:
-        if not BM25_AVAILABLE:
-            raise ImportError(
-                "rank_bm25 is not installed. Install with `pip install rank-bm25`."
-            )
+    Uses the inverted index persisted next to the metadata (built by
+    VectorStoreBuilder); when it is missing or was built from different
+    metadata it is rebuilt and saved.
+    """
 
-        if not config.metadata_path.exists():
+    def __init__(self, config: VectorStoreConfig = VectorStoreConfig()) -> None:
+        self.config = config
+        store = ChunkStore(config.chunk_store_path)
+        if store.exists():
+            self.metadata: Any = store
+            fingerprint = store.revision()
+        elif config.metadata_path.exists():
+            metadata_bytes = config.metadata_path.read_bytes()
+            self.metadata = json.loads(metadata_bytes)
+            fingerprint = hashlib.sha256(metadata_bytes).hexdigest()
+        else:
             raise FileNotFoundError(
                 f"Metadata file not found at {config.metadata_path}. Build the store first."
             )
 
-        metadata_text = config.metadata_path.read_text(encoding="utf-8")
-        self.metadata: List[Dict[str, Any]] = json.loads(metadata_text)
-        self.config = config
+        self.index = KeywordIndex.load(config.keyword_index_path, fingerprint=fingerprint)
+        if self.index is None or len(self.index) != len(self.metadata):
+            texts = (
+                self.metadata.texts() if isinstance(self.metadata, ChunkStore)
+                else (m.get("text", "") for m in self.metadata)
+            )
+            self.index = KeywordIndex.build(texts, fingerprint=fingerprint)
+            try:
+                self.index.save(config.keyword_index_path)
+            except OSError as exc:
+                logger.warning(f"Could not persist keyword index: {exc}")
+        self._filter_index: Optional[MetadataFilterIndex] = None
 
-        # Build BM25 corpus
-        self.corpus_tokens: List[List[str]] = [self._tokenize(m.get("text", "")) for m in self.metadata]
-        self.bm25 = BM25Okapi(self.corpus_tokens)
-
-    @staticmethod
-    def _tokenize(text: str) -> List[str]:
-        return [token for token in text.lower().split() if token]
+    @property
+    def filter_index(self) -> MetadataFilterIndex:
+        if self._filter_index is None:
+            self._filter_index = MetadataFilterIndex(self.metadata)
+        return self._filter_index
 
     def search(
         self,
@@ -238,29 +589,13 @@ class KeywordRetriever:
         top_k: int = 5,
         metadata_filters: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
-        tokens = self._tokenize(query)
-        if not tokens:
+        allowed = self.filter_index.mask(metadata_filters)
+        if allowed is not None and not allowed.any():
             return []
 
-        scores = self.bm25.get_scores(tokens)
-        scored_indices = sorted(
-            enumerate(scores), key=lambda x: x[1], reverse=True
-        )[:top_k]
-
-        results: List[Dict[str, Any]] = []
-        for idx, score in scored_indices:
-            record = self.metadata[idx]
-            if not _matches_filters(record, metadata_filters):
-                continue
-            results.append(
-                {
-                    "score": float(score),
-                    "text": record.get("text", ""),
-                    "metadata": {k: v for k, v in record.items() if k != "text"},
-                }
-            )
-
-        return results
+        hits = self.index.search(query, top_k=top_k, allowed=allowed)
+        records = _fetch_records(self.metadata, [idx for idx, _ in hits])
+        return [_result(score, records[idx]) for idx, score in hits if idx in records]
 
 
 class CohereReranker:
@@ -376,17 +711,35 @@ class HybridRetriever:
                     }
                 candidates[key]["score"] += rrf_score
 
-        if self.vector_retriever:
-            vector_results = self.vector_retriever.search(
-                query, top_k=top_k * 2, metadata_filters=metadata_filters
-            )
-            add_candidates(vector_results, self.vector_weight)
+        # Run the legs concurrently: the vector leg mostly waits on the embedding API
+        legs = {
+            name: retriever
+            for name, retriever in (("vector", self.vector_retriever), ("keyword", self.keyword_retriever))
+            if retriever
+        }
+        timings: Dict[str, float] = {}
 
-        if self.keyword_retriever:
-            keyword_results = self.keyword_retriever.search(
-                query, top_k=top_k * 2, metadata_filters=metadata_filters
-            )
-            add_candidates(keyword_results, self.keyword_weight)
+        def run_leg(name: str) -> List[Dict[str, Any]]:
+            start = time.perf_counter()
+            try:
+                return legs[name].search(query, top_k=top_k * 2, metadata_filters=metadata_filters)
+            except Exception as exc:
+                logger.error(f"{name.capitalize()} retrieval failed: {exc}")
+                return []
+            finally:
+                timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+        if len(legs) > 1:
+            executor = _get_search_executor()
+            futures = {name: executor.submit(run_leg, name) for name in legs}
+            leg_results = {name: future.result() for name, future in futures.items()}
+        else:
+            leg_results = {name: run_leg(name) for name in legs}
+
+        vector_results = leg_results.get("vector", [])
+        keyword_results = leg_results.get("keyword", [])
+        add_candidates(vector_results, self.vector_weight)
+        add_candidates(keyword_results, self.keyword_weight)
 
         merged = list(candidates.values())
         if not merged:
@@ -412,6 +765,7 @@ class HybridRetriever:
             final_count=len(final_results),
             used_rerank=bool(self.reranker),
             metadata_filters=metadata_filters,
+            leg_ms=timings,
         )
 
         return final_results
@@ -424,6 +778,7 @@ class HybridRetriever:
         final_count: int,
         used_rerank: bool,
         metadata_filters: Optional[Dict[str, Any]],
+        leg_ms: Optional[Dict[str, float]] = None,
     ) -> None:
         try:
             log_entry = {
@@ -434,6 +789,7 @@ class HybridRetriever:
                 "final_results": final_count,
                 "used_rerank": used_rerank,
                 "filters": metadata_filters or {},
+                "leg_ms": leg_ms or {},
             }
             log_dir = self.config.metadata_path.parent
             log_dir.mkdir(parents=True, exist_ok=True)
@@ -1,6 +1,10 @@
 """
 Query performance monitoring.
 Tracks database query performance and identifies slow queries.
+
+Durations are summarized in per-minute quantile sketches, so statistics over
+any recent window merge a few fixed-size sketches instead of sorting the raw
+history.
 """
 
 import time
@@ -12,6 +16,8 @@ from contextlib import contextmanager
 import threading
 from collections import deque
 
+from src.utils.quantile_sketch import DDSketch
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,22 +41,55 @@ class QueryMetrics:
         self.error = error
 
 
+class _QueryStats:
+    """Additive query statistics for one period (a minute, or all time)."""
+
+    __slots__ = ("sketch", "failed", "slow", "by_type")
+
+    def __init__(self):
+        self.sketch = DDSketch()
+        self.failed = 0
+        self.slow = 0
+        self.by_type: Dict[str, int] = {}
+
+    def add(self, query_type: str, duration: float, success: bool, slow: bool):
+        self.sketch.add(duration)
+        self.failed += not success
+        self.slow += slow
+        self.by_type[query_type] = self.by_type.get(query_type, 0) + 1
+
+    def merge(self, other: "_QueryStats"):
+        self.sketch.merge(other.sketch)
+        self.failed += other.failed
+        self.slow += other.slow
+        for query_type, count in other.by_type.items():
+            self.by_type[query_type] = self.by_type.get(query_type, 0) + count
+
+
 class QueryMonitor:
     """
     Monitor database query performance.
     Tracks slow queries, query counts, and performance metrics.
     """
     
-    def __init__(self, slow_query_threshold: float = 1.0, max_history: int = 1000):
+    def __init__(
+        self,
+        slow_query_threshold: float = 1.0,
+        max_history: int = 1000,
+        stats_retention_minutes: int = 1440
+    ):
         """
         Initialize query monitor.
         
         Args:
             slow_query_threshold: Threshold in seconds for slow queries
             max_history: Maximum number of queries to keep in history
+            stats_retention_minutes: Minutes of per-minute statistics kept for
+                windowed ``get_stats`` calls
         """
         self.slow_query_threshold = slow_query_threshold
         self.max_history = max_history
+        self.stats_retention_minutes = stats_retention_minutes
         
         # Thread-safe query history
         self._lock = threading.Lock()
@@ -62,6 +101,17 @@ class QueryMonitor:
         self._total_duration = 0.0
         self._failed_queries = 0
         self._query_counts_by_type = {}
+        self._type_durations: Dict[str, float] = {}
+        self._type_failures: Dict[str, int] = {}
+        self._all_time = _QueryStats()
+        self._minutes = deque(maxlen=stats_retention_minutes)  # (minute, _QueryStats)
+    
+    def _minute_stats(self, timestamp: datetime) -> _QueryStats:
+        """Statistics bucket for the minute of ``timestamp`` (caller holds the lock)."""
+        minute = timestamp.replace(second=0, microsecond=0)
+        if not self._minutes or self._minutes[-1][0] != minute:
+            self._minutes.append((minute, _QueryStats()))
+        return self._minutes[-1][1]
     
     def record_query(
         self,
@@ -94,8 +144,12 @@ class QueryMonitor:
             # Add to history
             self._query_history.append(metrics)
             
+            slow = duration >= self.slow_query_threshold
+            self._all_time.add(query_type, duration, success, slow)
+            self._minute_stats(metrics.timestamp).add(query_type, duration, success, slow)
+            
             # Track slow queries
-            if duration >= self.slow_query_threshold:
+            if slow:
                 self._slow_queries.append(metrics)
                 logger.warning(
                     f"Slow query detected ({duration:.2f}s): {query_type} - {query[:100]}"
@@ -107,10 +161,12 @@ class QueryMonitor:
             
             if not success:
                 self._failed_queries += 1
+                self._type_failures[query_type] = self._type_failures.get(query_type, 0) + 1
             
             # Count by type
             self._query_counts_by_type[query_type] = \
                 self._query_counts_by_type.get(query_type, 0) + 1
+            self._type_durations[query_type] = self._type_durations.get(query_type, 0.0) + duration
     
     @contextmanager
     def track_query(self, query_type: str, query: str):
@@ -141,7 +197,8 @@ class QueryMonitor:
         Get query statistics.
         
         Args:
-            time_window: Optional time window to filter queries
+            time_window: Optional time window to filter queries (resolved to
+                whole minutes, up to ``stats_retention_minutes``)
             
         Returns:
             Dictionary with statistics
@@ -149,12 +206,18 @@ class QueryMonitor:
         with self._lock:
             # Filter by time window if specified
             if time_window:
-                cutoff = datetime.now() - time_window
-                queries = [q for q in self._query_history if q.timestamp >= cutoff]
+                cutoff = (datetime.now() - time_window).replace(second=0, microsecond=0)
+                stats = _QueryStats()
+                for minute, minute_stats in reversed(self._minutes):
+                    if minute < cutoff:
+                        break
+                    stats.merge(minute_stats)
             else:
-                queries = list(self._query_history)
+                stats = self._all_time
             
-            if not queries:
+            sketch = stats.sketch
+            total = sketch.count
+            if not total:
                 return {
                     'total_queries': 0,
                     'avg_duration': 0.0,
@@ -166,26 +229,17 @@ class QueryMonitor:
                     'queries_by_type': {}
                 }
             
-            durations = [q.duration for q in queries]
-            failed = sum(1 for q in queries if not q.success)
-            slow = sum(1 for q in queries if q.duration >= self.slow_query_threshold)
-            
-            # Count by type
-            by_type = {}
-            for q in queries:
-                by_type[q.query_type] = by_type.get(q.query_type, 0) + 1
-            
             return {
-                'total_queries': len(queries),
-                'avg_duration': sum(durations) / len(durations),
-                'min_duration': min(durations),
-                'max_duration': max(durations),
-                'p95_duration': self._percentile(durations, 95),
-                'p99_duration': self._percentile(durations, 99),
-                'slow_queries': slow,
-                'failed_queries': failed,
-                'success_rate': ((len(queries) - failed) / len(queries)) * 100,
-                'queries_by_type': by_type,
+                'total_queries': total,
+                'avg_duration': sketch.avg,
+                'min_duration': sketch.min,
+                'max_duration': sketch.max,
+                'p95_duration': sketch.quantile(0.95),
+                'p99_duration': sketch.quantile(0.99),
+                'slow_queries': stats.slow,
+                'failed_queries': stats.failed,
+                'success_rate': ((total - stats.failed) / total) * 100,
+                'queries_by_type': dict(stats.by_type),
                 'time_window': str(time_window) if time_window else 'all'
             }
     
@@ -215,24 +269,21 @@ class QueryMonitor:
             ]
     
     def get_query_breakdown(self) -> Dict[str, Dict[str, Any]]:
-        """Get breakdown of queries by type."""
+        """Get breakdown of queries by type (since start or the last clear)."""
         with self._lock:
             breakdown = {}
             
-            for query_type in self._query_counts_by_type:
-                type_queries = [q for q in self._query_history if q.query_type == query_type]
+            for query_type, count in self._query_counts_by_type.items():
+                total_duration = self._type_durations.get(query_type, 0.0)
+                failed = self._type_failures.get(query_type, 0)
                 
-                if type_queries:
-                    durations = [q.duration for q in type_queries]
-                    failed = sum(1 for q in type_queries if not q.success)
-                    
-                    breakdown[query_type] = {
-                        'count': len(type_queries),
-                        'avg_duration': sum(durations) / len(durations),
-                        'total_duration': sum(durations),
-                        'failed': failed,
-                        'success_rate': ((len(type_queries) - failed) / len(type_queries)) * 100
-                    }
+                breakdown[query_type] = {
+                    'count': count,
+                    'avg_duration': total_duration / count,
+                    'total_duration': total_duration,
+                    'failed': failed,
+                    'success_rate': ((count - failed) / count) * 100
+                }
             
             return breakdown
     
@@ -245,20 +296,44 @@ class QueryMonitor:
             self._total_duration = 0.0
             self._failed_queries = 0
             self._query_counts_by_type.clear()
+            self._type_durations.clear()
+            self._type_failures.clear()
+            self._all_time = _QueryStats()
+            self._minutes.clear()
+    
+    def export_stats(self) -> Dict[str, Any]:
+        """All-time duration sketch and counters, for merging across workers."""
+        with self._lock:
+            return {
+                'sketch': self._all_time.sketch.to_dict(),
+                'failed': self._all_time.failed,
+                'slow': self._all_time.slow,
+                'by_type': dict(self._all_time.by_type),
+            }
     
     @staticmethod
-    def _percentile(data: List[float], percentile: int) -> float:
-        """Calculate percentile."""
-        if not data:
-            return 0.0
+    def merge_stats(exported: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine ``export_stats()`` results from several workers into one summary."""
+        stats = _QueryStats()
+        for data in exported:
+            other = _QueryStats()
+            other.sketch = DDSketch.from_dict(data['sketch'])
+            other.failed = data['failed']
+            other.slow = data['slow']
+            other.by_type = dict(data['by_type'])
+            stats.merge(other)
         
-        sorted_data = sorted(data)
-        index = int((percentile / 100) * len(sorted_data))
-        
-        if index >= len(sorted_data):
-            index = len(sorted_data) - 1
-        
-        return sorted_data[index]
+        sketch = stats.sketch
+        return {
+            'total_queries': sketch.count,
+            'avg_duration': sketch.avg,
+            'p95_duration': sketch.quantile(0.95) or 0.0,
+            'p99_duration': sketch.quantile(0.99) or 0.0,
+            'slow_queries': stats.slow,
+            'failed_queries': stats.failed,
+            'queries_by_type': stats.by_type,
+        }
+
 
 
 # Global monitor instance
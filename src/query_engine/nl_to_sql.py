@@ -16,6 +16,8 @@ from .query_optimizer import QueryOptimizer
 from .multi_table_manager import MultiTableManager
 from .template_generator import TemplateGenerator
 from .safe_query import SafeQueryExecutor
+from .plan_cache import QuestionNormalizer, SQLPlanCache, schema_fingerprint
+from src.database.schema_registry import DatasetSchema
 
 # Configure logger to also write to file
 logger.add("query_debug.log", rotation="1 MB", level="INFO")
@@ -43,12 +45,14 @@ DEEPSEEK_AVAILABLE = True  # Uses OpenAI-compatible API
 class NaturalLanguageQueryEngine:
     """Engine to convert natural language questions to SQL queries and execute them."""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, plan_cache: Optional[SQLPlanCache] = None):
         """
         Initialize the query engine.
         
         Args:
             api_key: OpenAI API key for LLM
+            plan_cache: Question-to-SQL plan cache; when set, repeat question
+                shapes reuse validated SQL instead of calling an LLM
         """
         self.openai_client = OpenAI(api_key=api_key)
         
@@ -102,6 +106,10 @@ class NaturalLanguageQueryEngine:
         self.optimizer: Optional[QueryOptimizer] = None
         self.multi_table_manager: Optional[MultiTableManager] = None
         self.template_generator: Optional[TemplateGenerator] = None
+        self._schema_description: Optional[tuple] = None  # (schema_info, description)
+        self._dimension_values: Dict[str, List[Any]] = {}
+        self.plan_cache = plan_cache
+        self._normalizer: Optional[tuple] = None  # (schema_info, fingerprint, QuestionNormalizer)
         logger.info("Initialized NaturalLanguageQueryEngine")
     
     def load_data(self, df: pd.DataFrame, table_name: str = "campaigns"):
@@ -134,6 +142,8 @@ class NaturalLanguageQueryEngine:
         
         self.conn = duckdb.connect(':memory:')
         self.conn.register(table_name, df_copy)
+        self._schema_description = None
+        self._dimension_values = {}
         
         # Initialize optimizer, multi-table manager, and template generator
         self.optimizer = QueryOptimizer(self.conn)
@@ -165,28 +175,47 @@ class NaturalLanguageQueryEngine:
         
         logger.info(f"Loaded {len(df_copy)} rows into table '{table_name}'")
 
-    def load_parquet_data(self, parquet_path: str, table_name: str = "campaigns"):
+    def load_parquet_data(
+        self,
+        parquet_path: str,
+        table_name: str = "campaigns",
+        schema: Optional[DatasetSchema] = None
+    ):
         """
         Load data from Parquet file into DuckDB.
         
         Args:
-            parquet_path: Path to the Parquet file
+            parquet_path: Path to the Parquet file or a partitioned Parquet dataset directory
             table_name: Name for the table
+            schema: Registry schema of the dataset (skips DESCRIBE and adds the
+                canonical column map to the schema info)
         """
         # Validate and sanitize inputs
         table_name = SafeQueryExecutor.sanitize_identifier(table_name)
-        parquet_path = SafeQueryExecutor.validate_file_path(parquet_path, allowed_extensions=['.parquet'])
+        parquet_path = str(parquet_path)
+        if os.path.isdir(parquet_path):
+            parquet_path = SafeQueryExecutor.validate_file_path(parquet_path)
+            source = f"read_parquet('{parquet_path}/**/*.parquet', hive_partitioning = false, union_by_name = true)"
+        else:
+            parquet_path = SafeQueryExecutor.validate_file_path(parquet_path, allowed_extensions=['.parquet'])
+            source = f"read_parquet('{parquet_path}')"
 
         self.conn = duckdb.connect(':memory:')
+        self._schema_description = None
+        self._dimension_values = {}
         
         # Register the parquet file as a view using string injection (DuckDB does not support ? in CREATE VIEW/read_parquet)
         # Path is already validated by validate_file_path above
-        self.conn.execute(f"CREATE VIEW {table_name} AS SELECT * FROM read_parquet('{parquet_path}')")  # nosec B608
+        self.conn.execute(f"CREATE VIEW {table_name} AS SELECT * FROM {source}")  # nosec B608
         
         # Initialize optimizer, multi-table manager, and template generator
         self.optimizer = QueryOptimizer(self.conn)
         self.multi_table_manager = MultiTableManager(self.conn)
-        self.template_generator = TemplateGenerator(self.conn.execute(f"DESCRIBE {table_name}").df()["column_name"].tolist())
+        if schema is not None:
+            columns = schema.columns
+        else:
+            columns = self.conn.execute(f"DESCRIBE {table_name}").df()["column_name"].tolist()
+        self.template_generator = TemplateGenerator(columns)
         
         # Get schema info from a sample (table_name is sanitized, safe to use)
         sample_df = self.conn.execute(f"SELECT * FROM {table_name} LIMIT 5").df()  # nosec B608
@@ -198,6 +227,10 @@ class NaturalLanguageQueryEngine:
             "dtypes": sample_df.dtypes.to_dict(),
             "sample_data": sample_df.head(3).to_dict('records')
         }
+        if schema is not None:
+            self.schema_info["column_map"] = {k: v[0] for k, v in schema.column_map.items() if v}
+            self.schema_info["date_column"] = schema.date_column
+            self.schema_info["dataset_version"] = schema.version
         
         # Also register with multi-table manager for complex queries
         # IMPORTANT: Use skip_db_registration=True to avoid shadowing our full Parquet view with a 5-row sample
@@ -304,11 +337,17 @@ class NaturalLanguageQueryEngine:
 
 
     def _get_schema_description(self) -> str:
-        """Return a formatted schema description for prompt injection."""
+        """
+        Return a formatted schema description for prompt injection.
+        Built once per loaded dataset (it queries distinct values of categorical columns).
+        """
         if not self.schema_info:
             raise ValueError(
                 "Schema information not available. Call load_data() before asking questions."
             )
+        cached = getattr(self, '_schema_description', None)
+        if cached is not None and cached[0] is self.schema_info:
+            return cached[1]
 
         columns = self.schema_info.get("columns", [])
         dtypes = self.schema_info.get("dtypes", {})
@@ -322,6 +361,13 @@ class NaturalLanguageQueryEngine:
                 dtype = dtypes.get(col)
                 lines.append(f"- {col} ({dtype})")
         
+        # Canonical metric/dimension -> physical column, from the schema registry
+        column_map = self.schema_info.get("column_map")
+        if column_map:
+            lines.append("\nColumn mapping (use the physical column on the right):")
+            for key, col in column_map.items():
+                lines.append(f"  {key} -> {col}")
+        
         # Include unique values for key categorical columns (CRITICAL for filters)
         if self.conn:
             try:
@@ -347,6 +393,7 @@ class NaturalLanguageQueryEngine:
                             
                             unique_df = self.conn.execute(unique_query).fetchdf()
                             if not unique_df.empty:
+                                self._dimension_values[col] = unique_df.iloc[:, 0].dropna().tolist()
                                 unique_vals = unique_df.iloc[:, 0].dropna().tolist()[:10]
                                 if unique_vals:
                                     lines.append(f"  {col}: {unique_vals}")
@@ -360,7 +407,9 @@ class NaturalLanguageQueryEngine:
             for row in sample_rows:
                 lines.append(f"- {row}")
 
-        return "\n".join(lines)
+        description = "\n".join(lines)
+        self._schema_description = (self.schema_info, description)
+        return description
 
     def generate_sql(self, question: str) -> str:
         """
@@ -917,40 +966,48 @@ SQL Query:""" # nosec B608
         try:
             start_time = time.time()
 
-            # 1) Generate SQL with normal provider priority
-            sql_query = self.generate_sql(question)
+            # 1) Reuse validated SQL for this question shape when the plan cache has it
+            sql_query, results = self._execute_cached_plan(question)
+            context_package = {}
 
-            # 2) Execute query
-            results = self.execute_query(sql_query)
+            if sql_query is None:
+                # 2) Generate SQL with normal provider priority
+                sql_query = self.generate_sql(question)
 
-            context_package = self.sql_helper.get_last_context_package() or {}
+                # 3) Execute query
+                results = self.execute_query(sql_query)
 
-            # 3) If no rows returned, optionally try a semantic fallback with DeepSeek
-            if results.empty and any(m[0] == 'deepseek' for m in self.available_models):
-                logger.warning(
-                    "Primary model returned no rows. Attempting DeepSeek fallback for better SQL."
-                )
-                original_models = list(self.available_models)
-                try:
-                    # Prioritize DeepSeek for this retry only
-                    deepseek_first = [m for m in original_models if m[0] == 'deepseek']
-                    others = [m for m in original_models if m[0] != 'deepseek']
-                    if deepseek_first:
-                        self.available_models = deepseek_first + others
-                        fallback_sql = self.generate_sql(question)
-                        fallback_results = self.execute_query(fallback_sql)
-                        if not fallback_results.empty:
-                            logger.info("DeepSeek fallback produced non-empty results. Using fallback SQL.")
-                            sql_query = fallback_sql
-                            results = fallback_results
-                            context_package = self.sql_helper.get_last_context_package() or context_package
-                except Exception as fe:
-                    logger.warning(f"DeepSeek semantic fallback failed: {fe}")
-                finally:
-                    # Restore original provider order for future calls
-                    self.available_models = original_models
-
-            # 4) Generate answer
+                context_package = self.sql_helper.get_last_context_package() or {}
+
+                # 4) If no rows returned, optionally try a semantic fallback with DeepSeek
+                if results.empty and any(m[0] == 'deepseek' for m in self.available_models):
+                    logger.warning(
+                        "Primary model returned no rows. Attempting DeepSeek fallback for better SQL."
+                    )
+                    original_models = list(self.available_models)
+                    try:
+                        # Prioritize DeepSeek for this retry only
+                        deepseek_first = [m for m in original_models if m[0] == 'deepseek']
+                        others = [m for m in original_models if m[0] != 'deepseek']
+                        if deepseek_first:
+                            self.available_models = deepseek_first + others
+                            fallback_sql = self.generate_sql(question)
+                            fallback_results = self.execute_query(fallback_sql)
+                            if not fallback_results.empty:
+                                logger.info("DeepSeek fallback produced non-empty results. Using fallback SQL.")
+                                sql_query = fallback_sql
+                                results = fallback_results
+                                context_package = self.sql_helper.get_last_context_package() or context_package
+                    except Exception as fe:
+                        logger.warning(f"DeepSeek semantic fallback failed: {fe}")
+                    finally:
+                        # Restore original provider order for future calls
+                        self.available_models = original_models
+
+                if not results.empty:
+                    self._remember_plan(question, sql_query)
+
+            # 5) Generate answer
             answer = self._generate_answer(question, results)
 
             execution_time = time.time() - start_time
@@ -1018,6 +1075,56 @@ SQL Query:""" # nosec B608
                 "error": str(e)
             }
 
+    def _plan_context(self) -> Optional[tuple]:
+        """(schema fingerprint, QuestionNormalizer) of the loaded table, or None without a plan cache."""
+        if getattr(self, 'plan_cache', None) is None or not self.schema_info:
+            return None
+        cached = self._normalizer
+        if cached is None or cached[0] is not self.schema_info:
+            self._get_schema_description()  # collects dimension values for entity slots
+            columns = self.schema_info.get("columns", [])
+            fingerprint = schema_fingerprint(self.schema_info.get("table_name", "campaigns"), columns)
+            cached = (self.schema_info, fingerprint, QuestionNormalizer(columns, self._dimension_values))
+            self._normalizer = cached
+        return cached[1], cached[2]
+    
+    def _execute_cached_plan(self, question: str) -> tuple:
+        """
+        Execute the cached plan for the question's shape.
+        
+        Returns:
+            (sql, results), or (None, None) on a miss or when the cached SQL fails
+        """
+        context = self._plan_context()
+        if context is None:
+            return None, None
+        fingerprint, normalizer = context
+        shape = normalizer.normalize(question)
+        hit = self.plan_cache.lookup(fingerprint, shape)
+        if hit is None:
+            return None, None
+        sql_query, plan = hit
+        try:
+            results = self.execute_query(sql_query)
+        except Exception as e:
+            logger.warning(f"Cached SQL plan failed, regenerating: {e}")
+            self.plan_cache.invalidate(fingerprint, shape, plan)
+            return None, None
+        self._last_model_used = "PlanCache"
+        logger.info(f"Answered '{question}' from SQL plan cache (shape: {shape.shape})")
+        return sql_query, results
+    
+    def _remember_plan(self, question: str, sql_query: str) -> None:
+        """Store SQL that answered the question so its shape skips the LLM next time."""
+        context = self._plan_context()
+        if context is None:
+            return
+        fingerprint, normalizer = context
+        try:
+            self.plan_cache.store(fingerprint, normalizer.normalize(question), sql_query, example=question)
+        except Exception as e:
+            logger.warning(f"Could not cache SQL plan: {e}")
+    
     def _generate_answer(self, question: str, results: pd.DataFrame) -> str:
         """
         Generate strategic insights and recommendations from query results.
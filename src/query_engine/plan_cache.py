@@ -0,0 +1,342 @@
+"""
+Question-to-SQL Plan Cache
+
+Remembers SQL that the NL-to-SQL engine generated *and executed successfully*,
+keyed by the shape of the question, so repeat questions skip the LLM.
+
+A question is normalized into a shape:
+
+- lowercased, typos corrected, filler words ("show me", "what is", ...) dropped
+- metric/dimension synonyms resolved with ColumnResolver
+  ("cost", "spend", "budget" -> the same physical column)
+- literal values become slots: dimension values found in the data
+  ("Google Ads"), ISO dates and numbers
+
+When a plan is stored, every slot whose literal appears in the SQL is turned
+into a placeholder; slots that cannot be located stay fixed (the plan only
+serves questions with the same value). Plans whose SQL contains date literals
+not taken from the question (e.g. "last month" resolved to absolute dates)
+are never stored.
+
+Plans are stored in SQLite per schema fingerprint (table + columns), so a new
+upload with the same columns keeps its plans and a different schema starts
+fresh.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from src.utils.observability import metrics
+from .column_resolver import ColumnResolver
+
+PLAN_CACHE_PATH = os.getenv("NL_SQL_PLAN_CACHE_PATH", "data/sql_plans.db")
+PLAN_CACHE_TTL_DAYS = float(os.getenv("NL_SQL_PLAN_CACHE_TTL_DAYS", "30"))
+
+# Words that do not change what is being asked
+FILLER_WORDS = {
+    'please', 'show', 'me', 'give', 'tell', 'what', 'whats', 'is', 'are', 'was', 'were',
+    'the', 'a', 'an', 'can', 'could', 'you', 'i', 'would', 'like', 'see', 'list', 'display', 'get',
+}
+
+# SEMANTIC_MAPPING terms kept literally: names of dimension *values*, and time
+# units (several resolve to the same date column but mean different periods)
+VALUE_TERMS = {'mobile', 'desktop', 'tablet', 'tofu', 'mofu', 'bofu'}
+TEMPORAL_TERMS = {'date', 'week', 'week range', 'month', 'year', 'day', 'period', 'time'}
+
+# Slot markers (\x00<index>\x00) and synonym markers (\x01<index>\x01) are never matched again
+_DATE_RE = re.compile(r"(?<![\w\-\x00\x01])\d{4}-\d{2}-\d{2}(?![\w\-\x00\x01])")
+_NUMBER_RE = re.compile(r"(?<![\w.\-:'\x00\x01])\d+(?:\.\d+)?(?![\w.\-:\x00\x01])")
+_PUNCTUATION_RE = re.compile(r"[?!,;:\"()]")
+_SQL_DATE_LITERAL_RE = re.compile(r"'\d{4}-\d{2}-\d{2}[^']*'")
+
+
+@dataclass
+class Slot:
+    """A literal value taken out of a question."""
+    kind: str  # 'entity', 'date' or 'number'
+    value: str  # as it appears in SQL (entity: the data value, unquoted)
+    column: Optional[str] = None  # entity slots: the dimension column
+
+    @property
+    def token(self) -> str:
+        return f"<{self.kind}:{self.column}>" if self.column else f"<{self.kind}>"
+
+
+@dataclass
+class QuestionShape:
+    """Normalized question with its slots (``shape`` holds one token per slot)."""
+    shape: str
+    slots: List[Slot] = field(default_factory=list)
+
+
+@dataclass
+class SQLPlan:
+    """Stored SQL template for a question shape."""
+    template: str  # SQL with {{slot:i}} placeholders
+    fixed: Dict[int, str]  # slot index -> required value (slots not parameterized)
+    hits: int = 0
+
+    def matches(self, slots: Sequence[Slot]) -> bool:
+        return all(i < len(slots) and slots[i].value == v for i, v in self.fixed.items())
+
+    def render(self, slots: Sequence[Slot]) -> str:
+        def fill(match):
+            slot = slots[int(match.group(1))]
+            if slot.kind == 'number':
+                return slot.value
+            return "'" + slot.value.replace("'", "''") + "'"
+        return re.sub(r"\{\{slot:(\d+)\}\}", fill, self.template)
+
+
+def schema_fingerprint(table_name: str, columns: Sequence[str]) -> str:
+    """Identifies the table layout plans were generated for."""
+    payload = json.dumps([table_name, list(columns)])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class QuestionNormalizer:
+    """Turns questions into shapes for one schema."""
+
+    def __init__(self, columns: Sequence[str], dimension_values: Optional[Dict[str, Sequence[Any]]] = None):
+        """
+        Args:
+            columns: Physical columns of the table
+            dimension_values: Known values of categorical columns (entity slots)
+        """
+        self.resolver = ColumnResolver(list(columns))
+        self._synonyms = self._build_synonyms(list(columns))
+        self._entities = sorted(
+            (
+                (str(value).lower(), str(value), column)
+                for column, values in (dimension_values or {}).items()
+                for value in values
+                if isinstance(value, str) and value.strip() and not value.strip().isdigit()
+            ),
+            key=lambda item: -len(item[0])
+        )
+
+    def _build_synonyms(self, columns: List[str]) -> List[Tuple[re.Pattern, int]]:
+        """Synonym phrase patterns (longest first) -> index of the resolved column."""
+        synonyms = []
+        for term in sorted(ColumnResolver.SEMANTIC_MAPPING, key=len, reverse=True):
+            if term in VALUE_TERMS or term in TEMPORAL_TERMS:
+                continue
+            column = self.resolver._semantic_match(term, columns)
+            if column:
+                pattern = re.compile(r"(?<![\w\x00\x01])" + re.escape(term) + r"(?![\w\x00\x01])")
+                synonyms.append((pattern, columns.index(column)))
+        return synonyms
+
+    def normalize(self, question: str) -> QuestionShape:
+        text = question.lower().strip()
+        text = " ".join(ColumnResolver.TYPO_CORRECTIONS.get(w, w) for w in text.split())
+        text = _PUNCTUATION_RE.sub(" ", text).rstrip(". ")
+
+        # Slots are replaced by \x00<index>\x00 markers so later passes skip them
+        slots: List[Slot] = []
+
+        def mark(slot: Slot) -> str:
+            slots.append(slot)
+            return f" \x00{len(slots) - 1}\x00 "
+
+        for lowered, value, column in self._entities:
+            pattern = r"(?<![\w\x00])" + re.escape(lowered) + r"(?![\w\x00])"
+            text = re.sub(pattern, lambda m, v=value, c=column: mark(Slot('entity', v, c)), text)
+        text = _DATE_RE.sub(lambda m: mark(Slot('date', m.group(0))), text)
+        text = _NUMBER_RE.sub(lambda m: mark(Slot('number', m.group(0))), text)
+
+        for pattern, column_index in self._synonyms:
+            text = pattern.sub(f" \x01{column_index}\x01 ", text)
+
+        words = [w for w in text.split() if w not in FILLER_WORDS]
+        # Number slots by order of appearance
+        order = [int(w.strip("\x00")) for w in words if w.startswith("\x00")]
+        ordered = [slots[i] for i in order]
+        shape, k = [], 0
+        for w in words:
+            if w.startswith("\x00"):
+                shape.append(ordered[k].token)
+                k += 1
+            elif w.startswith("\x01"):
+                shape.append(f"[{self.resolver.schema_columns[int(w.strip(chr(1)))]}]")
+            else:
+                shape.append(w)
+        return QuestionShape(" ".join(shape), ordered)
+
+
+def parameterize(sql: str, slots: Sequence[Slot]) -> Optional[SQLPlan]:
+    """
+    Build a plan from SQL that answered a question with these slots.
+    Returns None when the SQL depends on date literals the question did not contain.
+    """
+    template = sql
+    fixed: Dict[int, str] = {}
+    for i, slot in enumerate(slots):
+        placeholder = "{{slot:%d}}" % i
+        if slot.kind == 'number':
+            pattern = r"(?<![\w.':{])" + re.escape(slot.value) + r"(?![\w.'}])"
+            if len(re.findall(pattern, template)) == 1:
+                template = re.sub(pattern, placeholder, template)
+                continue
+        else:
+            literal = "'" + slot.value.replace("'", "''") + "'"
+            if literal in template:
+                template = template.replace(literal, placeholder)
+                continue
+        fixed[i] = slot.value
+
+    if _SQL_DATE_LITERAL_RE.search(template):
+        return None
+    return SQLPlan(template, fixed)
+
+
+class SQLPlanCache:
+    """
+    Persistent question-shape -> SQL plan cache shared by all engines.
+
+    Thread-safe; plans live in SQLite and are mirrored in memory per schema
+    fingerprint on first use.
+    """
+
+    def __init__(self, path: str = PLAN_CACHE_PATH, ttl_days: float = PLAN_CACHE_TTL_DAYS):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self._lock = threading.Lock()
+        self._plans: Dict[str, Dict[str, List[SQLPlan]]] = {}  # fingerprint -> shape -> plans
+        self._stats = {'hits': 0, 'misses': 0, 'stored': 0, 'rejected': 0, 'invalidated': 0}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sql_plans (
+                schema_fingerprint TEXT NOT NULL,
+                shape TEXT NOT NULL,
+                fixed TEXT NOT NULL,
+                template TEXT NOT NULL,
+                example_question TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER DEFAULT 0,
+                PRIMARY KEY (schema_fingerprint, shape, fixed)
+            )
+        """)
+        self._conn.commit()
+
+    def _load(self, fingerprint: str) -> Dict[str, List[SQLPlan]]:
+        """Plans of one schema (caller holds the lock)."""
+        plans = self._plans.get(fingerprint)
+        if plans is None:
+            plans = {}
+            rows = self._conn.execute(
+                "SELECT shape, fixed, template, hits FROM sql_plans "
+                "WHERE schema_fingerprint = ? AND created_at > ?",
+                (fingerprint, time.time() - self.ttl_seconds)
+            ).fetchall()
+            for shape, fixed, template, hits in rows:
+                fixed_slots = {int(k): v for k, v in json.loads(fixed).items()}
+                plans.setdefault(shape, []).append(SQLPlan(template, fixed_slots, hits))
+            self._plans[fingerprint] = plans
+        return plans
+
+    def lookup(self, fingerprint: str, question: QuestionShape) -> Optional[Tuple[str, SQLPlan]]:
+        """(filled SQL, plan) for a question shape, or None."""
+        with self._lock:
+            plan = next(
+                (p for p in self._load(fingerprint).get(question.shape, []) if p.matches(question.slots)),
+                None
+            )
+            if plan is None:
+                self._stats['misses'] += 1
+                metrics.increment("nl_sql_plan_cache", labels={'result': 'miss'})
+                return None
+            plan.hits += 1
+            self._stats['hits'] += 1
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE sql_plans SET hits = hits + 1, last_used = ? "
+                        "WHERE schema_fingerprint = ? AND shape = ? AND fixed = ?",
+                        (time.time(), fingerprint, question.shape, json.dumps(plan.fixed, sort_keys=True))
+                    )
+            except sqlite3.Error as e:
+                logger.debug(f"Could not record plan hit: {e}")
+        metrics.increment("nl_sql_plan_cache", labels={'result': 'hit'})
+        return plan.render(question.slots), plan
+
+    def store(self, fingerprint: str, question: QuestionShape, sql: str, example: str = "") -> Optional[SQLPlan]:
+        """Remember validated SQL for a question shape. Returns the plan, or None if not cacheable."""
+        plan = parameterize(sql, question.slots)
+        if plan is None:
+            with self._lock:
+                self._stats['rejected'] += 1
+            logger.debug(f"Not caching SQL plan for '{question.shape}' (depends on unslotted dates)")
+            return None
+        fixed = json.dumps(plan.fixed, sort_keys=True)
+        now = time.time()
+        with self._lock:
+            plans = self._load(fingerprint).setdefault(question.shape, [])
+            plans[:] = [p for p in plans if p.fixed != plan.fixed] + [plan]
+            self._stats['stored'] += 1
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sql_plans VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                        (fingerprint, question.shape, fixed, plan.template, example, now, now)
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Could not persist SQL plan: {e}")
+        return plan
+
+    def invalidate(self, fingerprint: str, question: QuestionShape, plan: SQLPlan) -> None:
+        """Drop a plan whose SQL failed."""
+        with self._lock:
+            plans = self._load(fingerprint).get(question.shape, [])
+            if plan in plans:
+                plans.remove(plan)
+            self._stats['invalidated'] += 1
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "DELETE FROM sql_plans WHERE schema_fingerprint = ? AND shape = ? AND fixed = ?",
+                        (fingerprint, question.shape, json.dumps(plan.fixed, sort_keys=True))
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Could not delete SQL plan: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            with self._conn:
+                self._conn.execute("DELETE FROM sql_plans")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and hit rate (percent) since startup."""
+        with self._lock:
+            total = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': round(100 * self._stats['hits'] / total, 2) if total else 0.0,
+                'plans': sum(len(p) for shapes in self._plans.values() for p in shapes.values())
+            }
+
+
+_plan_cache: Optional[SQLPlanCache] = None
+_plan_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> SQLPlanCache:
+    """Process-wide plan cache."""
+    global _plan_cache
+    with _plan_cache_lock:
+        if _plan_cache is None:
+            _plan_cache = SQLPlanCache()
+        return _plan_cache
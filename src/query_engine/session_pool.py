@@ -0,0 +1,194 @@
+"""
+Warm NL-to-SQL session pool.
+
+Loading a NaturalLanguageQueryEngine over the campaign dataset (DuckDB view,
+sample rows, optimizer/template setup, schema description for the prompt)
+costs far more than answering a question with it. The pool keeps loaded
+engines per dataset version and hands each one to a single request at a
+time; when the dataset version changes, idle engines are retired and new
+ones are loaded on demand.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from src.utils.observability import metrics
+
+NL_SQL_POOL_SIZE = int(os.getenv("NL_SQL_POOL_SIZE", "4"))
+NL_SQL_POOL_WAIT_SECONDS = float(os.getenv("NL_SQL_POOL_WAIT_SECONDS", "30"))
+NL_SQL_PLAN_CACHE_ENABLED = os.getenv("NL_SQL_PLAN_CACHE", "true").lower() == "true"
+
+
+def _default_engine_factory():
+    # Resolved at call time so the engine class can be swapped (e.g. patched in tests)
+    from src.query_engine import nl_to_sql
+    from src.query_engine.plan_cache import get_plan_cache
+    return nl_to_sql.NaturalLanguageQueryEngine(
+        api_key=os.getenv("OPENAI_API_KEY", "dummy"),
+        plan_cache=get_plan_cache() if NL_SQL_PLAN_CACHE_ENABLED else None
+    )
+
+
+class NLQuerySessionPool:
+    """
+    Pool of NaturalLanguageQueryEngine sessions loaded with the campaign dataset.
+
+    Each engine owns its own in-memory DuckDB connection and is used by one
+    request at a time, so concurrent questions never share engine state.
+
+    Usage:
+        with pool.session(duckdb_mgr) as engine:
+            result = engine.ask(question)
+    """
+
+    def __init__(
+        self,
+        engine_factory: Optional[Callable[[], Any]] = None,
+        size: int = NL_SQL_POOL_SIZE,
+        table_name: str = "all_campaigns",
+        wait_seconds: float = NL_SQL_POOL_WAIT_SECONDS
+    ):
+        """
+        Args:
+            engine_factory: Creates an unloaded engine (default: NaturalLanguageQueryEngine)
+            size: Maximum engines per dataset version (concurrent questions)
+            table_name: Name of the dataset view inside each engine
+            wait_seconds: How long a request waits for a busy pool before failing
+        """
+        self.engine_factory = engine_factory or _default_engine_factory
+        self.size = max(1, size)
+        self.table_name = table_name
+        self.wait_seconds = wait_seconds
+
+        self._cond = threading.Condition()
+        self._version: Optional[str] = None
+        self._idle: List[Any] = []
+        self._open = 0  # engines of the current version, idle or in use
+        self._stats = {'reused': 0, 'created': 0, 'retired': 0, 'waits': 0}
+
+    def _load_engine(self, duckdb_mgr) -> Any:
+        """Create an engine and load the dataset into it, including the prompt schema description."""
+        start = time.perf_counter()
+        engine = self.engine_factory()
+        engine.load_parquet_data(
+            str(duckdb_mgr.dataset_dir), table_name=self.table_name, schema=duckdb_mgr.get_schema()
+        )
+        describe = getattr(engine, '_get_schema_description', None)
+        if callable(describe):
+            try:
+                describe()
+            except Exception as e:
+                logger.debug(f"Could not prepare schema description: {e}")
+        elapsed = time.perf_counter() - start
+        metrics.observe("nl_sql_session_load_seconds", elapsed)
+        logger.info(f"Loaded NL-to-SQL session in {elapsed:.2f}s")
+        return engine
+
+    @staticmethod
+    def _close(engine: Any) -> None:
+        try:
+            engine.close()
+        except Exception as e:
+            logger.debug(f"Error closing NL-to-SQL session: {e}")
+
+    def _switch_version(self, version: Optional[str]) -> None:
+        """Retire idle engines of an older dataset version (caller holds the lock)."""
+        if version == self._version:
+            return
+        retired, self._idle = self._idle, []
+        self._stats['retired'] += len(retired)
+        for engine in retired:
+            self._close(engine)
+        if self._version is not None:
+            logger.info(f"Dataset version changed ({self._version} -> {version}); reloading NL-to-SQL sessions")
+        self._version = version
+        self._open = 0
+        self._cond.notify_all()
+
+    def _acquire(self, version: Optional[str]) -> Optional[Any]:
+        """Idle engine for version, or None when the caller should load a new one."""
+        deadline = time.monotonic() + self.wait_seconds
+        with self._cond:
+            self._switch_version(version)
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("All NL-to-SQL sessions are busy")
+                self._stats['waits'] += 1
+                self._cond.wait(remaining)
+                self._switch_version(version)
+            if self._idle:
+                self._stats['reused'] += 1
+                return self._idle.pop()
+            self._open += 1
+            self._stats['created'] += 1
+            return None
+
+    def _release(self, engine: Optional[Any], version: Optional[str], healthy: bool) -> None:
+        with self._cond:
+            current = version == self._version
+            if current and engine is not None and healthy:
+                self._idle.append(engine)
+                engine = None
+            elif current:
+                self._open -= 1
+            self._cond.notify()
+        if engine is not None:
+            self._close(engine)
+
+    @contextmanager
+    def session(self, duckdb_mgr) -> Iterator[Any]:
+        """
+        Borrow an engine loaded with the current dataset version.
+
+        Raises:
+            TimeoutError: when every session stays busy for ``wait_seconds``
+        """
+        version = duckdb_mgr.dataset_version
+        engine = self._acquire(version)
+        reused = engine is not None
+        metrics.increment("nl_sql_sessions", labels={'reused': str(reused).lower()})
+        healthy = False
+        try:
+            if engine is None:
+                engine = self._load_engine(duckdb_mgr)
+            yield engine
+            healthy = True
+        finally:
+            self._release(engine, version, healthy)
+
+    def warm(self, duckdb_mgr, background: bool = True) -> None:
+        """Load one session for the current dataset version ahead of the first question."""
+        def _warm():
+            try:
+                with self.session(duckdb_mgr):
+                    pass
+            except Exception as e:
+                logger.warning(f"Could not warm NL-to-SQL session: {e}")
+
+        if not duckdb_mgr.has_data():
+            return
+        if background:
+            threading.Thread(target=_warm, name="nl-sql-warmup", daemon=True).start()
+        else:
+            _warm()
+
+    def clear(self) -> None:
+        """Close all idle sessions; engines in use are closed when released."""
+        with self._cond:
+            self._switch_version(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self._stats,
+                'dataset_version': self._version,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'size': self.size
+            }
@@ -1,20 +1,33 @@
 """
 Structured Query Logger
 Comprehensive query logging with analytics and debugging
+
+Completed and failed queries are appended to the shared event store
+(``src.database.event_store``, stream ``query_log``); analytics read its
+minute rollups and latency sketch instead of re-reading the day's logs.
+Daily JSONL files written by earlier versions are imported with
+``migrate_jsonl()`` (``scripts/migrate_event_logs.py``).
 """
-import os
 import json
+import os
+import shutil
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, field, asdict
-from pathlib import Path
 from enum import Enum
 import hashlib
 import logging
 
+from src.database.event_store import DIMENSION_KEY, DIMENSION_USER, EventStore, get_event_store
+
 logger = logging.getLogger(__name__)
 
+# Daily JSONL query logs of earlier versions
+LEGACY_LOG_DIR = Path(os.getenv("QUERY_LOG_DIR", "./logs/queries"))
+LEGACY_PATTERN = "queries_*.jsonl"
+
 
 class QueryStatus(str, Enum):
     PENDING = "pending"
@@ -75,12 +88,20 @@ class StructuredQueryLogger:
         query_logger.complete_query(log_id, rows=100, execution_time=150)
     """
     
-    LOG_DIR = Path(os.getenv("QUERY_LOG_DIR", "./logs/queries"))
+    STREAM = "query_log"
     
-    def __init__(self):
-        self.LOG_DIR.mkdir(parents=True, exist_ok=True)
+    def __init__(self, event_store: Optional[EventStore] = None, legacy_dir: Optional[str] = None):
+        self.event_store = event_store or get_event_store()
+        self.legacy_dir = Path(legacy_dir) if legacy_dir else LEGACY_LOG_DIR
         self._active_queries: Dict[str, QueryLog] = {}
         self._query_count = 0
+        
+        legacy_files = list(self.legacy_dir.glob(LEGACY_PATTERN))
+        if legacy_files:
+            logger.warning(
+                f"{len(legacy_files)} legacy JSONL query log file(s) in {self.legacy_dir} are not queried; "
+                f"run scripts/migrate_event_logs.py to import them"
+            )
     
     def _generate_id(self) -> str:
         self._query_count += 1
@@ -199,16 +220,77 @@ class StructuredQueryLogger:
     # =========================================================================
     
     def _save_log(self, log: QueryLog):
-        """Save log to file"""
-        date_str = log.timestamp.strftime("%Y-%m-%d")
-        log_file = self.LOG_DIR / f"queries_{date_str}.jsonl"
-        
+        """Append the finished query to the event store"""
         log_dict = asdict(log)
         log_dict["timestamp"] = log.timestamp.isoformat()
         log_dict["status"] = log.status.value
+        self.event_store.append(self.STREAM, **self._to_event(log_dict))
+    
+    def _to_event(self, log_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Event store fields of a serialized query log"""
+        query = log_dict["natural_language_query"]
+        return {
+            "timestamp": datetime.fromisoformat(log_dict["timestamp"]),
+            "event_id": log_dict["id"],
+            "user_id": log_dict.get("user_id"),
+            "session_id": log_dict.get("session_id"),
+            "status": QueryStatus(log_dict["status"]).value,
+            "key": self._query_hash(query),
+            "label": query,
+            "value": float(log_dict.get("execution_time_ms") or 0),
+            "amount": float(log_dict.get("llm_tokens_used") or 0),
+            "payload": log_dict
+        }
+    
+    def migrate_jsonl(self, archive: bool = True) -> Dict[str, int]:
+        """
+        Import legacy ``queries_*.jsonl`` files into the event store.
+        
+        Logs already in the store are skipped, so re-running after an
+        interruption does not duplicate them.
+        
+        Args:
+            archive: Move imported files to ``archive/`` (else keep them)
+            
+        Returns:
+            Stats with files and events imported and lines skipped
+        """
+        stats = {"files": 0, "events": 0, "skipped_lines": 0}
+        archive_dir = self.legacy_dir / "archive"
+        
+        for log_file in sorted(self.legacy_dir.glob(LEGACY_PATTERN)):
+            events = []
+            with open(log_file) as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        events.append(self._to_event(json.loads(line)))
+                    except (ValueError, KeyError, TypeError) as e:
+                        stats["skipped_lines"] += 1
+                        logger.warning(f"Skipping {log_file.name}:{line_number}: {e}")
+            
+            added = self.event_store.import_events(self.STREAM, events)
+            if archive:
+                archive_dir.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(log_file), str(archive_dir / log_file.name))
+            
+            stats["files"] += 1
+            stats["events"] += added
+            logger.info(f"Imported {added} query logs from {log_file.name}")
         
-        with open(log_file, "a") as f:
-            f.write(json.dumps(log_dict) + "\n")
+        return stats
+    
+    @staticmethod
+    def _query_hash(natural_language_query: str) -> str:
+        return hashlib.sha256(natural_language_query.lower().encode()).hexdigest()[:8]
+    
+    @staticmethod
+    def _day_range(date: str = None):
+        """[start, end) datetimes and date of a YYYY-MM-DD day (default today, UTC)"""
+        date = date or datetime.utcnow().strftime("%Y-%m-%d")
+        start = datetime.strptime(date, "%Y-%m-%d")
+        return start, start + timedelta(days=1), date
     
     def get_logs(
         self,
@@ -218,97 +300,75 @@ class StructuredQueryLogger:
         limit: int = 100
     ) -> List[Dict]:
         """Retrieve query logs"""
-        date = date or datetime.utcnow().strftime("%Y-%m-%d")
-        log_file = self.LOG_DIR / f"queries_{date}.jsonl"
-        
-        if not log_file.exists():
-            return []
-        
-        logs = []
-        with open(log_file) as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                log = json.loads(line)
-                
-                if status and log.get("status") != status.value:
-                    continue
-                if user_id and log.get("user_id") != user_id:
-                    continue
-                
-                logs.append(log)
-                
-                if len(logs) >= limit:
-                    break
-        
-        return logs
+        start, end, _ = self._day_range(date)
+        return self.event_store.events(
+            self.STREAM,
+            start=start,
+            end=end,
+            status=status.value if status else None,
+            user_id=user_id,
+            limit=limit
+        )
     
     # =========================================================================
     # Analytics
     # =========================================================================
     
     def get_analytics(self, date: str = None) -> Dict:
-        """Get query analytics for a day"""
-        logs = self.get_logs(date, limit=10000)
+        """Get query analytics for a day (from rollups)"""
+        start, end, day = self._day_range(date)
+        counts = self.event_store.counts(self.STREAM, start, end)
         
-        if not logs:
+        if counts.empty:
             return {"date": date, "total_queries": 0}
         
-        total = len(logs)
-        successful = sum(1 for l in logs if l["status"] == "success")
-        cached = sum(1 for l in logs if l["status"] == "cached")
-        failed = sum(1 for l in logs if l["status"] == "failed")
+        by_status = counts.set_index("status")["events"]
+        total = int(by_status.sum())
+        successful = int(by_status.get(QueryStatus.SUCCESS.value, 0))
+        cached = int(by_status.get(QueryStatus.CACHED.value, 0))
+        failed = int(by_status.get(QueryStatus.FAILED.value, 0))
         
-        exec_times = [l["execution_time_ms"] for l in logs if l["execution_time_ms"] > 0]
-        llm_tokens = sum(l["llm_tokens_used"] for l in logs)
+        timed = counts["value_events"].sum()
+        p95 = self.event_store.quantiles(self.STREAM, [0.95], start, end)[0.95]
+        users = self.event_store.key_counts(self.STREAM, DIMENSION_USER, start.date(), end.date())
         
         return {
-            "date": date or datetime.utcnow().strftime("%Y-%m-%d"),
+            "date": day,
             "total_queries": total,
             "successful": successful,
             "cached": cached,
             "failed": failed,
             "cache_hit_rate": cached / total if total > 0 else 0,
             "success_rate": successful / total if total > 0 else 0,
-            "avg_execution_time_ms": sum(exec_times) / len(exec_times) if exec_times else 0,
-            "p95_execution_time_ms": sorted(exec_times)[int(len(exec_times) * 0.95)] if exec_times else 0,
-            "total_llm_tokens": llm_tokens,
-            "unique_users": len(set(l["user_id"] for l in logs if l["user_id"]))
+            "avg_execution_time_ms": float(counts["value_sum"].sum() / timed) if timed else 0,
+            "p95_execution_time_ms": p95,
+            "total_llm_tokens": int(counts["amount_sum"].sum()),
+            "unique_users": len(users)
         }
     
     def get_slow_queries(self, date: str = None, threshold_ms: float = 5000) -> List[Dict]:
         """Get slow queries"""
-        logs = self.get_logs(date, limit=10000)
-        return [l for l in logs if l["execution_time_ms"] > threshold_ms]
+        start, end, _ = self._day_range(date)
+        return self.event_store.events(self.STREAM, start=start, end=end, min_value=threshold_ms)
     
     def get_failed_queries(self, date: str = None) -> List[Dict]:
         """Get failed queries"""
         return self.get_logs(date, status=QueryStatus.FAILED)
     
     def get_common_queries(self, date: str = None, limit: int = 10) -> List[Dict]:
-        """Get most common query patterns"""
-        logs = self.get_logs(date, limit=10000)
-        
-        # Group by query hash
-        query_counts = {}
-        for log in logs:
-            query_hash = hashlib.sha256(log["natural_language_query"].lower().encode()).hexdigest()[:8]
-            if query_hash not in query_counts:
-                query_counts[query_hash] = {
-                    "query": log["natural_language_query"],
-                    "count": 0,
-                    "avg_time_ms": 0,
-                    "total_time_ms": 0
-                }
-            query_counts[query_hash]["count"] += 1
-            query_counts[query_hash]["total_time_ms"] += log["execution_time_ms"]
-        
-        # Calculate averages and sort
-        for q in query_counts.values():
-            q["avg_time_ms"] = q["total_time_ms"] / q["count"]
+        """Get most common query patterns (grouped by normalized query hash)"""
+        start, end, _ = self._day_range(date)
+        patterns = self.event_store.key_counts(self.STREAM, DIMENSION_KEY, start.date(), end.date())
         
-        sorted_queries = sorted(query_counts.values(), key=lambda x: x["count"], reverse=True)
-        return sorted_queries[:limit]
+        return [
+            {
+                "query": row.label,
+                "count": int(row.events),
+                "avg_time_ms": row.value_sum / row.events,
+                "total_time_ms": row.value_sum
+            }
+            for row in patterns.head(limit).itertuples()
+        ]
 
 
 # Global instance
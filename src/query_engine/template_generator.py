@@ -5,9 +5,10 @@ Generates SQL templates dynamically based on actual data schema.
 Uses ColumnResolver to map semantic terms to actual column names.
 """
 
+import os
 from typing import Dict, List, Optional
 from loguru import logger
-import pandas as pd
+import duckdb
 
 from .column_resolver import ColumnResolver
 from .query_templates import QueryTemplate
@@ -333,10 +334,14 @@ FROM all_campaigns
 
 
 def load_schema_from_parquet(parquet_path: str) -> List[str]:
-    """Load column names from Parquet file."""
+    """Load column names from a Parquet file or partitioned dataset directory."""
     try:
-        df = pd.read_parquet(parquet_path)
-        return list(df.columns)
+        if os.path.isdir(parquet_path):
+            source = f"read_parquet('{parquet_path}/**/*.parquet', hive_partitioning = false, union_by_name = true)"
+        else:
+            source = f"read_parquet('{parquet_path}')"
+        with duckdb.connect(':memory:') as conn:
+            return conn.execute(f"DESCRIBE SELECT * FROM {source}").df()["column_name"].tolist()  # nosec B608
     except Exception as e:
         logger.error(f"Failed to load schema from {parquet_path}: {e}")
         return []
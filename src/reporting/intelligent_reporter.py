@@ -50,6 +50,7 @@ auto_map_columns = _normalizer.auto_map_columns
 detect_column_type = _normalizer.detect_column_type
 normalize_dataframe = _normalizer.normalize_dataframe
 validate_data_quality = _normalizer.validate_data_quality
+get_column_types = _normalizer.get_column_types
 clean_numeric_value = _normalizer.clean_numeric_value
 parse_date = _normalizer.parse_date
 COLUMN_ALIASES = _normalizer.COLUMN_ALIASES
@@ -234,6 +235,8 @@ class IntelligentDataReader:
         self.data: Optional[pd.DataFrame] = None
         self.metadata: Dict[str, Any] = {}
         self.quality_report: Optional[Dict] = None
+        # Column profiles of the loaded data, computed once and shared by the checks
+        self.column_types: Dict[Any, Any] = {}
     
     def read(self, source: Union[str, Path, DataSourceConfig, pd.DataFrame]) -> pd.DataFrame:
         """
@@ -271,8 +274,9 @@ class IntelligentDataReader:
         # Extract metadata
         self._extract_metadata()
         
-        # Validate quality
-        self.quality_report = validate_data_quality(self.data)
+        # Profile columns once, then validate quality from those profiles
+        self.column_types = get_column_types(self.data)
+        self.quality_report = validate_data_quality(self.data, self.column_types)
         
         logger.info(f"Loaded {len(self.data)} rows, {len(self.data.columns)} columns")
         
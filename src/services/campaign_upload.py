@@ -0,0 +1,315 @@
+"""
+Streaming ingestion of uploaded campaign files.
+
+Uploads are spooled to disk, then parsed in chunks straight into the
+partitioned Parquet dataset: CSV files through DuckDB's ``read_csv`` (types
+sniffed over the whole file, rows streamed as Arrow record batches), Excel
+files through pandas. The upload summary, column schema and preview are
+accumulated chunk by chunk, so peak memory is bounded by the chunk size
+rather than the file size.
+
+Each upload is tracked as a job so large files can be ingested in the
+background and polled for progress.
+"""
+
+import os
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+from loguru import logger
+
+from src.database.duckdb_manager import DuckDBManager, get_duckdb_manager
+from src.database.schema_registry import resolve_column
+from src.utils.observability import metrics
+
+UPLOAD_CHUNK_ROWS = int(os.getenv('UPLOAD_CHUNK_ROWS', '100000'))
+UPLOAD_SPOOL_DIR = Path(os.getenv('UPLOAD_DIR', 'data/uploads'))
+# Finished jobs (and their results) are forgotten this long after their last update
+UPLOAD_JOB_RETENTION_HOURS = float(os.getenv('UPLOAD_JOB_RETENTION_HOURS', '24'))
+
+# Pandas-compatible CSV typing: numbers and booleans are detected, dates stay text
+CSV_TYPE_CANDIDATES = ['BOOLEAN', 'BIGINT', 'DOUBLE', 'VARCHAR']
+
+SUMMARY_METRICS = {
+    'total_spend': 'spend',
+    'total_clicks': 'clicks',
+    'total_impressions': 'impressions',
+    'total_conversions': 'conversions',
+}
+
+
+class UploadSummary:
+    """Summary stats, column schema and preview accumulated over upload chunks."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: List[str] = []
+        self.dtypes: Dict[str, str] = {}
+        self.null_counts: Dict[str, int] = {}
+        self.totals = {key: 0.0 for key in SUMMARY_METRICS}
+        self.preview: List[Dict[str, Any]] = []
+        self._metric_columns: Dict[str, Optional[str]] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if not self.columns:
+            self.columns = list(chunk.columns)
+            self.dtypes = {col: str(chunk[col].dtype) for col in chunk.columns}
+            self.preview = chunk.head(5).fillna('').to_dict(orient='records')
+            self._metric_columns = {
+                key: resolve_column(chunk.columns, metric) for key, metric in SUMMARY_METRICS.items()
+            }
+
+        self.rows += len(chunk)
+        for col, nulls in chunk.isnull().sum().items():
+            self.null_counts[col] = self.null_counts.get(col, 0) + int(nulls)
+        for key, col in self._metric_columns.items():
+            if col:
+                self.totals[key] += float(pd.to_numeric(chunk[col], errors='coerce').sum())
+
+    def to_dict(self) -> Dict[str, Any]:
+        summary = {
+            'total_spend': float(self.totals['total_spend']),
+            'total_clicks': int(self.totals['total_clicks']),
+            'total_impressions': int(self.totals['total_impressions']),
+            'total_conversions': int(self.totals['total_conversions']),
+            'avg_ctr': 0,
+        }
+        if summary['total_impressions'] > 0:
+            summary['avg_ctr'] = (summary['total_clicks'] / summary['total_impressions']) * 100
+        return summary
+
+    def schema(self) -> List[Dict[str, Any]]:
+        return [
+            {'column': col, 'dtype': self.dtypes.get(col, 'object'), 'null_count': self.null_counts.get(col, 0)}
+            for col in self.columns
+        ]
+
+
+class CampaignUploadIngestor:
+    """Spools uploads to disk and ingests them in chunks, tracking each upload as a job."""
+
+    def __init__(
+        self,
+        duckdb_mgr: Optional[DuckDBManager] = None,
+        chunk_rows: int = UPLOAD_CHUNK_ROWS,
+        spool_dir: Path = UPLOAD_SPOOL_DIR
+    ):
+        self._duckdb_mgr = duckdb_mgr
+        self.chunk_rows = chunk_rows
+        self.spool_dir = Path(spool_dir)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def duckdb_mgr(self) -> DuckDBManager:
+        return self._duckdb_mgr or get_duckdb_manager()
+
+    # ============ JOB MANAGEMENT (Progress Tracking) ============
+
+    def create_job(self, filename: str, size_bytes: int) -> str:
+        self.cleanup_old_jobs()
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'filename': filename,
+                'size_bytes': size_bytes,
+                'status': 'pending',
+                'progress': 0,
+                'rows_processed': 0,
+                'message': 'Queued for ingestion',
+                'created_at': datetime.now().isoformat(),
+                'updated_at': datetime.now().isoformat(),
+            }
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update_job(self, job_id: str, **fields) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields, updated_at=datetime.now().isoformat())
+
+    def cleanup_old_jobs(self, max_age_hours: float = UPLOAD_JOB_RETENTION_HOURS) -> int:
+        """Forget finished jobs older than max_age_hours. Returns number removed."""
+        cutoff = datetime.now().timestamp() - max_age_hours * 3600
+        with self._lock:
+            stale = [
+                job_id for job_id, job in self._jobs.items()
+                if job['status'] in ('completed', 'failed')
+                and datetime.fromisoformat(job['updated_at']).timestamp() < cutoff
+            ]
+            for job_id in stale:
+                del self._jobs[job_id]
+        return len(stale)
+
+    # ============ SPOOLING ============
+
+    def spool_path(self, filename: str) -> Path:
+        """Unique on-disk path for an incoming upload (keeps the extension)."""
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        suffix = Path(filename or '').suffix.lower()
+        return self.spool_dir / f"upload-{uuid.uuid4().hex}{suffix}"
+
+    # ============ INGESTION ============
+
+    @staticmethod
+    def _count_lines(path: Path) -> int:
+        """Approximate data rows of a CSV (newlines minus header), for progress reporting."""
+        lines = 0
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                lines += block.count(b'\n')
+        return max(lines - 1, 1)
+
+    @staticmethod
+    def _csv_reader(conn, path: Path, chunk_rows: int) -> pa.RecordBatchReader:
+        """Open a CSV as a record batch stream; types are sniffed over the whole file."""
+        source = str(path).replace("'", "''")
+        candidates = ", ".join(f"'{t}'" for t in CSV_TYPE_CANDIDATES)
+        result = conn.execute(
+            f"SELECT * FROM read_csv('{source}', auto_detect = true, header = true, "
+            f"sample_size = -1, auto_type_candidates = [{candidates}])"  # nosec B608
+        )
+        # to_arrow_reader() replaces fetch_record_batch() in newer DuckDB releases
+        if hasattr(result, 'to_arrow_reader'):
+            return result.to_arrow_reader(chunk_rows)
+        return result.fetch_record_batch(chunk_rows)
+
+    def _track(
+        self,
+        job_id: str,
+        batches: Iterable[pd.DataFrame],
+        summary: UploadSummary,
+        total_rows: Optional[int]
+    ) -> Iterator[pd.DataFrame]:
+        """Pass chunks through, updating the summary and job progress."""
+        for chunk in batches:
+            summary.update(chunk)
+            progress = min(95, int(summary.rows / total_rows * 95)) if total_rows else 50
+            self._update_job(
+                job_id,
+                progress=progress,
+                rows_processed=summary.rows,
+                message=f"Ingested {summary.rows:,} rows"
+            )
+            yield chunk
+        if not summary.rows:
+            # Raised inside the writer's loop, so the existing dataset is left untouched
+            raise pd.errors.EmptyDataError("The uploaded file has no data rows")
+
+    def ingest(
+        self,
+        job_id: str,
+        path: Path,
+        sheet_name: Optional[str] = None,
+        append: bool = False,
+        on_complete: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Ingest a spooled upload into the campaign dataset.
+
+        Runs synchronously (call it from a worker thread); the spooled file is
+        removed afterwards. Errors mark the job failed and are re-raised.
+
+        Returns:
+            Upload result (imported_count, summary, schema, columns, preview)
+        """
+        path = Path(path)
+        t_start = time.time()
+        self._update_job(job_id, status='processing', message='Parsing upload')
+        summary = UploadSummary()
+
+        try:
+            if path.stat().st_size == 0:
+                raise pd.errors.EmptyDataError("The uploaded file is empty")
+
+            mgr = self.duckdb_mgr
+            with ExitStack() as stack:
+                if path.suffix == '.csv':
+                    # A dedicated cursor outside the cursor pool: the writer below takes
+                    # pool slots of its own while this reader is still being consumed
+                    conn = mgr.get_connection()
+                    stack.callback(conn.close)
+                    reader = self._csv_reader(conn, path, self.chunk_rows)
+                    # The reader's schema covers the whole file, so every chunk is written with the same types
+                    schema = reader.schema
+                    batches = (batch.to_pandas() for batch in reader)
+                    total_rows = self._count_lines(path)
+                else:
+                    # Excel cannot be streamed; parse it off the request path from disk
+                    logger.info(f"Reading Excel file with sheet: {sheet_name or 'first'}")
+                    df = pd.read_excel(path, sheet_name=sheet_name or 0)
+                    schema = None
+                    batches = iter([df])
+                    total_rows = len(df)
+
+                tracked = self._track(job_id, batches, summary, total_rows)
+                if append:
+                    mgr.append_campaign_batches(tracked, schema)
+                else:
+                    mgr.save_campaign_batches(tracked, schema)
+
+            if on_complete:
+                on_complete()
+
+            elapsed = time.time() - t_start
+            metrics.observe('upload_ingest_seconds', elapsed)
+            metrics.increment('upload_rows_ingested', summary.rows)
+            logger.info(f"Successfully imported {summary.rows} rows to Parquet in {elapsed:.2f}s")
+
+            result = {
+                'success': True,
+                'job_id': job_id,
+                'imported_count': summary.rows,
+                'message': f'Successfully imported {summary.rows} campaigns',
+                'summary': summary.to_dict(),
+                'schema': summary.schema(),
+                'columns': summary.columns,
+                'preview': summary.preview
+            }
+            self._update_job(
+                job_id,
+                status='completed',
+                progress=100,
+                rows_processed=summary.rows,
+                message=result['message'],
+                result=result
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"Upload ingestion failed (job {job_id}): {e}")
+            self._update_job(job_id, status='failed', message=str(e), error=str(e))
+            raise
+        finally:
+            path.unlink(missing_ok=True)
+
+    def ingest_in_background(self, job_id: str, path: Path, **kwargs) -> None:
+        """Background-task entry point: like ingest(), but failures only update the job."""
+        try:
+            self.ingest(job_id, path, **kwargs)
+        except Exception:
+            # Already recorded on the job; keep the traceback for the logs
+            logger.exception(f"Background upload ingestion failed (job {job_id})")
+
+
+_upload_ingestor: Optional[CampaignUploadIngestor] = None
+
+
+def get_upload_ingestor() -> CampaignUploadIngestor:
+    """Get or create the global upload ingestor."""
+    global _upload_ingestor
+    if _upload_ingestor is None:
+        _upload_ingestor = CampaignUploadIngestor()
+    return _upload_ingestor
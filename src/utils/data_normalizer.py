@@ -13,12 +13,17 @@ from __future__ import annotations
 
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 import pandas as pd
 import numpy as np
 from difflib import SequenceMatcher
 
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
 
 # =============================================================================
 # COLUMN NAME NORMALIZATION & FUZZY MATCHING
@@ -201,28 +206,189 @@ def auto_map_columns(
 # DATA TYPE DETECTION & CONVERSION
 # =============================================================================
 
-def detect_column_type(series: pd.Series) -> str:
+# Rows inspected per column: the first and last rows plus a random slice of
+# the middle, so detection cost does not grow with the file
+SAMPLE_HEAD = 100
+SAMPLE_TAIL = 100
+SAMPLE_RANDOM = 300
+
+_DATE_PATTERN = r'\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{2}-\d{2}-\d{4}|\d{1,2}/\d{1,2}/\d{2,4}'
+_AMOUNT_PATTERN = r'^[\$€£¥₹]?\s*[\d,]+\.?\d*$'
+_PERCENT_PATTERN = r'^[\d.]+\s*%?$'
+_CURRENCY_MARKERS = r'[\$£€¥₹]|USD|EUR|GBP'
+_BOOLEAN_STRINGS = {'true', 'false', 'yes', 'no', '1', '0', 't', 'f', 'y', 'n'}
+
+
+class ColumnProfile(NamedTuple):
+    """
+    Evidence about a column's content, gathered once from a row sample.
+
+    Ratios are shares of the non-null sampled values. Each consumer
+    (detect_column_type, DataValidator, MediaDataProcessor) turns the same
+    profile into its own type vocabulary.
+    """
+    dtype: str
+    length: int
+    dtype_kind: str  # 'datetime', 'bool', 'numeric' or 'object'
+    sample_size: int = 0
+    null_ratio: float = 0.0
+    unique_count: int = 0
+    date_pattern_ratio: float = 0.0
+    date_parse_ratio: float = 0.0
+    numeric_ratio: float = 0.0
+    cleaned_numeric_ratio: float = 0.0
+    amount_pattern_ratio: float = 0.0
+    percent_pattern_ratio: float = 0.0
+    currency_marker_ratio: float = 0.0
+    percent_sign_ratio: float = 0.0
+    is_boolean: bool = False
+
+    @property
+    def has_values(self) -> bool:
+        return self.sample_size > 0
+
+    def matches(self, series: pd.Series) -> bool:
+        """Whether this profile still describes ``series`` (same dtype and length)."""
+        return self.dtype == str(series.dtype) and self.length == len(series)
+
+
+def sample_column(
+    series: pd.Series,
+    head: int = SAMPLE_HEAD,
+    tail: int = SAMPLE_TAIL,
+    random: int = SAMPLE_RANDOM,
+    seed: int = 0,
+) -> pd.Series:
+    """Stratified row sample: head, tail and random middle rows (in order)."""
+    n = len(series)
+    if n <= head + tail + random:
+        return series
+    
+    rng = np.random.default_rng(seed)
+    middle = np.sort(rng.choice(n - head - tail, size=random, replace=False)) + head
+    positions = np.concatenate([np.arange(head), middle, np.arange(n - tail, n)])
+    return series.iloc[positions]
+
+
+def _dtype_kind(series: pd.Series) -> str:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'numeric'
+    return 'object'
+
+
+def profile_column(series: pd.Series) -> ColumnProfile:
+    """
+    Profile a column from a bounded sample of its rows.
+    
+    Typed columns (datetime, bool, numeric) are decided by dtype alone; text
+    columns are sampled and every check runs vectorized over the sample.
+    """
+    dtype_kind = _dtype_kind(series)
+    sample = sample_column(series)
+    non_null = sample.dropna()
+    null_ratio = 1 - len(non_null) / len(sample) if len(sample) else 1.0
+    
+    # Sparse column: the sample may miss its few values
+    if non_null.empty and len(sample) < len(series):
+        non_null = series.dropna().head(SAMPLE_HEAD + SAMPLE_TAIL + SAMPLE_RANDOM)
+    
+    base = dict(
+        dtype=str(series.dtype),
+        length=len(series),
+        dtype_kind=dtype_kind,
+        sample_size=len(non_null),
+        null_ratio=null_ratio,
+    )
+    if non_null.empty:
+        return ColumnProfile(**base)
+    
+    unique_count = int(non_null.nunique())
+    if dtype_kind != 'object':
+        return ColumnProfile(**base, unique_count=unique_count, numeric_ratio=1.0, cleaned_numeric_ratio=1.0)
+    
+    text = non_null.astype(str).str.strip()
+    
+    try:
+        date_parse_ratio = float(pd.to_datetime(non_null, errors='coerce').notna().mean())
+    except Exception:
+        date_parse_ratio = 0.0
+    
+    cleaned = text.str.replace(',', '', regex=False).str.replace('$', '', regex=False).str.replace('%', '', regex=False)
+    
+    return ColumnProfile(
+        **base,
+        unique_count=unique_count,
+        date_pattern_ratio=float(text.str.match(_DATE_PATTERN).mean()),
+        date_parse_ratio=date_parse_ratio,
+        numeric_ratio=float(pd.to_numeric(non_null, errors='coerce').notna().mean()),
+        cleaned_numeric_ratio=float(pd.to_numeric(cleaned, errors='coerce').notna().mean()),
+        amount_pattern_ratio=float(text.str.match(_AMOUNT_PATTERN).mean()),
+        percent_pattern_ratio=float(text.str.match(_PERCENT_PATTERN).mean()),
+        currency_marker_ratio=float(text.str.contains(_CURRENCY_MARKERS, regex=True).mean()),
+        percent_sign_ratio=float(text.str.contains('%', regex=False).mean()),
+        is_boolean=set(text.str.lower().unique()) <= _BOOLEAN_STRINGS,
+    )
+
+
+def get_column_types(
+    df: pd.DataFrame,
+    cached: Optional[Dict[Any, ColumnProfile]] = None
+) -> Dict[Any, ColumnProfile]:
+    """
+    Profiles of every column of ``df``.
+    
+    Pass the profiles from an earlier call as ``cached`` so the normalizer,
+    DataValidator and MediaDataProcessor share one detection pass over the
+    same upload; a cached column whose dtype or length has changed since it
+    was profiled is profiled again. ``df`` itself is not modified.
+    """
+    cached = cached or {}
+    profiles = {}
+    for position, col in enumerate(df.columns):
+        series = df.iloc[:, position]
+        profile = cached.get(col)
+        if profile is None or not profile.matches(series):
+            profile = profile_column(series)
+        profiles[col] = profile
+    return profiles
+
+
+def rename_column_types(
+    profiles: Dict[Any, ColumnProfile],
+    rename_map: Dict[Any, Any]
+) -> Dict[Any, ColumnProfile]:
+    """Cached profiles keyed by the column names after a rename."""
+    return {rename_map.get(col, col): profile for col, profile in profiles.items()}
+
+
+def detect_column_type(series: pd.Series, profile: Optional[ColumnProfile] = None) -> str:
     """
     Detect the semantic type of a column.
     
     Returns one of: 'date', 'numeric', 'currency', 'percentage', 'text', 'boolean'
     """
-    # Skip if all null
-    if series.isna().all():
-        return 'text'
+    if profile is None:
+        profile = profile_column(series)
     
-    # Get non-null sample
-    sample = series.dropna()
-    if len(sample) == 0:
+    # Skip if all null
+    if not profile.has_values:
         return 'text'
     
     # Check if already datetime
-    if pd.api.types.is_datetime64_any_dtype(series):
+    if profile.dtype_kind == 'datetime':
         return 'date'
     
+    # Check if boolean
+    if profile.dtype_kind == 'bool':
+        return 'boolean'
+    
     # Check if numeric
-    if pd.api.types.is_numeric_dtype(series):
-        col_name = series.name.lower() if series.name else ''
+    if profile.dtype_kind == 'numeric':
+        col_name = str(series.name).lower() if series.name is not None else ''
         
         # Check for percentage indicators
         if '%' in col_name or 'rate' in col_name or 'percent' in col_name:
@@ -234,35 +400,14 @@ def detect_column_type(series: pd.Series) -> str:
         
         return 'numeric'
     
-    # Check if boolean
-    if series.dtype == bool:
-        return 'boolean'
-    
     # String analysis
-    sample_str = sample.astype(str)
-    
-    # Check for date patterns
-    date_patterns = [
-        r'\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
-        r'\d{2}/\d{2}/\d{4}',  # MM/DD/YYYY or DD/MM/YYYY
-        r'\d{2}-\d{2}-\d{4}',  # MM-DD-YYYY or DD-MM-YYYY
-        r'\d{1,2}/\d{1,2}/\d{2,4}',  # M/D/YY or M/D/YYYY
-    ]
-    
-    date_matches = sum(1 for val in sample_str.head(10) if any(re.match(p, str(val)) for p in date_patterns))
-    if date_matches >= len(sample_str.head(10)) * 0.7:
+    if profile.date_pattern_ratio >= 0.7:
         return 'date'
     
-    # Check for currency patterns
-    currency_pattern = r'^[\$€£¥₹]?\s*[\d,]+\.?\d*$'
-    currency_matches = sum(1 for val in sample_str.head(10) if re.match(currency_pattern, str(val).strip()))
-    if currency_matches >= len(sample_str.head(10)) * 0.7:
+    if profile.amount_pattern_ratio >= 0.7:
         return 'currency'
     
-    # Check for percentage patterns
-    pct_pattern = r'^[\d.]+\s*%?$'
-    pct_matches = sum(1 for val in sample_str.head(10) if re.match(pct_pattern, str(val).strip()))
-    if pct_matches >= len(sample_str.head(10)) * 0.7:
+    if profile.percent_pattern_ratio >= 0.7:
         return 'percentage'
     
     return 'text'
@@ -324,13 +469,57 @@ def parse_date(value: Any) -> Optional[datetime]:
     return None
 
 
+def infer_date_format(series: pd.Series, dayfirst: bool = False, sample_size: int = 20) -> Optional[str]:
+    """Most common strptime format guessed from the first non-null values."""
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return None
+    
+    guesses = []
+    for value in series.dropna().head(sample_size):
+        try:
+            guess = guess_datetime_format(str(value).strip(), dayfirst=dayfirst)
+        except Exception:
+            guess = None
+        if guess:
+            guesses.append(guess)
+    
+    if not guesses:
+        return None
+    return max(set(guesses), key=guesses.count)
+
+
 def normalize_date_column(series: pd.Series) -> pd.Series:
     """
     Normalize a date column to datetime type.
     
-    Handles messy date formats and returns a clean datetime series.
+    Handles messy date formats and returns a clean datetime series. Parsing
+    is column-wise: the format inferred from the leading values first, then
+    pandas' per-value parser and DATE_FORMATS for whatever is left.
     """
-    return series.apply(parse_date)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    
+    text = series.where(series.isna(), series.astype(str).str.strip())
+    text = text.where(text != '')
+    result = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    pending = text.notna()
+    
+    date_format = infer_date_format(text)
+    if date_format:
+        result[pending] = pd.to_datetime(text[pending], format=date_format, errors='coerce')
+        pending &= result.isna()
+    
+    if pending.any():
+        result[pending] = pd.to_datetime(text[pending], format='mixed', errors='coerce')
+        pending &= result.isna()
+    
+    for fmt in DATE_FORMATS:
+        if not pending.any():
+            break
+        result[pending] = pd.to_datetime(text[pending], format=fmt, errors='coerce')
+        pending &= result.isna()
+    
+    return result
 
 
 # =============================================================================
@@ -392,8 +581,36 @@ def clean_numeric_value(value: Any) -> Optional[float]:
 def normalize_numeric_column(series: pd.Series) -> pd.Series:
     """
     Normalize a numeric column, cleaning currency symbols, commas, etc.
+    
+    Column-wise equivalent of clean_numeric_value: values pandas already
+    parses are converted directly, the rest are cleaned with string ops.
     """
-    return series.apply(clean_numeric_value)
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    
+    result = pd.to_numeric(series, errors='coerce').astype(float)
+    pending = result.isna() & series.notna()
+    if not pending.any():
+        return result
+    
+    text = series[pending].astype(str).str.strip()
+    
+    # Parentheses (negative)
+    is_negative = text.str.startswith('(') & text.str.endswith(')')
+    text = text.str.replace(r'^\((.*)\)$', r'\1', regex=True)
+    
+    # Currency symbols, whitespace and percentage sign
+    text = text.str.replace(r'[\$€£¥₹\s%]', '', regex=True)
+    
+    # Without a period, a comma before exactly two trailing digits is a
+    # decimal comma (12,50); every other comma is a thousand separator
+    decimal_comma = ~text.str.contains('.', regex=False) & text.str.match(r'^[\d,]+,\d{2}$')
+    text = text.mask(decimal_comma, text.str.replace(r',(\d{2})$', r'.\1', regex=True))
+    text = text.str.replace(',', '', regex=False)
+    
+    values = pd.to_numeric(text, errors='coerce').astype(float)
+    result[pending] = values.mask(is_negative, -values)
+    return result
 
 
 # =============================================================================
@@ -404,7 +621,8 @@ def normalize_dataframe(
     df: pd.DataFrame,
     date_columns: Optional[List[str]] = None,
     numeric_columns: Optional[List[str]] = None,
-    auto_detect: bool = True
+    auto_detect: bool = True,
+    column_types: Optional[Dict[Any, ColumnProfile]] = None
 ) -> Tuple[pd.DataFrame, Dict[str, str]]:
     """
     Normalize a DataFrame for reporting.
@@ -414,17 +632,19 @@ def normalize_dataframe(
         date_columns: Columns to parse as dates (optional)
         numeric_columns: Columns to parse as numeric (optional)
         auto_detect: Whether to auto-detect column types
+        column_types: Profiles already computed for ``df`` (see get_column_types)
     
     Returns:
         Tuple of (normalized_df, column_types_dict)
     """
+    profiles = get_column_types(df, column_types) if auto_detect else {}
     df = df.copy()
     column_types = {}
     
     for col in df.columns:
         # Detect type
         if auto_detect:
-            col_type = detect_column_type(df[col])
+            col_type = detect_column_type(df[col], profiles[col])
         else:
             col_type = 'text'
         
@@ -448,18 +668,21 @@ def normalize_dataframe(
 def get_column_mapping_report(
     source_df: pd.DataFrame,
     target_columns: List[str],
-    threshold: float = 0.6
+    threshold: float = 0.6,
+    column_types: Optional[Dict[Any, ColumnProfile]] = None
 ) -> pd.DataFrame:
     """
     Generate a report of column mappings between source and target.
     
+    Pass the upload's profiles as ``column_types`` to skip re-profiling.
     Returns a DataFrame with mapping details.
     """
     mappings = auto_map_columns(list(source_df.columns), target_columns, threshold)
+    profiles = get_column_types(source_df, column_types)
     
     rows = []
     for source, info in mappings.items():
-        source_type = detect_column_type(source_df[source])
+        source_type = detect_column_type(source_df[source], profiles[source])
         rows.append({
             'Source Column': source,
             'Source Type': source_type,
@@ -476,9 +699,14 @@ def get_column_mapping_report(
 # VALIDATION & QUALITY CHECKS
 # =============================================================================
 
-def validate_data_quality(df: pd.DataFrame) -> Dict[str, Any]:
+def validate_data_quality(
+    df: pd.DataFrame,
+    column_types: Optional[Dict[Any, ColumnProfile]] = None
+) -> Dict[str, Any]:
     """
     Validate data quality and return a report.
+    
+    Pass the upload's profiles as ``column_types`` to skip re-profiling.
     """
     report = {
         'total_rows': len(df),
@@ -488,13 +716,15 @@ def validate_data_quality(df: pd.DataFrame) -> Dict[str, Any]:
         'column_stats': {}
     }
     
+    profiles = get_column_types(df, column_types)
+    
     for col in df.columns:
         col_stats = {
             'null_count': int(df[col].isna().sum()),
             'null_pct': f"{df[col].isna().mean():.1%}",
             'unique_count': int(df[col].nunique()),
             'dtype': str(df[col].dtype),
-            'detected_type': detect_column_type(df[col])
+            'detected_type': detect_column_type(df[col], profiles[col])
         }
         report['column_stats'][col] = col_stats
         
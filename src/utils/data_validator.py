@@ -4,12 +4,28 @@ Handles multiple data types, formats, and edge cases
 """
 
 import pandas as pd
-import numpy as np
-from datetime import datetime
 from typing import Any, Dict, List, Optional, Union, Tuple
 from loguru import logger
 import re
 
+from .data_normalizer import (
+    ColumnProfile,
+    get_column_types,
+    infer_date_format,
+    profile_column,
+    rename_column_types,
+)
+
+
+# Currency symbols and codes stripped before parsing amounts
+_CURRENCY_TOKENS = re.compile(r'[\$£€¥₹]|USD|EUR|GBP|INR|JPY', re.IGNORECASE)
+
+# Lowercased spellings accepted as booleans
+_BOOLEAN_VALUES = {
+    **{val: True for val in ('true', 'yes', '1', 't', 'y', 'on', 'enabled', 'active')},
+    **{val: False for val in ('false', 'no', '0', 'f', 'n', 'off', 'disabled', 'inactive')},
+}
+
 
 class DataValidator:
     """Comprehensive data validation and normalization."""
@@ -42,13 +58,21 @@ class DataValidator:
             'warnings': [],
             'conversions': {}
         }
+        # Column profiles of the current upload (see data_normalizer.get_column_types)
+        self.column_types: Dict[Any, ColumnProfile] = {}
     
-    def validate_and_clean_dataframe(self, df: pd.DataFrame, apply_campaign_normalization: bool = True) -> Tuple[pd.DataFrame, Dict]:
+    def validate_and_clean_dataframe(
+        self,
+        df: pd.DataFrame,
+        apply_campaign_normalization: bool = True,
+        column_types: Optional[Dict[Any, ColumnProfile]] = None
+    ) -> Tuple[pd.DataFrame, Dict]:
         """
         Validate and clean entire DataFrame.
         
         Args:
             df: Input DataFrame
+            column_types: Profiles already computed for ``df`` (see get_column_types)
             
         Returns:
             Tuple of (cleaned_df, validation_report)
@@ -56,6 +80,10 @@ class DataValidator:
         logger.info(f"Starting validation of DataFrame with {len(df)} rows, {len(df.columns)} columns")
         
         self.validation_stats['total_rows'] = len(df)
+        
+        # Detect column types once, on a sample of rows; the profiles follow
+        # the columns through the renames below
+        self.column_types = get_column_types(df, column_types)
         cleaned_df = df.copy()
         
         # Step 1: Apply campaign-specific column normalization first
@@ -64,6 +92,8 @@ class DataValidator:
             if column_mappings:
                 self.validation_stats['conversions']['Column Mappings'] = f"{len(column_mappings)} columns renamed"
         
+        self.column_types = get_column_types(cleaned_df, self.column_types)
+        
         # Step 2: Detect and normalize column types
         for col in cleaned_df.columns:
             try:
@@ -127,10 +157,9 @@ class DataValidator:
         Returns:
             Detected type
         """
-        # Remove nulls for detection
-        non_null = series.dropna()
+        profile = self._column_profile(series, col_name)
         
-        if len(non_null) == 0:
+        if not profile.has_values:
             return 'unknown'
         
         # Check column name hints
@@ -145,74 +174,42 @@ class DataValidator:
         if any(word in col_lower for word in ['rate', 'ctr', 'cvr', 'roas', 'roi', 'percent']):
             return 'percentage'
         
-        # Sample values for content detection
-        sample = non_null.head(100)
+        if profile.dtype_kind == 'datetime':
+            return 'date'
         
         # Check if already numeric
-        if pd.api.types.is_numeric_dtype(series):
+        if profile.dtype_kind in ('numeric', 'bool'):
             return 'numeric'
         
-        # Try to detect dates
-        if self._is_date_column(sample):
+        # Content checks on the sampled values
+        if profile.date_parse_ratio > 0.7:
             return 'date'
         
-        # Try to detect currency
-        if self._is_currency_column(sample):
+        if profile.currency_marker_ratio > 0.3:
             return 'currency'
         
-        # Try to detect percentage
-        if self._is_percentage_column(sample):
+        if profile.percent_sign_ratio > 0.3:
             return 'percentage'
         
-        # Try to detect boolean
-        if self._is_boolean_column(sample):
+        if profile.is_boolean:
             return 'boolean'
         
-        # Try to detect numeric
-        if self._is_numeric_column(sample):
+        if profile.numeric_ratio > 0.7:
             return 'numeric'
         
         # Check if categorical (low cardinality)
-        if len(non_null.unique()) < len(non_null) * 0.5 and len(non_null.unique()) < 50:
+        if profile.unique_count < profile.sample_size * 0.5 and profile.unique_count < 50:
             return 'categorical'
         
         return 'string'
     
-    def _is_date_column(self, sample: pd.Series) -> bool:
-        """Check if column contains dates."""
-        try:
-            # Try pandas auto-detection
-            pd.to_datetime(sample.head(10), errors='coerce')
-            success_rate = pd.to_datetime(sample, errors='coerce').notna().sum() / len(sample)
-            return success_rate > 0.7
-        except Exception:
-            return False
-    
-    def _is_currency_column(self, sample: pd.Series) -> bool:
-        """Check if column contains currency values."""
-        sample_str = sample.astype(str)
-        currency_pattern = r'[\$£€¥₹]|USD|EUR|GBP'
-        return sample_str.str.contains(currency_pattern, regex=True).sum() > len(sample) * 0.3
-    
-    def _is_percentage_column(self, sample: pd.Series) -> bool:
-        """Check if column contains percentages."""
-        sample_str = sample.astype(str)
-        return sample_str.str.contains('%', regex=False).sum() > len(sample) * 0.3
-    
-    def _is_boolean_column(self, sample: pd.Series) -> bool:
-        """Check if column contains boolean values."""
-        unique_vals = set(str(v).lower() for v in sample.unique())
-        bool_vals = {'true', 'false', 'yes', 'no', '1', '0', 't', 'f', 'y', 'n'}
-        return len(unique_vals - bool_vals) == 0
-    
-    def _is_numeric_column(self, sample: pd.Series) -> bool:
-        """Check if column contains numeric values."""
-        try:
-            pd.to_numeric(sample, errors='coerce')
-            success_rate = pd.to_numeric(sample, errors='coerce').notna().sum() / len(sample)
-            return success_rate > 0.7
-        except Exception:
-            return False
+    def _column_profile(self, series: pd.Series, col_name: str) -> ColumnProfile:
+        """Cached profile of a column, re-profiled if the column changed."""
+        profile = self.column_types.get(col_name)
+        if profile is None or not profile.matches(series):
+            profile = profile_column(series)
+            self.column_types[col_name] = profile
+        return profile
     
     def _normalize_dates(self, series: pd.Series, col_name: str) -> pd.Series:
         """
@@ -227,10 +224,27 @@ class DataValidator:
         """
         logger.info(f"Normalizing dates in column '{col_name}'")
         
-        # Try pandas auto-detection first
+        # Fast path: already parsed (e.g. by read_csv(parse_dates=...) or parquet)
+        if pd.api.types.is_datetime64_any_dtype(series):
+            self.validation_stats['conversions'][col_name] = "Date (already datetime)"
+            return series
+        
+        non_null_count = len(series.dropna())
+        
+        # Infer a single format from the data so the column parses on the fast strptime path
+        inferred_format = infer_date_format(series, dayfirst=True)
+        if inferred_format:
+            result = pd.to_datetime(series, format=inferred_format, errors='coerce')
+            success_rate = result.notna().sum() / non_null_count
+            
+            if success_rate > 0.9:
+                self.validation_stats['conversions'][col_name] = f"Date ({inferred_format}, {success_rate:.1%} success)"
+                return result
+        
+        # Try pandas auto-detection (parses each value independently)
         try:
             result = pd.to_datetime(series, format='mixed', dayfirst=True, errors='coerce')
-            success_rate = result.notna().sum() / len(series.dropna())
+            success_rate = result.notna().sum() / non_null_count
             
             if success_rate > 0.9:
                 self.validation_stats['conversions'][col_name] = f"Date (auto-detected, {success_rate:.1%} success)"
@@ -242,7 +256,7 @@ class DataValidator:
         for date_format in self.DATE_FORMATS:
             try:
                 result = pd.to_datetime(series, format=date_format, errors='coerce')
-                success_rate = result.notna().sum() / len(series.dropna())
+                success_rate = result.notna().sum() / non_null_count
                 
                 if success_rate > 0.9:
                     logger.info(f"Successfully parsed dates with format: {date_format}")
@@ -252,28 +266,10 @@ class DataValidator:
                 logger.debug(f"Date format {date_format} failed: {e}")
                 continue
         
-        # Last resort: try to parse each value individually
-        def parse_flexible(val):
-            if pd.isna(val):
-                return pd.NaT
-            
-            val_str = str(val).strip()
-            
-            # Try each format
-            for fmt in self.DATE_FORMATS:
-                try:
-                    return datetime.strptime(val_str, fmt)
-                except:
-                    continue
-            
-            # Try pandas as last resort
-            try:
-                return pd.to_datetime(val_str, dayfirst=True)
-            except:
-                return pd.NaT
-        
-        result = series.apply(parse_flexible)
-        success_rate = result.notna().sum() / len(series.dropna())
+        # Last resort: mixed formats within the column. Each format is applied to
+        # the values no earlier format could parse, then pandas gets the rest.
+        result = self._parse_dates_flexible(series)
+        success_rate = result.notna().sum() / non_null_count
         
         self.validation_stats['conversions'][col_name] = f"Date (flexible parsing, {success_rate:.1%} success)"
         
@@ -284,6 +280,60 @@ class DataValidator:
         
         return result
     
+    def _parse_dates_flexible(self, series: pd.Series) -> pd.Series:
+        """Coalesce DATE_FORMATS over a column, first matching format wins per value."""
+        text = series.where(series.isna(), series.astype(str).str.strip())
+        result = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+        pending = text.notna()
+        
+        for date_format in self.DATE_FORMATS:
+            if not pending.any():
+                return result
+            parsed = pd.to_datetime(text[pending], format=date_format, errors='coerce')
+            result[parsed.index] = parsed
+            pending &= result.isna()
+        
+        if pending.any():
+            result[pending] = pd.to_datetime(text[pending], format='mixed', dayfirst=True, errors='coerce')
+        
+        return result
+    
+    def _to_float(self, series: pd.Series, strip: Optional[Any] = None,
+                  negative: str = r'^[-(]') -> pd.Series:
+        """
+        Vectorized float conversion of numbers and number-like strings.
+        
+        Values ``pd.to_numeric`` already understands are converted directly;
+        only the rest go through the string cleanup (``strip`` pattern,
+        thousands separators, ``-``/parentheses for negatives).
+        
+        Args:
+            series: Column data
+            strip: Regex removed from the text before parsing (e.g. currency symbols)
+            negative: Regex marking a value as negative after cleanup
+            
+        Returns:
+            Float series, NaN where a value could not be parsed
+        """
+        # Fast path: column is already numeric
+        if pd.api.types.is_numeric_dtype(series):
+            return series.astype(float)
+        
+        result = pd.to_numeric(series, errors='coerce').astype(float)
+        pending = result.isna() & series.notna()
+        
+        if pending.any():
+            text = series[pending].astype(str).str.strip()
+            if strip is not None:
+                text = text.str.replace(strip, '', regex=True)
+            text = text.str.replace(r'[, ]', '', regex=True)
+            
+            is_negative = text.str.contains(negative, regex=True)
+            values = pd.to_numeric(text.str.replace(r'[-()]', '', regex=True), errors='coerce').astype(float)
+            result[pending] = values.where(~is_negative, -values)
+        
+        return result
+    
     def _normalize_numeric(self, series: pd.Series, col_name: str) -> pd.Series:
         """
         Normalize numeric column.
@@ -297,33 +347,7 @@ class DataValidator:
         """
         logger.info(f"Normalizing numeric values in column '{col_name}'")
         
-        def clean_numeric(val):
-            if pd.isna(val):
-                return np.nan
-            
-            # If already numeric, return as is
-            if isinstance(val, (int, float)):
-                return float(val)
-            
-            # Convert to string and clean
-            val_str = str(val).strip()
-            
-            # Remove common separators
-            val_str = val_str.replace(',', '')  # 1,000 -> 1000
-            val_str = val_str.replace(' ', '')  # 1 000 -> 1000
-            
-            # Handle negative numbers
-            is_negative = val_str.startswith('-') or val_str.startswith('(')
-            val_str = val_str.replace('-', '').replace('(', '').replace(')', '')
-            
-            # Try to convert
-            try:
-                result = float(val_str)
-                return -result if is_negative else result
-            except:
-                return np.nan
-        
-        result = series.apply(clean_numeric)
+        result = self._to_float(series)
         success_rate = result.notna().sum() / len(series.dropna())
         
         self.validation_stats['conversions'][col_name] = f"Numeric ({success_rate:.1%} success)"
@@ -343,36 +367,8 @@ class DataValidator:
         """
         logger.info(f"Normalizing currency values in column '{col_name}'")
         
-        def clean_currency(val):
-            if pd.isna(val):
-                return np.nan
-            
-            # If already numeric, return as is
-            if isinstance(val, (int, float)):
-                return float(val)
-            
-            # Convert to string and clean
-            val_str = str(val).strip()
-            
-            # Remove currency symbols and text
-            val_str = re.sub(r'[\$£€¥₹]', '', val_str)
-            val_str = re.sub(r'USD|EUR|GBP|INR|JPY', '', val_str, flags=re.IGNORECASE)
-            
-            # Remove separators
-            val_str = val_str.replace(',', '')
-            val_str = val_str.replace(' ', '')
-            
-            # Handle negative
-            is_negative = '(' in val_str or val_str.startswith('-')
-            val_str = val_str.replace('(', '').replace(')', '').replace('-', '')
-            
-            try:
-                result = float(val_str)
-                return -result if is_negative else result
-            except:
-                return np.nan
-        
-        result = series.apply(clean_currency)
+        # Accounting negatives may put the parentheses anywhere: "$(1,000)", "(USD 5)"
+        result = self._to_float(series, strip=_CURRENCY_TOKENS, negative=r'^-|\(')
         success_rate = result.notna().sum() / len(series.dropna())
         
         self.validation_stats['conversions'][col_name] = f"Currency ({success_rate:.1%} success)"
@@ -392,36 +388,10 @@ class DataValidator:
         """
         logger.info(f"Normalizing percentage values in column '{col_name}'")
         
-        def clean_percentage(val):
-            if pd.isna(val):
-                return np.nan
-            
-            # If already numeric, check if it's already a decimal
-            if isinstance(val, (int, float)):
-                # If value is between 0-1, assume it's already decimal
-                if 0 <= val <= 1:
-                    return float(val)
-                # If value is > 1, assume it's percentage
-                else:
-                    return float(val) / 100
-            
-            # Convert to string and clean
-            val_str = str(val).strip()
-            
-            # Remove % symbol
-            val_str = val_str.replace('%', '')
-            val_str = val_str.replace(' ', '')
-            
-            try:
-                result = float(val_str)
-                # If value is > 1, assume it's percentage
-                if result > 1:
-                    return result / 100
-                return result
-            except:
-                return np.nan
+        values = self._to_float(series, strip='%')
         
-        result = series.apply(clean_percentage)
+        # Values between 0-1 are assumed to be decimals already, anything else a percentage
+        result = values.where(values.between(0, 1) | values.isna(), values / 100)
         success_rate = result.notna().sum() / len(series.dropna())
         
         self.validation_stats['conversions'][col_name] = f"Percentage ({success_rate:.1%} success)"
@@ -441,23 +411,13 @@ class DataValidator:
         """
         logger.info(f"Normalizing boolean values in column '{col_name}'")
         
-        def clean_boolean(val):
-            if pd.isna(val):
-                return np.nan
-            
-            val_str = str(val).strip().lower()
-            
-            true_vals = {'true', 'yes', '1', 't', 'y', 'on', 'enabled', 'active'}
-            false_vals = {'false', 'no', '0', 'f', 'n', 'off', 'disabled', 'inactive'}
-            
-            if val_str in true_vals:
-                return True
-            elif val_str in false_vals:
-                return False
-            else:
-                return np.nan
+        # Fast path: already boolean
+        if pd.api.types.is_bool_dtype(series):
+            self.validation_stats['conversions'][col_name] = "Boolean (100.0% success)"
+            return series
         
-        result = series.apply(clean_boolean)
+        # Unmapped strings and nulls (which render as 'nan'/'none') become NaN
+        result = series.astype(str).str.strip().str.lower().map(_BOOLEAN_VALUES)
         success_rate = result.notna().sum() / len(series.dropna())
         
         self.validation_stats['conversions'][col_name] = f"Boolean ({success_rate:.1%} success)"
@@ -571,7 +531,9 @@ class DataValidator:
         logger.info("Applying campaign-specific column normalization")
         
         df = df.copy()
-        df.columns = [str(c).strip() for c in df.columns]
+        stripped = {c: str(c).strip() for c in df.columns}
+        df.columns = [stripped[c] for c in df.columns]
+        self.column_types = rename_column_types(self.column_types, stripped)
         
         def _norm(name: str) -> str:
             return re.sub(r"[^a-z0-9]+", "_", str(name).strip().lower())
@@ -701,6 +663,7 @@ class DataValidator:
         
         if rename_map:
             df = df.rename(columns=rename_map)
+            self.column_types = rename_column_types(self.column_types, rename_map)
             logger.info(f"Renamed {len(rename_map)} columns: {list(rename_map.items())[:5]}...")
         
         # Normalize Funnel_Stage values if column exists
@@ -800,12 +763,16 @@ class DataValidator:
 
 
 # Convenience function
-def validate_and_clean_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+def validate_and_clean_data(
+    df: pd.DataFrame,
+    column_types: Optional[Dict[Any, ColumnProfile]] = None
+) -> Tuple[pd.DataFrame, Dict]:
     """
     Validate and clean DataFrame with comprehensive normalization.
     
     Args:
         df: Input DataFrame
+        column_types: Profiles already computed for ``df`` (see get_column_types)
         
     Returns:
         Tuple of (cleaned_df, validation_report)
@@ -818,4 +785,4 @@ def validate_and_clean_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
         raise ValueError("DataFrame is empty")
     
     validator = DataValidator()
-    return validator.validate_and_clean_dataframe(df)
+    return validator.validate_and_clean_dataframe(df, column_types=column_types)
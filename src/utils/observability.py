@@ -7,25 +7,31 @@ This module provides production-grade observability for the PCA Agent system:
 - Distributed tracing with span context
 - Alerting with configurable thresholds
 - LLM cost tracking and budgeting
+
+Recording on request hot paths avoids shared locks: metrics are buffered per
+thread and folded into the shared totals when read, label keys are interned
+once, and spans, histogram observations and operation logs can be sampled.
 """
 
 import time
 import json
 import threading
 import functools
+import random
 import uuid
 import os
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass, field, asdict
 from enum import Enum
-from collections import defaultdict
+from collections import defaultdict, deque
 from pathlib import Path
-import statistics
 from contextlib import contextmanager
 from loguru import logger
 import sys
 
+from src.utils.quantile_sketch import DEFAULT_BUCKETS, Histogram
+
 
 # =============================================================================
 # STRUCTURED LOGGING
@@ -99,6 +105,8 @@ class StructuredLogger:
         # Use a sink function instead of format string to avoid parsing issues
         service_name = self.service_name
         context_holder = self._context
+        log_file = self.log_file
+        handle = []  # Opened on first write and kept open (loguru serializes sink calls)
         
         def json_sink(message):
             """Custom sink that writes JSON formatted logs."""
@@ -131,8 +139,9 @@ class StructuredLogger:
             
             # Write to file
             try:
-                with open(self.log_file, 'a') as f:
-                    f.write(json.dumps(log_entry) + "\n")
+                if not handle:
+                    handle.append(open(log_file, 'a', buffering=1))
+                handle[0].write(json.dumps(log_entry) + "\n")
             except Exception:
                 pass  # Silently fail if we can't write
         
@@ -197,32 +206,43 @@ class StructuredLogger:
 structured_logger = StructuredLogger.get_instance()
 
 
-def log_operation(operation_name: str, component: str = "unknown"):
-    """Decorator to log function entry/exit with timing."""
+def log_operation(operation_name: str, component: str = "unknown", sample_rate: float = 1.0):
+    """
+    Decorator to log function entry/exit with timing.
+    
+    With ``sample_rate`` below 1, only that share of calls logs the
+    start/completion lines; failures are always logged.
+    """
+    starting_message = f"Starting {operation_name}"
+    completed_message = f"Completed {operation_name}"
+    
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            request_id = str(uuid.uuid4())[:8]
-            start_time = time.time()
+            sampled = sample_rate >= 1.0 or random.random() < sample_rate
+            request_id = f"{random.getrandbits(32):08x}"
+            start_time = time.perf_counter()
             
             with structured_logger.context(
                 request_id=request_id,
                 component=component,
                 operation=operation_name
             ):
-                structured_logger.info(f"Starting {operation_name}")
+                if sampled:
+                    structured_logger.info(starting_message)
                 
                 try:
                     result = func(*args, **kwargs)
-                    elapsed = time.time() - start_time
-                    structured_logger.info(
-                        f"Completed {operation_name}",
-                        duration_ms=round(elapsed * 1000, 2),
-                        success=True
-                    )
+                    if sampled:
+                        elapsed = time.perf_counter() - start_time
+                        structured_logger.info(
+                            completed_message,
+                            duration_ms=round(elapsed * 1000, 2),
+                            success=True
+                        )
                     return result
                 except Exception as e:
-                    elapsed = time.time() - start_time
+                    elapsed = time.perf_counter() - start_time
                     structured_logger.error(
                         f"Failed {operation_name}: {str(e)}",
                         duration_ms=round(elapsed * 1000, 2),
@@ -256,6 +276,36 @@ class MetricPoint:
     metric_type: MetricType = MetricType.GAUGE
 
 
+class _ThreadBuffer:
+    """Counter increments and histogram observations recorded by one thread."""
+    
+    __slots__ = ("lock", "thread", "counters", "observations")
+    
+    def __init__(self):
+        # Only contended while the buffer is being folded into the totals
+        self.lock = threading.Lock()
+        self.thread = threading.current_thread()
+        self.counters: Dict[str, float] = {}
+        self.observations: Dict[str, List[float]] = {}
+
+
+class BoundMetric:
+    """A metric name and label set resolved to its key once, for repeated recording."""
+    
+    __slots__ = ("_collector", "name", "key")
+    
+    def __init__(self, collector: 'MetricsCollector', name: str, key: str):
+        self._collector = collector
+        self.name = name
+        self.key = key
+    
+    def increment(self, value: float = 1.0):
+        self._collector._increment_key(self.key, value)
+    
+    def observe(self, value: float):
+        self._collector._observe_key(self.name, self.key, value)
+
+
 class MetricsCollector:
     """
     Metrics collection system for monitoring.
@@ -266,23 +316,43 @@ class MetricsCollector:
     - Histograms: Distribution of values (latency, response size)
     - Timers: Duration measurements
     
+    Histograms keep a fixed-memory quantile sketch and cumulative ``le``
+    bucket counts per key (see ``src.utils.quantile_sketch``): observing is
+    O(1), percentile reads don't sort, and histograms exported by other
+    workers can be merged in with ``merge_histograms``.
+    
+    Counter increments and histogram observations go to a buffer owned by
+    the recording thread and are folded into the shared totals whenever
+    metrics are read (or a thread has buffered ``BUFFER_SIZE`` observations
+    of one metric), so recording never waits on other threads. Label sets
+    are interned to their key on first use; ``bind`` resolves one up front.
+    Histograms can be sampled with ``set_sample_rate``; counters are exact.
+    
     Compatible with Prometheus, StatsD, CloudWatch, etc.
     """
     
     _instance: Optional['MetricsCollector'] = None
     _lock = threading.Lock()
     
+    # Buffered observations of one metric that trigger folding a thread's buffer
+    BUFFER_SIZE = 512
+    
+    # Label sets remembered by the key cache (label values with unbounded
+    # cardinality beyond this still work, they are just formatted per call)
+    MAX_INTERNED_KEYS = 10000
+    
     def __init__(self):
         self._counters: Dict[str, float] = defaultdict(float)
         self._gauges: Dict[str, float] = {}
-        self._histograms: Dict[str, List[float]] = defaultdict(list)
-        self._timers: Dict[str, List[float]] = defaultdict(list)
+        self._histograms: Dict[str, Histogram] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._sample_rates: Dict[str, float] = {}
         self._labels: Dict[str, Dict[str, str]] = {}
-        self._metrics_lock = threading.Lock()
+        self._keys: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], str] = {}
+        self._local = threading.local()
+        self._buffers: List[_ThreadBuffer] = []
+        self._metrics_lock = threading.RLock()
         self._start_time = datetime.utcnow()
-        
-        # Metric retention (keep last N values for histograms)
-        self._max_histogram_size = 1000
     
     @classmethod
     def get_instance(cls) -> 'MetricsCollector':
@@ -292,34 +362,84 @@ class MetricsCollector:
             return cls._instance
     
     def _make_key(self, name: str, labels: Optional[Dict[str, str]] = None) -> str:
-        """Create a unique key for a metric with labels."""
+        """Create a unique key for a metric with labels (interned per label set)."""
         if not labels:
             return name
-        label_str = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
-        return f"{name}{{{label_str}}}"
+        cache_key = (name, tuple(labels.items()))
+        try:
+            key = self._keys.get(cache_key)
+        except TypeError:  # Unhashable label value
+            cache_key = key = None
+        if key is None:
+            label_str = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+            key = sys.intern(f"{name}{{{label_str}}}")
+            if cache_key is not None and len(self._keys) < self.MAX_INTERNED_KEYS:
+                self._keys[cache_key] = key
+            self._labels.setdefault(key, dict(labels))
+        return key
+    
+    def bind(self, name: str, labels: Optional[Dict[str, str]] = None) -> BoundMetric:
+        """Resolve ``name`` and ``labels`` once; the returned handle records without key lookups."""
+        return BoundMetric(self, name, self._make_key(name, labels))
+    
+    def _buffer(self) -> _ThreadBuffer:
+        """This thread's buffer, registered on first use."""
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = _ThreadBuffer()
+            with self._metrics_lock:
+                self._buffers.append(buffer)
+            self._local.buffer = buffer
+            return buffer
+    
+    def _aggregate(self, buffers: Optional[List[_ThreadBuffer]] = None):
+        """Fold thread buffers (all by default) into the shared totals."""
+        with self._metrics_lock:
+            finished = set()
+            for buffer in (self._buffers if buffers is None else buffers):
+                # Checked before draining: a thread that was already dead cannot
+                # write after the drain, one that was alive still may
+                if not buffer.thread.is_alive():
+                    finished.add(buffer)
+                with buffer.lock:
+                    counters, buffer.counters = buffer.counters, {}
+                    observations, buffer.observations = buffer.observations, {}
+                for key, value in counters.items():
+                    self._counters[key] += value
+                for key, values in observations.items():
+                    name = key.partition("{")[0]
+                    histogram = self._histograms.get(key)
+                    if histogram is None:
+                        histogram = self._histograms[key] = Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+                    rate = self._sample_rates.get(name)
+                    weight = max(1, round(1 / rate)) if rate else 1
+                    for value in values:
+                        histogram.observe(value, weight)
+            if buffers is None and finished:
+                self._buffers = [b for b in self._buffers if b not in finished]
     
     # Counter operations
     def increment(self, name: str, value: float = 1.0, labels: Optional[Dict[str, str]] = None):
         """Increment a counter."""
-        key = self._make_key(name, labels)
-        with self._metrics_lock:
-            self._counters[key] += value
-            if labels:
-                self._labels[key] = labels
+        self._increment_key(self._make_key(name, labels), value)
+    
+    def _increment_key(self, key: str, value: float):
+        buffer = self._buffer()
+        with buffer.lock:
+            counters = buffer.counters
+            counters[key] = counters.get(key, 0.0) + value
     
     def get_counter(self, name: str, labels: Optional[Dict[str, str]] = None) -> float:
         """Get counter value."""
         key = self._make_key(name, labels)
+        self._aggregate()
         return self._counters.get(key, 0.0)
     
     # Gauge operations
     def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
         """Set a gauge value."""
-        key = self._make_key(name, labels)
-        with self._metrics_lock:
-            self._gauges[key] = value
-            if labels:
-                self._labels[key] = labels
+        self._gauges[self._make_key(name, labels)] = value
     
     def get_gauge(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
         """Get gauge value."""
@@ -327,35 +447,74 @@ class MetricsCollector:
         return self._gauges.get(key)
     
     # Histogram operations
+    def set_buckets(self, name: str, buckets: List[float]):
+        """Set the Prometheus ``le`` bucket bounds for histograms named ``name`` created from now on."""
+        self._buckets[name] = tuple(sorted(buckets))
+    
+    def set_sample_rate(self, name: str, rate: float):
+        """
+        Record only ``rate`` (0 < rate <= 1) of the observations of histograms named ``name``.
+        
+        Each kept observation is weighted by ``round(1 / rate)`` so counts
+        and bucket totals stay estimates of the full stream.
+        """
+        if not 0 < rate <= 1:
+            raise ValueError(f"sample rate must be in (0, 1], got {rate}")
+        self._aggregate()  # Observations buffered so far keep their previous weight
+        if rate == 1:
+            self._sample_rates.pop(name, None)
+        else:
+            self._sample_rates[name] = rate
+    
     def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
         """Record a value in a histogram."""
-        key = self._make_key(name, labels)
-        with self._metrics_lock:
-            self._histograms[key].append(value)
-            # Trim to max size
-            if len(self._histograms[key]) > self._max_histogram_size:
-                self._histograms[key] = self._histograms[key][-self._max_histogram_size:]
-            if labels:
-                self._labels[key] = labels
+        self._observe_key(name, self._make_key(name, labels), value)
+    
+    def _observe_key(self, name: str, key: str, value: float):
+        rate = self._sample_rates.get(name)
+        if rate is not None and random.random() >= rate:
+            return
+        buffer = self._buffer()
+        with buffer.lock:
+            values = buffer.observations.get(key)
+            if values is None:
+                values = buffer.observations[key] = []
+            values.append(value)
+            full = len(values) >= self.BUFFER_SIZE
+        if full:
+            self._aggregate([buffer])
     
     def get_histogram_stats(self, name: str, labels: Optional[Dict[str, str]] = None) -> Dict[str, float]:
-        """Get histogram statistics."""
+        """Get histogram statistics (percentiles within 1% relative error)."""
         key = self._make_key(name, labels)
-        values = self._histograms.get(key, [])
-        
-        if not values:
-            return {"count": 0, "min": 0, "max": 0, "avg": 0, "p50": 0, "p95": 0, "p99": 0}
-        
-        sorted_values = sorted(values)
-        return {
-            "count": len(values),
-            "min": min(values),
-            "max": max(values),
-            "avg": statistics.mean(values),
-            "p50": sorted_values[int(len(sorted_values) * 0.5)],
-            "p95": sorted_values[int(len(sorted_values) * 0.95)] if len(sorted_values) > 20 else max(values),
-            "p99": sorted_values[int(len(sorted_values) * 0.99)] if len(sorted_values) > 100 else max(values)
-        }
+        with self._metrics_lock:
+            self._aggregate()
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                return {"count": 0, "min": 0, "max": 0, "avg": 0, "p50": 0, "p95": 0, "p99": 0}
+            return histogram.stats()
+    
+    def export_histograms(self) -> Dict[str, Dict[str, Any]]:
+        """Serializable histogram state per key, for merging into another collector."""
+        with self._metrics_lock:
+            self._aggregate()
+            return {
+                key: {"labels": self._labels.get(key), **histogram.to_dict()}
+                for key, histogram in self._histograms.items()
+            }
+    
+    def merge_histograms(self, exported: Dict[str, Dict[str, Any]]):
+        """Merge histograms exported by another worker (``export_histograms``)."""
+        with self._metrics_lock:
+            for key, data in exported.items():
+                incoming = Histogram.from_dict(data)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    self._histograms[key] = incoming
+                    if data.get("labels"):
+                        self._labels[key] = data["labels"]
+                else:
+                    histogram.merge(incoming)
     
     # Timer operations
     @contextmanager
@@ -376,47 +535,77 @@ class MetricsCollector:
     def get_all_metrics(self) -> Dict[str, Any]:
         """Get all metrics in a structured format."""
         with self._metrics_lock:
+            self._aggregate()
             return {
                 "uptime_seconds": (datetime.utcnow() - self._start_time).total_seconds(),
                 "counters": dict(self._counters),
                 "gauges": dict(self._gauges),
                 "histograms": {
-                    name: self.get_histogram_stats(name) 
-                    for name in self._histograms.keys()
+                    name: histogram.stats()
+                    for name, histogram in self._histograms.items()
                 }
             }
     
+    @staticmethod
+    def _prometheus_labels(labels: Optional[Dict[str, str]], **extra: str) -> str:
+        """Render ``{k="v",...}`` with Prometheus escaping (empty without labels)."""
+        items = {**(labels or {}), **extra}
+        if not items:
+            return ""
+        escaped = (
+            f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+            for k, v in items.items()
+        )
+        return "{" + ",".join(escaped) + "}"
+    
     def to_prometheus_format(self) -> str:
-        """Export metrics in Prometheus text format."""
+        """Export metrics in Prometheus text format (histograms with cumulative buckets)."""
         lines = []
+        typed = set()
         
-        # Counters
-        for key, value in self._counters.items():
-            lines.append(f"# TYPE {key.split('{')[0]} counter")
-            lines.append(f"{key} {value}")
+        def declare(name: str, metric_type: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {metric_type}")
         
-        # Gauges
-        for key, value in self._gauges.items():
-            lines.append(f"# TYPE {key.split('{')[0]} gauge")
-            lines.append(f"{key} {value}")
-        
-        # Histograms (as summary)
-        for key, values in self._histograms.items():
-            base_name = key.split('{')[0]
-            stats = self.get_histogram_stats(key)
-            lines.append(f"# TYPE {base_name} summary")
-            lines.append(f'{base_name}_count{{{key.split("{")[1] if "{" in key else ""}}} {stats["count"]}')
-            lines.append(f'{base_name}_sum{{{key.split("{")[1] if "{" in key else ""}}} {sum(values)}')
+        with self._metrics_lock:
+            self._aggregate()
+            
+            # Counters
+            for key, value in self._counters.items():
+                base_name = key.split('{')[0]
+                declare(base_name, "counter")
+                lines.append(f"{base_name}{self._prometheus_labels(self._labels.get(key))} {value}")
+            
+            # Gauges
+            for key, value in list(self._gauges.items()):
+                base_name = key.split('{')[0]
+                declare(base_name, "gauge")
+                lines.append(f"{base_name}{self._prometheus_labels(self._labels.get(key))} {value}")
+            
+            # Histograms
+            for key, histogram in self._histograms.items():
+                base_name = key.split('{')[0]
+                labels = self._labels.get(key)
+                declare(base_name, "histogram")
+                for bound, count in histogram.cumulative_buckets():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{base_name}_bucket{self._prometheus_labels(labels, le=le)} {count}")
+                lines.append(f"{base_name}_sum{self._prometheus_labels(labels)} {histogram.sum}")
+                lines.append(f"{base_name}_count{self._prometheus_labels(labels)} {histogram.count}")
         
         return "\n".join(lines)
     
     def reset(self):
         """Reset all metrics."""
         with self._metrics_lock:
+            for buffer in self._buffers:
+                with buffer.lock:
+                    buffer.counters = {}
+                    buffer.observations = {}
             self._counters.clear()
             self._gauges.clear()
             self._histograms.clear()
-            self._timers.clear()
             self._start_time = datetime.utcnow()
 
 
@@ -426,22 +615,27 @@ metrics = MetricsCollector.get_instance()
 
 def track_metrics(name: str, labels: Optional[Dict[str, str]] = None):
     """Decorator to track function call metrics."""
+    # Metric keys are resolved once per decorated function, not per call
+    calls = metrics.bind(f"{name}_calls_total", labels)
+    successes = metrics.bind(f"{name}_success_total", labels)
+    duration = metrics.bind(f"{name}_duration_ms", labels)
+    errors_name = f"{name}_errors_total"
+    
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            metrics.increment(f"{name}_calls_total", labels=labels)
+            calls.increment()
             
-            start = time.time()
+            start = time.perf_counter()
             try:
                 result = func(*args, **kwargs)
-                metrics.increment(f"{name}_success_total", labels=labels)
+                successes.increment()
                 return result
             except Exception as e:
-                metrics.increment(f"{name}_errors_total", labels={**(labels or {}), "error_type": type(e).__name__})
+                metrics.increment(errors_name, labels={**(labels or {}), "error_type": type(e).__name__})
                 raise
             finally:
-                elapsed = (time.time() - start) * 1000
-                metrics.observe(f"{name}_duration_ms", elapsed, labels=labels)
+                duration.observe((time.perf_counter() - start) * 1000)
         
         return wrapper
     return decorator
@@ -464,6 +658,7 @@ class Span:
     status: str = "OK"
     tags: Dict[str, str] = field(default_factory=dict)
     logs: List[Dict[str, Any]] = field(default_factory=list)
+    sampled: bool = True
     
     @property
     def duration_ms(self) -> Optional[float]:
@@ -497,6 +692,11 @@ class Tracer:
     - Timing of operations
     - Error tracking
     
+    Sampling is decided per trace: a root span is kept with probability
+    ``sample_rate`` (default ``TRACE_SAMPLE_RATE``, 1.0) and its children
+    follow. Spans of unsampled traces still propagate context and record
+    status and tags, but are not stored.
+    
     Compatible with OpenTelemetry, Jaeger, Zipkin, etc.
     """
     
@@ -504,12 +704,16 @@ class Tracer:
     _lock = threading.Lock()
     _context = threading.local()
     
-    def __init__(self, service_name: str = "pca-agent"):
+    def __init__(self, service_name: str = "pca-agent", sample_rate: Optional[float] = None):
         self.service_name = service_name
+        self.sample_rate = (
+            sample_rate if sample_rate is not None
+            else float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+        )
+        # Single dict/deque operations are atomic, so recording spans needs no lock
         self._spans: Dict[str, Span] = {}
-        self._completed_spans: List[Span] = []
         self._max_completed_spans = 10000
-        self._spans_lock = threading.Lock()
+        self._completed_spans: deque = deque(maxlen=self._max_completed_spans)
     
     @classmethod
     def get_instance(cls, service_name: str = "pca-agent") -> 'Tracer':
@@ -520,7 +724,7 @@ class Tracer:
     
     def _generate_id(self) -> str:
         """Generate a unique ID for traces/spans."""
-        return uuid.uuid4().hex[:16]
+        return f"{random.getrandbits(64):016x}"
     
     def get_current_span(self) -> Optional[Span]:
         """Get the current active span."""
@@ -535,6 +739,10 @@ class Tracer:
     def start_span(self, operation_name: str, tags: Optional[Dict[str, str]] = None):
         """Start a new span as a context manager."""
         parent_span = self.get_current_span()
+        if parent_span:
+            sampled = parent_span.sampled
+        else:
+            sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
         
         span = Span(
             trace_id=parent_span.trace_id if parent_span else self._generate_id(),
@@ -543,14 +751,14 @@ class Tracer:
             operation_name=operation_name,
             service_name=self.service_name,
             start_time=datetime.utcnow(),
-            tags=tags or {}
+            tags=tags or {},
+            sampled=sampled
         )
         
-        with self._spans_lock:
+        if sampled:
             self._spans[span.span_id] = span
         
         # Set as current span
-        old_span = self.get_current_span()
         self._context.current_span = span
         
         try:
@@ -570,18 +778,13 @@ class Tracer:
         finally:
             span.end_time = datetime.utcnow()
             
-            # Move to completed spans
-            with self._spans_lock:
-                if span.span_id in self._spans:
-                    del self._spans[span.span_id]
+            # Move to completed spans (the deque drops the oldest past its limit)
+            if sampled:
+                self._spans.pop(span.span_id, None)
                 self._completed_spans.append(span)
-                
-                # Trim completed spans
-                if len(self._completed_spans) > self._max_completed_spans:
-                    self._completed_spans = self._completed_spans[-self._max_completed_spans:]
             
             # Restore parent span
-            self._context.current_span = old_span
+            self._context.current_span = parent_span
     
     def add_tag(self, key: str, value: str):
         """Add a tag to the current span."""
@@ -601,33 +804,31 @@ class Tracer:
     
     def get_trace(self, trace_id: str) -> List[Dict[str, Any]]:
         """Get all spans for a trace."""
-        with self._spans_lock:
-            spans = [s for s in self._completed_spans if s.trace_id == trace_id]
-            spans.extend([s for s in self._spans.values() if s.trace_id == trace_id])
+        spans = [s for s in list(self._completed_spans) if s.trace_id == trace_id]
+        spans.extend([s for s in list(self._spans.values()) if s.trace_id == trace_id])
         return [s.to_dict() for s in sorted(spans, key=lambda x: x.start_time)]
     
     def get_recent_traces(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent completed traces."""
-        with self._spans_lock:
-            # Group by trace_id
-            traces = defaultdict(list)
-            for span in self._completed_spans[-limit * 10:]:  # Get more spans to find unique traces
-                traces[span.trace_id].append(span)
-            
-            # Return most recent traces
-            result = []
-            for trace_id, spans in list(traces.items())[-limit:]:
-                root_span = next((s for s in spans if s.parent_span_id is None), spans[0])
-                result.append({
-                    "trace_id": trace_id,
-                    "operation": root_span.operation_name,
-                    "start_time": root_span.start_time.isoformat(),
-                    "duration_ms": root_span.duration_ms,
-                    "status": root_span.status,
-                    "span_count": len(spans)
-                })
-            
-            return result
+        # Group by trace_id
+        traces = defaultdict(list)
+        for span in list(self._completed_spans)[-limit * 10:]:  # Get more spans to find unique traces
+            traces[span.trace_id].append(span)
+        
+        # Return most recent traces
+        result = []
+        for trace_id, spans in list(traces.items())[-limit:]:
+            root_span = next((s for s in spans if s.parent_span_id is None), spans[0])
+            result.append({
+                "trace_id": trace_id,
+                "operation": root_span.operation_name,
+                "start_time": root_span.start_time.isoformat(),
+                "duration_ms": root_span.duration_ms,
+                "status": root_span.status,
+                "span_count": len(spans)
+            })
+        
+        return result
 
 
 # Global tracer
@@ -14,12 +14,15 @@ Author: PCA Agent Team
 """
 
 import asyncio
+import atexit
 import hashlib
 import json
 import os
 import pickle
+import sqlite3
 import threading
 import time
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
@@ -147,6 +150,222 @@ class CacheEntry:
     platform: Optional[str] = None
     business_model: Optional[str] = None
     ttl_hours: int = 168  # 7 days default
+    
+    def is_expired(self, now: Optional[datetime] = None) -> bool:
+        return (now or datetime.now()) - self.timestamp >= timedelta(hours=self.ttl_hours)
+
+
+EmbeddingFunction = Callable[[List[str]], np.ndarray]
+
+# Results of entries loaded from disk are read on first hit
+_UNLOADED = object()
+
+HASH_EMBEDDING_DIM = 128
+
+
+def hash_embedding(texts: List[str], dim: int = HASH_EMBEDDING_DIM) -> np.ndarray:
+    """
+    Hash-based bag-of-words embedding (no model required).
+    
+    Each word contributes the low ``dim`` bits of its SHA-256 digest, weighted
+    by 1 / position; rows are L2-normalized.
+    
+    Returns:
+        float32 array of shape (len(texts), dim)
+    """
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    nbytes = (dim + 7) // 8
+    for row, text in enumerate(texts):
+        words = text.lower().strip().split()
+        if not words:
+            continue
+        # Little-endian bit order of the digest tail == (int(hexdigest, 16) >> j) & 1
+        digests = np.frombuffer(
+            b''.join(hashlib.sha256(w.encode()).digest()[-nbytes:][::-1] for w in words),
+            dtype=np.uint8
+        ).reshape(len(words), nbytes)
+        bits = np.unpackbits(digests, axis=1, bitorder='little')[:, :dim]
+        weights = 1.0 / np.arange(1, len(words) + 1, dtype=np.float32)
+        out[row] = weights @ bits
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers embedding function (model loaded on first use)."""
+    
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+    
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+        return np.asarray(
+            self._model.encode(texts, normalize_embeddings=True, convert_to_numpy=True),
+            dtype=np.float32
+        )
+
+
+def default_embedding_function() -> EmbeddingFunction:
+    """
+    Embedding function for the semantic cache.
+    Uses the local sentence-transformers model named by SEMANTIC_CACHE_EMBEDDING_MODEL
+    when set and installed, otherwise the hash embedding.
+    """
+    model_name = os.getenv('SEMANTIC_CACHE_EMBEDDING_MODEL')
+    if model_name:
+        try:
+            import sentence_transformers  # noqa: F401
+            return SentenceTransformerEmbedder(model_name)
+        except ImportError:
+            logger.warning("sentence-transformers not installed. Using hash embeddings for the semantic cache.")
+    return hash_embedding
+
+
+def _embedding_function_name(fn: EmbeddingFunction) -> str:
+    """Stable identifier of an embedding function (stored with each embedding)."""
+    return getattr(fn, 'model_name', None) or getattr(fn, '__name__', None) or type(fn).__name__
+
+
+class SemanticCacheStore:
+    """
+    SQLite-backed persistent store for SemanticCache entries.
+    
+    One row per entry, upserted by key, so saving writes only what changed.
+    The database runs in WAL mode: several worker processes can share one
+    file, readers never block the writer. Each row carries its own
+    ``expires_at``; expired rows are never loaded and are purged on flush.
+    Results are stored separately from the index columns so startup reads
+    only keys, contexts and embeddings.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._init_database()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _init_database(self) -> None:
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_cache (
+                cache_key TEXT PRIMARY KEY,
+                query_text TEXT NOT NULL,
+                platform TEXT,
+                business_model TEXT,
+                embedding BLOB,
+                embedding_fn TEXT,
+                results BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                ttl_hours REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hit_count INTEGER DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_semantic_cache_expires ON semantic_cache(expires_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_semantic_cache_access ON semantic_cache(last_access)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_semantic_cache_updated ON semantic_cache(updated_at)")
+        conn.commit()
+    
+    _INDEX_COLUMNS = (
+        "cache_key, query_text, platform, business_model, embedding, embedding_fn, "
+        "created_at, ttl_hours, hit_count, updated_at"
+    )
+    
+    def load_index(self, limit: int, now: float) -> List[tuple]:
+        """Unexpired entries without results, least recently used first, at most ``limit``."""
+        rows = self._connect().execute(
+            f"SELECT {self._INDEX_COLUMNS} FROM semantic_cache WHERE expires_at > ? "
+            "ORDER BY last_access DESC LIMIT ?",  # nosec B608
+            (now, limit)
+        ).fetchall()
+        return rows[::-1]
+    
+    def load_updated_since(self, updated_after: float, now: float) -> List[tuple]:
+        """Unexpired entries written (by any process) after ``updated_after``."""
+        return self._connect().execute(
+            f"SELECT {self._INDEX_COLUMNS} FROM semantic_cache "
+            "WHERE updated_at > ? AND expires_at > ? ORDER BY updated_at",  # nosec B608
+            (updated_after, now)
+        ).fetchall()
+    
+    def load_entry(self, key: str, now: float) -> Optional[tuple]:
+        """Index columns of one unexpired entry, or None."""
+        return self._connect().execute(
+            f"SELECT {self._INDEX_COLUMNS} FROM semantic_cache "
+            "WHERE cache_key = ? AND expires_at > ?",  # nosec B608
+            (key, now)
+        ).fetchone()
+    
+    def load_results(self, key: str, now: float) -> Tuple[bool, Any]:
+        """(found, results) of one unexpired entry."""
+        row = self._connect().execute(
+            "SELECT results FROM semantic_cache WHERE cache_key = ? AND expires_at > ?",
+            (key, now)
+        ).fetchone()
+        if row is None:
+            return False, None
+        return True, pickle.loads(row[0])  # nosec B301 - written by this store only
+    
+    def write(self, upserts: List[tuple], touches: List[tuple]) -> None:
+        """
+        Persist changes in one transaction.
+        
+        Args:
+            upserts: (key, query_text, platform, business_model, embedding, embedding_fn,
+                results, created_at, ttl_hours, expires_at, last_access, hit_count, updated_at)
+            touches: (last_access, hit_count, key) of entries read since the last write
+        """
+        conn = self._connect()
+        with conn:
+            if upserts:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO semantic_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    upserts
+                )
+            if touches:
+                conn.executemany(
+                    "UPDATE semantic_cache SET last_access = MAX(last_access, ?), "
+                    "hit_count = MAX(hit_count, ?) WHERE cache_key = ?",
+                    touches
+                )
+    
+    def purge(self, now: float, max_entries: int) -> int:
+        """Delete expired entries and all but the ``max_entries`` most recently used."""
+        conn = self._connect()
+        with conn:
+            deleted = conn.execute("DELETE FROM semantic_cache WHERE expires_at <= ?", (now,)).rowcount
+            deleted += conn.execute(
+                "DELETE FROM semantic_cache WHERE cache_key NOT IN "
+                "(SELECT cache_key FROM semantic_cache ORDER BY last_access DESC LIMIT ?)",
+                (max_entries,)
+            ).rowcount
+        return deleted
+    
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM semantic_cache").fetchone()[0]
+    
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM semantic_cache")
 
 
 class SemanticCache:
@@ -160,9 +379,20 @@ class SemanticCache:
     
     Lookup process:
     1. Embed incoming query (0.01 seconds)
-    2. Compare to cached embeddings (cosine similarity)
+    2. Compare to cached embeddings (one matrix-vector product)
     3. If similarity > 0.85: Return cached results
     4. If not: Query database, cache results
+    
+    Embeddings are L2-normalized rows of a contiguous float32 matrix, so the
+    best match is an argmax over ``matrix @ query``. Entries are keyed by query
+    *and* context (platform, business_model): a lookup only matches entries
+    cached for the same context. Eviction is LRU in O(1).
+    
+    Persistence goes through SemanticCacheStore (``semantic_cache.db`` in
+    cache_dir). Startup loads keys and embeddings only; results are read on
+    first hit. New entries are written by a background flush every
+    ``flush_interval`` seconds (and at exit), which also picks up entries
+    written by other worker processes sharing the same cache_dir.
     """
     
     _instance = None
@@ -172,7 +402,10 @@ class SemanticCache:
                  cache_dir: Optional[str] = None,
                  max_entries: int = 10000,
                  similarity_threshold: float = 0.85,
-                 ttl_hours: int = 168):  # 7 days
+                 ttl_hours: int = 168,  # 7 days
+                 embedding_fn: Optional[EmbeddingFunction] = None,
+                 persist: bool = True,
+                 flush_interval: Optional[float] = None):
         
         self.cache_dir = cache_dir or os.path.join(
             os.path.dirname(__file__), "..", "..", "cache"
@@ -180,10 +413,28 @@ class SemanticCache:
         self.max_entries = max_entries
         self.similarity_threshold = similarity_threshold
         self.ttl_hours = ttl_hours
-        
-        # In-memory cache
-        self._cache: Dict[str, CacheEntry] = {}
-        self._embeddings_cache: Dict[str, List[float]] = {}
+        self.embedding_fn = embedding_fn or default_embedding_function()
+        self._embedding_fn_name = _embedding_function_name(self.embedding_fn)
+        self.flush_interval = flush_interval or float(os.getenv('SEMANTIC_CACHE_FLUSH_SECONDS', '5'))
+        
+        # In-memory cache, least recently used first
+        self._cache: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._rlock = threading.RLock()
+        
+        # Embedding matrix: row i holds the embedding of _row_keys[i]
+        self._matrix: Optional[np.ndarray] = None
+        self._row_keys: List[Optional[str]] = []
+        self._row_contexts = np.zeros(0, dtype=np.int32)
+        self._key_rows: Dict[str, int] = {}
+        self._free_rows: List[int] = []
+        self._context_ids: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+        
+        # Persistence: entries set and entries hit since the last flush
+        self._store: Optional[SemanticCacheStore] = None
+        self._dirty: Dict[str, Tuple[CacheEntry, np.ndarray]] = {}
+        self._touched: Dict[str, CacheEntry] = {}
+        self._synced_at = 0.0
+        self._flush_stop = threading.Event()
         
         # Metrics
         self._metrics = {
@@ -198,7 +449,11 @@ class SemanticCache:
         Path(self.cache_dir).mkdir(parents=True, exist_ok=True)
         
         # Load persistent cache
-        self._load_cache()
+        if persist:
+            self._load_cache()
+        if self._store is not None:
+            threading.Thread(target=self._flush_loop, name="semantic-cache-flush", daemon=True).start()
+            atexit.register(self.close)
     
     @classmethod
     def get_instance(cls, **kwargs) -> 'SemanticCache':
@@ -207,106 +462,134 @@ class SemanticCache:
                 cls._instance = cls(**kwargs)
             return cls._instance
     
+    def _embed(self, text: str) -> np.ndarray:
+        """Normalized float32 embedding of one text."""
+        vector = np.asarray(self.embedding_fn([text]), dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
     def _compute_embedding(self, text: str) -> List[float]:
-        """
-        Compute embedding for text using simple hash-based approach.
-        For production, replace with actual embedding model.
-        """
-        # Simple hash-based pseudo-embedding for demo
-        # In production, use sentence-transformers or OpenAI embeddings
-        import hashlib
-        
-        # Normalize text
-        normalized = text.lower().strip()
-        words = normalized.split()
-        
-        # Create a simple 128-dim pseudo-embedding
-        # Using SHA-256 instead of MD5 (MD5 is cryptographically weak)
-        embedding = [0.0] * 128
-        for i, word in enumerate(words):
-            word_hash = int(hashlib.sha256(word.encode()).hexdigest(), 16)
-            for j in range(128):
-                embedding[j] += ((word_hash >> j) & 1) * (1.0 / (i + 1))
-        
-        # Normalize
-        norm = sum(x*x for x in embedding) ** 0.5
-        if norm > 0:
-            embedding = [x / norm for x in embedding]
-        
-        return embedding
+        """Compute the embedding of text with the configured embedding function."""
+        return self._embed(text).tolist()
     
     def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
         """Compute cosine similarity between two vectors."""
         if len(a) != len(b):
             return 0.0
-        
-        dot_product = sum(x * y for x, y in zip(a, b))
-        norm_a = sum(x * x for x in a) ** 0.5
-        norm_b = sum(x * x for x in b) ** 0.5
-        
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        
-        return dot_product / (norm_a * norm_b)
+        a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+        norm = np.linalg.norm(a) * np.linalg.norm(b)
+        return float(a @ b / norm) if norm > 0 else 0.0
     
-    def _get_cache_key(self, query: str) -> str:
-        """Generate cache key from query."""
+    @staticmethod
+    def _context_fields(context: Optional[Dict]) -> Tuple[Optional[str], Optional[str]]:
+        context = context or {}
+        return context.get('platform'), context.get('business_model')
+    
+    def _get_cache_key(self, query: str, context: Optional[Dict] = None) -> str:
+        """Generate cache key from query and its context."""
         normalized = query.lower().strip()
+        platform, business_model = self._context_fields(context)
+        if platform or business_model:
+            normalized += f"\x00{platform or ''}\x00{business_model or ''}".lower()
         return hashlib.sha256(normalized.encode()).hexdigest()[:32]
     
+    def _context_id(self, context: Optional[Dict]) -> int:
+        fields = tuple(str(v).lower() if v else None for v in self._context_fields(context))
+        if fields not in self._context_ids:
+            self._context_ids[fields] = len(self._context_ids)
+        return self._context_ids[fields]
+    
+    # ---- embedding matrix ----
+    
+    def _add_row(self, key: str, embedding: np.ndarray, context_id: int) -> None:
+        if self._matrix is None or self._matrix.shape[1] != embedding.shape[0]:
+            # First entry (or embedding function changed): start a new matrix
+            self._matrix = np.zeros((min(self.max_entries, 1024) or 1, embedding.shape[0]), dtype=np.float32)
+            self._row_keys, self._key_rows, self._free_rows = [], {}, []
+            self._row_contexts = np.zeros(len(self._matrix), dtype=np.int32)
+        
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._row_keys)
+            self._row_keys.append(None)
+            if row >= len(self._matrix):
+                grown = np.zeros((len(self._matrix) * 2, self._matrix.shape[1]), dtype=np.float32)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+                self._row_contexts = np.concatenate([self._row_contexts, np.zeros(row, dtype=np.int32)])
+        
+        self._matrix[row] = embedding
+        self._row_contexts[row] = context_id
+        self._row_keys[row] = key
+        self._key_rows[key] = row
+    
+    def _remove(self, key: str) -> None:
+        """Drop an entry and free its matrix row."""
+        self._cache.pop(key, None)
+        row = self._key_rows.pop(key, None)
+        if row is not None:
+            self._matrix[row] = 0.0
+            self._row_keys[row] = None
+            self._row_contexts[row] = -1
+            self._free_rows.append(row)
+    
+    def _best_match(self, embedding: np.ndarray, context_id: int) -> Tuple[Optional[str], float]:
+        """Key and similarity of the most similar entry cached for the same context."""
+        used = len(self._row_keys)
+        if self._matrix is None or used == 0 or self._matrix.shape[1] != embedding.shape[0]:
+            return None, 0.0
+        scores = self._matrix[:used] @ embedding
+        scores[self._row_contexts[:used] != context_id] = -np.inf
+        row = int(np.argmax(scores))
+        if not np.isfinite(scores[row]):
+            return None, 0.0
+        return self._row_keys[row], float(scores[row])
+    
+    # ---- public API ----
+    
     def get(self, query: str, context: Optional[Dict] = None) -> Optional[Any]:
         """
         Get cached results for a query.
         
         Args:
             query: The query string
-            context: Optional context (platform, business_model, etc.)
+            context: Optional context (platform, business_model, etc.);
+                only entries cached with the same context match
             
         Returns:
             Cached results if found, None otherwise
         """
-        start_time = time.time()
-        
-        # Check exact match first
-        cache_key = self._get_cache_key(query)
-        if cache_key in self._cache:
-            entry = self._cache[cache_key]
+        with self._rlock:
+            # Check exact match first
+            cache_key = self._get_cache_key(query, context)
+            entry = self._cache.get(cache_key) or self._load_from_store(cache_key)
+            if entry is not None:
+                results = self._entry_results(cache_key, entry)
+                if results is not _UNLOADED and not entry.is_expired():
+                    self._mark_hit(cache_key, entry)
+                    self._metrics['hits'] += 1
+                    self._metrics['time_saved_seconds'] += 4.0  # Assume 4s saved per hit
+                    logger.debug(f"Cache hit (exact): {query[:50]}...")
+                    return results
+                # Expired (or gone from disk), remove
+                self._remove(cache_key)
             
-            # Check TTL
-            if datetime.now() - entry.timestamp < timedelta(hours=entry.ttl_hours):
-                entry.hit_count += 1
-                self._metrics['hits'] += 1
-                self._metrics['time_saved_seconds'] += 4.0  # Assume 4s saved per hit
-                logger.debug(f"Cache hit (exact): {query[:50]}...")
-                return entry.results
-            else:
-                # Expired, remove
-                del self._cache[cache_key]
-        
-        # Check semantic similarity
-        query_embedding = self._compute_embedding(query)
-        
-        best_match = None
-        best_similarity = 0.0
-        
-        for key, entry in self._cache.items():
-            if entry.query_embedding:
-                similarity = self._cosine_similarity(query_embedding, entry.query_embedding)
-                if similarity > best_similarity and similarity >= self.similarity_threshold:
-                    best_similarity = similarity
-                    best_match = entry
-        
-        if best_match:
-            # Check TTL
-            if datetime.now() - best_match.timestamp < timedelta(hours=best_match.ttl_hours):
-                best_match.hit_count += 1
-                self._metrics['semantic_hits'] += 1
-                self._metrics['time_saved_seconds'] += 4.0
-                logger.debug(f"Cache hit (semantic, sim={best_similarity:.2f}): {query[:50]}...")
-                return best_match.results
-        
-        self._metrics['misses'] += 1
-        return None
+            # Check semantic similarity
+            best_key, best_similarity = self._best_match(self._embed(query), self._context_id(context))
+            if best_key is not None and best_similarity >= self.similarity_threshold:
+                best_match = self._cache[best_key]
+                results = self._entry_results(best_key, best_match)
+                if results is not _UNLOADED and not best_match.is_expired():
+                    self._mark_hit(best_key, best_match)
+                    self._metrics['semantic_hits'] += 1
+                    self._metrics['time_saved_seconds'] += 4.0
+                    logger.debug(f"Cache hit (semantic, sim={best_similarity:.2f}): {query[:50]}...")
+                    return results
+                self._remove(best_key)
+            
+            self._metrics['misses'] += 1
+            return None
     
     def set(self, query: str, results: Any, 
             context: Optional[Dict] = None,
@@ -317,74 +600,179 @@ class SemanticCache:
         Args:
             query: The query string
             results: Results to cache
-            context: Optional context metadata
+            context: Optional context metadata (part of the cache key)
             ttl_hours: Optional custom TTL
         """
-        # Evict if at capacity
-        if len(self._cache) >= self.max_entries:
-            self._evict_lru()
-        
-        cache_key = self._get_cache_key(query)
-        embedding = self._compute_embedding(query)
-        
+        embedding = self._embed(query)
+        platform, business_model = self._context_fields(context)
         entry = CacheEntry(
-            query_embedding=embedding,
+            query_embedding=None,  # held in the embedding matrix
             query_text=query,
             results=results,
             timestamp=datetime.now(),
             hit_count=0,
-            platform=context.get('platform') if context else None,
-            business_model=context.get('business_model') if context else None,
+            platform=platform,
+            business_model=business_model,
             ttl_hours=ttl_hours or self.ttl_hours
         )
         
-        self._cache[cache_key] = entry
+        with self._rlock:
+            cache_key = self._get_cache_key(query, context)
+            self._remove(cache_key)
+            
+            # Evict if at capacity
+            while len(self._cache) >= self.max_entries:
+                self._evict_lru()
+            
+            self._cache[cache_key] = entry
+            self._add_row(cache_key, embedding, self._context_id(context))
+            if self._store is not None:
+                self._dirty[cache_key] = (entry, embedding)
         logger.debug(f"Cached: {query[:50]}...")
     
     def _evict_lru(self) -> None:
-        """Evict least recently used entries."""
+        """Evict the least recently used entry."""
         if not self._cache:
             return
-        
-        # Sort by hit count and timestamp (LRU)
-        sorted_entries = sorted(
-            self._cache.items(),
-            key=lambda x: (x[1].hit_count, x[1].timestamp)
-        )
-        
-        # Remove bottom 10%
-        to_remove = max(1, len(sorted_entries) // 10)
-        for key, _ in sorted_entries[:to_remove]:
-            del self._cache[key]
-            self._metrics['evictions'] += 1
-        
-        logger.info(f"Evicted {to_remove} cache entries")
+        key = next(iter(self._cache))
+        self._remove(key)
+        self._metrics['evictions'] += 1
+        logger.debug(f"Evicted cache entry {key}")
+    
+    def _mark_hit(self, key: str, entry: CacheEntry) -> None:
+        entry.hit_count += 1
+        self._cache.move_to_end(key)
+        if self._store is not None:
+            self._touched[key] = entry
+    
+    def _entry_results(self, key: str, entry: CacheEntry) -> Any:
+        """Results of an entry, read from the store on first access (_UNLOADED if gone)."""
+        if entry.results is _UNLOADED and self._store is not None:
+            try:
+                found, results = self._store.load_results(key, time.time())
+            except Exception as e:
+                logger.warning(f"Could not read cached results: {e}")
+                found, results = False, None
+            if found:
+                entry.results = results
+        return entry.results
+    
+    def _load_from_store(self, key: str) -> Optional[CacheEntry]:
+        """Entry written to the store by another process since the last sync."""
+        if self._store is None:
+            return None
+        try:
+            row = self._store.load_entry(key, time.time())
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read semantic cache store: {e}")
+            return None
+        if row is None:
+            return None
+        self._add_stored_entries([row])
+        return self._cache.get(key)
+    
+    def _add_stored_entries(self, rows: List[tuple]) -> None:
+        """Add entries read from the store; their results stay on disk until first hit."""
+        dim = self._matrix.shape[1] if self._matrix is not None else None
+        embeddings: Dict[int, np.ndarray] = {}
+        stale = []
+        for i, row in enumerate(rows):
+            blob, fn_name = row[4], row[5]
+            embedding = np.frombuffer(blob, dtype=np.float32) if blob else None
+            if embedding is None or fn_name != self._embedding_fn_name or (dim and len(embedding) != dim):
+                stale.append(i)
+            else:
+                embeddings[i] = embedding
+        if stale:
+            # Stored with another embedding function: re-embed in one batch
+            fresh = np.asarray(self.embedding_fn([rows[i][1] for i in stale]), dtype=np.float32)
+            norms = np.linalg.norm(fresh, axis=1, keepdims=True)
+            np.divide(fresh, norms, out=fresh, where=norms > 0)
+            embeddings.update(zip(stale, fresh))
+        
+        for i, (key, query_text, platform, business_model, _, _, created_at,
+                ttl_hours, hit_count, updated_at) in enumerate(rows):
+            self._synced_at = max(self._synced_at, updated_at)
+            if key in self._cache:
+                continue
+            while len(self._cache) >= self.max_entries:
+                self._evict_lru()
+            self._cache[key] = CacheEntry(
+                query_embedding=None,
+                query_text=query_text,
+                results=_UNLOADED,
+                timestamp=datetime.fromtimestamp(created_at),
+                hit_count=hit_count,
+                platform=platform,
+                business_model=business_model,
+                ttl_hours=ttl_hours
+            )
+            context = {'platform': platform, 'business_model': business_model}
+            self._add_row(key, embeddings[i], self._context_id(context))
     
     def _load_cache(self) -> None:
-        """Load cache from disk."""
-        cache_file = os.path.join(self.cache_dir, "semantic_cache.pkl")
+        """Open the persistent store and load the index of unexpired entries."""
         try:
-            if os.path.exists(cache_file):
-                with open(cache_file, 'rb') as f:
-                    data = pickle.load(f)  # nosec B301 B403
-                    self._cache = data.get('cache', {})
-                    self._metrics = data.get('metrics', self._metrics)
-                logger.info(f"Loaded {len(self._cache)} cache entries from disk")
-        except Exception as e:
+            self._store = SemanticCacheStore(os.path.join(self.cache_dir, "semantic_cache.db"))
+            rows = self._store.load_index(self.max_entries, time.time())
+            with self._rlock:
+                self._add_stored_entries(rows)
+            logger.info(f"Loaded {len(self._cache)} cache entries from disk")
+        except sqlite3.Error as e:
             logger.warning(f"Could not load cache: {e}")
+            self._store = None
     
-    def save_cache(self) -> None:
-        """Save cache to disk."""
-        cache_file = os.path.join(self.cache_dir, "semantic_cache.pkl")
+    def flush(self) -> None:
+        """
+        Write entries set or hit since the last flush, purge expired entries
+        and load entries added by other processes.
+        """
+        if self._store is None:
+            return
+        with self._rlock:
+            dirty, self._dirty = self._dirty, {}
+            touched, self._touched = self._touched, {}
+        
+        now = time.time()
+        upserts = []
+        for key, (entry, embedding) in dirty.items():
+            try:
+                results = pickle.dumps(entry.results)
+            except Exception as e:
+                logger.debug(f"Not persisting unpicklable cache entry {key}: {e}")
+                continue
+            created_at = entry.timestamp.timestamp()
+            upserts.append((
+                key, entry.query_text, entry.platform, entry.business_model,
+                embedding.astype(np.float32).tobytes(), self._embedding_fn_name, results,
+                created_at, entry.ttl_hours, created_at + entry.ttl_hours * 3600,
+                now, entry.hit_count, now
+            ))
+        touches = [(now, entry.hit_count, key) for key, entry in touched.items() if key not in dirty]
+        
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump({  # nosec B301 B403
-                    'cache': self._cache,
-                    'metrics': self._metrics
-                }, f)
-            logger.info(f"Saved {len(self._cache)} cache entries to disk")
-        except Exception as e:
-            logger.warning(f"Could not save cache: {e}")
+            self._store.write(upserts, touches)
+            purged = self._store.purge(now, self.max_entries)
+            rows = self._store.load_updated_since(self._synced_at, now)
+            with self._rlock:
+                self._add_stored_entries(rows)
+            if upserts or purged:
+                logger.debug(f"Semantic cache flush: {len(upserts)} written, {purged} purged")
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Could not flush semantic cache: {e}")
+    
+    def _flush_loop(self) -> None:
+        while not self._flush_stop.wait(self.flush_interval):
+            self.flush()
+    
+    def save_cache(self) -> None:
+        """Save cache to disk (flushes pending changes)."""
+        self.flush()
+    
+    def close(self) -> None:
+        """Stop the background flush and write pending changes."""
+        self._flush_stop.set()
+        self.flush()
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get cache metrics."""
@@ -400,7 +788,18 @@ class SemanticCache:
     
     def clear(self) -> None:
         """Clear all cache entries."""
-        self._cache.clear()
+        with self._rlock:
+            self._cache.clear()
+            self._dirty.clear()
+            self._touched.clear()
+            self._matrix = None
+            self._row_keys, self._key_rows, self._free_rows = [], {}, []
+            self._row_contexts = np.zeros(0, dtype=np.int32)
+            if self._store is not None:
+                try:
+                    self._store.clear()
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not clear semantic cache store: {e}")
         logger.info("Cache cleared")
 
 
@@ -1337,14 +1736,14 @@ def parallel_execute(tasks: List[Tuple[Callable, tuple, dict]]) -> List[Any]:
     return get_optimizer().parallel.execute_parallel(tasks)
 
 
-def cache_get(query: str) -> Optional[Any]:
+def cache_get(query: str, context: Optional[Dict] = None) -> Optional[Any]:
     """Get from semantic cache."""
-    return get_optimizer().cache.get(query)
+    return get_optimizer().cache.get(query, context)
 
 
-def cache_set(query: str, results: Any) -> None:
+def cache_set(query: str, results: Any, context: Optional[Dict] = None) -> None:
     """Set in semantic cache."""
-    get_optimizer().cache.set(query, results)
+    get_optimizer().cache.set(query, results, context)
 
 
 def bundle_queries(metrics: Dict, issues: List[str] = None, platforms: List[str] = None) -> List[str]:
@@ -0,0 +1,300 @@
+"""
+Mergeable Quantile Sketches and Cumulative Histograms
+
+``DDSketch`` keeps values in logarithmic buckets: bucket ``k`` holds the
+values in ``(gamma^(k-1), gamma^k]`` with ``gamma = (1 + a) / (1 - a)``, so
+any quantile it returns is within relative error ``a`` of the exact one.
+Adding a value is O(1) (one log and a list increment), memory is bounded by
+``max_bins`` per sign (the lowest buckets are collapsed beyond that), and two
+sketches with the same accuracy merge by adding their bucket counts, which
+lets per-worker sketches be combined (``to_dict`` / ``from_dict`` carry them
+across processes).
+
+``Histogram`` pairs a sketch with fixed Prometheus-style ``le`` buckets for
+exposition; ``MetricsCollector`` (``src.utils.observability``) stores one per
+metric key.
+"""
+
+import math
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# ~1000 bins cover 1e-4 .. 1e5 at 1% accuracy
+DEFAULT_MAX_BINS = 2048
+
+# Values closer to 0 than this are counted as zero
+MIN_INDEXABLE_VALUE = 1e-9
+
+# Upper bounds shared by second- and millisecond-valued metrics
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0,
+    100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0, 30000.0, 60000.0,
+)
+
+
+class _DenseStore:
+    """Contiguous bucket counts from ``offset``; collapses the lowest keys past ``max_bins``."""
+
+    __slots__ = ("bins", "offset", "count", "max_bins")
+
+    def __init__(self, max_bins: int = DEFAULT_MAX_BINS):
+        self.bins: List[int] = []
+        self.offset = 0
+        self.count = 0
+        self.max_bins = max_bins
+
+    def add(self, key: int, count: int = 1):
+        if not self.bins:
+            self.bins = [0]
+            self.offset = key
+        elif key < self.offset or key >= self.offset + len(self.bins):
+            key = self._extend(key)
+        self.bins[key - self.offset] += count
+        self.count += count
+
+    def _extend(self, key: int) -> int:
+        """Grow the range to include ``key``; returns the key to count it under."""
+        top = self.offset + len(self.bins) - 1
+        low, high = min(key, self.offset), max(key, top)
+
+        if high - low + 1 > self.max_bins:
+            low = high - self.max_bins + 1
+            if self.offset < low:
+                # Existing buckets below the new range merge into its lowest bucket
+                cut = min(low - self.offset, len(self.bins))
+                collapsed = sum(self.bins[:cut])
+                self.bins = self.bins[cut:] or [0]
+                self.offset = low
+                self.bins[0] += collapsed
+            key = max(key, low)
+
+        top = self.offset + len(self.bins) - 1
+        if low < self.offset:
+            self.bins[:0] = [0] * (self.offset - low)
+            self.offset = low
+        if high > top:
+            self.bins.extend([0] * (high - top))
+        return key
+
+    def key_at_rank(self, rank: int, descending: bool = False) -> int:
+        """Key of the bucket holding the ``rank``-th (0-based) value."""
+        bins = reversed(self.bins) if descending else self.bins
+        cumulative = list(accumulate(bins))
+        index = min(bisect_left(cumulative, rank + 1), len(cumulative) - 1)
+        return self.offset + (len(self.bins) - 1 - index if descending else index)
+
+    def merge(self, other: "_DenseStore"):
+        for index, count in enumerate(other.bins):
+            if count:
+                self.add(other.offset + index, count)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"offset": self.offset, "bins": list(self.bins)}
+
+    def load(self, data: Dict[str, Any]):
+        for index, count in enumerate(data.get("bins", [])):
+            if count:
+                self.add(data["offset"] + index, count)
+
+
+class DDSketch:
+    """
+    Fixed-memory, mergeable quantile sketch with relative-error guarantees.
+
+    Quantile ``q`` of ``n`` values is the value at 0-based rank ``int(q * n)``
+    (clamped to the last value), the convention of the list-based percentiles
+    it replaces.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+        max_bins: int = DEFAULT_MAX_BINS,
+    ):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be in (0, 1), got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(self.gamma)
+        self.max_bins = max_bins
+        self._positive = _DenseStore(max_bins)
+        self._negative = _DenseStore(max_bins)
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def key(self, value: float) -> int:
+        """Bucket key of a positive value."""
+        return math.ceil(math.log(value) * self._multiplier)
+
+    def value(self, key: int) -> float:
+        """Representative value of a bucket (within the relative accuracy of all its values)."""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        """Add ``value`` ``count`` times."""
+        if value > MIN_INDEXABLE_VALUE:
+            self._positive.add(self.key(value), count)
+        elif value < -MIN_INDEXABLE_VALUE:
+            self._negative.add(self.key(-value), count)
+        else:
+            self.zero_count += count
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_bins(self, bins: Dict[int, int]):
+        """Add pre-bucketed positive counts (``key -> count``), e.g. from a SQL rollup.
+
+        Only the count is known for these values, so ``sum``/``min``/``max``
+        are left untouched and quantiles are not clamped by them.
+        """
+        for key, count in bins.items():
+            if count:
+                self._positive.add(int(key), int(count))
+                self.count += int(count)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated ``q``-quantile (0 <= q <= 1); None when the sketch is empty."""
+        if self.count == 0:
+            return None
+        rank = min(int(q * self.count), self.count - 1)
+
+        if rank < self._negative.count:
+            # Most negative first: negative buckets from the highest key down
+            estimate = -self.value(self._negative.key_at_rank(rank, descending=True))
+        elif rank < self._negative.count + self.zero_count:
+            estimate = 0.0
+        else:
+            rank -= self._negative.count + self.zero_count
+            estimate = self.value(self._positive.key_at_rank(rank))
+
+        if self.min <= self.max:
+            estimate = min(max(estimate, self.min), self.max)
+        return estimate
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[float, Optional[float]]:
+        return {q: self.quantile(q) for q in qs}
+
+    @property
+    def avg(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def merge(self, other: "DDSketch"):
+        """Add another sketch's values into this one (same accuracy required)."""
+        if not math.isclose(self.gamma, other.gamma):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self._positive.merge(other._positive)
+        self._negative.merge(other._negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> "DDSketch":
+        return DDSketch.from_dict(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable state, for merging across processes."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "zero_count": self.zero_count,
+            "positive": self._positive.to_dict(),
+            "negative": self._negative.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"], data.get("max_bins", DEFAULT_MAX_BINS))
+        sketch._positive.load(data["positive"])
+        sketch._negative.load(data["negative"])
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if data.get("min") is not None:
+            sketch.min = data["min"]
+        if data.get("max") is not None:
+            sketch.max = data["max"]
+        return sketch
+
+
+class Histogram:
+    """A quantile sketch plus cumulative ``le`` bucket counts for Prometheus exposition."""
+
+    __slots__ = ("bounds", "bucket_counts", "sketch")
+
+    def __init__(
+        self,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    ):
+        self.bounds: Tuple[float, ...] = tuple(sorted(float(b) for b in buckets))
+        # One count per bound, plus the +Inf overflow
+        self.bucket_counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.sketch = DDSketch(relative_accuracy)
+
+    def observe(self, value: float, count: int = 1):
+        """Record ``value`` (``count`` times, e.g. the weight of a sampled observation)."""
+        self.bucket_counts[bisect_left(self.bounds, value)] += count
+        self.sketch.add(value, count)
+
+    @property
+    def count(self) -> int:
+        return self.sketch.count
+
+    @property
+    def sum(self) -> float:
+        return self.sketch.sum
+
+    def cumulative_buckets(self) -> List[Tuple[float, int]]:
+        """``(le, count of values <= le)`` pairs, ending with ``(inf, count)``."""
+        return list(zip(self.bounds + (math.inf,), accumulate(self.bucket_counts)))
+
+    def stats(self) -> Dict[str, float]:
+        """count/min/max/avg and p50/p95/p99, all read from the sketch."""
+        sketch = self.sketch
+        if sketch.count == 0:
+            return {"count": 0, "min": 0, "max": 0, "avg": 0, "p50": 0, "p95": 0, "p99": 0}
+        return {
+            "count": sketch.count,
+            "min": sketch.min,
+            "max": sketch.max,
+            "avg": sketch.avg,
+            "p50": sketch.quantile(0.5),
+            "p95": sketch.quantile(0.95),
+            "p99": sketch.quantile(0.99),
+        }
+
+    def merge(self, other: "Histogram"):
+        if self.bounds != other.bounds:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.bucket_counts = [a + b for a, b in zip(self.bucket_counts, other.bucket_counts)]
+        self.sketch.merge(other.sketch)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bounds": list(self.bounds),
+            "bucket_counts": list(self.bucket_counts),
+            "sketch": self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Histogram":
+        histogram = cls(data["bounds"], data["sketch"]["relative_accuracy"])
+        histogram.bucket_counts = list(data["bucket_counts"])
+        histogram.sketch = DDSketch.from_dict(data["sketch"])
+        return histogram
@@ -229,7 +229,7 @@ def mock_analytics_services():
     """Mock out all LLM-based analytics services to prevent API calls."""
     with patch("src.analytics.auto_insights.MediaAnalyticsExpert") as MockExpert, \
          patch("src.api.v1.campaigns.MediaAnalyticsExpert") as MockExpertAPI, \
-         patch("src.api.v1.campaigns.query_engine") as MockQueryEngineAPI, \
+         patch("src.api.v1.campaigns.query_sessions") as MockQueryEngineAPI, \
          patch("src.api.v1.intelligence.NaturalLanguageQueryEngine") as MockIntelligenceQueryEngine, \
          patch("src.query_engine.nl_to_sql.NaturalLanguageQueryEngine") as MockQueryEngine, \
          patch("src.agents.reasoning_agent.ReasoningAgent") as MockReasoningAgent, \
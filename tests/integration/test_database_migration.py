@@ -111,12 +111,10 @@ class TestDatabaseMigration:
     
     def test_parquet_file_exists_for_campaigns(self):
         """Test that campaign data is stored in Parquet, not SQLite."""
-        parquet_file = Path("data/campaigns.parquet")
-        
-        # If we have campaign data, it should be in Parquet
+        # If we have campaign data, it should be in the partitioned Parquet dataset
         duckdb = get_duckdb_manager()
         if duckdb.has_data():
-            assert parquet_file.exists(), \
+            assert any(duckdb.dataset_dir.rglob("*.parquet")), \
                 "Campaign data should be in Parquet format"
 
 
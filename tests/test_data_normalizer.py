@@ -42,6 +42,9 @@ normalize_numeric_column = data_normalizer.normalize_numeric_column
 normalize_dataframe = data_normalizer.normalize_dataframe
 validate_data_quality = data_normalizer.validate_data_quality
 get_column_mapping_report = data_normalizer.get_column_mapping_report
+sample_column = data_normalizer.sample_column
+profile_column = data_normalizer.profile_column
+get_column_types = data_normalizer.get_column_types
 
 
 # =============================================================================
@@ -416,6 +419,82 @@ class TestDataFrameNormalization:
         assert column_types['col2'] == 'numeric'
 
 
+# =============================================================================
+# SAMPLED TYPE DETECTION TESTS
+# =============================================================================
+
+class TestSampledTypeDetection:
+    """Tests for the shared, sample-based column profiles."""
+    
+    def test_sample_is_bounded_and_stratified(self):
+        """Head, tail and middle rows are sampled, never the whole column."""
+        series = pd.Series(range(100_000))
+        sample = sample_column(series)
+        
+        assert len(sample) == 500
+        assert sample.iloc[0] == 0 and sample.iloc[-1] == 99_999
+        assert sample.between(100, 99_899).sum() == 300
+        assert sample.is_monotonic_increasing
+    
+    def test_detection_looks_past_the_head(self):
+        """A column whose first rows are placeholders is still detected from the rest of the file."""
+        values = ['n/a'] * 2_000 + ['2024-01-15'] * 48_000
+        profile = profile_column(pd.Series(values))
+        
+        assert profile.sample_size == 500
+        assert 0.7 < profile.date_pattern_ratio < 1.0
+    
+    def test_sparse_column_is_not_reported_empty(self):
+        """Values missed by the sample are still found."""
+        series = pd.Series([None] * 50_000 + ['$5'] + [None] * 50_000)
+        
+        assert profile_column(series).has_values
+        assert detect_column_type(series) == 'currency'
+    
+    def test_cached_profiles_are_reused(self):
+        """Cached profiles are reused and redone only for changed columns."""
+        df = pd.DataFrame({'Spend_USD': ['$1,000', '$2,000'], 'Platform': ['Google', 'Meta']})
+        first = get_column_types(df)
+        
+        assert not df.attrs
+        
+        df['Spend_USD'] = [1000.0, 2000.0]
+        second = get_column_types(df, first)
+        assert second['Platform'] is first['Platform']
+        assert second['Spend_USD'].dtype_kind == 'numeric'
+    
+    def test_precomputed_profiles_are_not_recomputed(self, monkeypatch):
+        """Consumers handed the upload's profiles do not profile again."""
+        df = pd.DataFrame({'Spend_USD': ['$1,000', '$2,000'], 'Date': ['2024-01-01', '2024-01-02']})
+        profiles = get_column_types(df)
+        
+        def fail(series):
+            raise AssertionError(f"column {series.name} profiled again")
+        monkeypatch.setattr(data_normalizer, 'profile_column', fail)
+        
+        _, column_types = normalize_dataframe(df, column_types=profiles)
+        assert column_types == {'Spend_USD': 'currency', 'Date': 'date'}
+        assert validate_data_quality(df, profiles)['column_stats']['Date']['detected_type'] == 'date'
+        report = get_column_mapping_report(df, ['Spend', 'Date'], column_types=profiles)
+        assert len(report) == 2
+    
+    def test_vectorized_numeric_matches_scalar_cleaning(self):
+        """normalize_numeric_column agrees with clean_numeric_value."""
+        values = ['$1,234.56', '(100)', '($1,234.56)', '5%', '12,50', '$ 100', '', 'abc', None, 7]
+        result = normalize_numeric_column(pd.Series(values, dtype=object))
+        expected = [clean_numeric_value(v) for v in values]
+        
+        for got, want in zip(result, expected):
+            assert (pd.isna(got) and want is None) or got == pytest.approx(want)
+    
+    def test_vectorized_dates_fall_back_per_value(self):
+        """A column mixing formats is parsed column-wise."""
+        result = normalize_date_column(pd.Series(['2024-01-15', '2024-01-16', '15.01.2024', '', 'soon']))
+        
+        assert result.iloc[:3].tolist() == [datetime(2024, 1, 15), datetime(2024, 1, 16), datetime(2024, 1, 15)]
+        assert result.iloc[3:].isna().all()
+
+
 # =============================================================================
 # DATA QUALITY VALIDATION TESTS
 # =============================================================================
@@ -9,6 +9,7 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 import os
 from datetime import datetime, date
+import numpy as np
 import pandas as pd
 import tempfile
 from pathlib import Path
@@ -276,6 +277,479 @@ class TestDuckDBManager:
             pass
 
 
+class TestDuckDBPartitionedStorage:
+    """Tests for the hive-partitioned Parquet layout and incremental appends."""
+    
+    @pytest.fixture
+    def manager(self, tmp_path):
+        from src.database.duckdb_manager import DuckDBManager
+        return DuckDBManager(data_dir=str(tmp_path))
+    
+    @pytest.fixture
+    def campaign_df(self):
+        return pd.DataFrame({
+            'Date': pd.to_datetime(['2024-01-05', '2024-01-20', '2024-02-03', '2024-02-10']),
+            'Platform': ['Google Ads', 'Meta', 'Google Ads', 'Meta'],
+            'Spend': [100.0, 200.0, 300.0, 400.0],
+            'Clicks': [10, 20, 30, 40],
+        })
+    
+    def test_save_writes_month_platform_partitions(self, manager, campaign_df):
+        """Test save_campaigns writes one directory per month x platform."""
+        assert manager.save_campaigns(campaign_df) == 4
+        
+        partitions = {
+            p.parent.relative_to(manager.dataset_dir).as_posix()
+            for p in manager.dataset_dir.rglob("*.parquet")
+        }
+        assert partitions == {
+            'month=2024-01/platform=Google_Ads',
+            'month=2024-01/platform=Meta',
+            'month=2024-02/platform=Google_Ads',
+            'month=2024-02/platform=Meta',
+        }
+        assert manager.get_total_count() == 4
+    
+    def test_append_inserts_into_persistent_table(self, manager, campaign_df):
+        """Test append writes only new files and INSERTs into the campaigns table."""
+        manager.save_campaigns(campaign_df)
+        files_before = set(manager.dataset_dir.rglob("*.parquet"))
+        
+        new_rows = campaign_df.head(1).assign(Spend=50.0)
+        with patch.object(manager, 'save_campaigns') as mock_save:
+            total = manager.append_campaigns(new_rows)
+        
+        mock_save.assert_not_called()
+        assert total == 5
+        assert len(set(manager.dataset_dir.rglob("*.parquet")) - files_before) == 1
+        with manager.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM campaigns").fetchone()[0] == 5
+            assert conn.execute("SELECT SUM(Spend) FROM campaigns").fetchone()[0] == 1050.0
+    
+    def test_append_with_new_column_rebuilds_table(self, manager, campaign_df):
+        """Test schema drift on append falls back to a table rebuild."""
+        manager.save_campaigns(campaign_df)
+        manager.append_campaigns(campaign_df.head(2).assign(Revenue=[1.0, 2.0]))
+        
+        with manager.connection() as conn:
+            cols = conn.execute("DESCRIBE campaigns").df()['column_name'].tolist()
+            assert 'Revenue' in cols
+            assert conn.execute("SELECT COUNT(*) FROM campaigns").fetchone()[0] == 6
+    
+    def test_compact_merges_part_files(self, manager, campaign_df):
+        """Test compaction leaves one file per partition without losing rows."""
+        manager.save_campaigns(campaign_df)
+        manager.append_campaigns(campaign_df)
+        manager.append_campaigns(campaign_df)
+        
+        stats = manager.compact()
+        
+        assert stats['files_before'] == 12
+        assert stats['files_after'] == 4
+        assert manager.get_total_count() == 12
+    
+    def test_legacy_single_file_is_migrated(self, tmp_path, campaign_df):
+        """Test a legacy campaigns.parquet is imported into an empty dataset once."""
+        from src.database.duckdb_manager import DuckDBManager
+        campaign_df.to_parquet(tmp_path / "campaigns.parquet", index=False)
+        
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        assert not manager.has_data()
+        
+        assert manager.migrate_legacy_file()
+        assert manager.get_total_count() == 4
+        assert not list(manager.dataset_dir.glob("*.parquet"))
+        # The file stays in place but is not imported again
+        assert (tmp_path / "campaigns.parquet").exists()
+        assert not manager.migrate_legacy_file()
+        manager.compact()
+        assert manager.get_total_count() == 4
+    
+    def test_interrupted_compaction_never_duplicates_rows(self, manager, campaign_df):
+        """Test compaction interrupted at either step is rolled back or forward."""
+        from src.database.duckdb_manager import COMPACTING_SUFFIX
+        manager.save_campaigns(campaign_df)
+        manager.append_campaigns(campaign_df)
+        
+        part_dir = next(manager.dataset_dir.rglob("*.parquet")).parent
+        inputs = sorted(part_dir.glob("*.parquet"))
+        merged = part_dir / "part-merged.parquet.tmp"
+        pd.concat([pd.read_parquet(f) for f in inputs]).to_parquet(merged, index=False)
+        # Inputs hidden, merge not yet published: rolled back
+        inputs[0].rename(inputs[0].with_name(inputs[0].name + COMPACTING_SUFFIX))
+        manager.compact()
+        assert sum(len(pd.read_parquet(f)) for f in manager.dataset_dir.rglob("*.parquet")) == 8
+        
+        # Merge published, inputs not yet removed: rolled forward
+        inputs = sorted(part_dir.glob("*.parquet"))
+        pd.read_parquet(inputs[0]).to_parquet(part_dir / "part-merged.parquet", index=False)
+        inputs[0].rename(inputs[0].with_name(inputs[0].name + COMPACTING_SUFFIX))
+        manager.compact()
+        assert not list(manager.dataset_dir.rglob(f"*{COMPACTING_SUFFIX}"))
+        assert sum(len(pd.read_parquet(f)) for f in manager.dataset_dir.rglob("*.parquet")) == 8
+
+
+class TestDuckDBAggregation:
+    """Tests for SQL push-down aggregation."""
+    
+    @pytest.fixture
+    def manager(self, tmp_path):
+        from src.database.duckdb_manager import DuckDBManager
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        manager.save_campaigns(pd.DataFrame({
+            'Date': ['2024-01-05', '2024-01-20', '2024-02-03', '02/10/2024', None],
+            'Platform': ['Google', 'Meta', 'Google', None, 'Meta'],
+            'Spend': [100.0, None, 300.0, 400.0, 50.0],
+            'Total Spent': [999.0, 200.0, None, None, None],
+            'Clicks': [10, 20, 30, 40, 5],
+        }))
+        return manager
+    
+    def test_aggregate_coalesces_alias_columns(self, manager):
+        """Test metrics coalesce their alias columns per row before summing."""
+        result = manager.aggregate({'spend': ['Spend', 'Total Spent'], 'clicks': ['Clicks']})
+        
+        row = result.iloc[0]
+        assert row['spend'] == 1050.0
+        assert row['clicks'] == 105
+        assert row['row_count'] == 5
+    
+    def test_aggregate_group_by_drops_null_keys(self, manager):
+        """Test dimension groups exclude NULL keys and come back ordered."""
+        result = manager.aggregate({'spend': ['Spend']}, group_by={'platform': 'Platform'})
+        
+        assert result['platform'].tolist() == ['Google', 'Meta']
+        assert result['spend'].tolist() == [400.0, 50.0]
+    
+    def test_aggregate_month_grain_and_date_range(self, manager):
+        """Test date parsing, month grouping and inclusive date bounds."""
+        result = manager.aggregate(
+            {'clicks': ['Clicks']},
+            date_column='Date',
+            start_date='2024-01-20',
+            end_date='2024-02-10',
+            date_grain='month'
+        )
+        
+        assert result['month'].tolist() == ['2024-01', '2024-02']
+        assert result['clicks'].tolist() == [20, 70]
+    
+    def test_aggregate_filters_and_missing_metric(self, manager):
+        """Test filters apply and metrics without source columns are zero."""
+        result = manager.aggregate({'revenue': [], 'clicks': ['Clicks']}, filters={'Platform': 'Google,Meta'})
+        
+        assert result.iloc[0]['revenue'] == 0
+        assert result.iloc[0]['clicks'] == 65
+    
+    def test_get_date_bounds(self, manager):
+        """Test min/max parsed dates for filtered rows."""
+        assert manager.get_date_bounds('Date') == (date(2024, 1, 5), date(2024, 2, 10))
+        assert manager.get_date_bounds('Date', filters={'Platform': 'Meta'}) == (date(2024, 1, 20), date(2024, 1, 20))
+    
+    def test_get_aggregated_data_without_optional_columns(self, tmp_path):
+        """Test default metrics only reference columns that exist."""
+        from src.database.duckdb_manager import DuckDBManager
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        manager.save_campaigns(pd.DataFrame({'Funnel': ['Upper', 'Lower'], 'Spend': [10.0, 30.0], 'Clicks': [1, 3]}))
+        
+        result = manager.get_aggregated_data(group_by='Funnel')
+        
+        assert result['name'].tolist() == ['Lower', 'Upper']
+        assert result['cpc'].tolist() == [10.0, 10.0]
+
+
+class TestDuckDBConnectionPool:
+    """Tests for the shared connection and per-request cursors."""
+    
+    def test_settings_from_environment(self, tmp_path, monkeypatch):
+        """Test threads/memory budget are configurable and applied to the shared connection."""
+        from src.database.duckdb_manager import DuckDBManager
+        monkeypatch.setenv('DUCKDB_THREADS', '2')
+        monkeypatch.setenv('DUCKDB_MEMORY_LIMIT', '512MB')
+        
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        
+        with manager.connection() as conn:
+            assert conn.execute("SELECT current_setting('threads')").fetchone()[0] == 2
+            assert 'MiB' in conn.execute("SELECT current_setting('memory_limit')").fetchone()[0]
+        manager.close()
+    
+    def test_cursors_share_one_connection(self, tmp_path):
+        """Test concurrent requests get cursors on the same warmed connection."""
+        from concurrent.futures import ThreadPoolExecutor
+        from src.database.duckdb_manager import DuckDBManager
+        
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        shared = manager._get_shared_connection()
+        
+        def query(i):
+            with manager.connection() as conn:
+                return conn.execute("SELECT ?", [i]).fetchone()[0]
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert sorted(pool.map(query, range(20))) == list(range(20))
+        
+        assert manager._get_shared_connection() is shared
+        assert manager.get_pool_stats()['active_cursors'] == 0
+        manager.close()
+    
+    def test_cursor_limit_times_out(self, tmp_path, monkeypatch):
+        """Test waiting for a cursor beyond the limit raises TimeoutError."""
+        from src.database.duckdb_manager import DuckDBManager
+        monkeypatch.setenv('DUCKDB_MAX_CURSORS', '1')
+        monkeypatch.setenv('DUCKDB_POOL_TIMEOUT', '0.05')
+        
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        
+        with manager.connection():
+            with pytest.raises(TimeoutError):
+                with manager.connection():
+                    pass
+        
+        stats = manager.get_pool_stats()
+        assert stats['timeouts'] >= 1
+        assert stats['wait_ms']['count'] >= 1
+        manager.close()
+
+
+class TestDatasetSchemaRegistry:
+    """Tests for the dataset-versioned schema registry."""
+    
+    @pytest.fixture
+    def campaigns_df(self):
+        return pd.DataFrame({
+            'Date': ['2024-01-01', '2024-02-01'],
+            'Network': ['Google', 'Meta'],
+            'Total Spent': [100.0, 200.0],
+            'Site Visit': [1, 2],
+        })
+    
+    def test_build_schema_resolves_aliases(self):
+        """Test canonical keys map to physical columns with dtypes and date type."""
+        from src.database.schema_registry import build_schema
+        
+        schema = build_schema({'Day': 'VARCHAR', 'Cost': 'DOUBLE', 'Spend': 'DOUBLE', 'Network': 'VARCHAR'})
+        
+        assert schema.sources('spend') == ['Spend', 'Cost']
+        assert schema.resolve('platform') == 'Network'
+        assert schema.resolve('network') == 'Network'
+        assert schema.resolve('clicks') is None
+        assert schema.date_column == 'Day'
+        assert schema.date_is_string
+        assert schema.is_numeric('Cost') and not schema.is_numeric('Network')
+    
+    def test_schema_published_on_save(self, tmp_path, campaigns_df):
+        """Test save_campaigns persists the schema and readers share it without DESCRIBE."""
+        from src.database.duckdb_manager import DuckDBManager, SCHEMA_FILE
+        
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        manager.save_campaigns(campaigns_df)
+        
+        assert (manager.dataset_dir / SCHEMA_FILE).exists()
+        schema = manager.get_schema()
+        assert schema.resolve('spend') == 'Total Spent'
+        assert schema.resolve('conversions') == 'Site Visit'
+        assert manager.get_columns() == list(campaigns_df.columns)
+        assert manager.get_schema() is schema
+        
+        # A second process loads the same version from disk
+        reader = DuckDBManager(data_dir=str(tmp_path))
+        assert reader.dataset_version == manager.dataset_version
+    
+    def test_schema_version_changes_on_write(self, tmp_path, campaigns_df):
+        """Test new data invalidates the schema and other readers pick up the new version."""
+        from src.database.duckdb_manager import DuckDBManager
+        
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        manager.save_campaigns(campaigns_df)
+        reader = DuckDBManager(data_dir=str(tmp_path))
+        first_version = reader.dataset_version
+        
+        extra = campaigns_df.assign(Clicks=[5, 6])
+        manager.append_campaigns(extra)
+        
+        assert manager.dataset_version != first_version
+        assert reader.dataset_version == manager.dataset_version
+        assert reader.get_schema().resolve('clicks') == 'Clicks'
+    
+    def test_schema_built_for_existing_dataset(self, tmp_path, campaigns_df):
+        """Test datasets written before the registry get a schema on first use."""
+        from src.database.duckdb_manager import DuckDBManager, SCHEMA_FILE
+        
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        manager.save_campaigns(campaigns_df)
+        (manager.dataset_dir / SCHEMA_FILE).unlink()
+        
+        reader = DuckDBManager(data_dir=str(tmp_path))
+        assert reader.get_schema().resolve('platform') == 'Network'
+        assert (manager.dataset_dir / SCHEMA_FILE).exists()
+    
+    def test_no_schema_without_data(self, tmp_path):
+        """Test an empty store has no schema."""
+        from src.database.duckdb_manager import DuckDBManager
+        
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        assert manager.get_schema() is None
+        assert manager.get_columns() == []
+
+
+class TestDimensionDictionary:
+    """Tests for precomputed filter dimension dictionaries."""
+    
+    @pytest.fixture
+    def manager(self, tmp_path):
+        from src.database.duckdb_manager import DuckDBManager
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        manager.save_campaigns(pd.DataFrame({
+            'Date': ['2024-01-01'] * 5,
+            'Platform': ['Google', 'Google', 'Meta', 'Meta', 'Meta'],
+            'Channel': ['Search', 'Display', 'Social', 'Social', 'Unknown'],
+            'Device_Type': ['Mobile', None, 'Desktop', 'Mobile', 'Mobile'],
+            'Spend': [1.0, 2.0, 3.0, 4.0, 5.0],
+        }))
+        return manager
+    
+    def test_filter_options_from_dictionary(self, manager):
+        """Test options come from the stored dictionary, excluding numeric/date, empty and 'Unknown' values."""
+        from src.database.duckdb_manager import DIMENSIONS_FILE
+        
+        assert (manager.dataset_dir / DIMENSIONS_FILE).exists()
+        options = manager.get_filter_options()
+        
+        assert options == {
+            'platform': ['Google', 'Meta'],
+            'channel': ['Display', 'Search', 'Social'],
+            'device_type': ['Desktop', 'Mobile'],
+        }
+        counts = manager.get_filter_counts()['Platform']
+        assert counts['rows'].tolist() == [2, 3]
+    
+    def test_cross_filter_counts(self, manager):
+        """Test each column is restricted by the selections on the other columns only."""
+        counts = manager.get_filter_counts({'Platform': 'Meta', 'Device_Type': ['Mobile']})
+        
+        assert dict(zip(counts['Channel']['value'], counts['Channel']['rows'])) == {'Social': 1}
+        # Platform options ignore the platform selection itself
+        assert dict(zip(counts['Platform']['value'], counts['Platform']['rows'])) == {'Google': 1, 'Meta': 2}
+    
+    def test_cross_filter_scan_without_cube(self, manager, monkeypatch):
+        """Test the single-scan fallback matches the in-memory cube."""
+        import src.database.dimension_dictionary as dd
+        
+        selection = {'Platform': 'Meta', 'Device_Type': ['Mobile']}
+        expected = manager.get_filter_counts(selection)
+        
+        monkeypatch.setattr(dd, 'MAX_CUBE_ROWS', 0)
+        manager._publish_dimensions(manager.get_schema())
+        assert not manager.get_dimension_dictionary().supports_cross_filter
+        
+        scanned = manager.get_filter_counts(selection)
+        for col, frame in expected.items():
+            assert scanned[col].to_dict('records') == frame.to_dict('records')
+    
+    def test_append_merges_dictionary(self, manager):
+        """Test appends merge new values into the dictionary, and other readers reload it."""
+        from src.database.duckdb_manager import DuckDBManager
+        reader = DuckDBManager(data_dir=str(manager.data_dir))
+        assert reader.get_filter_options()['platform'] == ['Google', 'Meta']
+        
+        manager.append_campaigns(pd.DataFrame({
+            'Date': ['2024-02-01'], 'Platform': ['TikTok'], 'Channel': ['Social'],
+            'Device_Type': ['Mobile'], 'Spend': [6.0],
+        }))
+        
+        counts = reader.get_filter_counts({'Platform': 'TikTok'})
+        assert reader.get_filter_options()['platform'] == ['Google', 'Meta', 'TikTok']
+        assert dict(zip(counts['Channel']['value'], counts['Channel']['rows'])) == {'Social': 1}
+        assert manager.get_filter_counts()['Channel']['rows'].tolist() == [1, 1, 3]
+
+
+class TestRollups:
+    """Tests for pre-aggregated rollups and the aggregate() router."""
+
+    @pytest.fixture
+    def manager(self, tmp_path):
+        from src.database.duckdb_manager import DuckDBManager
+        rng = np.random.default_rng(7)
+        n = 400
+        df = pd.DataFrame({
+            'Date': pd.date_range('2024-01-01', periods=90).strftime('%Y-%m-%d')[rng.integers(0, 90, n)],
+            'Platform': rng.choice(['Google', 'Meta', 'TikTok'], n),
+            'Channel': rng.choice(['Search', 'Social', None], n),
+            'Funnel': rng.choice(['Awareness', 'Conversion', 'Unknown'], n),
+            'Campaign': rng.choice(['a', 'b', 'c'], n),
+            'Spend': rng.random(n) * 100,
+            'Clicks': rng.integers(0, 50, n),
+            'Impressions': rng.integers(50, 1000, n),
+        })
+        df.loc[:3, 'Date'] = 'not a date'
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        manager.save_campaigns(df.iloc[:300])
+        manager.append_campaigns(df.iloc[300:])
+        return manager
+
+    def _both(self, manager, **kwargs):
+        schema = manager.get_schema()
+        metrics = {k: schema.sources(k) for k in ['spend', 'impressions', 'clicks', 'conversions']}
+        manager.ENABLE_ROLLUPS = True
+        routed = manager.aggregate(metrics, **kwargs)
+        manager.ENABLE_ROLLUPS = False
+        base = manager.aggregate(metrics, **kwargs)
+        manager.ENABLE_ROLLUPS = True
+        return routed, base
+
+    @pytest.mark.parametrize('kwargs', [
+        {},
+        {'group_by': {'platform': 'Platform', 'channel': 'Channel'}},
+        {'date_column': 'Date', 'date_grain': 'month', 'group_by': {'channel': 'Channel'}},
+        {'date_column': 'Date', 'date_grain': 'week', 'filters': {'Platform': ['Google', 'Meta']}},
+        {'date_column': 'Date', 'start_date': '2024-02-01', 'end_date': '2024-02-29'},
+        {'date_column': 'Date', 'start_date': '2024-01-10', 'end_date': '2024-02-03', 'date_grain': 'day'},
+        {'group_by': {'funnel': 'Funnel'}, 'exclude_values': ['Unknown']},
+    ])
+    def test_rollups_match_base_table(self, manager, kwargs):
+        """Test queries answered from rollups (after save + append) equal base-table answers."""
+        rollups = manager.get_rollups()
+        assert rollups.version == manager.dataset_version
+        assert rollups.dimensions == ['Platform', 'Channel', 'Funnel']
+
+        routed, base = self._both(manager, **kwargs)
+        pd.testing.assert_frame_equal(routed, base, check_dtype=False)
+
+    def test_router_picks_smallest_covering_rollup(self, manager):
+        """Test plan selection by grain, dimensions and date-range alignment."""
+        rollups = manager.get_rollups()
+        metrics = {'spend': manager.get_schema().sources('spend')}
+
+        plan = rollups.plan(metrics, [], [], date_column='Date', date_grain='month')
+        assert (plan.grain, plan.set_mask) == ('month', rollups.set_mask(()))
+
+        plan = rollups.plan(metrics, ['Channel'], ['Platform'])
+        assert plan.set_mask == rollups.set_mask(('Platform', 'Channel'))
+
+        # Unaligned ranges need the daily rollup
+        plan = rollups.plan(metrics, [], [], date_column='Date', start_date='2024-01-15', end_date='2024-01-31')
+        assert plan.grain == 'day'
+
+        # Non-rollup dimensions and unknown metric column lists fall back to the base table
+        assert rollups.plan(metrics, ['Campaign'], []) is None
+        assert rollups.plan({'spend': ['Clicks', 'Spend']}, [], []) is None
+
+    def test_uncovered_query_uses_base_table(self, manager):
+        """Test dimensions outside the rollups are still aggregated correctly."""
+        routed, base = self._both(manager, group_by={'campaign': 'Campaign'})
+        pd.testing.assert_frame_equal(routed, base, check_dtype=False)
+        assert routed['row_count'].sum() == 400
+
+    def test_rollups_rebuilt_for_new_manager(self, manager):
+        """Test the catalog is reloaded from the database on startup."""
+        from src.database.duckdb_manager import DuckDBManager
+        manager.close()
+        reopened = DuckDBManager(data_dir=str(manager.data_dir))
+        assert reopened._rollups is not None
+        assert reopened._rollups.version == reopened.dataset_version
+
+
 # ============================================================================
 # USER MODELS TESTS
 # ============================================================================
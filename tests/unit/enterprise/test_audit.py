@@ -4,6 +4,7 @@ import os
 import shutil
 from datetime import datetime, timedelta
 from pathlib import Path
+import pyarrow.parquet as pq
 from src.enterprise.audit import AuditLogger, AuditEventType, AuditSeverity
 
 class TestAuditLogger:
@@ -15,7 +16,9 @@ class TestAuditLogger:
 
     @pytest.fixture
     def logger(self, audit_dir):
-        return AuditLogger(audit_dir=audit_dir)
+        audit = AuditLogger(audit_dir=audit_dir, flush_interval=0)
+        yield audit
+        audit.close()
 
     def test_log_event_creates_file(self, logger, audit_dir):
         logger.log_event(
@@ -24,15 +27,15 @@ class TestAuditLogger:
             action="login",
             details={"success": True}
         )
+        logger.flush()
         
-        log_files = list(Path(audit_dir).glob("audit_*.jsonl"))
+        log_files = list(Path(audit_dir).glob("events/date=*/part-*.parquet"))
         assert len(log_files) == 1
         
-        with open(log_files[0], 'r') as f:
-            content = f.read()
-            event = json.loads(content)
-            assert event['user'] == "testadmin"
-            assert event['event_type'] == "user_login"
+        rows = pq.read_table(log_files[0]).to_pylist()
+        assert rows[0]['user'] == "testadmin"
+        assert rows[0]['event_type'] == "user_login"
+        assert json.loads(rows[0]['details']) == {"success": True}
 
     def test_get_user_activity(self, logger):
         logger.log_event(AuditEventType.USER_LOGIN, user="user1", action="login")
@@ -52,3 +55,124 @@ class TestAuditLogger:
         
         assert report['summary']['total_events'] == 2
         assert report['security']['critical_events'] == 1
+
+    def test_events_are_buffered_until_flush(self, audit_dir):
+        audit = AuditLogger(audit_dir=audit_dir, buffer_size=3, flush_interval=0)
+        for i in range(2):
+            audit.log_event(AuditEventType.API_CALL, user="user1", action=f"call {i}")
+        assert not list(Path(audit_dir).glob("events/*/*.parquet"))
+        
+        audit.log_event(AuditEventType.API_CALL, user="user1", action="call 2")
+        assert len(list(Path(audit_dir).glob("events/*/*.parquet"))) == 1
+        
+        # Queries see buffered events too
+        audit.log_event(AuditEventType.API_CALL, user="user1", action="call 3")
+        assert [e['action'] for e in audit.get_user_activity("user1")] == [f"call {i}" for i in range(4)]
+
+    def test_security_alerts_and_failed_logins(self, logger):
+        logger.log_event(AuditEventType.USER_LOGIN, user="user1", action="login", details={"success": False})
+        logger.log_event(AuditEventType.USER_LOGIN, user="user1", action="login", details={"success": True})
+        logger.log_event(AuditEventType.ERROR_OCCURRED, user="user2", action="fail", severity=AuditSeverity.ERROR)
+        logger.log_event(AuditEventType.SECURITY_ALERT, user="system", action="alert", severity=AuditSeverity.WARNING)
+        
+        alerts = logger.get_security_alerts()
+        assert {a['action'] for a in alerts} == {"fail", "alert"}
+        assert [a['action'] for a in logger.get_security_alerts(severity=AuditSeverity.ERROR)] == ["fail"]
+        
+        report = logger.generate_compliance_report(datetime.now() - timedelta(hours=1), datetime.now() + timedelta(hours=1))
+        assert report['security']['failed_logins'] == 1
+        assert report['security']['security_alerts'] == 1
+        assert report['user_activity']['most_active_users'] == {"user1": 2, "user2": 1, "system": 1}
+        assert report['summary']['events_by_type'] == {"user_login": 2, "error_occurred": 1, "security_alert": 1}
+
+    def test_empty_period_report(self, logger):
+        report = logger.generate_compliance_report(datetime(2020, 1, 1), datetime(2020, 2, 1))
+        assert report['summary']['total_events'] == 0
+        assert report['user_activity']['most_active_users'] == {}
+
+
+class TestAuditMigration:
+    @staticmethod
+    def _legacy_event(user, timestamp, event_type="data_exported"):
+        return {
+            "event_id": f"{user}-{timestamp}",
+            "timestamp": timestamp,
+            "event_type": event_type,
+            "severity": "info",
+            "user": user,
+            "organization": "default",
+            "action": "export",
+            "resource": None,
+            "details": {"rows": 10},
+            "ip_address": None,
+            "user_agent": None,
+            "version": "1.0"
+        }
+
+    @pytest.fixture
+    def legacy_dir(self, tmp_path):
+        audit_dir = tmp_path / "audit"
+        audit_dir.mkdir()
+        events = [
+            self._legacy_event("alice", "2025-01-05T10:00:00"),
+            self._legacy_event("bob", "2025-01-05T11:00:00"),
+            self._legacy_event("alice", "2025-01-20T09:30:00"),
+        ]
+        with open(audit_dir / "audit_202501.jsonl", "w") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+            f.write("not json\n")
+        with open(audit_dir / "audit_202502.jsonl", "w") as f:
+            f.write(json.dumps(self._legacy_event("alice", "2025-02-02T08:00:00")) + "\n")
+        return audit_dir
+
+    def test_migrate_jsonl_into_daily_partitions(self, legacy_dir):
+        audit = AuditLogger(audit_dir=str(legacy_dir), flush_interval=0)
+        stats = audit.migrate_jsonl()
+        
+        assert stats == {"files": 2, "events": 4, "skipped_lines": 1}
+        assert not list(legacy_dir.glob("audit_*.jsonl"))
+        assert len(list((legacy_dir / "archive" / "jsonl").glob("*.jsonl"))) == 2
+        assert sorted(p.name for p in (legacy_dir / "events").iterdir()) == [
+            "date=2025-01-05", "date=2025-01-20", "date=2025-02-02"
+        ]
+        
+        activity = audit.get_user_activity("alice")
+        assert [e['timestamp'] for e in activity] == [
+            "2025-01-05T10:00:00", "2025-01-20T09:30:00", "2025-02-02T08:00:00"
+        ]
+        assert activity[0]['details'] == {"rows": 10}
+
+    def test_migration_is_repeatable(self, legacy_dir):
+        audit = AuditLogger(audit_dir=str(legacy_dir), flush_interval=0)
+        audit.migrate_jsonl(archive=False)
+        audit.migrate_jsonl(archive=False)
+        
+        assert len(audit.get_user_activity("alice")) == 3
+
+    def test_queries_read_only_partitions_in_range(self, legacy_dir):
+        audit = AuditLogger(audit_dir=str(legacy_dir), flush_interval=0)
+        audit.migrate_jsonl()
+        
+        start, end = datetime(2025, 1, 5), datetime(2025, 1, 5, 23, 59)
+        assert [f.parent.name for f in audit._partition_files(start, end)] == ["date=2025-01-05"]
+        
+        report = audit.generate_compliance_report(start, end)
+        assert report['summary']['total_events'] == 2
+        assert report['data_access']['data_exported'] == 2
+        assert report['user_activity']['activity_by_hour'] == {10: 1, 11: 1}
+        
+        export = audit.export_audit_log(datetime(2025, 1, 1), datetime(2025, 1, 31), format="json")
+        exported = json.loads(Path(export).read_text())
+        assert [e['user'] for e in exported] == ["alice", "bob", "alice"]
+
+    def test_compact_merges_part_files(self, legacy_dir):
+        audit = AuditLogger(audit_dir=str(legacy_dir), flush_interval=0)
+        audit.migrate_jsonl()
+        audit._write_events([AuditLogger._from_legacy(self._legacy_event("carol", "2025-01-05T12:00:00"))])
+        
+        stats = audit.compact()
+        
+        assert stats == {"files_before": 4, "files_after": 3, "partitions_compacted": 1}
+        users = pq.read_table(next((legacy_dir / "events" / "date=2025-01-05").glob("*.parquet"))).column("user")
+        assert users.to_pylist() == ["alice", "bob", "carol"]
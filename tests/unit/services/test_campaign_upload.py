@@ -0,0 +1,148 @@
+"""
+Unit tests for streaming campaign upload ingestion.
+"""
+
+import asyncio
+import io
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from src.database.duckdb_manager import DuckDBManager
+from src.services.campaign_upload import CampaignUploadIngestor
+
+
+@pytest.fixture
+def campaign_df():
+    n = 60
+    return pd.DataFrame({
+        'Date': pd.date_range('2024-01-01', periods=n).strftime('%Y-%m-%d'),
+        'Platform': np.where(np.arange(n) % 3 == 0, 'Google', 'Meta'),
+        'Spend': np.arange(n) * 2.5,
+        'Clicks': np.arange(n),
+        'Impressions': np.arange(n) * 20,
+        'Notes': [None] * 25 + ['ok'] * 35,  # all-null in the first chunks
+    })
+
+
+@pytest.fixture
+def ingestor(tmp_path):
+    mgr = DuckDBManager(str(tmp_path / 'data'))
+    yield CampaignUploadIngestor(mgr, chunk_rows=8, spool_dir=tmp_path / 'uploads')
+    mgr.close()
+
+
+def _spool_csv(ingestor, df):
+    path = ingestor.spool_path('campaigns.csv')
+    df.to_csv(path, index=False)
+    return path
+
+
+class TestCampaignUploadIngestor:
+
+    def test_chunked_ingest_matches_single_frame(self, ingestor, campaign_df):
+        job_id = ingestor.create_job('campaigns.csv', 1)
+        path = _spool_csv(ingestor, campaign_df)
+
+        result = ingestor.ingest(job_id, path)
+
+        assert result['imported_count'] == len(campaign_df)
+        assert result['summary']['total_spend'] == pytest.approx(campaign_df['Spend'].sum())
+        assert result['summary']['total_clicks'] == campaign_df['Clicks'].sum()
+        assert result['summary']['avg_ctr'] == pytest.approx(5.0)
+        nulls = {s['column']: s['null_count'] for s in result['schema']}
+        assert nulls['Notes'] == 25
+        assert result['columns'] == list(campaign_df.columns)
+        assert len(result['preview']) == 5
+        assert not path.exists()
+
+        stored = ingestor.duckdb_mgr.get_campaigns(limit=1000)
+        assert len(stored) == len(campaign_df)
+        assert stored['Notes'].notna().sum() == 35
+        assert ingestor.duckdb_mgr.get_schema().dtypes['Spend'] == 'DOUBLE'
+
+    def test_job_progress_and_append(self, ingestor, campaign_df):
+        ingestor.ingest(ingestor.create_job('a.csv', 1), _spool_csv(ingestor, campaign_df))
+        job_id = ingestor.create_job('b.csv', 1)
+        assert ingestor.get_job(job_id)['status'] == 'pending'
+
+        ingestor.ingest(job_id, _spool_csv(ingestor, campaign_df), append=True)
+
+        job = ingestor.get_job(job_id)
+        assert job['status'] == 'completed'
+        assert job['progress'] == 100
+        assert job['rows_processed'] == len(campaign_df)
+        assert ingestor.duckdb_mgr.get_total_count() == 2 * len(campaign_df)
+
+    def test_finished_jobs_are_pruned_on_new_job(self, ingestor, campaign_df):
+        old_job = ingestor.create_job('old.csv', 1)
+        ingestor.ingest(old_job, _spool_csv(ingestor, campaign_df))
+        running_job = ingestor.create_job('running.csv', 1)
+        for job_id in (old_job, running_job):
+            ingestor._jobs[job_id]['updated_at'] = '2001-01-01T00:00:00'
+
+        new_job = ingestor.create_job('new.csv', 1)
+
+        assert set(ingestor._jobs) == {running_job, new_job}
+
+    def test_csv_ingest_with_single_cursor_slot(self, tmp_path, campaign_df, monkeypatch):
+        monkeypatch.setenv('DUCKDB_MAX_CURSORS', '1')
+        monkeypatch.setenv('DUCKDB_POOL_TIMEOUT', '2')
+        mgr = DuckDBManager(str(tmp_path / 'data'))
+        ingestor = CampaignUploadIngestor(mgr, chunk_rows=8, spool_dir=tmp_path / 'uploads')
+
+        ingestor.ingest(ingestor.create_job('a.csv', 1), _spool_csv(ingestor, campaign_df))
+        ingestor.ingest(ingestor.create_job('b.csv', 1), _spool_csv(ingestor, campaign_df), append=True)
+
+        assert mgr.get_total_count() == 2 * len(campaign_df)
+        mgr.close()
+
+    def test_header_only_upload_keeps_existing_data(self, ingestor, campaign_df):
+        ingestor.ingest(ingestor.create_job('a.csv', 1), _spool_csv(ingestor, campaign_df))
+        path = _spool_csv(ingestor, campaign_df.head(0))
+        job_id = ingestor.create_job('empty.csv', 1)
+
+        with pytest.raises(pd.errors.EmptyDataError):
+            ingestor.ingest(job_id, path)
+
+        assert ingestor.get_job(job_id)['status'] == 'failed'
+        assert ingestor.duckdb_mgr.get_total_count() == len(campaign_df)
+
+    def test_upload_endpoint_background_job(self, ingestor, campaign_df):
+        from fastapi import BackgroundTasks
+        from src.api.v1 import campaigns
+
+        upload = UploadFile(file=io.BytesIO(campaign_df.to_csv(index=False).encode()), filename='c.csv')
+        tasks = BackgroundTasks()
+        with patch('src.services.campaign_upload.get_upload_ingestor', return_value=ingestor):
+            response = asyncio.run(campaigns.upload_campaign_data(
+                tasks, file=upload, sheet_name=None, append=False, background=True, current_user={}
+            ))
+            assert response.status_code == 202
+            job_id = ingestor.get_job(next(iter(ingestor._jobs)))['job_id']
+
+            asyncio.run(tasks())
+            job = asyncio.run(campaigns.get_upload_job_status(job_id, current_user={}))
+            assert job['status'] == 'completed'
+            assert job['result']['imported_count'] == len(campaign_df)
+
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(campaigns.get_upload_job_status('missing', current_user={}))
+            assert exc.value.status_code == 404
+
+    def test_upload_endpoint_rejects_empty_file(self, ingestor):
+        from fastapi import BackgroundTasks
+        from src.api.v1 import campaigns
+
+        upload = UploadFile(file=io.BytesIO(b''), filename='c.csv')
+        with patch('src.services.campaign_upload.get_upload_ingestor', return_value=ingestor):
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(campaigns.upload_campaign_data(
+                    BackgroundTasks(), file=upload, sheet_name=None, append=False,
+                    background=False, current_user={}
+                ))
+        assert exc.value.status_code == 400
+        assert not any(ingestor.spool_dir.iterdir())
@@ -6,6 +6,7 @@ in both mock mode and credential validation.
 """
 
 import pytest
+import time
 from datetime import datetime, timedelta
 
 from src.connectors import (
@@ -18,6 +19,9 @@ from src.connectors import (
     ConnectorStatus,
 )
 from src.connectors.base_connector import Campaign, PerformanceMetrics
+from src.connectors.connector_manager import CallStatus
+from src.connectors.mock_responses import clear_mock_latency, set_mock_latency
+from src.utils.observability import metrics
 
 
 class TestBaseConnector:
@@ -363,3 +367,82 @@ class TestConnectorIntegration:
             assert "spend" in data
             assert "ctr" in data
             assert "platform" in data
+
+
+class TestConcurrentFanOut:
+    """Tests for concurrent multi-platform calls with mock latency."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_latency(self):
+        yield
+        clear_mock_latency()
+    
+    def test_latency_is_the_slowest_platform_not_the_sum(self):
+        """Platform calls should overlap."""
+        set_mock_latency(0.2)
+        manager = AdConnectorManager(use_mock=True, max_workers=12)
+        
+        start = time.perf_counter()
+        campaigns = manager.get_campaigns()
+        elapsed = time.perf_counter() - start
+        
+        assert len(campaigns) == len(AdConnectorManager.SUPPORTED_PLATFORMS)
+        assert all(campaigns.values())
+        assert elapsed < 1.0  # 12 platforms one after another take 2.4s
+    
+    def test_max_workers_bounds_concurrency(self):
+        """No more than max_workers calls should run at once."""
+        set_mock_latency(0.1)
+        platforms = ["google_ads", "meta_ads", "dv360", "tradedesk"]
+        manager = AdConnectorManager(use_mock=True, platforms=platforms, max_workers=2)
+        
+        start = time.perf_counter()
+        manager.get_campaigns()
+        
+        assert time.perf_counter() - start >= 0.2
+    
+    def test_slow_platform_times_out_with_partial_results(self):
+        """A platform past its timeout should not hold back the others."""
+        set_mock_latency(1.0, "dv360")
+        manager = AdConnectorManager(use_mock=True, platform_timeouts={"dv360": 0.1})
+        
+        start = time.perf_counter()
+        performance = manager.get_aggregated_performance()
+        
+        assert time.perf_counter() - start < 0.9
+        assert performance["partial"] is True
+        assert set(performance["failed_platforms"]) == {"dv360"}
+        assert "dv360" not in performance["by_platform"]
+        assert "google_ads" in performance["by_platform"]
+        assert performance["totals"]["spend"] > 0
+        
+        connections = manager.test_all_connections()
+        assert connections["dv360"].success is False
+        assert "timed out" in connections["dv360"].message
+    
+    def test_platform_error_is_isolated(self):
+        """A failing platform should return no campaigns; the rest still should."""
+        manager = AdConnectorManager(use_mock=True, platforms=["google_ads", "meta_ads"])
+        
+        def fail(*args, **kwargs):
+            raise RuntimeError("quota exceeded")
+        manager.get_connector("meta_ads").get_campaigns = fail
+        
+        outcome = manager.fan_out("get_campaigns", lambda c: c.get_campaigns())
+        
+        assert outcome.results["meta_ads"].status == CallStatus.ERROR
+        assert outcome.results["meta_ads"].error == "quota exceeded"
+        assert list(outcome.values) == ["google_ads"]
+        assert manager.get_campaigns()["meta_ads"] == []
+    
+    def test_latency_metrics_per_platform(self):
+        """Each platform call should be timed."""
+        set_mock_latency(0.05, "google_ads")
+        manager = AdConnectorManager(use_mock=True, platforms=["google_ads"])
+        labels = {"platform": "google_ads", "operation": "get_performance"}
+        before = metrics.get_histogram_stats("ad_connector_latency_ms", labels=labels)["count"]
+        
+        outcome = manager._fetch_performance(None, None, None)
+        
+        assert outcome.latency_ms["google_ads"] >= 50
+        assert metrics.get_histogram_stats("ad_connector_latency_ms", labels=labels)["count"] == before + 1
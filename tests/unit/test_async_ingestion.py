@@ -0,0 +1,202 @@
+"""
+Tests for the async knowledge ingestion pipeline against a local stub HTTP server.
+"""
+
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.knowledge.async_ingestion import AsyncIngestionPipeline, source_kind
+from src.knowledge.embedding_cache import CachedEmbedder
+from src.knowledge.knowledge_ingestion import KnowledgeIngestion
+from src.knowledge.vector_store import VectorStoreBuilder, VectorStoreConfig
+from src.utils.performance import hash_embedding
+
+
+def _page(topic):
+    sentences = " ".join(
+        f"Campaign {topic} analysis step {i} explains how marketers compare spend, reach and conversions."
+        for i in range(12)
+    )
+    return f"<html><head><title>{topic}</title></head><body><main><p>{sentences}</p></main></body></html>"
+
+
+class StubServer:
+    """Serves ``pages`` (path -> html) with ETags, tracking concurrency and conditional hits."""
+
+    def __init__(self, pages, etags=True, delay=0.05):
+        self.pages = dict(pages)
+        self.etags = etags
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.not_modified = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    time.sleep(stub.delay)
+                    body = stub.pages.get(self.path)
+                    if body is None:
+                        self.send_response(404)
+                        self.end_headers()
+                        return
+                    etag = '"' + hashlib.md5(body.encode()).hexdigest() + '"'
+                    if stub.etags and self.headers.get("If-None-Match") == etag:
+                        with stub.lock:
+                            stub.not_modified += 1
+                        self.send_response(304)
+                        self.end_headers()
+                        return
+                    data = body.encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html")
+                    self.send_header("Content-Length", str(len(data)))
+                    if stub.etags:
+                        self.send_header("ETag", etag)
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RecordingBuilder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def upsert_documents(self, documents):
+        if self.fail:
+            raise RuntimeError("vector store unavailable")
+        self.batches.append([doc["url"] for doc in documents])
+        return []
+
+
+class HashProvider:
+    name = "test:hash"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts, batch_size=None):
+        self.calls.append(list(texts))
+        return hash_embedding(list(texts), dim=32)
+
+
+PAGES = {f"/page{i}": _page(f"topic{i}") for i in range(8)}
+
+
+def _pipeline(tmp_path, builder=None, **kwargs):
+    options = {"per_host_concurrency": 2, "embed_batch_chunks": 10, **kwargs}
+    return AsyncIngestionPipeline(
+        KnowledgeIngestion(chunk_size=400, chunk_overlap=50),
+        builder,
+        state_path=tmp_path / "fetch_state.json",
+        **options,
+    )
+
+
+class TestAsyncIngestionPipeline:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_fetch_is_bounded_per_host_and_batched(self, tmp_path):
+        builder = RecordingBuilder()
+        with StubServer(PAGES) as server:
+            sources = [{"url": server.url(path), "category": "Test", "priority": 1} for path in PAGES]
+            report = await _pipeline(tmp_path, builder).run(sources)
+
+        assert report["ingested"] == len(PAGES) and report["failed"] == 0
+        assert 1 < server.max_in_flight <= 2
+        # Several documents per vector store write, every document written once
+        assert len(builder.batches) < len(PAGES)
+        assert sorted(url for batch in builder.batches for url in batch) == sorted(s["url"] for s in sources)
+        assert set(report["stages_ms"]) == {"fetch", "parse", "embed"}
+        assert all(r["timings_ms"]["fetch"] > 0 for r in report["results"])
+
+    @pytest.mark.asyncio
+    async def test_unchanged_sources_are_skipped_with_conditional_requests(self, tmp_path):
+        with StubServer(PAGES) as server:
+            sources = [{"url": server.url(path)} for path in PAGES]
+            await _pipeline(tmp_path, RecordingBuilder()).run(sources)
+
+            builder = RecordingBuilder()
+            server.pages["/page0"] = _page("changed")
+            report = await _pipeline(tmp_path, builder).run(sources)
+
+        assert report["unchanged"] == len(PAGES) - 1 and report["ingested"] == 1
+        assert server.not_modified == len(PAGES) - 1
+        assert builder.batches == [[server.url("/page0")]]
+
+    @pytest.mark.asyncio
+    async def test_content_hash_detects_unchanged_pages_without_validators(self, tmp_path):
+        with StubServer(PAGES, etags=False) as server:
+            sources = [{"url": server.url(path)} for path in PAGES]
+            await _pipeline(tmp_path).run(sources)
+            report = await _pipeline(tmp_path).run(sources)
+
+        assert report["unchanged"] == len(PAGES)
+
+    @pytest.mark.asyncio
+    async def test_failures_are_retried_on_the_next_run(self, tmp_path):
+        with StubServer(PAGES) as server:
+            sources = [{"url": server.url("/page0")}, {"url": server.url("/missing")}]
+            report = await _pipeline(tmp_path, RecordingBuilder(fail=True)).run(sources)
+            assert report["failed"] == 2
+
+            report = await _pipeline(tmp_path, RecordingBuilder()).run(sources)
+
+        statuses = {r["url"]: r["status"] for r in report["results"]}
+        assert statuses == {server.url("/page0"): "ingested", server.url("/missing"): "failed"}
+
+    def test_reingest_updates_vector_store_incrementally(self, tmp_path):
+        provider = HashProvider()
+        config = VectorStoreConfig(index_path=tmp_path / "faiss.index", metadata_path=tmp_path / "metadata.json")
+        builder = VectorStoreBuilder(config=config, embedder=CachedEmbedder(provider))
+
+        with StubServer(PAGES) as server:
+            sources = [{"url": server.url(path)} for path in PAGES]
+            first = _pipeline(tmp_path, builder).run_sync(sources)
+            provider.calls.clear()
+            server.pages["/page3"] = _page("rewritten")
+            second = _pipeline(tmp_path, builder).run_sync(sources)
+
+        old_chunks = next(r["chunk_count"] for r in first["results"] if r["url"] == server.url("/page3"))
+        assert builder.store.count() == first["chunks"] - old_chunks + second["chunks"]
+        assert provider.calls and all("rewritten" in text for call in provider.calls for text in call)
+        assert {r["url"] for r in builder.load_metadata()} == {s["url"] for s in sources}
+
+
+def test_source_kind():
+    assert source_kind({"url": "https://www.youtube.com/watch?v=abc"}) == "youtube"
+    assert source_kind({"url": "https://example.com/report.pdf?x=1"}) == "pdf"
+    assert source_kind({"path": "docs/guide.pdf"}) == "pdf"
+    assert source_kind({"url": "https://example.com/blog", "type": "pdf"}) == "pdf"
+    assert source_kind({"url": "https://example.com/blog"}) == "url"
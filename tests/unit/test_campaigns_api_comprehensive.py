@@ -708,5 +708,155 @@ class TestKnowledgeModeHandler:
         assert result['success'] is False
 
 
+class TestSqlAggregatedEndpoints:
+    """Tests for endpoints that aggregate inside DuckDB instead of pandas."""
+    
+    @pytest.fixture
+    def duckdb_mgr(self, tmp_path):
+        from src.database.duckdb_manager import DuckDBManager
+        manager = DuckDBManager(data_dir=str(tmp_path))
+        manager.save_campaigns(pd.DataFrame({
+            'Date': ['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-03'],
+            'Platform': ['Google', 'Meta', 'Google', 'Meta'],
+            'Funnel_Stage': ['Upper', 'Lower', 'Lower', 'Upper'],
+            'Cost': [100.0, 200.0, 300.0, 400.0],
+            'Impressions': [1000, 2000, 3000, 4000],
+            'Clicks': [10, 20, 30, 40],
+            'Conversions': [1, 2, 3, 4],
+            'Revenue': [200.0, 400.0, 600.0, 800.0],
+        }))
+        return manager
+    
+    @pytest.fixture
+    def sql_client(self, duckdb_mgr):
+        from src.api.v1.campaigns import get_current_user
+        app.dependency_overrides[get_current_user] = lambda: {"username": "test_user"}
+        with patch('src.database.duckdb_manager.get_duckdb_manager', return_value=duckdb_mgr), \
+             patch('src.api.v1.campaigns.get_duckdb_manager', return_value=duckdb_mgr):
+            yield TestClient(app)
+        app.dependency_overrides.clear()
+    
+    def test_resolve_metric_columns_priority(self):
+        """Test alias resolution returns every match in alias priority order."""
+        from src.api.v1.campaigns import resolve_metric_columns, resolve_column
+        
+        columns = ['total spent', 'Spend', 'Clicks']
+        assert resolve_metric_columns(columns, 'spend') == ['Spend', 'total spent']
+        assert resolve_column(columns, 'clicks') == 'Clicks'
+        assert resolve_column(columns, 'revenue') is None
+    
+    def test_build_dimension_filters_uses_aliases(self):
+        """Test frontend filter keys map to physical columns with fallbacks."""
+        from src.api.v1.campaigns import build_dimension_filters
+        from src.database.schema_registry import build_schema
+        
+        schema = build_schema({'Network': 'VARCHAR', 'Funnel_Stage': 'VARCHAR'})
+        filters = build_dimension_filters(schema, {
+            'platform': 'Meta', 'funnel': 'Upper', 'device': 'Mobile', 'channel': None
+        })
+        assert filters == {'Network': 'Meta', 'Funnel_Stage': 'Upper', 'Device_Type': 'Mobile'}
+    
+    def test_global_metrics(self, sql_client):
+        """Test totals come from a single SQL aggregate."""
+        response = sql_client.get("/campaigns/metrics")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['total_spend'] == 1000.0
+        assert data['total_clicks'] == 100
+        assert data['avg_cpc'] == 10.0
+    
+    def test_visualizations_filtered(self, sql_client):
+        """Test per-chart GROUP BY results honour dimension and date filters."""
+        response = sql_client.get("/campaigns/visualizations?platforms=Google&end_date=2024-01-01")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [p['platform'] for p in data['platform']] == ['Google']
+        assert data['trend'] == [{
+            'date': '2024-01-01', 'spend': 100.0, 'impressions': 1000, 'clicks': 10, 'conversions': 1,
+            'revenue': 200.0, 'reach': 0, 'ctr': 1.0, 'cpc': 10.0, 'cpa': 100.0
+        }]
+    
+    def test_funnel_stats_resolves_alias(self, sql_client):
+        """Test funnel stats work when the funnel column is an alias (Funnel_Stage)."""
+        response = sql_client.get("/campaigns/funnel-stats")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [row['stage'] for row in data['data']] == ['Upper', 'Lower']
+        assert data['data'][0]['spend'] == 500.0
+    
+    def test_dashboard_stats_summary(self, sql_client):
+        """Test dashboard summary, sparkline and monthly tables."""
+        response = sql_client.get("/campaigns/dashboard-stats")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['summary_groups']['current']['spend'] == 1000.0
+        assert data['summary_groups']['current']['roas'] == 2.0
+        assert len(data['summary_groups']['sparkline']) == 3
+        assert data['monthly_performance'][0]['month'] == '2024-01'
+        assert {row['funnel'] for row in data['funnel']} == {'Upper', 'Lower'}
+    
+    def test_chart_data_uses_schema_registry(self, sql_client):
+        """Test chart data resolves aliased columns and string dates from the registry."""
+        response = sql_client.get("/campaigns/chart-data?x_axis=platform&y_axis=spend&start_date=2024-01-02")
+        
+        assert response.status_code == 200
+        assert response.json()['data'] == [{'x': 'Google', 'y': 300.0}, {'x': 'Meta', 'y': 400.0}]
+
+    def test_chart_data_columnar_and_arrow_formats(self, sql_client):
+        """Test chart data can be returned as column arrays or an Arrow IPC stream."""
+        import pyarrow as pa
+        from src.api.arrow_responses import ARROW_STREAM_MEDIA_TYPE
+
+        response = sql_client.get("/campaigns/chart-data?x_axis=date&y_axis=clicks&format=columnar")
+        assert response.status_code == 200
+        assert response.json()['data'] == {'x': ['2024-01-01', '2024-01-02', '2024-01-03'], 'y': [30.0, 30.0, 40.0]}
+
+        response = sql_client.get("/campaigns/chart-data?x_axis=date&y_axis=clicks&format=arrow")
+        assert response.headers['content-type'] == ARROW_STREAM_MEDIA_TYPE
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.column('y').to_pylist() == [30.0, 30.0, 40.0]
+
+        assert sql_client.get("/campaigns/chart-data?format=xml").status_code == 400
+
+    def test_visualizations_arrow_format(self, sql_client):
+        """Test the Arrow response stacks every chart into one table keyed by chart."""
+        import pyarrow as pa
+
+        response = sql_client.get("/campaigns/visualizations?format=arrow")
+
+        assert response.status_code == 200
+        table = pa.ipc.open_stream(response.content).read_all()
+        rows = [r for r in table.to_pylist() if r['chart'] == 'platform']
+        assert [(r['key'], r['spend'], r['roas']) for r in rows] == [('Google', 400.0, 2.0), ('Meta', 600.0, 2.0)]
+        trend = [r for r in table.to_pylist() if r['chart'] == 'trend']
+        assert [r['key'] for r in trend] == ['2024-01-01', '2024-01-02', '2024-01-03']
+        assert trend[0]['roas'] is None
+
+    def test_schema_endpoint_from_registry(self, sql_client):
+        """Test /schema reports availability from the registry without sampling rows."""
+        response = sql_client.get("/campaigns/schema")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['metrics']['spend'] is True
+        assert data['metrics']['roas'] is True
+        assert data['dimensions']['funnel'] is True
+        assert data['dimensions']['device'] is False
+    
+    def test_filters_cross_filtered_with_counts(self, sql_client):
+        """Test /filters narrows other filters to values co-occurring with the selection."""
+        response = sql_client.get("/campaigns/filters?platforms=Google&include_counts=true")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['platforms'] == ['Google', 'Meta']
+        assert data['funnel_stages'] == ['Lower', 'Upper']
+        assert data['counts']['platform'] == {'Google': 2, 'Meta': 2}
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
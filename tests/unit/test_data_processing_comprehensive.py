@@ -58,6 +58,17 @@ class TestMediaDataProcessor:
         result = processor.load_data(sample_raw_data, auto_detect=True)
         assert result is not None
     
+    def test_load_data_reuses_column_profiles(self, sample_raw_data):
+        """Test precomputed column profiles are used instead of profiling again."""
+        from src.data_processing import MediaDataProcessor
+        from src.utils.data_normalizer import get_column_types
+        profiles = get_column_types(sample_raw_data)
+        processor = MediaDataProcessor()
+        
+        with patch('src.utils.data_normalizer.profile_column', side_effect=AssertionError):
+            result = processor.load_data(sample_raw_data, column_types=profiles)
+        assert len(result) == len(sample_raw_data)
+    
     def test_get_data_summary(self, sample_raw_data):
         """Test getting data summary."""
         from src.data_processing import MediaDataProcessor
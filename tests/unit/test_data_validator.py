@@ -1,6 +1,7 @@
 import pandas as pd
 import pytest
 
+from src.utils.data_normalizer import get_column_types
 from src.utils.data_validator import DataValidator
 
 
@@ -53,3 +54,58 @@ def test_partial_missing_data():
     assert "Funnel_Stage" in cleaned.columns
     assert cleaned["Funnel_Stage"].iloc[0] == "Unknown"
     assert report["warnings"] == []
+
+
+def test_numeric_and_currency_strings_are_cleaned():
+    validator = DataValidator()
+    numeric = validator._normalize_numeric(pd.Series(["1,000", " 42 ", "(5)", "-3.5", None, "n/a", 7]), "clicks")
+    currency = validator._normalize_currency(pd.Series(["$1,234.50", "USD 20", "$(1,000)", "€-5", None]), "spend")
+
+    assert numeric.tolist()[:4] == [1000.0, 42.0, -5.0, -3.5]
+    assert numeric.isna().tolist()[4:6] == [True, True] and numeric.iloc[6] == 7.0
+    assert currency.tolist()[:4] == [1234.5, 20.0, -1000.0, -5.0]
+    assert pd.isna(currency.iloc[4])
+
+
+def test_percentage_and_boolean_normalization():
+    validator = DataValidator()
+    strings = validator._normalize_percentage(pd.Series(["12.5%", "0.3", "150 %", None]), "ctr")
+    numbers = validator._normalize_percentage(pd.Series([0.25, 40.0, -10.0]), "ctr")
+    flags = validator._normalize_boolean(pd.Series(["Yes", " off ", "TRUE", "maybe", None]), "active")
+
+    assert strings.iloc[:3].tolist() == pytest.approx([0.125, 0.3, 1.5])
+    assert pd.isna(strings.iloc[3])
+    assert numbers.tolist() == pytest.approx([0.25, 0.4, -0.1])
+    assert flags.iloc[:3].tolist() == [True, False, True]
+    assert flags.iloc[3:].isna().all()
+
+
+def test_dtype_fast_paths_keep_typed_columns():
+    validator = DataValidator()
+    dates = pd.Series(pd.to_datetime(["2024-01-13", "2024-02-01"]))
+    ints = pd.Series([1, 2, 3])
+
+    assert validator._normalize_dates(dates, "Date") is dates
+    assert validator._normalize_numeric(ints, "clicks").dtype == "float64"
+    assert validator.validation_stats["conversions"]["Date"] == "Date (already datetime)"
+
+
+def test_dates_with_mixed_formats():
+    validator = DataValidator()
+    uniform = validator._normalize_dates(pd.Series(["13/01/2024", "25/01/2024", None]), "Date")
+    mixed = validator._parse_dates_flexible(pd.Series(["13-01-2024", "2024/01/25", "Jan 13, 2024", "garbage"]))
+
+    assert uniform.iloc[:2].tolist() == [pd.Timestamp("2024-01-13"), pd.Timestamp("2024-01-25")]
+    assert validator.validation_stats["conversions"]["Date"].startswith("Date (%d/%m/%Y")
+    assert mixed.iloc[:3].tolist() == [pd.Timestamp("2024-01-13"), pd.Timestamp("2024-01-25"), pd.Timestamp("2024-01-13")]
+    assert pd.isna(mixed.iloc[3])
+
+
+def test_column_profiles_follow_renamed_columns(sample_df):
+    uploaded = get_column_types(sample_df)
+    validator = DataValidator()
+    validator.validate_and_clean_dataframe(sample_df, column_types=uploaded)
+
+    assert not sample_df.attrs
+    assert validator.column_types["Spend"] == uploaded["Total Spend"]
+    assert validator.column_types["Campaign_Name"].sample_size == 2
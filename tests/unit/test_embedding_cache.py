@@ -0,0 +1,124 @@
+"""
+Tests for the content-hash embedding cache and embedding providers.
+"""
+
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from src.knowledge.embedding_cache import (
+    CachedEmbedder,
+    EmbeddingCache,
+    LocalEmbeddingProvider,
+    content_key,
+)
+from src.knowledge.vector_store import VectorRetriever, VectorStoreBuilder, VectorStoreConfig
+
+
+class CountingProvider:
+    """Deterministic provider that records which texts it embedded."""
+
+    name = "test:counting"
+
+    def __init__(self, dim=4):
+        self.dim = dim
+        self.calls = []
+
+    def embed(self, texts, batch_size=None):
+        self.calls.append(list(texts))
+        return np.array([[len(t), t.count("a"), i, 1.0][: self.dim] for i, t in enumerate(texts)], dtype="float32")
+
+
+def _openai_client():
+    """Mock OpenAI client returning one 8-dim vector per input text."""
+    client = Mock()
+
+    def create(model, input):
+        return Mock(data=[Mock(embedding=[float(len(text))] + [0.5] * 7) for text in input])
+
+    client.embeddings.create.side_effect = create
+    return client
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(tmp_path / "embeddings")
+
+
+class TestCachedEmbedder:
+
+    def test_only_new_texts_reach_the_provider(self, cache):
+        provider = CountingProvider()
+        embedder = CachedEmbedder(provider, cache)
+
+        first = embedder.embed(["alpha", "beta", "alpha"])
+        second = embedder.embed(["beta", "gamma", "alpha"])
+
+        assert provider.calls == [["alpha", "beta"], ["gamma"]]
+        assert np.array_equal(first[0], first[2])
+        assert np.array_equal(second[0], first[1])
+        assert np.array_equal(second[2], first[0])
+
+    def test_cache_persists_and_is_memory_mapped(self, cache, tmp_path):
+        CachedEmbedder(CountingProvider(), cache).embed(["one", "two"])
+
+        reopened = EmbeddingCache(tmp_path / "embeddings")
+        provider = CountingProvider()
+        vectors = CachedEmbedder(provider, reopened).embed(["two", "one"])
+
+        assert provider.calls == []
+        assert vectors.shape == (2, 4)
+        assert isinstance(reopened._maps[CountingProvider.name], np.memmap)
+        assert reopened.count(CountingProvider.name) == 2
+
+    def test_providers_are_cached_separately(self, cache):
+        CachedEmbedder(CountingProvider(), cache).embed(["text"])
+        other = CountingProvider(dim=3)
+        other.name = "test:other"
+        assert CachedEmbedder(other, cache).embed(["text"]).shape == (1, 3)
+        assert other.calls == [["text"]]
+
+    def test_dimension_change_is_not_cached(self, cache):
+        CachedEmbedder(CountingProvider(), cache).embed(["a"])
+        changed = CountingProvider(dim=2)
+        assert CachedEmbedder(changed, cache).embed(["b"]).shape == (1, 2)
+        assert cache.lookup(CountingProvider.name, [content_key("b")]) == {}
+
+    def test_local_provider_works_offline(self, cache):
+        embedder = CachedEmbedder(LocalEmbeddingProvider(), cache)
+        vectors = embedder.embed(["campaign budget pacing", "campaign budget pacing"])
+        assert vectors.shape[0] == 2
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+
+class TestKnowledgeStackUsesCache:
+
+    @pytest.fixture
+    def config(self, tmp_path):
+        return VectorStoreConfig(index_path=tmp_path / "faiss.index", metadata_path=tmp_path / "metadata.json")
+
+    def test_reingest_embeds_only_changed_chunks(self, config):
+        client = _openai_client()
+        builder = VectorStoreBuilder(config=config, client=client)
+        doc = {"success": True, "source": "web", "chunks": ["first chunk", "second chunk"]}
+
+        builder.build_from_documents([doc])
+        builder.build_from_documents([{**doc, "chunks": ["first chunk", "second chunk, edited"]}])
+
+        inputs = [call.kwargs["input"] for call in client.embeddings.create.call_args_list]
+        assert inputs == [["first chunk", "second chunk"], ["second chunk, edited"]]
+
+    def test_repeated_query_skips_the_api(self, config):
+        client = _openai_client()
+        VectorStoreBuilder(config=config, client=client).build_from_documents(
+            [{"success": True, "source": "web", "chunks": ["first chunk", "second chunk"]}]
+        )
+        client.embeddings.create.reset_mock()
+
+        retriever = VectorRetriever(config=config, client=client)
+        first = retriever.search("which chunk", top_k=1)
+        second = retriever.search("which chunk", top_k=1)
+
+        assert first == second
+        assert client.embeddings.create.call_count == 1
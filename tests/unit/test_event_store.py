@@ -0,0 +1,245 @@
+"""
+Tests for the shared event store and the loggers/analytics built on it.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.analytics.user_behavior import UserBehaviorAnalytics
+from src.database.event_store import DIMENSION_KEY, DIMENSION_USER, LATENCY_ACCURACY, EventStore
+from src.evaluation.query_tracker import QueryTracker
+from src.query_engine.structured_query_logger import QueryStatus, StructuredQueryLogger
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "events.duckdb"), flush_size=50, flush_interval=0)
+    yield store
+    store.close()
+
+
+class TestEventStore:
+
+    def test_rollups_merge_across_flushes(self, store):
+        base = datetime(2026, 3, 1, 12, 0)
+        for i in range(120):
+            store.append(
+                "api", timestamp=base + timedelta(seconds=i), user_id=f"u{i % 3}",
+                status="ok" if i % 4 else "error", key="/search", value=i + 1, amount=2,
+            )
+
+        counts = store.counts("api").set_index("status")
+        assert counts.loc["ok", "events"] == 90 and counts.loc["error", "events"] == 30
+        assert counts["amount_sum"].sum() == 240
+        assert counts["value_max"].max() == 120
+
+        series = store.timeseries("api", interval="minute")
+        assert series.groupby("period")["events"].sum().tolist() == [60, 60]
+
+        users = store.key_counts("api", DIMENSION_USER)
+        assert users.set_index("name")["events"].to_dict() == {"u0": 40, "u1": 40, "u2": 40}
+        keys = store.key_counts("api", DIMENSION_KEY, by_status=True)
+        assert set(zip(keys["name"], keys["status"])) == {("/search", "ok"), ("/search", "error")}
+
+    def test_quantiles_are_within_sketch_accuracy(self, store):
+        values = [float(v) for v in range(1, 1001)]
+        for v in values:
+            store.append("latency", value=v)
+
+        quantiles = store.quantiles("latency", [0.5, 0.95, 0.99])
+        for q, estimate in quantiles.items():
+            exact = sorted(values)[int(q * len(values))]
+            assert abs(estimate - exact) <= LATENCY_ACCURACY * exact
+        assert store.quantiles("missing", [0.5]) == {0.5: 0.0}
+
+    def test_time_bounds_and_raw_events(self, store):
+        day = datetime(2026, 3, 2)
+        store.append("jobs", timestamp=day - timedelta(minutes=1), value=1, payload={"n": 0})
+        store.append("jobs", timestamp=day + timedelta(hours=1), value=9000, payload={"n": 1})
+        store.append("jobs", timestamp=day + timedelta(hours=2), value=10, payload={"n": 2})
+
+        assert store.counts("jobs", day, day + timedelta(days=1))["events"].sum() == 2
+        assert store.events("jobs", day, day + timedelta(days=1), min_value=5000) == [{"n": 1}]
+        assert [e["n"] for e in store.events("jobs", limit=2)] == [0, 1]
+
+    def test_failed_flush_keeps_events_without_raising(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("src.database.event_store.MAX_BUFFERED_EVENTS", 3)
+        unwritable = tmp_path / "locked"
+        unwritable.mkdir()  # a directory cannot be opened as a database
+        store = EventStore(str(unwritable), flush_size=2, flush_interval=0)
+
+        for i in range(5):
+            store.append("jobs", value=i)
+        store.append("jobs", value="not a number")
+
+        assert store.flush() == 0
+        assert [e["value"] for e in store._buffer] == [2.0, 3.0, 4.0]
+
+        store.db_path = tmp_path / "events.duckdb"
+        assert store.flush() == 3
+        assert store.counts("jobs")["events"].sum() == 3
+        store.close()
+
+
+class TestStructuredQueryLogger:
+
+    def _log(self, query_logger, query, user, time_ms, status="success", tokens=0):
+        query_id = query_logger.start_query(query, user_id=user)
+        if tokens:
+            query_logger.set_llm_details(query_id, "openai", "gpt", tokens, 100)
+        if status == "failed":
+            query_logger.fail_query(query_id, "boom", execution_time_ms=time_ms)
+        else:
+            query_logger.complete_query(query_id, rows=1, execution_time_ms=time_ms, cached=status == "cached")
+
+    def test_analytics_from_rollups(self, store):
+        query_logger = StructuredQueryLogger(event_store=store)
+        for i in range(20):
+            self._log(query_logger, "What is my ROAS?" if i % 2 else "Spend by channel", f"u{i % 4}", 100 * (i + 1), tokens=10)
+        self._log(query_logger, "what is my roas?", "u9", 9000, status="failed")
+        self._log(query_logger, "Spend by channel", "u1", 0, status="cached")
+
+        analytics = query_logger.get_analytics()
+
+        assert analytics["total_queries"] == 22
+        assert (analytics["successful"], analytics["failed"], analytics["cached"]) == (20, 1, 1)
+        assert analytics["avg_execution_time_ms"] == pytest.approx((sum(100 * (i + 1) for i in range(20)) + 9000) / 21)
+        assert analytics["p95_execution_time_ms"] == pytest.approx(2000, rel=LATENCY_ACCURACY)
+        assert analytics["total_llm_tokens"] == 200
+        assert analytics["unique_users"] == 5
+
+        common = query_logger.get_common_queries()
+        assert sorted((c["count"], c["query"].lower()) for c in common) == [(11, "spend by channel"), (11, "what is my roas?")]
+
+        assert [q["natural_language_query"] for q in query_logger.get_slow_queries()] == ["what is my roas?"]
+        assert len(query_logger.get_failed_queries()) == 1
+        assert len(query_logger.get_logs(user_id="u1", status=QueryStatus.SUCCESS)) == 5
+
+    def test_other_days_are_not_counted(self, store):
+        query_logger = StructuredQueryLogger(event_store=store)
+        self._log(query_logger, "today", "u1", 10)
+
+        assert query_logger.get_analytics("2001-01-01") == {"date": "2001-01-01", "total_queries": 0}
+        assert query_logger.get_common_queries("2001-01-01") == []
+
+    def test_legacy_jsonl_is_imported_once(self, store, tmp_path, caplog):
+        legacy_dir = tmp_path / "queries"
+        legacy_dir.mkdir()
+        lines = [
+            json.dumps({
+                "id": f"q_{i}", "timestamp": f"2026-03-01T10:0{i}:00", "user_id": "u1", "session_id": None,
+                "natural_language_query": "What is my ROAS?", "status": "success",
+                "execution_time_ms": 100.0 * (i + 1), "llm_tokens_used": 10,
+            })
+            for i in range(3)
+        ]
+        (legacy_dir / "queries_2026-03-01.jsonl").write_text("\n".join(lines[:2] + ["{not json"]) + "\n")
+
+        with caplog.at_level(logging.WARNING):
+            query_logger = StructuredQueryLogger(event_store=store, legacy_dir=str(legacy_dir))
+        assert "1 legacy JSONL query log file(s)" in caplog.text
+
+        assert query_logger.migrate_jsonl(archive=False) == {"files": 1, "events": 2, "skipped_lines": 1}
+        (legacy_dir / "queries_2026-03-01.jsonl").write_text("\n".join(lines) + "\n")
+        assert query_logger.migrate_jsonl()["events"] == 1
+
+        analytics = query_logger.get_analytics("2026-03-01")
+        assert analytics["total_queries"] == 3
+        assert analytics["total_llm_tokens"] == 30
+        assert query_logger.get_common_queries("2026-03-01")[0]["count"] == 3
+        assert not list(legacy_dir.glob("queries_*.jsonl"))
+        assert (legacy_dir / "archive" / "queries_2026-03-01.jsonl").exists()
+
+
+class TestUserBehaviorAnalytics:
+
+    def _session(self, analytics, session_id, user, resources):
+        analytics.start_session(session_id, user, "desktop", "Chrome", "1.1.1.1")
+        for i, resource in enumerate(resources):
+            analytics.track_action(f"{session_id}-{i}", user, session_id, "view", resource)
+        analytics.track_action(f"{session_id}-x", user, session_id, "export", "/export")
+        analytics.end_session(session_id)
+
+    def test_stats_funnel_and_journey(self, store):
+        analytics = UserBehaviorAnalytics(event_store=store)
+        self._session(analytics, "s1", "alice", ["/home", "/pricing", "/signup"])
+        self._session(analytics, "s2", "alice", ["/home"])
+        self._session(analytics, "s3", "bob", ["/home", "/signup"])
+
+        stats = analytics.get_user_stats("alice")
+        assert stats["total_sessions"] == 2
+        assert stats["action_breakdown"] == {"view": 4, "export": 2}
+        assert stats["most_used_features"][0] == {"feature": "view", "count": 4}
+        assert analytics.get_user_stats("nobody")["total_sessions"] == 0
+
+        assert analytics.get_feature_usage() == {"/home": 3, "/export": 3, "/signup": 2, "/pricing": 1}
+
+        funnel = analytics.get_conversion_funnel(["/home", "/pricing", "/signup"])
+        assert funnel["total_users"] == 2
+        assert [step["users"] for step in funnel["funnel"]] == [3, 1, 1]
+
+        journey = analytics.get_user_journey("s1")
+        assert [step["resource"] for step in journey] == ["/home", "/pricing", "/signup", "/export"]
+        assert analytics.get_user_journey("unknown") == []
+
+        cohorts = analytics.get_cohort_analysis("day")
+        assert [c["size"] for c in cohorts["cohorts"]] == [2]
+
+    def test_storage_path_gets_its_own_store(self, tmp_path):
+        analytics = UserBehaviorAnalytics(storage_path=str(tmp_path / "analytics"))
+        assert analytics.event_store.db_path == (tmp_path / "analytics" / "events.duckdb").resolve()
+
+    def test_legacy_files_are_imported_once(self, store, tmp_path):
+        legacy_dir = tmp_path / "user_analytics"
+        legacy_dir.mkdir()
+        actions = [
+            {"action_id": f"a{i}", "user_id": "alice", "session_id": "s1", "action_type": "view",
+             "resource": resource, "details": {}, "timestamp": f"2026-03-01 10:00:0{i + 1}"}
+            for i, resource in enumerate(["/home", "/pricing"])
+        ]
+        (legacy_dir / "session_s1.json").write_text(json.dumps({
+            "session_id": "s1", "user_id": "alice", "start_time": "2026-03-01 10:00:00",
+            "end_time": "2026-03-01 10:05:00", "duration_seconds": 300, "page_views": 2,
+            "actions": actions, "device": "desktop", "browser": "Chrome", "ip_address": "1.1.1.1",
+        }))
+        (legacy_dir / "actions_2026-03-01.jsonl").write_text(
+            "\n".join(json.dumps(a) for a in actions) + "\n{\"action_id\": \"broken\"}\n"
+        )
+
+        analytics = UserBehaviorAnalytics(event_store=store, legacy_dir=str(legacy_dir))
+        assert analytics.migrate_jsonl(archive=False) == {"files": 2, "events": 3, "skipped_lines": 1}
+        assert analytics.migrate_jsonl()["events"] == 0
+
+        stats = analytics.get_user_stats("alice")
+        assert stats["total_sessions"] == 1
+        assert stats["avg_session_duration"] == 300
+        assert stats["action_breakdown"] == {"view": 2}
+        assert [step["resource"] for step in analytics.get_user_journey("s1")] == ["/home", "/pricing"]
+        assert sorted(p.name for p in (legacy_dir / "archive").iterdir()) == ["actions_2026-03-01.jsonl", "session_s1.json"]
+
+
+class TestQueryTrackerActivity:
+
+    def test_lifecycle_events_roll_up(self, tmp_path, store):
+        tracker = QueryTracker(db_path=str(tmp_path / "tracker.db"), event_store=store)
+        for i in range(3):
+            query_id = tracker.start_query(f"query {i}", ["a", "b"], user_id="u1")
+            if i < 2:
+                tracker.update_query(query_id, selected_interpretation_index=0, execution_time_ms=100 * (i + 1))
+            else:
+                tracker.update_query(query_id, error_message="bad sql", execution_time_ms=50)
+            tracker.add_feedback(query_id, 1 if i else -1)
+
+        activity = tracker.get_activity(interval="day")
+
+        assert activity[["started", "executed", "failed", "feedback"]].sum().tolist() == [3, 2, 1, 3]
+        assert activity["avg_execution_time_ms"].iloc[-1] == pytest.approx(350 / 3)
+        assert activity["avg_feedback"].iloc[-1] == pytest.approx(1 / 3)
+
+        summary = tracker.get_metrics_summary()
+        assert summary["total_queries"] == 3
+        assert summary["success_rate"] == pytest.approx(66.67)
+        assert summary["interpretation_accuracy"] == pytest.approx(66.67)
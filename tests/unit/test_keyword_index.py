@@ -0,0 +1,111 @@
+"""
+Tests for the BM25 inverted keyword index.
+"""
+
+import json
+import random
+
+import numpy as np
+import pytest
+
+from src.knowledge.keyword_index import KeywordIndex, analyze, stem
+from src.knowledge.knowledge_ingestion import KnowledgeIngestion
+from src.knowledge.vector_store import KeywordRetriever, VectorStoreConfig
+
+VOCAB = [f"term{i}" for i in range(60)]
+
+
+def _brute_force(index, query, top_k, allowed=None):
+    scores = np.zeros(index.num_docs)
+    for term in set(analyze(query)):
+        if term not in index.terms:
+            continue
+        offset, length, _ = index.terms[term]
+        ids = np.asarray(index.doc_ids[offset:offset + length])
+        tfs = np.asarray(index.tfs[offset:offset + length])
+        scores[ids] += analyze(query).count(term) * index._term_scores(length, ids, tfs)
+    if allowed is not None:
+        scores[~allowed] = 0
+    ranked = sorted((i for i in range(index.num_docs) if scores[i] > 0), key=lambda i: (-scores[i], i))
+    return [(i, scores[i]) for i in ranked[:top_k]]
+
+
+@pytest.fixture
+def corpus():
+    rng = random.Random(7)
+    # Zipf-like term usage so postings lengths and score bounds vary
+    weights = [1 / (i + 1) for i in range(len(VOCAB))]
+    return [" ".join(rng.choices(VOCAB, weights, k=rng.randint(3, 40))) for _ in range(500)]
+
+
+class TestAnalyzer:
+
+    def test_stop_words_and_inflections(self):
+        assert analyze("The optimized campaigns are optimizing optimization!") == ["optimiz", "campaign", "optimiz", "optimiz"]
+        assert stem("budgets") == stem("budget")
+        assert stem("class") == "class"
+
+
+class TestKeywordIndex:
+
+    @pytest.mark.parametrize("query", ["term0 term1", "term3 term40 term41 term59", "term59 term59 term2", "term1 nothing"])
+    def test_pruned_search_matches_exhaustive_scoring(self, corpus, query):
+        index = KeywordIndex.build(corpus)
+        got = index.search(query, top_k=10)
+        expected = _brute_force(index, query, 10)
+        assert [doc for doc, _ in got] == [doc for doc, _ in expected]
+        assert np.allclose([s for _, s in got], [s for _, s in expected])
+
+    def test_allowed_mask_restricts_candidates(self, corpus):
+        index = KeywordIndex.build(corpus)
+        allowed = np.arange(len(corpus)) % 7 == 0
+        got = index.search("term5 term20", top_k=8, allowed=allowed)
+        assert got and all(allowed[doc] for doc, _ in got)
+        assert [doc for doc, _ in got] == [doc for doc, _ in _brute_force(index, "term5 term20", 8, allowed)]
+
+    def test_only_matching_documents_are_returned(self):
+        index = KeywordIndex.build(["meta ads budget", "linkedin lead gen", "tiktok creative"])
+        assert [doc for doc, _ in index.search("budget for meta", top_k=5)] == [0]
+        assert index.search("the", top_k=5) == []
+
+    def test_save_and_load_memory_mapped(self, corpus, tmp_path):
+        index = KeywordIndex.build(corpus, fingerprint="abc")
+        index.save(tmp_path / "kw")
+
+        loaded = KeywordIndex.load(tmp_path / "kw", fingerprint="abc")
+        assert isinstance(loaded.doc_ids, np.memmap)
+        assert loaded.search("term4 term9", top_k=5) == index.search("term4 term9", top_k=5)
+        assert KeywordIndex.load(tmp_path / "kw", fingerprint="other") is None
+        assert KeywordIndex.load(tmp_path / "missing") is None
+
+
+class TestRetrieversUseIndex:
+
+    def test_keyword_retriever_persists_and_rebuilds_on_change(self, tmp_path):
+        config = VectorStoreConfig(index_path=tmp_path / "faiss.index", metadata_path=tmp_path / "metadata.json")
+        config.metadata_path.write_text(json.dumps([
+            {"text": "Retargeting audiences on Meta", "source": "web"},
+            {"text": "Bid strategies for search campaigns", "source": "pdf"},
+        ]))
+
+        first = KeywordRetriever(config=config)
+        assert (config.keyword_index_path / "lexicon.json").exists()
+        assert first.search("retargeted audience")[0]["metadata"]["source"] == "web"
+
+        config.metadata_path.write_text(json.dumps([{"text": "Creative fatigue signals", "source": "blog"}]))
+        second = KeywordRetriever(config=config)
+        assert second.search("creative")[0]["metadata"]["source"] == "blog"
+
+    def test_ingestion_context_uses_index(self):
+        ingestion = KnowledgeIngestion()
+        ingestion.knowledge_base = [
+            {"success": True, "source": "url", "chunks": ["Campaign optimization checklist", "Unrelated text"]},
+            {"success": True, "source": "pdf", "chunks": ["Optimizing campaigns for ROAS"]},
+        ]
+        context = ingestion.get_context_for_query("campaign optimization", max_chunks=2)
+        assert "[Source: url]\nCampaign optimization checklist" in context
+        assert "[Source: pdf]\nOptimizing campaigns for ROAS" in context
+        assert "Unrelated" not in context
+
+        ingestion.knowledge_base.append({"success": True, "source": "youtube", "chunks": ["Lookalike audiences"]})
+        assert "youtube" in ingestion.get_context_for_query("lookalike")
@@ -0,0 +1,157 @@
+"""
+Tests for filter-aware candidate selection in the vector, keyword and hybrid retrievers.
+"""
+
+import json
+from unittest.mock import Mock
+
+import faiss
+import numpy as np
+import pytest
+
+from src.knowledge.vector_store import (
+    HybridRetriever,
+    KeywordRetriever,
+    MetadataFilterIndex,
+    VectorRetriever,
+    VectorStoreConfig,
+)
+
+DIM = 8
+
+
+def _vector(i):
+    v = np.zeros(DIM, dtype="float32")
+    v[i % DIM] = 1.0
+    v[(i + 1) % DIM] = 0.1 * (i // DIM + 1)
+    return v
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Small store where only every tenth chunk is from the 'pdf' source."""
+    metadata = [
+        {
+            "text": f"campaign budget tip {i}" + (" retargeting" if i % 10 == 0 else ""),
+            "source": "pdf" if i % 10 == 0 else "web",
+            "category": "budget" if i % 2 else "creative",
+            "tags": ["a", "b"] if i % 3 == 0 else ["c"],
+        }
+        for i in range(200)
+    ]
+    config = VectorStoreConfig(index_path=tmp_path / "faiss.index", metadata_path=tmp_path / "metadata.json")
+    config.metadata_path.write_text(json.dumps(metadata))
+    index = faiss.IndexFlatIP(DIM)
+    vectors = np.stack([_vector(i) for i in range(len(metadata))])
+    faiss.normalize_L2(vectors)
+    index.add(vectors)
+    faiss.write_index(index, str(config.index_path))
+    return config, metadata
+
+
+def _client(vector):
+    client = Mock()
+    client.embeddings.create.return_value = Mock(data=[Mock(embedding=vector.tolist())])
+    return client
+
+
+class TestMetadataFilterIndex:
+
+    def test_mask_matches_scalar_list_and_unhashable_filters(self, store):
+        _, metadata = store
+        index = MetadataFilterIndex(metadata)
+
+        assert index.mask(None) is None
+        assert index.mask({"source": "pdf"}).sum() == 20
+        assert index.mask({"source": ["pdf", "web"]}).all()
+        assert index.mask({"source": "pdf", "category": "budget"}).sum() == 0
+        assert index.mask({"tags": [["c"]]}).sum() == sum(1 for m in metadata if m["tags"] == ["c"])
+        assert not index.mask({"missing": "x"}).any()
+
+
+class TestFilteredVectorSearch:
+
+    def test_selective_filter_still_returns_top_k(self, store):
+        config, _ = store
+        retriever = VectorRetriever(config=config, client=_client(_vector(3)))
+
+        results = retriever.search("query", top_k=5, metadata_filters={"source": "pdf"})
+
+        assert len(results) == 5
+        assert all(r["metadata"]["source"] == "pdf" for r in results)
+        scores = [r["score"] for r in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_overfetch_fallback_when_index_cannot_filter(self, store):
+        config, _ = store
+        retriever = VectorRetriever(config=config, client=_client(_vector(3)))
+        inner = retriever.index
+        calls = []
+
+        class NoSelectorIndex:
+            ntotal = inner.ntotal
+
+            def search(self, query, k, params=None):
+                if params is not None:
+                    raise TypeError("params not supported")
+                calls.append(k)
+                return inner.search(query, k)
+
+        retriever.index = NoSelectorIndex()
+        results = retriever.search("query", top_k=5, metadata_filters={"source": "pdf"})
+
+        assert len(results) == 5
+        assert all(r["metadata"]["source"] == "pdf" for r in results)
+        # Fetch size scales with selectivity (1 in 10) instead of a fixed multiple
+        assert calls[0] >= 50
+
+    def test_no_matching_chunks_skips_embedding(self, store):
+        config, _ = store
+        client = _client(_vector(0))
+        retriever = VectorRetriever(config=config, client=client)
+
+        assert retriever.search("query", metadata_filters={"source": "video"}) == []
+        client.embeddings.create.assert_not_called()
+
+
+class TestFilteredKeywordSearch:
+
+    def test_scores_only_allowed_chunks(self, store):
+        config, _ = store
+        retriever = KeywordRetriever(config=config)
+
+        results = retriever.search("retargeting budget", top_k=30, metadata_filters={"category": "creative"})
+
+        assert len(results) == 30
+        assert all(r["metadata"]["category"] == "creative" for r in results)
+        # Every 'retargeting' chunk is a creative one, and they rank first
+        assert all("retargeting" in r["text"] for r in results[:20])
+
+
+class TestHybridSearch:
+
+    def test_legs_run_concurrently_and_merge(self, store, tmp_path):
+        config, _ = store
+        vector = VectorRetriever(config=config, client=_client(_vector(0)))
+        keyword = KeywordRetriever(config=config)
+        threads = {}
+
+        def tracked(name, search):
+            def run(*args, **kwargs):
+                import threading
+                threads[name] = threading.current_thread().name
+                return search(*args, **kwargs)
+            return run
+
+        vector.search = tracked("vector", vector.search)
+        keyword.search = tracked("keyword", keyword.search)
+        hybrid = HybridRetriever(config=config, use_keyword=False, use_rerank=False)
+        hybrid.vector_retriever, hybrid.keyword_retriever = vector, keyword
+
+        results = hybrid.search("retargeting", top_k=4, metadata_filters={"source": "pdf"})
+
+        assert len(results) == 4
+        assert all(r["metadata"]["source"] == "pdf" for r in results)
+        assert all(name.startswith("hybrid-search") for name in threads.values())
+        logged = [json.loads(line) for line in (tmp_path / "retrieval_metrics.jsonl").read_text().splitlines()]
+        assert set(logged[-1]["leg_ms"]) == {"vector", "keyword"}
@@ -119,21 +119,28 @@ class TestVectorStoreBuilder:
             # Should have called embeddings.create twice (2 batches)
             assert mock_builder.client.embeddings.create.call_count == 2
     
-    def test_persist_metadata(self, mock_builder, tmp_path):
-        """Test metadata persistence."""
-        metadata = [
+    def test_persist_chunk_store(self, mock_builder):
+        """Test chunks persist in the chunk store and a rebuild renumbers them densely."""
+        from src.knowledge.chunk_store import ChunkStore
+        from src.knowledge.keyword_index import KeywordIndex
+        records = [
             {"text": "Chunk 1", "source": "web"},
-            {"text": "Chunk 2", "source": "pdf"}
+            {"text": "Chunk 2", "source": "pdf"},
+            {"text": "Chunk 3", "source": "pdf"},
         ]
+        for _ in range(2):
+            with mock_builder.store.transaction() as txn:
+                txn.clear()
+                ids = txn.add(records)
+        mock_builder._persist_keyword_index()
         
-        mock_builder._persist_metadata(metadata)
-        
-        # Check file was created
-        assert mock_builder.config.metadata_path.exists()
+        reopened = ChunkStore(mock_builder.config.chunk_store_path)
+        assert ids == [1, 2, 3]
+        assert [r["source"] for r in reopened.records()] == ["web", "pdf", "pdf"]
         
-        # Check content
-        saved = json.loads(mock_builder.config.metadata_path.read_text())
-        assert len(saved) == 2
+        index = KeywordIndex.load(mock_builder.config.keyword_index_path, fingerprint=reopened.revision())
+        assert index.num_docs == 3
+        assert index.avgdl == 2.0  # "chunk" and "1"/"2"/"3" per text; the unused id 0 is not counted
     
     def test_load_metadata(self, mock_builder, tmp_path):
         """Test metadata loading."""
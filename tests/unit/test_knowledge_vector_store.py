@@ -163,14 +163,6 @@ class TestVectorStoreRetrieval:
 class TestHybridSearch:
     """Test hybrid search functionality."""
     
-    def test_bm25_available(self):
-        """Test BM25 availability check."""
-        try:
-            from src.knowledge.vector_store import BM25_AVAILABLE
-            assert isinstance(BM25_AVAILABLE, bool)
-        except ImportError:
-            pytest.skip("Vector store not available")
-    
     def test_cohere_reranking_available(self):
         """Test Cohere reranking availability."""
         try:
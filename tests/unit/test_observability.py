@@ -140,6 +140,61 @@ class TestMetricsCollector:
         
         assert "requests_total" in str(all_metrics)
         assert isinstance(all_metrics, dict)
+    
+    def test_thread_buffers_fold_into_totals(self):
+        """Values recorded on other threads should be visible on read."""
+        import threading
+        
+        metrics = MetricsCollector()
+        
+        def record():
+            for i in range(1000):
+                metrics.increment("jobs", labels={"queue": "default"})
+                metrics.observe("job_ms", float(i % 100 + 1))
+        
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        assert metrics.get_counter("jobs", labels={"queue": "default"}) == 4000
+        assert metrics.get_histogram_stats("job_ms")["count"] == 4000
+        # Buffers of finished threads are dropped once folded in
+        assert len(metrics._buffers) <= 1
+    
+    def test_bound_metric_and_label_order(self):
+        """Bound handles and reordered labels should share one key."""
+        metrics = MetricsCollector()
+        requests = metrics.bind("requests", labels={"method": "GET", "path": "/"})
+        
+        requests.increment()
+        metrics.increment("requests", labels={"path": "/", "method": "GET"})
+        
+        assert metrics.get_counter("requests", labels={"method": "GET", "path": "/"}) == 2
+        assert 'requests{method="GET",path="/"} 2' in metrics.to_prometheus_format()
+    
+    def test_sampled_histogram_is_reweighted(self):
+        """Sampled observations should count for the skipped ones."""
+        metrics = MetricsCollector()
+        metrics.set_sample_rate("latency", 0.25)
+        
+        with patch("src.utils.observability.random.random", side_effect=[0.1, 0.9, 0.9, 0.9] * 10):
+            for _ in range(40):
+                metrics.observe("latency", 5.0)
+        
+        assert metrics.get_histogram_stats("latency")["count"] == 40
+        with pytest.raises(ValueError):
+            metrics.set_sample_rate("latency", 0)
+    
+    def test_reset_discards_buffered_values(self):
+        """Reset should drop values not yet folded in."""
+        metrics = MetricsCollector()
+        metrics.increment("pending")
+        
+        metrics.reset()
+        
+        assert metrics.get_counter("pending") == 0
 
 
 # ============================================================================
@@ -200,6 +255,31 @@ class TestTracer:
         
         assert span.status == "ERROR"
         assert span.tags.get("error") == "true"
+    
+    def test_unsampled_traces_are_not_stored(self):
+        """Children should follow the root's sampling decision."""
+        tracer = Tracer(sample_rate=0.0)
+        
+        with tracer.start_span("root") as root:
+            with tracer.start_span("child") as child:
+                assert child.trace_id == root.trace_id
+        
+        assert not child.sampled
+        assert child.end_time is not None
+        assert tracer.get_trace(root.trace_id) == []
+        assert tracer.get_current_span() is None
+    
+    def test_completed_spans_are_bounded(self):
+        """Only the most recent completed spans should be kept."""
+        tracer = Tracer(sample_rate=1.0)
+        tracer._completed_spans = type(tracer._completed_spans)(maxlen=5)
+        
+        for i in range(8):
+            with tracer.start_span(f"op{i}"):
+                pass
+        
+        assert [s.operation_name for s in tracer._completed_spans] == [f"op{i}" for i in range(3, 8)]
+        assert len(tracer.get_recent_traces()) == 5
 
 
 # ============================================================================
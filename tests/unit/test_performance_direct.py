@@ -196,6 +196,105 @@ class TestSemanticCache:
         metrics = cache.get_metrics()
         assert 'hits' in metrics
         assert 'misses' in metrics
+    
+    def test_hash_embedding_matches_per_bit_reference(self):
+        """Vectorized hash embedding equals the per-bit definition."""
+        import hashlib
+        import numpy as np
+        from src.utils.performance import hash_embedding
+        
+        text = "LinkedIn B2B lead gen benchmarks"
+        expected = np.zeros(128)
+        for i, word in enumerate(text.lower().split()):
+            h = int(hashlib.sha256(word.encode()).hexdigest(), 16)
+            expected += np.array([(h >> j) & 1 for j in range(128)]) / (i + 1)
+        expected /= np.linalg.norm(expected)
+        assert np.allclose(hash_embedding([text])[0], expected, atol=1e-6)
+    
+    def test_semantic_hit_with_custom_embedding(self, tmp_path):
+        """Similar queries hit through the embedding matrix."""
+        import numpy as np
+        
+        def embed(texts):
+            return np.array([[1.0, 0.1 if 'today' in t else 0.0] for t in texts])
+        
+        cache = SemanticCache(cache_dir=str(tmp_path), embedding_fn=embed)
+        cache.set("ctr benchmarks", ["chunk"])
+        assert cache.get("ctr benchmarks today") == ["chunk"]
+        assert cache.get_metrics()['semantic_hits'] == 1
+    
+    def test_context_is_part_of_lookup(self, cache):
+        """Entries cached for one platform do not answer another."""
+        cache.set("ctr benchmarks", ["meta"], context={'platform': 'meta'})
+        cache.set("ctr benchmarks", ["google"], context={'platform': 'google'})
+        assert cache.get("ctr benchmarks", {'platform': 'meta'}) == ["meta"]
+        assert cache.get("ctr benchmarks", {'platform': 'google'}) == ["google"]
+        assert cache.get("ctr benchmarks") is None
+        assert cache.get("ctr benchmarks", {'platform': 'tiktok'}) is None
+    
+    def test_lru_eviction(self, tmp_path):
+        """The least recently used entry is evicted first."""
+        cache = SemanticCache(cache_dir=str(tmp_path), max_entries=2, similarity_threshold=1.1)
+        cache.set("first query", 1)
+        cache.set("second query", 2)
+        assert cache.get("first query") == 1
+        cache.set("third query", 3)
+        assert cache.get("second query") is None
+        assert cache.get("first query") == 1
+        assert cache.get("third query") == 3
+        assert cache.get_metrics()['evictions'] == 1
+        assert len(cache._free_rows) == 0  # evicted row was reused
+    
+    def test_save_and_reload(self, cache, tmp_path):
+        """Saved entries are reloaded with their context."""
+        cache.set("roas by platform", {"r": 1}, context={'platform': 'meta'})
+        cache.save_cache()
+        reloaded = SemanticCache(cache_dir=str(tmp_path))
+        assert reloaded.get("roas by platform", {'platform': 'meta'}) == {"r": 1}
+    
+    def test_reload_reads_results_lazily(self, cache, tmp_path):
+        """Startup loads the index only; results are read on first hit."""
+        from src.utils.performance import _UNLOADED
+        
+        cache.set("cpa trends", [1, 2, 3])
+        cache.save_cache()
+        reloaded = SemanticCache(cache_dir=str(tmp_path))
+        key = reloaded._get_cache_key("cpa trends")
+        assert reloaded._cache[key].results is _UNLOADED
+        assert reloaded.get("cpa trends") == [1, 2, 3]
+        assert reloaded._cache[key].results == [1, 2, 3]
+    
+    def test_expired_entries_are_not_loaded(self, cache, tmp_path):
+        """Per-entry TTL is enforced on disk."""
+        cache.set("old query", "stale", ttl_hours=1)
+        cache.set("new query", "fresh")
+        cache._dirty[cache._get_cache_key("old query")][0].timestamp -= timedelta(hours=2)
+        cache.save_cache()
+        reloaded = SemanticCache(cache_dir=str(tmp_path), similarity_threshold=1.1)
+        assert reloaded.get("old query") is None
+        assert reloaded.get("new query") == "fresh"
+        assert reloaded._store.count() == 1
+    
+    def test_shared_between_instances(self, tmp_path):
+        """Entries flushed by one process are visible to another using the same directory."""
+        writer = SemanticCache(cache_dir=str(tmp_path))
+        reader = SemanticCache(cache_dir=str(tmp_path))
+        writer.set("spend by channel", {"rows": 3}, context={'platform': 'google'})
+        writer.flush()
+        assert reader.get("spend by channel", {'platform': 'google'}) == {"rows": 3}
+        
+        writer.set("ctr by device", {"rows": 2})
+        writer.flush()
+        reader.flush()  # picks up new entries for semantic lookups
+        assert reader._get_cache_key("ctr by device") in reader._cache
+    
+    def test_memory_only(self, tmp_path):
+        """persist=False keeps nothing on disk."""
+        cache = SemanticCache(cache_dir=str(tmp_path), persist=False)
+        cache.set("query", 1)
+        cache.save_cache()
+        assert cache.get("query") == 1
+        assert not (tmp_path / "semantic_cache.db").exists()
 
 
 class TestCacheEntry:
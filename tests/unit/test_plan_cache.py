@@ -0,0 +1,113 @@
+"""
+Tests for the question-to-SQL plan cache.
+"""
+
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+# Bound at import: the autouse conftest fixture patches the name on nl_to_sql
+from src.query_engine.nl_to_sql import NaturalLanguageQueryEngine
+from src.query_engine.plan_cache import (
+    QuestionNormalizer,
+    SQLPlanCache,
+    parameterize,
+    schema_fingerprint,
+)
+
+COLUMNS = ['Date', 'Platform', 'Total Spent', 'Clicks', 'Campaign_Name_Full']
+VALUES = {'Platform': ['Google Ads', 'Meta', 'LinkedIn']}
+
+
+@pytest.fixture
+def normalizer():
+    return QuestionNormalizer(COLUMNS, VALUES)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SQLPlanCache(path=str(tmp_path / "plans.db"))
+
+
+class TestQuestionNormalizer:
+
+    def test_synonyms_and_filler_share_a_shape(self, normalizer):
+        a = normalizer.normalize("Show me total spend by platform?")
+        b = normalizer.normalize("what is the total cost by network")
+        assert a.shape == b.shape == "total [Total Spent] by [Platform]"
+
+    def test_values_become_slots(self, normalizer):
+        shape = normalizer.normalize("Top 5 campaigns by clicks on Google Ads since 2024-01-01")
+        assert shape.shape == "top <number> campaigns by [Clicks] on <entity:Platform> since <date>"
+        assert [s.value for s in shape.slots] == ['5', 'Google Ads', '2024-01-01']
+
+    def test_time_units_stay_literal(self, normalizer):
+        assert normalizer.normalize("spend last month").shape != normalizer.normalize("spend last week").shape
+
+
+class TestParameterize:
+
+    def test_slots_found_in_sql_are_parameterized(self, normalizer):
+        question = normalizer.normalize("top 5 campaigns by clicks on Google Ads")
+        plan = parameterize(
+            "SELECT Campaign_Name_Full, SUM(Clicks) FROM t WHERE Platform = 'Google Ads' "
+            "GROUP BY 1 ORDER BY 2 DESC LIMIT 5",
+            question.slots
+        )
+        assert plan.fixed == {}
+        other = normalizer.normalize("top 3 campaigns by clicks on LinkedIn")
+        assert plan.render(other.slots).endswith("WHERE Platform = 'LinkedIn' GROUP BY 1 ORDER BY 2 DESC LIMIT 3")
+
+    def test_ambiguous_number_stays_fixed(self, normalizer):
+        question = normalizer.normalize("top 2 platforms by ctr")
+        plan = parameterize("SELECT Platform, ROUND(SUM(Clicks), 2) FROM t GROUP BY 1 LIMIT 2", question.slots)
+        assert plan.fixed == {0: '2'}
+        assert not plan.matches(normalizer.normalize("top 3 platforms by ctr").slots)
+
+    def test_unslotted_dates_are_not_cached(self, normalizer):
+        question = normalizer.normalize("spend last month")
+        assert parameterize("SELECT SUM(x) FROM t WHERE Date >= '2024-05-01'", question.slots) is None
+
+
+class TestSQLPlanCache:
+
+    def test_store_lookup_and_persistence(self, cache, normalizer, tmp_path):
+        fp = schema_fingerprint("all_campaigns", COLUMNS)
+        cache.store(fp, normalizer.normalize("spend on Meta"), "SELECT SUM(x) FROM t WHERE Platform = 'Meta'")
+
+        sql, _ = cache.lookup(fp, normalizer.normalize("cost on linkedin"))
+        assert sql == "SELECT SUM(x) FROM t WHERE Platform = 'LinkedIn'"
+        assert cache.lookup(schema_fingerprint("all_campaigns", ['Other']), normalizer.normalize("spend on Meta")) is None
+        assert cache.get_stats()['hit_rate'] == 50.0
+
+        reopened = SQLPlanCache(path=str(tmp_path / "plans.db"))
+        assert reopened.lookup(fp, normalizer.normalize("spend on Meta")) is not None
+
+    def test_invalidate(self, cache, normalizer):
+        question = normalizer.normalize("clicks by platform")
+        plan = cache.store("fp", question, "SELECT Platform, SUM(Clicks) FROM t GROUP BY 1")
+        cache.invalidate("fp", question, plan)
+        assert cache.lookup("fp", question) is None
+
+
+class TestEnginePlanReuse:
+
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    def test_repeat_question_skips_llm(self, cache):
+        engine = NaturalLanguageQueryEngine(api_key='test-key', plan_cache=cache)
+        engine.load_data(pd.DataFrame({
+            'platform': ['Google', 'Meta', 'Google'],
+            'spend': [10.0, 20.0, 5.0],
+        }), table_name='campaigns')
+
+        sql = "SELECT platform, SUM(spend) AS total FROM campaigns WHERE platform = 'Google' GROUP BY platform"
+        with patch.object(engine, 'generate_sql', return_value=sql) as generate, \
+             patch.object(engine, '_generate_answer', return_value="ok"):
+            first = engine.ask("total spend for Google")
+            second = engine.ask("total cost for meta")
+
+        assert generate.call_count == 1
+        assert second['model_used'] == "PlanCache"
+        assert second['results']['total'].tolist() == [20.0]
+        assert first['results']['total'].tolist() == [15.0]
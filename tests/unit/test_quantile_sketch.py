@@ -0,0 +1,174 @@
+"""
+Tests for the quantile sketch and the histograms built on it.
+"""
+
+import random
+from datetime import timedelta
+
+import pytest
+
+from src.monitoring.query_monitor import QueryMonitor
+from src.utils.observability import MetricsCollector
+from src.utils.quantile_sketch import DDSketch, Histogram
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class TestDDSketch:
+
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(0, 2) for _ in range(20000)]
+        sketch = DDSketch(relative_accuracy=0.01)
+        for v in values:
+            sketch.add(v)
+
+        for q in (0.0, 0.25, 0.5, 0.9, 0.95, 0.99, 1.0):
+            exact = _exact(values, q)
+            assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+        assert sketch.count == len(values)
+        assert sketch.avg == pytest.approx(sum(values) / len(values))
+
+    def test_negative_and_zero_values(self):
+        values = [-50.0, -5.0, 0.0, 0.0, 3.0, 30.0]
+        sketch = DDSketch()
+        for v in values:
+            sketch.add(v)
+
+        assert sketch.quantile(0) == pytest.approx(-50.0, rel=0.01)
+        assert sketch.quantile(0.4) == 0.0
+        assert sketch.quantile(1) == 30.0
+        assert DDSketch().quantile(0.5) is None
+
+    def test_merge_matches_single_sketch(self):
+        rng = random.Random(3)
+        values = [rng.uniform(1, 1000) for _ in range(3000)]
+        whole, left, right = DDSketch(), DDSketch(), DDSketch()
+        for i, v in enumerate(values):
+            whole.add(v)
+            (left if i % 2 else right).add(v)
+
+        left.merge(right)
+
+        assert left.count == whole.count
+        for q in (0.5, 0.95, 0.99):
+            assert left.quantile(q) == whole.quantile(q)
+        with pytest.raises(ValueError):
+            left.merge(DDSketch(relative_accuracy=0.05))
+
+    def test_serialization_round_trip(self):
+        sketch = DDSketch()
+        for v in (0.2, 4.0, 4.1, 900.0, -1.0):
+            sketch.add(v)
+
+        restored = DDSketch.from_dict(sketch.to_dict())
+
+        assert restored.to_dict() == sketch.to_dict()
+        assert restored.quantile(0.5) == sketch.quantile(0.5)
+
+    def test_memory_is_bounded_by_collapsing_low_buckets(self):
+        # 500 bins at 1% accuracy span about four decades
+        sketch = DDSketch(max_bins=500)
+        for exponent in range(-6, 7):
+            sketch.add(10.0 ** exponent)
+
+        assert len(sketch._positive.bins) == 500
+        assert sketch.count == 13
+        # The highest quantiles keep their accuracy
+        assert sketch.quantile(1) == pytest.approx(1e6, rel=0.01)
+        assert sketch.quantile(0.9) == pytest.approx(1e5, rel=0.01)
+
+    def test_add_bins_loads_sql_rollup_keys(self):
+        direct = DDSketch()
+        for v in range(1, 101):
+            direct.add(float(v))
+        bins = {}
+        for v in range(1, 101):
+            key = direct.key(float(v))
+            bins[key] = bins.get(key, 0) + 1
+
+        loaded = DDSketch()
+        loaded.add_bins(bins)
+
+        assert loaded.count == 100
+        assert loaded.quantile(0.5) == pytest.approx(51, rel=0.01)
+
+
+class TestHistogram:
+
+    def test_cumulative_buckets(self):
+        histogram = Histogram(buckets=[1, 5, 10])
+        for v in (0.5, 1, 3, 7, 12, 50):
+            histogram.observe(v)
+
+        assert histogram.cumulative_buckets() == [(1.0, 2), (5.0, 3), (10.0, 4), (float("inf"), 6)]
+        assert histogram.sum == pytest.approx(73.5)
+
+    def test_merge_and_round_trip(self):
+        first, second = Histogram(buckets=[1, 10]), Histogram(buckets=[1, 10])
+        first.observe(0.5)
+        second.observe(5)
+
+        first.merge(Histogram.from_dict(second.to_dict()))
+
+        assert first.bucket_counts == [1, 1, 0]
+        assert first.stats()["max"] == 5
+        with pytest.raises(ValueError):
+            first.merge(Histogram(buckets=[2]))
+
+
+class TestMetricsCollectorHistograms:
+
+    def test_prometheus_histogram_exposition(self):
+        metrics = MetricsCollector()
+        metrics.set_buckets("latency_ms", [10, 100])
+        for v in (5, 50, 500):
+            metrics.observe("latency_ms", v, labels={"op": "query"})
+        metrics.increment("requests", labels={"path": '/a"b'})
+
+        output = metrics.to_prometheus_format()
+
+        assert output.count("# TYPE latency_ms histogram") == 1
+        assert 'latency_ms_bucket{op="query",le="10.0"} 1' in output
+        assert 'latency_ms_bucket{op="query",le="100.0"} 2' in output
+        assert 'latency_ms_bucket{op="query",le="+Inf"} 3' in output
+        assert 'latency_ms_count{op="query"} 3' in output
+        assert 'requests{path="/a\\"b"} 1' in output
+
+    def test_stats_are_not_truncated_and_merge_across_workers(self):
+        worker, other = MetricsCollector(), MetricsCollector()
+        for v in range(1, 2001):
+            worker.observe("duration", float(v))
+            other.observe("duration", float(v))
+
+        worker.merge_histograms(other.export_histograms())
+        stats = worker.get_histogram_stats("duration")
+
+        assert stats["count"] == 4000
+        assert stats["min"] == 1.0 and stats["max"] == 2000.0
+        assert stats["p95"] == pytest.approx(1901, rel=0.01)
+
+
+class TestQueryMonitorSketch:
+
+    def test_stats_from_sketches(self):
+        monitor = QueryMonitor(slow_query_threshold=0.9, max_history=10)
+        for i in range(1, 1001):
+            monitor.record_query("SELECT" if i % 2 else "INSERT", "q", i / 1000, success=i % 10 != 0)
+
+        stats = monitor.get_stats()
+        assert stats["total_queries"] == 1000
+        assert stats["p95_duration"] == pytest.approx(0.951, rel=0.01)
+        assert (stats["slow_queries"], stats["failed_queries"]) == (101, 100)
+        assert stats["queries_by_type"] == {"SELECT": 500, "INSERT": 500}
+        assert monitor.get_stats(timedelta(minutes=5))["total_queries"] == 1000
+
+        breakdown = monitor.get_query_breakdown()
+        assert breakdown["INSERT"]["failed"] == 100 and breakdown["SELECT"]["count"] == 500
+
+        merged = QueryMonitor.merge_stats([monitor.export_stats(), monitor.export_stats()])
+        assert merged["total_queries"] == 2000
+        assert merged["p99_duration"] == pytest.approx(stats["p99_duration"])
@@ -0,0 +1,98 @@
+"""
+Tests for the warm NL-to-SQL session pool.
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.query_engine.session_pool import NLQuerySessionPool
+
+
+class FakeManager:
+    """DuckDB manager stand-in with a settable dataset version."""
+
+    def __init__(self, version="v1"):
+        self.version = version
+        self.dataset_dir = "/tmp/dataset"
+
+    @property
+    def dataset_version(self):
+        return self.version
+
+    def get_schema(self):
+        return None
+
+    def has_data(self):
+        return True
+
+
+@pytest.fixture
+def pool():
+    return NLQuerySessionPool(engine_factory=MagicMock, size=2, wait_seconds=0.2)
+
+
+class TestNLQuerySessionPool:
+
+    def test_session_is_reused_across_questions(self, pool):
+        mgr = FakeManager()
+        with pool.session(mgr) as first:
+            pass
+        with pool.session(mgr) as second:
+            pass
+        assert first is second
+        first.load_parquet_data.assert_called_once()
+        assert pool.get_stats()['reused'] == 1
+
+    def test_concurrent_requests_get_distinct_engines(self, pool):
+        mgr = FakeManager()
+        with pool.session(mgr) as a, pool.session(mgr) as b:
+            assert a is not b
+            assert pool.get_stats()['in_use'] == 2
+
+    def test_busy_pool_times_out(self, pool):
+        mgr = FakeManager()
+        with pool.session(mgr), pool.session(mgr):
+            with pytest.raises(TimeoutError):
+                with pool.session(mgr):
+                    pass
+
+    def test_waiter_gets_released_engine(self, pool):
+        mgr = FakeManager()
+        pool.wait_seconds = 5
+        got = []
+        with pool.session(mgr) as a, pool.session(mgr):
+            waiter = threading.Thread(target=lambda: got.append(pool.session(mgr).__enter__()))
+            waiter.start()
+        waiter.join(timeout=5)
+        assert got and got[0] is a
+
+    def test_new_dataset_version_reloads(self, pool):
+        mgr = FakeManager("v1")
+        with pool.session(mgr) as old:
+            pass
+        mgr.version = "v2"
+        with pool.session(mgr) as new:
+            pass
+        assert new is not old
+        old.close.assert_called_once()
+        assert pool.get_stats()['dataset_version'] == "v2"
+
+    def test_engine_in_use_during_version_change_is_closed(self, pool):
+        mgr = FakeManager("v1")
+        with pool.session(mgr) as old:
+            mgr.version = "v2"
+            with pool.session(mgr):
+                pass
+        old.close.assert_called_once()
+        assert pool.get_stats()['idle'] == 1
+
+    def test_failed_session_is_not_returned(self, pool):
+        mgr = FakeManager()
+        with pytest.raises(RuntimeError):
+            with pool.session(mgr) as broken:
+                raise RuntimeError("boom")
+        broken.close.assert_called_once()
+        with pool.session(mgr) as engine:
+            assert engine is not broken
@@ -0,0 +1,150 @@
+"""
+Tests for the Shapley decomposition engine and its use in CausalAnalysisEngine.
+"""
+
+from itertools import permutations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.causal_analysis import CausalAnalysisEngine, DecompositionMethod
+from src.analytics.shapley import (
+    coalition_masks,
+    exact_shapley,
+    factor_value_function,
+    group_value_function,
+    sampled_shapley,
+)
+
+
+def _brute_force(value_fn, n):
+    """Average marginal contribution over every ordering, one coalition at a time."""
+    phi = np.zeros(n)
+    orders = list(permutations(range(n)))
+    for order in orders:
+        mask = np.zeros(n, dtype=bool)
+        previous = value_fn(mask[None, :])[0]
+        for player in order:
+            mask[player] = True
+            current = value_fn(mask[None, :])[0]
+            phi[player] += current - previous
+            previous = current
+    return phi / len(orders)
+
+
+def _roas(values):
+    ctr, cvr, aov, cpm = values.T
+    return ctr * cvr * aov / cpm
+
+
+BEFORE = np.array([0.02, 0.05, 80.0, 0.010])
+AFTER = np.array([0.025, 0.04, 95.0, 0.012])
+
+
+class TestShapleyEngine:
+
+    def test_coalition_masks_follow_bit_order(self):
+        masks = coalition_masks(3)
+        assert masks.shape == (8, 3)
+        assert masks[5].tolist() == [True, False, True]
+
+    def test_exact_matches_brute_force_and_is_efficient(self):
+        value_fn = factor_value_function(BEFORE, AFTER, _roas)
+        phi = exact_shapley(value_fn, 4)
+
+        np.testing.assert_allclose(phi, _brute_force(value_fn, 4))
+        assert phi.sum() == pytest.approx(_roas(AFTER[None, :])[0] - _roas(BEFORE[None, :])[0])
+
+    def test_sampled_approximates_exact(self):
+        value_fn = factor_value_function(BEFORE, AFTER, _roas)
+        exact = exact_shapley(value_fn, 4)
+        sampled = sampled_shapley(value_fn, 4, n_permutations=4000, seed=1)
+
+        assert sampled.sum() == pytest.approx(exact.sum())
+        np.testing.assert_allclose(sampled, exact, atol=0.05 * np.abs(exact).max())
+
+    def test_group_value_function_moves_group_totals(self):
+        before = np.array([[10.0, 100.0], [30.0, 100.0]])
+        after = np.array([[40.0, 100.0], [30.0, 200.0]])
+        value_fn = group_value_function(before, after, lambda t: t[:, 0] / t[:, 1])
+
+        np.testing.assert_allclose(value_fn(coalition_masks(2)), [0.2, 0.35, 40 / 300, 70 / 300])
+
+
+def _period(spend, revenue, clicks, impressions, conversions, channels):
+    return pd.DataFrame({
+        'Channel': channels,
+        'Spend': spend,
+        'Revenue': revenue,
+        'Clicks': clicks,
+        'Impressions': impressions,
+        'Conversions': conversions,
+    })
+
+
+@pytest.fixture
+def periods():
+    channels = ['Search', 'Social', 'Video', 'Search', 'Social', 'Video']
+    before = _period(
+        [100, 200, 300, 120, 180, 310], [400, 500, 600, 450, 520, 580],
+        [50, 80, 40, 55, 85, 42], [1000, 4000, 8000, 1100, 4200, 7900], [5, 6, 2, 6, 7, 3], channels,
+    )
+    after = _period(
+        [150, 150, 300, 160, 140, 320], [700, 380, 620, 720, 400, 600],
+        [70, 60, 45, 72, 58, 47], [1300, 3500, 8100, 1250, 3600, 8200], [9, 4, 3, 8, 5, 3], channels,
+    )
+    return before, after
+
+
+class TestCausalShapley:
+
+    @pytest.mark.parametrize("metric", ["ROAS", "CPA", "CTR", "CVR"])
+    def test_components_add_up_to_metric_change(self, periods, metric):
+        before, after = periods
+        engine = CausalAnalysisEngine()
+
+        contributions = engine._decompose_metric(before, after, metric, DecompositionMethod.SHAPLEY)
+        change = engine._calculate_metric(after, metric) - engine._calculate_metric(before, metric)
+
+        assert sum(c.absolute_change for c in contributions) == pytest.approx(change)
+        assert sum(c.percentage_contribution for c in contributions) == pytest.approx(100)
+
+    def test_channel_attribution_adds_up_without_filtering(self, periods):
+        before, after = periods
+        engine = CausalAnalysisEngine()
+
+        attribution = engine._calculate_channel_attribution(before, after, 'ROAS')
+        change = engine._calculate_metric(after, 'ROAS') - engine._calculate_metric(before, 'ROAS')
+
+        assert set(attribution) == {'Search', 'Social', 'Video'}
+        assert sum(attribution.values()) == pytest.approx(change)
+        assert attribution['Search'] > 0 > attribution['Social']
+
+    def test_metric_column_is_attributed_as_its_mean(self, periods):
+        before, after = periods
+        attribution = CausalAnalysisEngine()._calculate_channel_attribution(before, after, 'Spend')
+
+        # Mean spend over six rows: each channel moves it by its spend delta / 6
+        assert attribution == pytest.approx({'Search': 15.0, 'Social': -15.0, 'Video': 10 / 6})
+
+    def test_sampled_attribution_for_many_groups(self):
+        rng = np.random.default_rng(5)
+        channels = [f"ch{i}" for i in range(16)]
+        before = _period(*(rng.uniform(50, 500, 16) for _ in range(5)), channels)
+        after = _period(*(rng.uniform(50, 500, 16) for _ in range(5)), channels)
+        engine = CausalAnalysisEngine(shapley_max_exact=8, shapley_permutations=500)
+
+        attribution = engine._calculate_channel_attribution(before, after, 'CPA')
+        change = engine._calculate_metric(after, 'CPA') - engine._calculate_metric(before, 'CPA')
+
+        assert len(attribution) == 16
+        assert sum(attribution.values()) == pytest.approx(change)
+
+    def test_zero_factor_falls_back_to_formula_decomposition(self, periods):
+        before, after = periods
+        before = before.assign(Conversions=0)
+
+        contributions = CausalAnalysisEngine()._shapley_decomposition(before, after, 'ROAS')
+
+        assert "Spend Level" in {c.component for c in contributions}
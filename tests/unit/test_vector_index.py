@@ -0,0 +1,141 @@
+"""
+Tests for incremental FAISS index updates, index types and the chunk metadata store.
+"""
+
+import faiss
+import numpy as np
+import pytest
+
+from src.knowledge.chunk_store import ChunkStore
+from src.knowledge.embedding_cache import CachedEmbedder
+from src.knowledge.faiss_index import benchmark_index_types, create_index, index_type_of
+from src.knowledge.vector_store import (
+    KeywordRetriever,
+    VectorRetriever,
+    VectorStoreBuilder,
+    VectorStoreConfig,
+)
+from src.utils.performance import hash_embedding
+
+
+class HashProvider:
+    """Offline provider that records which texts it embedded."""
+
+    name = "test:hash"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts, batch_size=None):
+        self.calls.append(list(texts))
+        return hash_embedding(list(texts), dim=32)
+
+
+def _doc(url, chunks, source="web"):
+    return {"success": True, "source": source, "url": url, "title": url, "chunks": chunks}
+
+
+@pytest.fixture
+def provider():
+    return HashProvider()
+
+
+def _config(tmp_path, index_type="flat"):
+    return VectorStoreConfig(
+        index_path=tmp_path / "faiss.index", metadata_path=tmp_path / "metadata.json", index_type=index_type
+    )
+
+
+def _retriever(config, provider):
+    return VectorRetriever(config=config, embedder=CachedEmbedder(provider))
+
+
+class TestIncrementalBuild:
+
+    def test_rebuild_only_indexes_changed_chunks(self, tmp_path, provider):
+        config = _config(tmp_path)
+        builder = VectorStoreBuilder(config=config, embedder=CachedEmbedder(provider))
+        builder.build_from_documents([_doc("a", ["meta budget pacing", "tiktok creative"]), _doc("b", ["linkedin leads"])])
+        before = builder.store.get_many(range(len(builder.store)))
+
+        provider.calls.clear()
+        builder.build_from_documents([_doc("a", ["meta budget pacing", "tiktok creative refresh"])])
+
+        assert provider.calls == [["tiktok creative refresh"]]
+        assert builder.store.count() == 2
+        assert faiss.read_index(str(config.index_path)).ntotal == 2
+        after = builder.store.get_many(range(len(builder.store)))
+        # The unchanged chunk keeps its id; replaced and dropped chunks are gone
+        assert set(before) & set(after) == {i for i, r in before.items() if r["text"] == "meta budget pacing"}
+        assert {r["text"] for r in builder.load_metadata()} == {"meta budget pacing", "tiktok creative refresh"}
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+    def test_add_and_delete_documents(self, tmp_path, provider, index_type):
+        config = _config(tmp_path, index_type)
+        builder = VectorStoreBuilder(config=config, embedder=CachedEmbedder(provider))
+        builder.build_from_documents([_doc("a", ["meta budget pacing"]), _doc("b", ["linkedin leads"])])
+
+        ids = builder.add_documents([_doc("c", ["youtube reach campaign"])])
+        assert builder.delete_documents(["b"]) == 1
+
+        retriever = _retriever(config, provider)
+        assert isinstance(retriever.metadata, ChunkStore)
+        assert index_type_of(retriever.index) == index_type
+        results = retriever.search("linkedin leads", top_k=5)
+        assert {r["metadata"]["url"] for r in results} == {"a", "c"}
+        assert retriever.search("youtube reach campaign", top_k=1)[0]["text"] == "youtube reach campaign"
+        assert builder.store.get_many(ids)[ids[0]]["url"] == "c"
+
+    def test_index_type_change_forces_rebuild(self, tmp_path, provider):
+        VectorStoreBuilder(config=_config(tmp_path), embedder=CachedEmbedder(provider)).build_from_documents(
+            [_doc("a", ["meta budget pacing"])]
+        )
+        builder = VectorStoreBuilder(config=_config(tmp_path, "hnsw"), embedder=CachedEmbedder(provider))
+        builder.build_from_documents([_doc("a", ["meta budget pacing"])])
+
+        assert index_type_of(faiss.read_index(str(tmp_path / "faiss.index"))) == "hnsw"
+
+
+class TestRetrieversOverChunkStore:
+
+    def test_filters_and_keyword_search_skip_deleted_chunks(self, tmp_path, provider):
+        config = _config(tmp_path)
+        builder = VectorStoreBuilder(config=config, embedder=CachedEmbedder(provider))
+        builder.build_from_documents([
+            _doc("a", ["retargeting budget tips"], source="pdf"),
+            _doc("b", ["retargeting audience"], source="pdf"),
+            _doc("c", ["retargeting creative"], source="web"),
+        ])
+        builder.delete_documents(["a"])
+
+        retriever = _retriever(config, provider)
+        results = retriever.search("retargeting", top_k=5, metadata_filters={"source": "pdf"})
+        assert [r["metadata"]["url"] for r in results] == ["b"]
+        assert retriever.filter_index.mask({"source": ["pdf", "web"]}).sum() == 2
+
+        keyword = KeywordRetriever(config=config)
+        assert {r["metadata"]["url"] for r in keyword.search("retargeting", top_k=5)} == {"b", "c"}
+
+
+class TestIndexTypes:
+
+    @pytest.fixture
+    def vectors(self):
+        rng = np.random.default_rng(3)
+        vectors = rng.standard_normal((600, 32)).astype("float32")
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def test_ivfpq_trains_or_falls_back_to_flat(self, vectors):
+        assert index_type_of(create_index("ivfpq", vectors)) == "ivfpq"
+        assert index_type_of(create_index("ivfpq", vectors[:50])) == "flat"
+        with pytest.raises(ValueError):
+            create_index("annoy", vectors)
+
+    def test_benchmark_reports_recall_against_exact_search(self, vectors):
+        results = benchmark_index_types(vectors[:500], vectors[500:520], k=5)
+
+        by_type = {r["index_type"]: r for r in results}
+        assert set(by_type) == {"flat", "hnsw", "ivfpq"}
+        assert by_type["flat"]["recall"] == 1.0
+        assert all(0 < r["recall"] <= 1 and r["p95_ms"] >= r["p50_ms"] for r in results)